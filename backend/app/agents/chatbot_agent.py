@@ -3,6 +3,10 @@ import json
 import re
 from typing import Optional, Tuple
 from app.core.openai_client import get_openai_client, get_default_gpt_model
+from app.core.chat_stream import ChatCompletion, create_chat_completion
+from app.core.io_steps import SupabaseQuery, adrive_steps, drive_steps
+from app.utils.context_gatherer import ContextGatherer
+from app.utils.prompt_budget import INTENT_PRIORITIES, PromptBudget, count_tokens, message_tokens
 from app.agents.youtube_intent_classifier import process_video_query
 from app.agents.web_crawler_agent import get_web_enhanced_response
 from dotenv import load_dotenv
@@ -37,6 +41,8 @@ from app.utils.calendar_grade_scope import (
     should_hide_staff_only_calendar_events,
     sanitize_calendar_title_for_display,
 )
+from app.utils.classroom_batch_loader import fetch_rows_in, group_rows
+from app.utils.intent_router import CANONICAL_INTENT_IDS, classify_query, get_intent_router
 
 # Note: rapidfuzz is optional, we'll handle it gracefully
 try:
@@ -184,43 +190,47 @@ def get_student_coursework_data(student_user_id: str, student_email: str = None,
                     if cw_id:
                         coursework_ids_from_submissions.add(cw_id)
         
-        # If no submissions found, try alternative: get coursework from courses synced by this student
-        # (when student syncs, coursework is linked to courses)
-        if not coursework_ids_from_submissions:
+        _coursework_columns = (
+            'id, course_id, coursework_id, title, description, due_date, due_time, state, alternate_link, max_points, work_type'
+        )
+        coursework_rows = []
+
+        if coursework_ids_from_submissions:
+            # Get coursework details for student's coursework only (chunked in_() — a student can
+            # have hundreds of submissions, which overflows a single PostgREST URL)
+            coursework_rows = fetch_rows_in(
+                supabase, 'google_classroom_coursework', _coursework_columns,
+                'id', list(coursework_ids_from_submissions),
+                order='due_date', desc=False, limit=limit_coursework or 100,
+            )
+        else:
+            # If no submissions found, try alternative: get coursework from courses synced by this student
+            # (when student syncs, coursework is linked to courses)
             print(f"[Chatbot] No submissions found, trying to get coursework from student-synced courses...")
             # Get courses synced by this student (user_id in google_classroom_courses)
             student_courses_result = supabase.table('google_classroom_courses').select(
                 'id'
             ).eq('user_id', student_user_id).execute()
-            
+
             if student_courses_result.data:
                 student_course_ids = [c.get('id') for c in student_courses_result.data]
-                # Get coursework for these courses
-                coursework_from_student = supabase.table('google_classroom_coursework').select(
-                    'id'
-                ).in_('course_id', student_course_ids).execute()
-                
-                if coursework_from_student.data:
-                    coursework_ids_from_submissions = set([cw.get('id') for cw in coursework_from_student.data])
-                    print(f"[Chatbot] Found {len(coursework_ids_from_submissions)} coursework from student-synced courses")
-        
-        if not coursework_ids_from_submissions:
+                # Fetch coursework details for these courses directly (no separate id lookup round-trip)
+                coursework_rows = fetch_rows_in(
+                    supabase, 'google_classroom_coursework', _coursework_columns,
+                    'course_id', student_course_ids,
+                    order='due_date', desc=False, limit=limit_coursework or 100,
+                )
+                if coursework_rows:
+                    print(f"[Chatbot] Found {len(coursework_rows)} coursework from student-synced courses")
+
+        if not coursework_rows:
             print(f"[Chatbot] No coursework found for this student")
             return {"classroom_data": []}
-        
-        # Get coursework details for student's coursework only
-        coursework_result = supabase.table('google_classroom_coursework').select(
-            'id, course_id, coursework_id, title, description, due_date, due_time, state, alternate_link, max_points, work_type'
-        ).in_('id', list(coursework_ids_from_submissions)).order('due_date', desc=False).limit(limit_coursework or 100).execute()
-        
-        if not coursework_result.data:
-            print(f"[Chatbot] No coursework details found")
-            return {"classroom_data": []}
-        
-        print(f"[Chatbot] Found {len(coursework_result.data)} coursework items for this student")
+
+        print(f"[Chatbot] Found {len(coursework_rows)} coursework items for this student")
         
         # Get course IDs to fetch course names
-        course_ids = list(set([cw.get('course_id') for cw in coursework_result.data if cw.get('course_id')]))
+        course_ids = list(set([cw.get('course_id') for cw in coursework_rows if cw.get('course_id')]))
         courses_map = {}
         if course_ids:
             courses_result = supabase.table('google_classroom_courses').select(
@@ -288,7 +298,7 @@ def get_student_coursework_data(student_user_id: str, student_email: str = None,
         
         # Format coursework with course info (only include courses that passed grade filter)
         coursework_list = []
-        for cw in coursework_result.data:
+        for cw in coursework_rows:
             course_id = cw.get('course_id')
             course = courses_map.get(course_id) if course_id else None
             
@@ -466,86 +476,116 @@ def get_admin_data(user_email: str = None,
             courses = []
         
         print(f"[Chatbot] Found {len(courses)} courses in Supabase")
-        
+
+        # Batched relation loads: one in_() query per relation for ALL courses, grouped in memory
+        # (previously one query per course per relation — N+1 that grew with course count).
+        # Per-course caps are bounded in SQL via limit_per_value, not trimmed after loading everything.
+        course_ids = [c.get('id') for c in courses if c.get('id')]
+        teachers_by_course = {}
+        students_by_course = {}
+        coursework_by_course = {}
+        announcements_by_course = {}
+        submissions_by_course = {}
+
+        if course_ids and load_teachers:
+            teachers_by_course = group_rows(
+                fetch_rows_in(supabase, 'google_classroom_teachers', 'course_id, user_id, course_user_id, profile',
+                              'course_id', course_ids, limit_per_value=limit_teachers),
+                'course_id', limit_per_key=limit_teachers, key_fn=str)
+
+        if course_ids and load_students:
+            students_by_course = group_rows(
+                fetch_rows_in(supabase, 'google_classroom_students', 'course_id, user_id, course_user_id, profile',
+                              'course_id', course_ids, limit_per_value=limit_students),
+                'course_id', limit_per_key=limit_students, key_fn=str)
+
+        if course_ids and load_coursework:
+            coursework_by_course = group_rows(
+                fetch_rows_in(supabase, 'google_classroom_coursework',
+                              'id, course_id, coursework_id, title, description, due_date, due_time, state, alternate_link',
+                              'course_id', course_ids, order='due_date', desc=False, limit_per_value=limit_coursework),
+                'course_id', limit_per_key=limit_coursework, key_fn=str)
+
+        if course_ids and load_announcements:
+            # SQL-level filtering for announcements by date range if provided (CRITICAL for token reduction)
+            _ann_configure = None
+            # Filter by date ranges at SQL level (cost optimization - reduces tokens significantly)
+            if announcement_date_ranges and len(announcement_date_ranges) > 0:
+                # Find the earliest start time and latest end time to create a bounding date range
+                earliest_start = min(date_start for date_start, date_end in announcement_date_ranges)
+                latest_end = max(date_end for date_start, date_end in announcement_date_ranges)
+                
+                # Filter at SQL level using date range (reduces data fetched dramatically)
+                # Convert datetime to ISO string for Supabase query (ensure UTC timezone format)
+                # Format: 'YYYY-MM-DDTHH:MM:SS+00:00' or 'YYYY-MM-DDTHH:MM:SSZ'
+                if earliest_start.tzinfo:
+                    earliest_start_iso = earliest_start.isoformat().replace('+00:00', 'Z')
+                else:
+                    earliest_start_iso = earliest_start.isoformat() + 'Z'
+                
+                if latest_end.tzinfo:
+                    latest_end_iso = latest_end.isoformat().replace('+00:00', 'Z')
+                else:
+                    latest_end_iso = latest_end.isoformat() + 'Z'
+                
+                print(f"[Chatbot] SQL filtering by date range: {earliest_start.date()} to {latest_end.date()} ({earliest_start_iso} to {latest_end_iso})")
+                
+                # SQL-level date filtering: only fetch announcements in the date range
+                # Supabase PostgREST accepts ISO 8601 datetime strings for .gte() and .lte()
+                _ann_configure = lambda q: q.gte('update_time', earliest_start_iso).lte('update_time', latest_end_iso)
+
+                # Per-course cap after SQL filtering (much smaller dataset)
+                _ann_limit = limit_announcements * 2 if limit_announcements else 20  # 2x to account for exact date matching
+            else:
+                # No date filtering, just order and cap per course
+                _ann_limit = limit_announcements if limit_announcements else 10  # Default limit when no date filter
+
+            announcements_by_course = group_rows(
+                fetch_rows_in(supabase, 'google_classroom_announcements', 'course_id, text, update_time, alternate_link',
+                              'course_id', course_ids, order='update_time', desc=True, configure=_ann_configure,
+                              limit_per_value=_ann_limit),
+                'course_id', limit_per_key=_ann_limit, key_fn=str)
+
+        if courses and load_submissions:
+            # DWD stores google_classroom_submissions.course_id as the Google Classroom API
+            # course id (google_classroom_courses.course_id), not our row UUID (google_classroom_courses.id).
+            _google_course_ids = [str(c.get('course_id')) for c in courses if c.get('course_id') is not None]
+            try:
+                # Large limits = completion reports — avoid ordering by recency (drops older rows);
+                # order by id there so range() paging stays stable
+                _by_recency = bool(limit_submissions) and limit_submissions < 400
+                submissions_by_course = group_rows(
+                    fetch_rows_in(supabase, 'google_classroom_submissions',
+                                  'id, course_id, coursework_id, user_id, state, assigned_grade, late, coursework_id_google',
+                                  'course_id', _google_course_ids,
+                                  order='created_at' if _by_recency else 'id', desc=_by_recency,
+                                  limit_per_value=limit_submissions or None),
+                    'course_id', limit_per_key=limit_submissions or None, key_fn=str)
+            except Exception as e:
+                print(f"[Chatbot] Error fetching submissions for {len(_google_course_ids)} course(s): {e}")
+
+        print(
+            f"[Chatbot] Batched classroom loads for {len(course_ids)} course(s): "
+            f"teachers={sum(len(v) for v in teachers_by_course.values())}, "
+            f"students={sum(len(v) for v in students_by_course.values())}, "
+            f"coursework={sum(len(v) for v in coursework_by_course.values())}, "
+            f"announcements={sum(len(v) for v in announcements_by_course.values())}, "
+            f"submissions={sum(len(v) for v in submissions_by_course.values())}"
+        )
+
         # Format classroom data with nested relationships (only load what's needed based on query intent)
         formatted_classroom_data = []
         for course in courses:
             course_id = course.get('id')  # UUID of course in our DB
-            
-            teachers = []
-            students = []
-            coursework_list = []
+            _course_key = str(course_id)
+
+            teachers = teachers_by_course.get(_course_key, [])
+            students = students_by_course.get(_course_key, [])
+            coursework_list = coursework_by_course.get(_course_key, [])
             announcements = []
-            
-            # Only query relationships that are needed (optimize for speed and cost)
-            if load_teachers:
-                teachers_query = supabase.table('google_classroom_teachers').select('user_id, course_user_id, profile').eq('course_id', course_id)
-                if limit_teachers:
-                    teachers_query = teachers_query.limit(limit_teachers)
-                teachers_result = teachers_query.execute()
-                teachers = teachers_result.data if teachers_result.data else []
-            
-            if load_students:
-                students_query = supabase.table('google_classroom_students').select('user_id, course_user_id, profile').eq('course_id', course_id)
-                if limit_students:
-                    students_query = students_query.limit(limit_students)
-                students_result = students_query.execute()
-                students = students_result.data if students_result.data else []
-            
-            if load_coursework:
-                coursework_query = supabase.table('google_classroom_coursework').select(
-                    'id, coursework_id, title, description, due_date, due_time, state, alternate_link'
-                ).eq('course_id', course_id).order('due_date', desc=False)
-                if limit_coursework:
-                    coursework_query = coursework_query.limit(limit_coursework)
-                coursework_result = coursework_query.execute()
-                coursework_list = coursework_result.data if coursework_result.data else []
-            
+
             if load_announcements:
-                # SQL-level filtering for announcements by date range if provided (CRITICAL for token reduction)
-                announcements_query = supabase.table('google_classroom_announcements').select('text, update_time, alternate_link').eq('course_id', course_id)
-                
-                # Filter by date ranges at SQL level (cost optimization - reduces tokens significantly)
-                if announcement_date_ranges and len(announcement_date_ranges) > 0:
-                    # Find the earliest start time and latest end time to create a bounding date range
-                    earliest_start = min(date_start for date_start, date_end in announcement_date_ranges)
-                    latest_end = max(date_end for date_start, date_end in announcement_date_ranges)
-                    
-                    # Filter at SQL level using date range (reduces data fetched dramatically)
-                    # Convert datetime to ISO string for Supabase query (ensure UTC timezone format)
-                    # Format: 'YYYY-MM-DDTHH:MM:SS+00:00' or 'YYYY-MM-DDTHH:MM:SSZ'
-                    if earliest_start.tzinfo:
-                        earliest_start_iso = earliest_start.isoformat().replace('+00:00', 'Z')
-                    else:
-                        earliest_start_iso = earliest_start.isoformat() + 'Z'
-                    
-                    if latest_end.tzinfo:
-                        latest_end_iso = latest_end.isoformat().replace('+00:00', 'Z')
-                    else:
-                        latest_end_iso = latest_end.isoformat() + 'Z'
-                    
-                    print(f"[Chatbot] SQL filtering by date range: {earliest_start.date()} to {latest_end.date()} ({earliest_start_iso} to {latest_end_iso})")
-                    
-                    # SQL-level date filtering: only fetch announcements in the date range
-                    # Supabase PostgREST accepts ISO 8601 datetime strings for .gte() and .lte()
-                    announcements_query = announcements_query.gte('update_time', earliest_start_iso).lte('update_time', latest_end_iso)
-                    announcements_query = announcements_query.order('update_time', desc=True)
-                    
-                    # Apply limit after SQL filtering (much smaller dataset)
-                    if limit_announcements:
-                        announcements_query = announcements_query.limit(limit_announcements * 2)  # Get 2x to account for exact date matching
-                    else:
-                        announcements_query = announcements_query.limit(20)  # Default limit
-                else:
-                    # No date filtering, just order and limit
-                    announcements_query = announcements_query.order('update_time', desc=True)
-                    if limit_announcements:
-                        announcements_query = announcements_query.limit(limit_announcements)
-                    else:
-                        announcements_query = announcements_query.limit(10)  # Default limit when no date filter
-                
-                announcements_result = announcements_query.execute()
-                announcements = announcements_result.data if announcements_result.data else []
+                announcements = announcements_by_course.get(_course_key, [])
                 print(f"[Chatbot] Fetched {len(announcements)} announcements from SQL (after SQL-level date filtering) for course {course.get('name', '')}")
                 
                 # Final exact date matching in Python (on much smaller dataset now)
@@ -624,19 +664,7 @@ def get_admin_data(user_email: str = None,
                         )
                     else:
                         _sub_course_key = str(_google_cid)
-                        submissions_query = supabase.table('google_classroom_submissions').select(
-                            'id, coursework_id, user_id, state, assigned_grade, late, coursework_id_google'
-                        ).eq('course_id', _sub_course_key)
-                        
-                        if limit_submissions:
-                            # Large limits = completion reports — avoid ordering by recency (drops older rows)
-                            if limit_submissions >= 400:
-                                submissions_query = submissions_query.limit(limit_submissions)
-                            else:
-                                submissions_query = submissions_query.order('created_at', desc=True).limit(limit_submissions)
-                        
-                        submissions_result = submissions_query.execute()
-                        submissions_rows = submissions_result.data or []
+                        submissions_rows = submissions_by_course.get(_sub_course_key, [])
                         print(
                             f"[Chatbot] Submissions SQL: course '{course.get('name', '')}' "
                             f"google_course_id={_sub_course_key} → {len(submissions_rows)} row(s)"
@@ -987,10 +1015,124 @@ def is_brief_social_acknowledgment(query: str) -> bool:
     return any(re.match(p, q, re.IGNORECASE) for p in patterns)
 
 
+_CANONICAL_INTENT_SYSTEM_PROMPT = "You are Prakriti School's official AI assistant chatbot. Be warm, friendly, and personal in your responses. Always contextualize your responses specifically for Prakriti School, emphasizing our progressive, experiential approach and 'learning for happiness' philosophy. Use a conversational, encouraging tone and address users by their first name with appropriate titles (Sir/Madam for teachers and parents). Always provide complete, comprehensive responses with proper Markdown formatting (**bold**, *italic*, ### headings, bullet points). Make sure to fully answer the user's question with all relevant details about Prakriti School."
+
+# Official answers for the canonical FAQ intents (phrases live in app/utils/intent_router.py)
+_CANONICAL_INTENT_ANSWERS = {
+    "school_type": {
+        "answer": 'Prakriti is an alternative/progressive K–12 school in Noida/Greater Noida focusing on "learning for happiness" through deep experiential education.',
+        "prompt": "A user asked about the type of school Prakriti is. Here is the official answer: {answer}\n"
+                  "Please explain this in your own words, elaborate, or summarize as needed.",
+    },
+    "teaching_philosophy": {
+        "answer": 'The school follows a compassionate, learner-centric model based on reconnecting with inner nature ("prakriti"), promoting joy, self-expression, and holistic development.',
+        "prompt": "A user asked about the teaching philosophy at Prakriti. Here is the official answer: {answer}\n"
+                  "Please explain this in your own words, elaborate, or summarize as needed.",
+    },
+    "igcse_subjects": {
+        "answer": 'IGCSE (Grades 9–10) covers core subjects. For AS/A Level (Grades 11–12), available subjects include Design & Tech, History, Computer Science, Enterprise, Art & Design, Physics, Chemistry, Biology, Combined Sciences, English First & Second Language, French, and Math.',
+        "prompt": "A user asked about the subjects available for IGCSE and AS/A Level. Here is the official answer: {answer}\n"
+                  "Please explain this in your own words, elaborate, or summarize as needed.",
+    },
+    "special_needs": {
+        "answer": 'Prakriti runs a Bridge Programme with an inclusive curriculum. Children with diverse needs learn together. Special educators, therapists, and parent support systems are in place.',
+        "prompt": "A user asked about support for learners with special needs. Here is the official answer: {answer}\n"
+                  "Please explain this in your own words, elaborate, or summarize as needed.",
+    },
+    "enrichment_activities": {
+        "answer": 'Prakriti integrates sports, visual & performing arts, music, theater, STEM/design labs, farm outings, meditation/mindfulness, and maker projects across all grades.',
+        "prompt": "A user asked about sports, arts, and enrichment activities at Prakriti. Here is the official answer: {answer}\n"
+                  "Please explain this in your own words, elaborate, or summarize as needed.",
+    },
+    "fees": {
+        "answer": (
+            '(2024–25 fee structure)\n'
+            '| Grade | Monthly Fee (₹) | Security Deposit (₹, refundable) |\n'
+            '|---|---|---|\n'
+            '| Pre-Nursery–KG | 21,000 | 60,000 |\n'
+            '| Grade I–V | 25,400 | 75,000 |\n'
+            '| Grade VI–VIII | 28,000 | 90,000 |\n'
+            '| Grade IX | 31,200 | 100,000 |\n'
+            '| Grade X | 32,400 | 100,000 |\n'
+            '| Grade XI–XII | 35,000 | 100,000 |\n'
+            '| Admission charges (one-time, non-refundable) | – | 125,000'
+        ),
+        "prompt": "A user asked about the fees for different grades. Here is the official answer (including a table):\n{answer}\n"
+                  "Please explain this in your own words, summarize the fee structure, and mention the admission charges.",
+    },
+    "location": {
+        "answer": 'Prakriti is located on the Noida Expressway in Greater Noida, NCR.',
+        "prompt": "A user asked about the location of Prakriti School. Here is the official answer: {answer}\n"
+                  "Please explain this in your own words, elaborate, or summarize as needed.",
+        # Google Maps embed URL for Prakriti School
+        "attachment": {"type": "map", "url": "https://www.google.com/maps/embed?pb=!1m18!1m12!1m3!1d3502.123456789!2d77.123456!3d28.123456!2m3!1f0!2f0!3f0!3m2!1i1024!2i768!4f13.1!3m3!1m2!1s0x390ce4b123456789:0xabcdefabcdefabcd!2sPrakriti%20School!5e0!3m2!1sen!2sin!4v1710000000000!5m2!1sen!2sin"},
+    },
+}
+
+
+def _answer_canonical_intent(intent_id: str, openai_client, user_query: str = "", role: str = None):
+    """
+    Rephrase the official answer for a canonical FAQ intent; falls back to the answer itself.
+    Rephrasings are served from the semantic response cache for repeat / near-duplicate questions.
+    """
+    spec = _CANONICAL_INTENT_ANSWERS[intent_id]
+    canonical_answer = spec["answer"]
+
+    def _rephrase():
+        response = create_chat_completion(
+            openai_client,
+            model=get_default_gpt_model(),
+            messages=[{"role": "system", "content": _CANONICAL_INTENT_SYSTEM_PROMPT},
+                      {"role": "user", "content": spec["prompt"].format(answer=canonical_answer)}],
+            temperature=0.3,
+        )
+        content = response.choices[0].message.content
+        return content.strip() if content else canonical_answer
+
+    try:
+        from app.services.semantic_response_cache import get_response_cache
+        cache = get_response_cache()
+        text = cache.get_or_compute(intent_id, user_query, role, _rephrase)
+    except Exception as e:
+        print(f"[ResponseCache] Cache unavailable, calling LLM directly: {e}")
+        text = _rephrase()
+
+    if spec.get("attachment"):
+        return [text, spec["attachment"]]
+    return text
+
+
+_EMPTY_ADMIN_DATA = {"classroom_data": [], "calendar_data": []}
+
+
+def _detect_holiday_contexts(today_date):
+    """(today, yesterday) holiday contexts from the info sheet (context source 'holidays')"""
+    from datetime import timedelta
+    return detect_holiday_context(today_date), detect_holiday_context(today_date - timedelta(days=1))
+
+
+def _fetch_drive_exam_info(user_query: str, user_profile):
+    """Exam / timetable / teacher lookup through the Drive integrator (context source 'drive')"""
+    import sys
+    sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+    from drive_chatbot_integrator import DriveChatbotIntegrator
+
+    integrator = DriveChatbotIntegrator()
+    return integrator.get_exam_info(user_query, user_profile)
+
+
 def generate_chatbot_response(request):
     """
     Use OpenAI GPT-4 to generate a chatbot response with RAG logic and fuzzy matching.
     """
+    return drive_steps(_chatbot_response_steps(request))
+
+
+def _chatbot_response_steps(request):
+    """
+    The chatbot pipeline as a step generator (app.core.io_steps): the main completion and the
+    Classroom lookups are yielded, so the async route awaits them instead of holding a worker.
+    """
     # 🔍 MODEL LOGGING FOR CHATBOT RESPONSE GENERATION
     import re  # For post-processing regex patterns
     selected_model = get_default_gpt_model()
@@ -998,17 +1140,13 @@ def generate_chatbot_response(request):
     print(f"[ChatbotResponse] 🤖 AI MODEL: {selected_model} (Default: GPT-4o-mini, Fallback: GPT-3.5-turbo)")
     print(f"[ChatbotResponse] 📝 QUERY: {request.message[:100]}{'...' if len(request.message) > 100 else ''}")
 
-    # 🎄 EARLY HOLIDAY DETECTION - Check if today is a holiday for all responses
+    # Web / Drive / Classroom / holiday context is fetched concurrently, each source with its own deadline
+    context = ContextGatherer(label="Chatbot")
+
+    # 🎄 EARLY HOLIDAY DETECTION - Check if today is a holiday for all responses (collected before first use)
     from datetime import datetime, timezone, timedelta
     today_date = datetime.now(timezone.utc).date()
-    global_holiday_context = detect_holiday_context(today_date)
-    yesterday_date = today_date - timedelta(days=1)
-    yesterday_holiday_context = detect_holiday_context(yesterday_date)
-
-    if global_holiday_context:
-        print(f"[ChatbotResponse] 🎄 HOLIDAY DETECTED: {global_holiday_context['message']}")
-    if yesterday_holiday_context:
-        print(f"[ChatbotResponse] 🎄 HOLIDAY DETECTED for yesterday: {yesterday_holiday_context['message']}")
+    context.start('holidays', _detect_holiday_contexts, today_date)
 
     # Capture re module at function start to avoid closure issues in generator expressions
     re_module = re
@@ -1092,47 +1230,14 @@ Once you provide the subject and topic, I'll be able to give you detailed, step-
         query_lower
     ) or is_public_calendar_event_lookup_query(query_lower)
     
-    # Expanded keywords to catch queries like "help with homework", "I need help with my homework", etc.
-    is_coursework_query_early = any(kw in query_lower for kw in [
-        'assignment', 'homework', 'coursework', 'task', 'due', 'submit',
-        'my assignments', 'my coursework', 'my classes', 'my courses', 'my homework',
-        'help with homework', 'help with assignment', 'help with coursework',
-        'need help with homework', 'need help with assignment',
-        'homework help', 'assignment help', 'coursework help'
-    ])
-    is_classroom_related_query_early = any(kw in query_lower for kw in [
-        'assignment', 'homework', 'coursework', 'task', 'due', 'submit', 
-        'announcement', 'announce', 'notice', 'update',
-        'student', 'classmate', 'roster',
-        'teacher', 'instructor', 'faculty',
-        'course', 'class', 'subject',
-        'calendar', 'calender', 'schedule', 'planning', 'school events', 'upcoming event',
-        'my assignments', 'my coursework', 'my classes', 'my courses', 'my homework',
-        'help with homework', 'help with assignment', 'help with coursework',
-        'need help with homework', 'need help with assignment',
-        'homework help', 'assignment help', 'coursework help',
-        'calendar page', 'calender page', 'school events'
-    ])
-    is_home_related_query_early = any(kw in query_lower for kw in [
-        'home', 'homework', 'my assignments', 'my coursework', 'my classes', 'my courses',
-        'help with homework', 'help with assignment'
-    ])
+    # Single-pass classification against the compiled intent registry (app/utils/intent_router.py).
+    # Expanded keywords catch queries like "help with homework", "I need help with my homework", etc.
+    matched_intents = classify_query(query_lower)
+    is_coursework_query_early = 'coursework_early' in matched_intents
+    is_classroom_related_query_early = 'classroom_early' in matched_intents
+    is_home_related_query_early = 'home_early' in matched_intents
     # Faculty / teacher directory — sourced from Google Classroom in this chatbot; guests must sign in first
-    is_faculty_directory_query = any(
-        phrase in query_lower
-        for phrase in (
-            'faculty list',
-            'list of faculty',
-            'list of teachers',
-            'teacher list',
-            'teachers list',
-            'all teachers',
-            'all faculty',
-            'school faculty',
-            'faculty members',
-            'faculty directory',
-        )
-    )
+    is_faculty_directory_query = 'faculty_directory' in matched_intents
 
     # For guest users: Tell them to login first (but public school calendar does not need Classroom)
     # "What does the calendar page cover?" etc. must still work for guests (Year Flow is public).
@@ -1178,11 +1283,10 @@ After you’re signed in, I can help with your school-specific questions and cou
         user_id = user_profile.get('user_id') or user_profile.get('id')  # Try both possible keys
         if user_id:
             try:
-                from supabase_config import get_supabase_client
-                supabase = get_supabase_client()
-                
                 # Check if user has any courses synced (indicates Google Classroom is connected)
-                courses_check = supabase.table('google_classroom_courses').select('id').eq('user_id', user_id).limit(1).execute()
+                courses_check = yield SupabaseQuery(
+                    lambda db: db.table('google_classroom_courses').select('id').eq('user_id', user_id).limit(1)
+                )
                 has_classroom_connected = courses_check.data and len(courses_check.data) > 0
                 
                 if not has_classroom_connected:
@@ -1202,16 +1306,10 @@ For **general** homework help (not tied to your live Classroom list), ask a **sp
                 # Continue anyway - don't block the user if there's an error checking
     
     # Step 0: Check if this is a greeting and provide role-specific greeting (PRIORITY)
-    greeting_patterns = [
-        r'\bhi\b', r'\bhello\b', r'\bhey\b', 
-        r'\bgood morning\b', r'\bgood afternoon\b', r'\bgood evening\b', 
-        r'\bgreetings\b'
-    ]
-    is_greeting = any(re_module.search(pattern, user_query.lower()) for pattern in greeting_patterns)
+    is_greeting = 'greeting' in matched_intents
     
     # Check for "how are you" type questions
-    how_are_you_keywords = ['how are you', 'how are you doing', 'how do you do', 'how\'s it going', 'how\'s everything']
-    is_how_are_you = any(keyword in user_query.lower() for keyword in how_are_you_keywords)
+    is_how_are_you = 'how_are_you' in matched_intents
     
     
     if is_greeting and user_profile:
@@ -1571,292 +1669,22 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
 
     # Step 1: Google holiday-calendar embed (narrow — do NOT use "school calendar" or generic "holidays"
     # or Prakriti Year Flow / calendar_event_data queries will wrongly return this instead of DB events)
-    holiday_embed_keywords = [
-        'holiday calendar',
-        'school holidays',
-        'vacation calendar',
-        'show holidays',
-        'holiday list',
-        'calendar of holidays',
-    ]
-    # Whole-word "holidays" only (avoid matching random substrings)
-    uql = user_query.lower()
-    if any(kw in uql for kw in holiday_embed_keywords) or re.search(r'\bholidays\b', uql):
+    # Whole-word "holidays" only (avoid matching random substrings) — see 'holiday_embed' intent
+    if 'holiday_embed' in matched_intents:
         return {
             'type': 'calendar',
             'url': 'https://calendar.google.com/calendar/embed?src=Y185MWZiZDlkMjE4ZTQ5YzZjY2RhNGEyOTg3ZWI0ZDJkYjcyYTJmYTBlN2JiMTkzYWY2N2U4NjlhY2NiYmRiZWQ3QGdyb3VwLmNhbGVuZGFyLmdvb2dsZS5jb20&ctz=Asia/Kolkata'
         }
 
-    # Step 0.5: Intent-based Q&A for "What kind of school is Prakriti?"
-    school_type_intents = [
-        'what kind of school is prakriti',
-        'what type of school is prakriti',
-        'what is prakriti school',
-        'describe prakriti school',
-        'tell me about prakriti',
-        'prakriti school description',
-        'is prakriti a progressive school',
-        'is prakriti an alternative school',
-        'what grades does prakriti have',
-        'what makes prakriti different',
-        'what is special about prakriti school',
-        'prakriti school overview',
-        'prakriti k12 school',
-        'what does prakriti focus on',
-        'what is the philosophy of prakriti school',
-    ]
-    if any(kw in user_query.lower() for kw in school_type_intents):
-        print(f"[Chatbot] ✅ Matched Step 0.5 intent handler: 'tell me about prakriti' - returning early (skipping web crawler)")
-        canonical_answer = (
-            'Prakriti is an alternative/progressive K–12 school in Noida/Greater Noida focusing on "learning for happiness" through deep experiential education.'
-        )
-        prompt = (
-            f"A user asked about the type of school Prakriti is. Here is the official answer: {canonical_answer}\n"
-            "Please explain this in your own words, elaborate, or summarize as needed."
-        )
-        response = openai_client.chat.completions.create(
-            model=get_default_gpt_model(),
-            messages=[{"role": "system", "content": "You are Prakriti School's official AI assistant chatbot. Be warm, friendly, and personal in your responses. Always contextualize your responses specifically for Prakriti School, emphasizing our progressive, experiential approach and 'learning for happiness' philosophy. Use a conversational, encouraging tone and address users by their first name with appropriate titles (Sir/Madam for teachers and parents). Always provide complete, comprehensive responses with proper Markdown formatting (**bold**, *italic*, ### headings, bullet points). Make sure to fully answer the user's question with all relevant details about Prakriti School."},
-                      {"role": "user", "content": prompt}],
-            temperature=0.3,
-        )
-        content = response.choices[0].message.content
-        return content.strip() if content else canonical_answer
-
-    # Step 0.6: Intent-based Q&A for "What's the teaching philosophy at Prakriti?"
-    teaching_philosophy_intents = [
-        "what's the teaching philosophy at prakriti",
-        "what is prakriti's teaching philosophy",
-        "how does prakriti teach",
-        "what is the teaching style at prakriti",
-        "prakriti school teaching approach",
-        "prakriti education philosophy",
-        "how are students taught at prakriti",
-        "what is the learning model at prakriti",
-        "what is prakriti's approach to education",
-        "what is the classroom environment at prakriti",
-        "prakriti's learning philosophy",
-        "what is the focus of teaching at prakriti",
-        "prakriti school philosophy",
-    ]
-    if any(kw in user_query.lower() for kw in teaching_philosophy_intents):
-        print(f"[Chatbot] ✅ Matched Step 0.6 intent handler: 'teaching philosophy' - returning early (skipping web crawler)")
-        canonical_answer = (
-            'The school follows a compassionate, learner-centric model based on reconnecting with inner nature ("prakriti"), promoting joy, self-expression, and holistic development.'
-        )
-        prompt = (
-            f"A user asked about the teaching philosophy at Prakriti. Here is the official answer: {canonical_answer}\n"
-            "Please explain this in your own words, elaborate, or summarize as needed."
-        )
-        response = openai_client.chat.completions.create(
-            model=get_default_gpt_model(),
-            messages=[{"role": "system", "content": "You are Prakriti School's official AI assistant chatbot. Be warm, friendly, and personal in your responses. Always contextualize your responses specifically for Prakriti School, emphasizing our progressive, experiential approach and 'learning for happiness' philosophy. Use a conversational, encouraging tone and address users by their first name with appropriate titles (Sir/Madam for teachers and parents). Always provide complete, comprehensive responses with proper Markdown formatting (**bold**, *italic*, ### headings, bullet points). Make sure to fully answer the user's question with all relevant details about Prakriti School."},
-                      {"role": "user", "content": prompt}],
-            temperature=0.3,
-        )
-        content = response.choices[0].message.content
-        return content.strip() if content else canonical_answer
-
-    # Step 0.7: Intent-based Q&A for "Which subjects are available for IGCSE and AS/A Level?"
-    igcse_subjects_intents = [
-        "which subjects are available for igcse and as/a level",
-        "igcse subjects",
-        "as level subjects",
-        "a level subjects",
-        "subjects offered igcse",
-        "subjects offered as level",
-        "subjects offered a level",
-        "prakriti igcse subjects",
-        "prakriti as level subjects",
-        "prakriti a level subjects",
-        "what can i study at prakriti",
-        "what are the options for igcse",
-        "what are the options for a level",
-        "what are the options for as level",
-        "prakriti subject list",
-        "prakriti subject options",
-        "subjects for grade 9",
-        "subjects for grade 10",
-        "subjects for grade 11",
-        "subjects for grade 12",
-    ]
-    if any(kw in user_query.lower() for kw in igcse_subjects_intents):
-        canonical_answer = (
-            'IGCSE (Grades 9–10) covers core subjects. For AS/A Level (Grades 11–12), available subjects include Design & Tech, History, Computer Science, Enterprise, Art & Design, Physics, Chemistry, Biology, Combined Sciences, English First & Second Language, French, and Math.'
-        )
-        prompt = (
-            f"A user asked about the subjects available for IGCSE and AS/A Level. Here is the official answer: {canonical_answer}\n"
-            "Please explain this in your own words, elaborate, or summarize as needed."
-        )
-        response = openai_client.chat.completions.create(
-            model=get_default_gpt_model(),
-            messages=[{"role": "system", "content": "You are Prakriti School's official AI assistant chatbot. Be warm, friendly, and personal in your responses. Always contextualize your responses specifically for Prakriti School, emphasizing our progressive, experiential approach and 'learning for happiness' philosophy. Use a conversational, encouraging tone and address users by their first name with appropriate titles (Sir/Madam for teachers and parents). Always provide complete, comprehensive responses with proper Markdown formatting (**bold**, *italic*, ### headings, bullet points). Make sure to fully answer the user's question with all relevant details about Prakriti School."},
-                      {"role": "user", "content": prompt}],
-            temperature=0.3,
-        )
-        content = response.choices[0].message.content
-        return content.strip() if content else canonical_answer
-
-    # Step 0.8: Intent-based Q&A for "How are learners with special needs supported?"
-    special_needs_intents = [
-        "how are learners with special needs supported",
-        "special needs support",
-        "prakriti special needs",
-        "bridge programme",
-        "support for special needs",
-        "inclusive education prakriti",
-        "special educators prakriti",
-        "therapists prakriti",
-        "parent support prakriti",
-        "how does prakriti help special needs",
-        "prakriti inclusion",
-        "prakriti support for disabilities",
-        "prakriti learning support",
-        "prakriti therapy",
-        "prakriti special education",
-    ]
-    if any(kw in user_query.lower() for kw in special_needs_intents):
-        canonical_answer = (
-            'Prakriti runs a Bridge Programme with an inclusive curriculum. Children with diverse needs learn together. Special educators, therapists, and parent support systems are in place.'
-        )
-        prompt = (
-            f"A user asked about support for learners with special needs. Here is the official answer: {canonical_answer}\n"
-            "Please explain this in your own words, elaborate, or summarize as needed."
-        )
-        response = openai_client.chat.completions.create(
-            model=get_default_gpt_model(),
-            messages=[{"role": "system", "content": "You are Prakriti School's official AI assistant chatbot. Be warm, friendly, and personal in your responses. Always contextualize your responses specifically for Prakriti School, emphasizing our progressive, experiential approach and 'learning for happiness' philosophy. Use a conversational, encouraging tone and address users by their first name with appropriate titles (Sir/Madam for teachers and parents). Always provide complete, comprehensive responses with proper Markdown formatting (**bold**, *italic*, ### headings, bullet points). Make sure to fully answer the user's question with all relevant details about Prakriti School."},
-                      {"role": "user", "content": prompt}],
-            temperature=0.3,
-        )
-        content = response.choices[0].message.content
-        return content.strip() if content else canonical_answer
-
-    # Step 0.9: Intent-based Q&A for "What sports, arts, and enrichment activities are available?"
-    enrichment_activities_intents = [
-        "what sports, arts, and enrichment activities are available",
-        "sports at prakriti",
-        "arts at prakriti",
-        "enrichment activities prakriti",
-        "prakriti sports",
-        "prakriti arts",
-        "prakriti enrichment",
-        "activities at prakriti",
-        "prakriti extracurricular",
-        "prakriti co-curricular",
-        "prakriti after school",
-        "prakriti clubs",
-        "prakriti music",
-        "prakriti theater",
-        "prakriti stem",
-        "prakriti design lab",
-        "prakriti mindfulness",
-        "prakriti meditation",
-        "prakriti maker projects",
-        "prakriti farm outings",
-        "prakriti field trips",
-    ]
-    if any(kw in user_query.lower() for kw in enrichment_activities_intents):
-        canonical_answer = (
-            'Prakriti integrates sports, visual & performing arts, music, theater, STEM/design labs, farm outings, meditation/mindfulness, and maker projects across all grades.'
-        )
-        prompt = (
-            f"A user asked about sports, arts, and enrichment activities at Prakriti. Here is the official answer: {canonical_answer}\n"
-            "Please explain this in your own words, elaborate, or summarize as needed."
-        )
-        response = openai_client.chat.completions.create(
-            model=get_default_gpt_model(),
-            messages=[{"role": "system", "content": "You are Prakriti School's official AI assistant chatbot. Be warm, friendly, and personal in your responses. Always contextualize your responses specifically for Prakriti School, emphasizing our progressive, experiential approach and 'learning for happiness' philosophy. Use a conversational, encouraging tone and address users by their first name with appropriate titles (Sir/Madam for teachers and parents). Always provide complete, comprehensive responses with proper Markdown formatting (**bold**, *italic*, ### headings, bullet points). Make sure to fully answer the user's question with all relevant details about Prakriti School."},
-                      {"role": "user", "content": prompt}],
-            temperature=0.3,
-        )
-        content = response.choices[0].message.content
-        return content.strip() if content else canonical_answer
-
-    # Step 0.10: Intent-based Q&A for "What are the fees for different grades?"
-    fees_intents = [
-        "what are the fees for different grades",
-        "prakriti fee structure",
-        "school fees",
-        "What is the school fees",
-        "prakriti fees",
-        "grade wise fees",
-        "admission charges",
-        "fee for nursery",
-        "fee for grade 1",
-        "fee for grade 12",
-        "prakriti admission fee",
-        "prakriti tuition",
-        "prakriti security deposit",
-        "prakriti monthly fee",
-        "prakriti one time charges",
-        "prakriti payment",
-        "prakriti fee breakdown",
-        "prakriti fee details",
-        "prakriti fee for 2024",
-        "prakriti fee for 2025",
-    ]
-    if any(kw in user_query.lower() for kw in fees_intents):
-        canonical_answer = (
-            '(2024–25 fee structure)\n'
-            '| Grade | Monthly Fee (₹) | Security Deposit (₹, refundable) |\n'
-            '|---|---|---|\n'
-            '| Pre-Nursery–KG | 21,000 | 60,000 |\n'
-            '| Grade I–V | 25,400 | 75,000 |\n'
-            '| Grade VI–VIII | 28,000 | 90,000 |\n'
-            '| Grade IX | 31,200 | 100,000 |\n'
-            '| Grade X | 32,400 | 100,000 |\n'
-            '| Grade XI–XII | 35,000 | 100,000 |\n'
-            '| Admission charges (one-time, non-refundable) | – | 125,000'
-        )
-        prompt = (
-            f"A user asked about the fees for different grades. Here is the official answer (including a table):\n{canonical_answer}\n"
-            "Please explain this in your own words, summarize the fee structure, and mention the admission charges."
-        )
-        response = openai_client.chat.completions.create(
-            model=get_default_gpt_model(),
-            messages=[{"role": "system", "content": "You are Prakriti School's official AI assistant chatbot. Be warm, friendly, and personal in your responses. Always contextualize your responses specifically for Prakriti School, emphasizing our progressive, experiential approach and 'learning for happiness' philosophy. Use a conversational, encouraging tone and address users by their first name with appropriate titles (Sir/Madam for teachers and parents). Always provide complete, comprehensive responses with proper Markdown formatting (**bold**, *italic*, ### headings, bullet points). Make sure to fully answer the user's question with all relevant details about Prakriti School."},
-                      {"role": "user", "content": prompt}],
-            temperature=0.3,
-        )
-        content = response.choices[0].message.content
-        return content.strip() if content else canonical_answer
-
-    # Step 0.11: Intent-based Q&A for "Where is Prakriti School located?" with Google Map embed
-    location_intents = [
-        "where is prakriti school located",
-        "prakriti school location",
-        "prakriti address",
-        "prakriti location",
-        "school address",
-        "prakriti map",
-        "how to reach prakriti",
-        "prakriti school directions",
-        "prakriti school google map",
-        "prakriti school route",
-        "prakriti school navigation",
-        "prakriti school in greater noida",
-        "prakriti school on expressway",
-        "prakriti school ncr",
-    ]
-    if any(kw in user_query.lower() for kw in location_intents):
-        canonical_answer = (
-            'Prakriti is located on the Noida Expressway in Greater Noida, NCR.'
-        )
-        prompt = (
-            f"A user asked about the location of Prakriti School. Here is the official answer: {canonical_answer}\n"
-            "Please explain this in your own words, elaborate, or summarize as needed."
-        )
-        response = openai_client.chat.completions.create(
-            model=get_default_gpt_model(),
-            messages=[{"role": "system", "content": "You are Prakriti School's official AI assistant chatbot. Be warm, friendly, and personal in your responses. Always contextualize your responses specifically for Prakriti School, emphasizing our progressive, experiential approach and 'learning for happiness' philosophy. Use a conversational, encouraging tone and address users by their first name with appropriate titles (Sir/Madam for teachers and parents). Always provide complete, comprehensive responses with proper Markdown formatting (**bold**, *italic*, ### headings, bullet points). Make sure to fully answer the user's question with all relevant details about Prakriti School."},
-                      {"role": "user", "content": prompt}],
-            temperature=0.3,
+    # Steps 0.5–0.11: Intent-based Q&A with official canonical answers (school type, teaching
+    # philosophy, IGCSE subjects, special needs, enrichment, fees, location) — returns early
+    canonical_intent = get_intent_router().first_intent(matched_intents, CANONICAL_INTENT_IDS)
+    if canonical_intent:
+        print(f"[Chatbot] ✅ Matched canonical intent handler: '{canonical_intent}' - returning early (skipping web crawler)")
+        return _answer_canonical_intent(
+            canonical_intent, openai_client, user_query,
+            (user_profile.get('role') if user_profile else None),
         )
-        content = response.choices[0].message.content
-        # Google Maps embed URL for Prakriti School
-        map_url = "https://www.google.com/maps/embed?pb=!1m18!1m12!1m3!1d3502.123456789!2d77.123456!3d28.123456!2m3!1f0!2f0!3f0!3m2!1i1024!2i768!4f13.1!3m3!1m2!1s0x390ce4b123456789:0xabcdefabcdefabcd!2sPrakriti%20School!5e0!3m2!1sen!2sin!4v1710000000000!5m2!1sen!2sin"
-        return [content.strip() if content else canonical_answer, {"type": "map", "url": map_url}]
 
     # Step 0.12: YouTube Video Intent Detection (only for clear video requests)
     # Explicit video request keywords - user is asking for a video
@@ -2271,16 +2099,9 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
     ]
     
     if should_use_web_crawling_first:
-        try:
-            print("[Chatbot] Person detail query detected - using web crawler for team page...")
-            web_enhanced_info = get_web_enhanced_response(user_query)
-            if web_enhanced_info:
-                print(f"[Chatbot] Web enhancement found: {len(web_enhanced_info)} characters")
-            else:
-                print("[Chatbot] No web enhancement found")
-        except Exception as e:
-            print(f"[Chatbot] Error in web crawling: {e}")
-            web_enhanced_info = ""
+        # Runs in the background while Drive / Classroom data load; collected before the LLM prompt
+        print("[Chatbot] Person detail query detected - using web crawler for team page...")
+        context.start('web', get_web_enhanced_response, user_query)
     else:
         # For other queries, check if web crawling is beneficial
         # ONLY trigger for Prakriti-specific website content queries, NOT general academic questions
@@ -2361,19 +2182,9 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
             print(f"[Chatbot] ✅ Using cached web data from browser (fast response, no crawling needed)")
             web_enhanced_info = cached_web_data
         else:
-            try:
-                print(f"[Chatbot] ✅ Web crawling triggered for query: '{user_query}'")
-                print("[Chatbot] Getting web-enhanced information...")
-                web_enhanced_info = get_web_enhanced_response(user_query)
-                if web_enhanced_info:
-                    print(f"[Chatbot] ✅ Web enhancement found: {len(web_enhanced_info)} characters")
-                else:
-                    print("[Chatbot] ⚠️ Web enhancement returned empty")
-            except Exception as e:
-                print(f"[Chatbot] ❌ Error in web crawling: {e}")
-                import traceback
-                traceback.print_exc()
-                web_enhanced_info = ""
+            print(f"[Chatbot] ✅ Web crawling triggered for query: '{user_query}'")
+            print("[Chatbot] Getting web-enhanced information (in background)...")
+            context.start('web', get_web_enhanced_response, user_query)
     else:
         print(f"[Chatbot] ⚠️ Web crawling NOT triggered. Query: '{user_query}' | Keywords checked: {web_enhancement_keywords}")
 
@@ -2404,81 +2215,9 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
     if is_exam_query or is_teacher_drive_query or is_teacher_subject_query:
         print(f"[Chatbot] 📚 EXAM QUERY DETECTED: '{user_query}' - using Google Drive integration")
         print(f"[Chatbot] 📊 is_exam_query: {is_exam_query}, exam_keywords: {exam_keywords}")
-        try:
-            # Import drive integration
-            import sys
-            import os
-            sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-            from drive_chatbot_integrator import DriveChatbotIntegrator
-
-            integrator = DriveChatbotIntegrator()
-            print(f"[Chatbot] 🧪 Calling drive integration with query='{user_query}', user_profile={user_profile}")
-            drive_response = integrator.get_exam_info(user_query, user_profile)
-            print(f"[Chatbot] 🧪 Drive integration returned: '{drive_response[:100]}...'")
-            print(f"[Chatbot] 🔍 Drive integration returned: {len(drive_response) if drive_response else 0} characters")
-            if drive_response:
-                print(f"[Chatbot] 📄 Response preview: {drive_response[:100]}...")
-
-            # Check if drive integration returned a "no data" style message (Drive layer already has friendly copy)
-            dr_low = (drive_response or "").lower()
-            drive_looks_like_error = dr_low.startswith("sorry") or dr_low.startswith("i couldn't") or dr_low.startswith("i'm not able")
-            if drive_response and drive_looks_like_error:
-                print(f"[Chatbot] ⚠️ Drive integration returned no data error: {drive_response[:100]}")
-                qtype = (analysis or {}).get("query_type")
-                # Timetable / teacher lookups: always surface Drive's message (do not swap for exam text)
-                if qtype in ("timetable", "teacher", "teacher_subject"):
-                    return drive_response
-                if is_teacher_drive_query:
-                    return drive_response
-                elif is_exam_query:
-                    query_lower = user_query.lower()
-                    is_timetable_ask = (
-                        qtype == "timetable"
-                        or "timetable" in query_lower
-                        or "time table" in query_lower
-                        or "time tabl" in query_lower
-                        or ("time" in query_lower and "tabl" in query_lower)
-                    )
-                    if is_timetable_ask:
-                        return drive_response
-                    return "There are no upcoming exams scheduled at this time."
-                else:
-                    return drive_response
-            elif drive_response and drive_response.startswith("TEACHER_INFO:"):
-                print(f"[Chatbot] 👨‍🏫 Teacher info detected, enhancing with AI model")
-                # Extract the raw teacher info and enhance it with AI
-                teacher_info = drive_response.replace("TEACHER_INFO:", "").strip()
-                print(f"[Chatbot] 📝 Raw teacher info: {teacher_info}")
-
-                # Don't return directly - let it go through AI enhancement
-                # Store it for later use in the main response logic
-                teacher_enhanced_info = teacher_info
-                drive_response = ""  # Clear drive response so it continues to AI
-                print(f"[Chatbot] 🔄 Teacher info stored for AI enhancement")
-            elif drive_response and drive_response.startswith("TEACHER_SUBJECT:"):
-                print(f"[Chatbot] 📚 Teacher subject info detected, enhancing with AI model")
-                # Extract the raw teacher subject info and enhance it with AI
-                teacher_subject_info = drive_response.replace("TEACHER_SUBJECT:", "").strip()
-                print(f"[Chatbot] 📝 Raw teacher subject info: {teacher_subject_info}")
-
-                # Don't return directly - let it go through AI enhancement
-                # Store it for later use in the main response logic
-                teacher_enhanced_info = teacher_subject_info
-                drive_response = ""  # Clear drive response so it continues to AI
-                print(f"[Chatbot] 🔄 Teacher subject info stored for AI enhancement")
-            elif drive_response:
-                print(f"[Chatbot] ✅ Drive integration successful: {len(drive_response)} characters")
-                print(f"[Chatbot] 📤 RETURNING DRIVE RESPONSE NOW: {len(drive_response)} chars")
-                return drive_response
-            else:
-                print(f"[Chatbot] ⚠️ Drive integration returned no results or error: {drive_response[:100] if drive_response else 'None'}")
-                drive_response = ""  # Reset to empty if invalid
-        except Exception as e:
-            print(f"[Chatbot] ❌ Error in drive integration: {e}")
-            import traceback
-            traceback.print_exc()
-            exam_response = ""
-            return f"Sorry, there was an error accessing exam information: {str(e)}"
+        print(f"[Chatbot] 🧪 Calling drive integration with query='{user_query}', user_profile={user_profile}")
+        # Runs alongside the web crawl and the Classroom/Calendar load; collected once the admin load has started
+        context.start('drive', _fetch_drive_exam_info, user_query, user_profile)
 
     # Get admin data for enhanced responses - BUT only if not a person detail query OR web-only query
     # IMPORTANT: Use admin data (synced Google Classroom/Calendar) as REFERENCE for ALL users
@@ -2819,51 +2558,174 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
                         print(f"[Chatbot] Student coursework query detected - querying coursework table directly")
                         # Get student's grade for filtering
                         student_grade = user_profile.get('grade', '') if user_profile else None
-                        admin_data = get_student_coursework_data(user_id, student_email=user_email, limit_coursework=limit_coursework or 20, user_grade=student_grade, work_type_filter=work_type_filter)
+                        context.start('admin', get_student_coursework_data, user_id, student_email=user_email, limit_coursework=limit_coursework or 20, user_grade=student_grade, work_type_filter=work_type_filter)
                         coursework_data_from_direct_query = True
                     else:
                         # Non-student user (e.g., college ID connected) - access by email/user_id without grade filtering
                         print(f"[Chatbot] Coursework query detected for non-student user - accessing by email/user_id (no grade filtering)")
-                        admin_data = get_student_coursework_data(user_id, student_email=user_email, limit_coursework=limit_coursework or 20, user_grade=None, work_type_filter=work_type_filter)
+                        context.start('admin', get_student_coursework_data, user_id, student_email=user_email, limit_coursework=limit_coursework or 20, user_grade=None, work_type_filter=work_type_filter)
                         coursework_data_from_direct_query = True
                 else:
-                    # First try current user if they have admin privileges
-                    admin_data = get_admin_data(user_email,
-                                               load_teachers=should_load_teachers,
-                                               load_students=should_load_students,
-                                               load_announcements=should_load_announcements,
-                                               load_coursework=should_load_coursework,
-                                               load_calendar=should_load_calendar,
-                                               load_submissions=should_load_submissions,
-                                               announcement_date_ranges=target_date_ranges_for_sql if target_date_ranges_for_sql else None,
-                                               limit_announcements=limit_announcements,
-                                               limit_students=limit_students,
-                                               limit_teachers=limit_teachers,
-                                               limit_coursework=limit_coursework,
-                                               limit_submissions=500 if is_assignment_status_query else 50,
-                                               limit_calendar_events=cal_limit,
-                                               load_classroom_courses=should_load_classroom_courses)
-                
-                # If no data found from current user, try to get from any admin who has synced data
-                if not admin_data.get('classroom_data') and not admin_data.get('calendar_data'):
-                    print("[Chatbot] No data from current user, trying to get from any admin with synced data...")
-                    try:
-                        from supabase_config import get_supabase_client
-                        supabase = get_supabase_client()
-                        
-                        # Find any admin who has synced classroom data
-                        # IMPORTANT: user_id in google_classroom_courses is auth.users.id, not user_profiles.id
-                        # Note: calendar_event_data is global (no user_id), so we can't use it to find user_id
-                        result = supabase.table('google_classroom_courses').select('user_id').limit(1).execute()
-                        
-                        if result.data and len(result.data) > 0:
-                            user_with_data_id = result.data[0]['user_id']  # This is auth.users.id
-                            # Get the user's email - user_profiles.user_id references auth.users.id
-                            user_profile_result = supabase.table('user_profiles').select('email').eq('user_id', user_with_data_id).limit(1).execute()
-                            if user_profile_result.data and len(user_profile_result.data) > 0:
-                                user_email = user_profile_result.data[0]['email']
-                                print(f"[Chatbot] Found user with synced data: {user_email} (auth_user_id: {user_with_data_id})")
-                                admin_data = get_admin_data(user_email,
+                    # First try current user if they have admin privileges (collected after the Drive check below)
+                    context.start('admin', get_admin_data, user_email,
+                                  load_teachers=should_load_teachers,
+                                  load_students=should_load_students,
+                                  load_announcements=should_load_announcements,
+                                  load_coursework=should_load_coursework,
+                                  load_calendar=should_load_calendar,
+                                  load_submissions=should_load_submissions,
+                                  announcement_date_ranges=target_date_ranges_for_sql if target_date_ranges_for_sql else None,
+                                  limit_announcements=limit_announcements,
+                                  limit_students=limit_students,
+                                  limit_teachers=limit_teachers,
+                                  limit_coursework=limit_coursework,
+                                  limit_submissions=500 if is_assignment_status_query else 50,
+                                  limit_calendar_events=cal_limit,
+                                  load_classroom_courses=should_load_classroom_courses)
+        except Exception as e:
+            print(f"[Chatbot] ❌ Error getting reference data: {e}")
+            import traceback
+            traceback.print_exc()
+            admin_data = {"classroom_data": [], "calendar_data": []}
+    elif should_use_web_crawling_first:
+        # For person detail queries, we still load teacher data above to verify web crawler claims
+        # (web crawler might claim someone is a teacher, we need to verify against Google Classroom data)
+        # So this branch is only reached if ADMIN_FEATURES_AVAILABLE was False
+        print(f"[Chatbot] Person detail query - web crawler used, but teacher data was loaded if available to verify claims")
+        # admin_data should already be populated above if ADMIN_FEATURES_AVAILABLE was True
+        if not admin_data.get('classroom_data'):
+            admin_data = {"classroom_data": [], "calendar_data": []}
+    else:
+        print(f"[Chatbot] ⚠️ Admin features not available - cannot fetch reference data")
+
+    # Drive answers take precedence over the Classroom/Calendar shortcuts below
+    if context.started('drive'):
+        try:
+            # Past its deadline the query goes to the LLM
+            drive_response = context.result('drive', default="", reraise=True) or ""
+            print(f"[Chatbot] 🧪 Drive integration returned: '{drive_response[:100]}...'")
+            print(f"[Chatbot] 🔍 Drive integration returned: {len(drive_response) if drive_response else 0} characters")
+            if drive_response:
+                print(f"[Chatbot] 📄 Response preview: {drive_response[:100]}...")
+
+            # Check if drive integration returned a "no data" style message (Drive layer already has friendly copy)
+            dr_low = (drive_response or "").lower()
+            drive_looks_like_error = dr_low.startswith("sorry") or dr_low.startswith("i couldn't") or dr_low.startswith("i'm not able")
+            if drive_response and drive_looks_like_error:
+                print(f"[Chatbot] ⚠️ Drive integration returned no data error: {drive_response[:100]}")
+                qtype = (analysis or {}).get("query_type")
+                # Timetable / teacher lookups: always surface Drive's message (do not swap for exam text)
+                if qtype in ("timetable", "teacher", "teacher_subject"):
+                    return drive_response
+                if is_teacher_drive_query:
+                    return drive_response
+                elif is_exam_query:
+                    query_lower = user_query.lower()
+                    is_timetable_ask = (
+                        qtype == "timetable"
+                        or "timetable" in query_lower
+                        or "time table" in query_lower
+                        or "time tabl" in query_lower
+                        or ("time" in query_lower and "tabl" in query_lower)
+                    )
+                    if is_timetable_ask:
+                        return drive_response
+                    return "There are no upcoming exams scheduled at this time."
+                else:
+                    return drive_response
+            elif drive_response and drive_response.startswith("TEACHER_INFO:"):
+                print(f"[Chatbot] 👨‍🏫 Teacher info detected, enhancing with AI model")
+                # Extract the raw teacher info and enhance it with AI
+                teacher_info = drive_response.replace("TEACHER_INFO:", "").strip()
+                print(f"[Chatbot] 📝 Raw teacher info: {teacher_info}")
+
+                # Don't return directly - let it go through AI enhancement
+                # Store it for later use in the main response logic
+                teacher_enhanced_info = teacher_info
+                drive_response = ""  # Clear drive response so it continues to AI
+                print(f"[Chatbot] 🔄 Teacher info stored for AI enhancement")
+            elif drive_response and drive_response.startswith("TEACHER_SUBJECT:"):
+                print(f"[Chatbot] 📚 Teacher subject info detected, enhancing with AI model")
+                # Extract the raw teacher subject info and enhance it with AI
+                teacher_subject_info = drive_response.replace("TEACHER_SUBJECT:", "").strip()
+                print(f"[Chatbot] 📝 Raw teacher subject info: {teacher_subject_info}")
+
+                # Don't return directly - let it go through AI enhancement
+                # Store it for later use in the main response logic
+                teacher_enhanced_info = teacher_subject_info
+                drive_response = ""  # Clear drive response so it continues to AI
+                print(f"[Chatbot] 🔄 Teacher subject info stored for AI enhancement")
+            elif drive_response:
+                print(f"[Chatbot] ✅ Drive integration successful: {len(drive_response)} characters")
+                print(f"[Chatbot] 📤 RETURNING DRIVE RESPONSE NOW: {len(drive_response)} chars")
+                return drive_response
+            else:
+                print(f"[Chatbot] ⚠️ Drive integration returned no results or error: {drive_response[:100] if drive_response else 'None'}")
+                drive_response = ""  # Reset to empty if invalid
+        except Exception as e:
+            print(f"[Chatbot] ❌ Error in drive integration: {e}")
+            import traceback
+            traceback.print_exc()
+            exam_response = ""
+            return f"Sorry, there was an error accessing exam information: {str(e)}"
+
+    # Holiday context is used by the calendar shortcuts below and by the system prompt
+    global_holiday_context, yesterday_holiday_context = context.result('holidays', default=(None, None))
+    if global_holiday_context:
+        print(f"[ChatbotResponse] 🎄 HOLIDAY DETECTED: {global_holiday_context['message']}")
+    if yesterday_holiday_context:
+        print(f"[ChatbotResponse] 🎄 HOLIDAY DETECTED for yesterday: {yesterday_holiday_context['message']}")
+
+    # Collect the Classroom/Calendar load started above (it overlapped with Drive and the web crawl)
+    if context.started('admin'):
+        try:
+            admin_data = context.result('admin', default=_EMPTY_ADMIN_DATA)
+
+            # If no data found from current user, try to get from any admin who has synced data
+            # (not after a timeout: the lookup below would only wait on the same slow backend again)
+            if not admin_data.get('classroom_data') and not admin_data.get('calendar_data') and not context.timed_out('admin'):
+                print("[Chatbot] No data from current user, trying to get from any admin with synced data...")
+                try:
+                    # Find any admin who has synced classroom data
+                    # IMPORTANT: user_id in google_classroom_courses is auth.users.id, not user_profiles.id
+                    # Note: calendar_event_data is global (no user_id), so we can't use it to find user_id
+                    result = yield SupabaseQuery(lambda db: db.table('google_classroom_courses').select('user_id').limit(1))
+                    
+                    if result.data and len(result.data) > 0:
+                        user_with_data_id = result.data[0]['user_id']  # This is auth.users.id
+                        # Get the user's email - user_profiles.user_id references auth.users.id
+                        user_profile_result = yield SupabaseQuery(
+                            lambda db: db.table('user_profiles').select('email').eq('user_id', user_with_data_id).limit(1)
+                        )
+                        if user_profile_result.data and len(user_profile_result.data) > 0:
+                            user_email = user_profile_result.data[0]['email']
+                            print(f"[Chatbot] Found user with synced data: {user_email} (auth_user_id: {user_with_data_id})")
+                            admin_data = context.fetch('admin_fallback', get_admin_data, user_email, default=_EMPTY_ADMIN_DATA,
+                                                       load_teachers=should_load_teachers,
+                                                       load_students=should_load_students,
+                                                       load_announcements=should_load_announcements,
+                                                       load_coursework=should_load_coursework,
+                                                       load_calendar=should_load_calendar,
+                                                       load_submissions=should_load_submissions,
+                                                       announcement_date_ranges=target_date_ranges_for_sql if target_date_ranges_for_sql else None,
+                                                       limit_announcements=limit_announcements,
+                                                       limit_students=limit_students,
+                                                       limit_teachers=limit_teachers,
+                                                       limit_coursework=limit_coursework,
+                                                       limit_submissions=500 if is_assignment_status_query else 50,
+                                                       limit_calendar_events=cal_limit,
+                                                       load_classroom_courses=should_load_classroom_courses)
+                        else:
+                            # If no email found, just use the user_id directly (skip email lookup)
+                            print(f"[Chatbot] Found synced data for user_id: {user_with_data_id}, but no email in user_profiles")
+                            # Query directly using user_id
+                            courses_result = yield SupabaseQuery(
+                                lambda db: db.table('google_classroom_courses').select('*').eq('user_id', user_with_data_id)
+                            )
+                            if courses_result.data:
+                                print(f"[Chatbot] Direct query found {len(courses_result.data)} courses")
+                                admin_data = context.fetch('admin_fallback', get_admin_data, None,  # Let get_admin_data find it via fallback
+                                                           default=_EMPTY_ADMIN_DATA,
                                                            load_teachers=should_load_teachers,
                                                            load_students=should_load_students,
                                                            load_announcements=should_load_announcements,
@@ -2878,230 +2740,207 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
                                                            limit_submissions=500 if is_assignment_status_query else 50,
                                                            limit_calendar_events=cal_limit,
                                                            load_classroom_courses=should_load_classroom_courses)
-                            else:
-                                # If no email found, just use the user_id directly (skip email lookup)
-                                print(f"[Chatbot] Found synced data for user_id: {user_with_data_id}, but no email in user_profiles")
-                                # Query directly using user_id
-                                courses_result = supabase.table('google_classroom_courses').select('*').eq('user_id', user_with_data_id).execute()
-                                if courses_result.data:
-                                    print(f"[Chatbot] Direct query found {len(courses_result.data)} courses")
-                                    admin_data = get_admin_data(None,  # Let get_admin_data find it via fallback
-                                                               load_teachers=should_load_teachers,
-                                                               load_students=should_load_students,
-                                                               load_announcements=should_load_announcements,
-                                                               load_coursework=should_load_coursework,
-                                                               load_calendar=should_load_calendar,
-                                                               load_submissions=should_load_submissions,
-                                                               announcement_date_ranges=target_date_ranges_for_sql if target_date_ranges_for_sql else None,
-                                                               limit_announcements=limit_announcements,
-                                                               limit_students=limit_students,
-                                                               limit_teachers=limit_teachers,
-                                                               limit_coursework=limit_coursework,
-                                                               limit_submissions=500 if is_assignment_status_query else 50,
-                                                               limit_calendar_events=cal_limit,
-                                                               load_classroom_courses=should_load_classroom_courses)
-                    except Exception as e:
-                        print(f"[Chatbot] Error getting reference data from other admin: {e}")
+                except Exception as e:
+                    print(f"[Chatbot] Error getting reference data from other admin: {e}")
 
-                if admin_data.get('classroom_data') or admin_data.get('calendar_data'):
-                    print(f"[Chatbot] ✅ Reference data loaded: {len(admin_data.get('classroom_data', []))} courses, {len(admin_data.get('calendar_data', []))} events")
-                else:
-                    print(f"[Chatbot] ⚠️ No reference data available (no courses or events synced yet)")
+            if admin_data.get('classroom_data') or admin_data.get('calendar_data'):
+                print(f"[Chatbot] ✅ Reference data loaded: {len(admin_data.get('classroom_data', []))} courses, {len(admin_data.get('calendar_data', []))} events")
+            else:
+                print(f"[Chatbot] ⚠️ No reference data available (no courses or events synced yet)")
 
-                # Special handling for calendar queries with no events
-                calendar_events = admin_data.get('calendar_data', [])
-                # Bookaroo (common typo: "schoolaroo") — only rows that mention the festival, not the full list
-                if is_calendar_query and calendar_events and re.search(
-                    r"\b(?:book|school)aroo\b", query_lower
-                ):
-                    _hay = "bookaroo"
-                    _matched = [
-                        e
-                        for e in calendar_events
-                        if _hay in (e.get("summary") or "").lower()
-                    ]
-                    if _matched:
-                        admin_data["calendar_data"] = _matched
-                        calendar_events = _matched
-                        print(
-                            f"[Chatbot] 📅 Bookaroo filter: {len(calendar_events)} event(s) matching title"
+            # Special handling for calendar queries with no events
+            calendar_events = admin_data.get('calendar_data', [])
+            # Bookaroo (common typo: "schoolaroo") — only rows that mention the festival, not the full list
+            if is_calendar_query and calendar_events and re.search(
+                r"\b(?:book|school)aroo\b", query_lower
+            ):
+                _hay = "bookaroo"
+                _matched = [
+                    e
+                    for e in calendar_events
+                    if _hay in (e.get("summary") or "").lower()
+                ]
+                if _matched:
+                    admin_data["calendar_data"] = _matched
+                    calendar_events = _matched
+                    print(
+                        f"[Chatbot] 📅 Bookaroo filter: {len(calendar_events)} event(s) matching title"
+                    )
+            if is_calendar_query and calendar_events:
+                filtered_cal, scope_lbl = filter_calendar_events_by_month_phrase(query_lower, calendar_events)
+                if scope_lbl is None:
+                    filtered_cal, scope_lbl = filter_calendar_events_by_week_phrase(query_lower, calendar_events)
+                if scope_lbl is not None:
+                    calendar_month_scope_label = scope_lbl
+                    admin_data['calendar_data'] = filtered_cal
+                    calendar_events = filtered_cal
+                    print(f"[Chatbot] 📅 Month scope filter ({scope_lbl}): {len(calendar_events)} event(s)")
+                    if len(calendar_events) == 0:
+                        month_name = scope_lbl.split(" (")[0].strip()
+                        return (
+                            f"**School calendar**\n\n"
+                            f"There are no school events listed in the calendar data for **{month_name}**. "
+                            f"The public calendar is updated regularly; check back later or contact the school office for the latest dates."
                         )
-                if is_calendar_query and calendar_events:
-                    filtered_cal, scope_lbl = filter_calendar_events_by_month_phrase(query_lower, calendar_events)
-                    if scope_lbl is None:
-                        filtered_cal, scope_lbl = filter_calendar_events_by_week_phrase(query_lower, calendar_events)
-                    if scope_lbl is not None:
-                        calendar_month_scope_label = scope_lbl
-                        admin_data['calendar_data'] = filtered_cal
-                        calendar_events = filtered_cal
-                        print(f"[Chatbot] 📅 Month scope filter ({scope_lbl}): {len(calendar_events)} event(s)")
-                        if len(calendar_events) == 0:
-                            month_name = scope_lbl.split(" (")[0].strip()
-                            return (
-                                f"**School calendar**\n\n"
-                                f"There are no school events listed in the calendar data for **{month_name}**. "
-                                f"The public calendar is updated regularly; check back later or contact the school office for the latest dates."
-                            )
 
-                if is_calendar_query and calendar_events:
-                    qg = parse_queried_grade_targets(query_lower)
-                    if qg is not None:
-                        before_q = len(calendar_events)
-                        graded_q = filter_calendar_events_by_queried_grades(calendar_events, qg)
-                        calendar_query_grade_targets = qg
-                        if before_q != len(graded_q):
+            if is_calendar_query and calendar_events:
+                qg = parse_queried_grade_targets(query_lower)
+                if qg is not None:
+                    before_q = len(calendar_events)
+                    graded_q = filter_calendar_events_by_queried_grades(calendar_events, qg)
+                    calendar_query_grade_targets = qg
+                    if before_q != len(graded_q):
+                        print(
+                            f"[Chatbot] 📚 Query grade filter {sorted(qg)}: "
+                            f"{before_q} -> {len(graded_q)} event(s)"
+                        )
+                    if should_hide_staff_only_calendar_events(user_profile):
+                        before_staff = len(graded_q)
+                        graded_q = filter_calendar_events_exclude_staff_only(graded_q)
+                        dropped = before_staff - len(graded_q)
+                        if dropped:
                             print(
-                                f"[Chatbot] 📚 Query grade filter {sorted(qg)}: "
-                                f"{before_q} -> {len(graded_q)} event(s)"
-                            )
-                        if should_hide_staff_only_calendar_events(user_profile):
-                            before_staff = len(graded_q)
-                            graded_q = filter_calendar_events_exclude_staff_only(graded_q)
-                            dropped = before_staff - len(graded_q)
-                            if dropped:
-                                print(
-                                    f"[Chatbot] 👤 Excluded {dropped} staff-only calendar row(s) "
-                                    "(facilitator PD / facilitators-only, not for learners)"
-                                )
-                        admin_data["calendar_data"] = graded_q
-                        calendar_events = graded_q
-                        if len(graded_q) == 0 and before_q > 0:
-                            glist = ", ".join(sorted(qg, key=lambda x: (len(x), x)))
-                            return (
-                                "**School calendar**\n\n"
-                                f"No events in the calendar data are school-wide or cohort-tagged only for **{glist}**. "
-                                "Titles that mention other grades (e.g. Indigo (3) with Violet (2)) are excluded for this filter."
+                                f"[Chatbot] 👤 Excluded {dropped} staff-only calendar row(s) "
+                                "(facilitator PD / facilitators-only, not for learners)"
                             )
+                    admin_data["calendar_data"] = graded_q
+                    calendar_events = graded_q
+                    if len(graded_q) == 0 and before_q > 0:
+                        glist = ", ".join(sorted(qg, key=lambda x: (len(x), x)))
+                        return (
+                            "**School calendar**\n\n"
+                            f"No events in the calendar data are school-wide or cohort-tagged only for **{glist}**. "
+                            "Titles that mention other grades (e.g. Indigo (3) with Violet (2)) are excluded for this filter."
+                        )
 
-                if is_calendar_query and calendar_events:
-                    ug = normalize_user_grade_for_calendar(user_profile)
-                    if ug is not None and calendar_query_grade_targets is None:
-                        before_g = len(calendar_events)
-                        graded = filter_calendar_events_by_user_grade(calendar_events, ug)
-                        calendar_user_grade = ug
-                        if before_g != len(graded):
-                            print(f"[Chatbot] 📚 Grade filter (grade {ug}): {before_g} -> {len(graded)} event(s)")
-                        if should_hide_staff_only_calendar_events(user_profile):
-                            before_staff = len(graded)
-                            graded = filter_calendar_events_exclude_staff_only(graded)
-                            dropped = before_staff - len(graded)
-                            if dropped:
-                                print(
-                                    f"[Chatbot] 👤 Excluded {dropped} staff-only calendar row(s) "
-                                    "(facilitator PD / facilitators-only, not for learners)"
-                                )
-                        admin_data["calendar_data"] = graded
-                        calendar_events = graded
-                        if len(graded) == 0 and before_g > 0:
-                            return (
-                                "**School calendar**\n\n"
-                                f"No events in this view are open to **all grades** or tagged for **Grade {ug}**. "
-                                "Other events may be for different cohorts (see colour / Honesty (4) / Empathy (7) tags in titles). "
-                                "Check your profile grade or ask the office if this looks wrong."
+            if is_calendar_query and calendar_events:
+                ug = normalize_user_grade_for_calendar(user_profile)
+                if ug is not None and calendar_query_grade_targets is None:
+                    before_g = len(calendar_events)
+                    graded = filter_calendar_events_by_user_grade(calendar_events, ug)
+                    calendar_user_grade = ug
+                    if before_g != len(graded):
+                        print(f"[Chatbot] 📚 Grade filter (grade {ug}): {before_g} -> {len(graded)} event(s)")
+                    if should_hide_staff_only_calendar_events(user_profile):
+                        before_staff = len(graded)
+                        graded = filter_calendar_events_exclude_staff_only(graded)
+                        dropped = before_staff - len(graded)
+                        if dropped:
+                            print(
+                                f"[Chatbot] 👤 Excluded {dropped} staff-only calendar row(s) "
+                                "(facilitator PD / facilitators-only, not for learners)"
                             )
+                    admin_data["calendar_data"] = graded
+                    calendar_events = graded
+                    if len(graded) == 0 and before_g > 0:
+                        return (
+                            "**School calendar**\n\n"
+                            f"No events in this view are open to **all grades** or tagged for **Grade {ug}**. "
+                            "Other events may be for different cohorts (see colour / Honesty (4) / Empathy (7) tags in titles). "
+                            "Check your profile grade or ask the office if this looks wrong."
+                        )
 
-                # Empty rows: real "no data" vs link-only (we intentionally skip DB fetch — do not say "no events")
-                if (
-                    is_calendar_query
-                    and len(calendar_events) == 0
-                    and not is_calendar_link_only
-                ):
-                    print("[Chatbot] 📅 Calendar query with no events - providing clear 'no events' response")
-                    # Create a direct response for calendar queries with no events
-                    calendar_response = f"**School Calendar Events**\n\nI don't have any upcoming school events scheduled in the calendar data for the requested period. The school calendar is regularly updated with important dates, holidays, and special events.\n\n### **Primary School Calendar**\nFor the complete year flow and all upcoming events, please visit the official **Prakriti School Calendar**: [https://events.prakriti.edu.in/](https://events.prakriti.edu.in/)\n\nIf you're looking for information about:\n- **Holidays**: Check the school's holiday list\n- **Exam schedules**: Contact your teacher or administration\n- **Sports events**: Check with the physical education department\n- **Cultural activities**: Look for announcements in your classroom\n\nFor the most current information, please check with your teachers or the school administration."
-
-                    # Add holiday context if today is a holiday
-                    if global_holiday_context:
-                        calendar_response += f"\n\n**Holiday Note**: Today is {global_holiday_context['message']} - {global_holiday_context['context']}"
-
-                    return calendar_response
-
-                # Special handling for date-specific calendar queries with no events on that date
-                if is_calendar_query and target_date_ranges_for_sql and len(calendar_events) > 0:
-                    # Check if any events fall within the requested date range
-                    events_on_date = []
-                    print(f"[Chatbot] 🔍 Filtering {len(calendar_events)} events for date range: {target_date_ranges_for_sql[0][0].date()} to {target_date_ranges_for_sql[0][1].date()}")
-                    for event in calendar_events:
-                        # Try both 'startTime' (formatted) and 'start_time' (raw) field names
-                        event_start = event.get('startTime') or event.get('start_time', '')
-                        event_title = event.get('summary', 'Unknown')
-                        if event_start:
-                            try:
-                                from datetime import datetime
-                                # Handle both ISO format and date-only format
-                                if 'T' in event_start:
-                                    event_datetime = datetime.fromisoformat(event_start.replace('Z', '+00:00'))
-                                else:
-                                    # Date-only format, assume start of day
-                                    event_datetime = datetime.fromisoformat(event_start).replace(hour=0, minute=0, second=0, microsecond=0)
-                                
-                                # Make timezone-aware if not already
-                                if event_datetime.tzinfo is None:
-                                    from datetime import timezone
-                                    event_datetime = event_datetime.replace(tzinfo=timezone.utc)
+            # Empty rows: real "no data" vs link-only (we intentionally skip DB fetch — do not say "no events")
+            if (
+                is_calendar_query
+                and len(calendar_events) == 0
+                and not is_calendar_link_only
+            ):
+                print("[Chatbot] 📅 Calendar query with no events - providing clear 'no events' response")
+                # Create a direct response for calendar queries with no events
+                calendar_response = f"**School Calendar Events**\n\nI don't have any upcoming school events scheduled in the calendar data for the requested period. The school calendar is regularly updated with important dates, holidays, and special events.\n\n### **Primary School Calendar**\nFor the complete year flow and all upcoming events, please visit the official **Prakriti School Calendar**: [https://events.prakriti.edu.in/](https://events.prakriti.edu.in/)\n\nIf you're looking for information about:\n- **Holidays**: Check the school's holiday list\n- **Exam schedules**: Contact your teacher or administration\n- **Sports events**: Check with the physical education department\n- **Cultural activities**: Look for announcements in your classroom\n\nFor the most current information, please check with your teachers or the school administration."
+
+                # Add holiday context if today is a holiday
+                if global_holiday_context:
+                    calendar_response += f"\n\n**Holiday Note**: Today is {global_holiday_context['message']} - {global_holiday_context['context']}"
+
+                return calendar_response
+
+            # Special handling for date-specific calendar queries with no events on that date
+            if is_calendar_query and target_date_ranges_for_sql and len(calendar_events) > 0:
+                # Check if any events fall within the requested date range
+                events_on_date = []
+                print(f"[Chatbot] 🔍 Filtering {len(calendar_events)} events for date range: {target_date_ranges_for_sql[0][0].date()} to {target_date_ranges_for_sql[0][1].date()}")
+                for event in calendar_events:
+                    # Try both 'startTime' (formatted) and 'start_time' (raw) field names
+                    event_start = event.get('startTime') or event.get('start_time', '')
+                    event_title = event.get('summary', 'Unknown')
+                    if event_start:
+                        try:
+                            from datetime import datetime
+                            # Handle both ISO format and date-only format
+                            if 'T' in event_start:
+                                event_datetime = datetime.fromisoformat(event_start.replace('Z', '+00:00'))
+                            else:
+                                # Date-only format, assume start of day
+                                event_datetime = datetime.fromisoformat(event_start).replace(hour=0, minute=0, second=0, microsecond=0)
+                            
+                            # Make timezone-aware if not already
+                            if event_datetime.tzinfo is None:
+                                from datetime import timezone
+                                event_datetime = event_datetime.replace(tzinfo=timezone.utc)
+                            
+                            event_date = event_datetime.date()
+                            print(f"[Chatbot] 📅 Checking event '{event_title}': {event_date}")
+                            
+                            for date_start, date_end in target_date_ranges_for_sql:
+                                # Compare dates (ignore time for date-only queries)
+                                range_start_date = date_start.date()
+                                range_end_date = date_end.date()
                                 
-                                event_date = event_datetime.date()
-                                print(f"[Chatbot] 📅 Checking event '{event_title}': {event_date}")
+                                print(f"[Chatbot]   Comparing: {event_date} with range {range_start_date} to {range_end_date}")
                                 
-                                for date_start, date_end in target_date_ranges_for_sql:
-                                    # Compare dates (ignore time for date-only queries)
-                                    range_start_date = date_start.date()
-                                    range_end_date = date_end.date()
-                                    
-                                    print(f"[Chatbot]   Comparing: {event_date} with range {range_start_date} to {range_end_date}")
-                                    
-                                    if range_start_date <= event_date <= range_end_date:
-                                        print(f"[Chatbot]   ✅ MATCH! Event '{event_title}' is on {event_date}")
-                                        events_on_date.append(event)
-                                        break
-                                    else:
-                                        print(f"[Chatbot]   ❌ No match: {event_date} not in range {range_start_date} to {range_end_date}")
-                            except Exception as e:
-                                print(f"[Chatbot] Error parsing event date '{event_start}' for event '{event_title}': {e}")
-                                import traceback
-                                traceback.print_exc()
-                                continue
-
-                    print(f"[Chatbot] 📊 Found {len(events_on_date)} events on requested date")
-                    # If events found on the requested date, filter calendar_events to only show those events
-                    if len(events_on_date) > 0:
-                        print(f"[Chatbot] ✅ Filtering calendar events to show only {len(events_on_date)} event(s) on requested date")
-                        # Update calendar_events to only include events on the requested date
-                        admin_data['calendar_data'] = events_on_date
-                        calendar_events = events_on_date  # Also update local variable for consistency
-                    # If no events on the requested date, provide concise response
-                    elif len(events_on_date) == 0:
-                        print(f"[Chatbot] 📅 Date-specific calendar query with no events on requested date - providing concise 'no events' response")
-                        calendar_response = f"**School Calendar Events**\n\nI don't see any events scheduled specifically for the date you requested. The school calendar is regularly updated with important dates, holidays, and special events.\n\nFor the most current information, please check with your teachers or the school administration."
-
-                        # Only add holiday context if the requested date is today
-                        if global_holiday_context and target_date_ranges_for_sql:
-                            from datetime import datetime, timezone
-                            today = datetime.now(timezone.utc).date()
-                            # Check if any of the requested date ranges includes today
-                            is_today_query = any(
-                                date_start.date() == today or date_end.date() == today
-                                for date_start, date_end in target_date_ranges_for_sql
-                            )
-                            if is_today_query:
-                                calendar_response += f"\n\n**Holiday Note**: Today is {global_holiday_context['message']} - {global_holiday_context['context']}"
+                                if range_start_date <= event_date <= range_end_date:
+                                    print(f"[Chatbot]   ✅ MATCH! Event '{event_title}' is on {event_date}")
+                                    events_on_date.append(event)
+                                    break
+                                else:
+                                    print(f"[Chatbot]   ❌ No match: {event_date} not in range {range_start_date} to {range_end_date}")
+                        except Exception as e:
+                            print(f"[Chatbot] Error parsing event date '{event_start}' for event '{event_title}': {e}")
+                            import traceback
+                            traceback.print_exc()
+                            continue
+
+                print(f"[Chatbot] 📊 Found {len(events_on_date)} events on requested date")
+                # If events found on the requested date, filter calendar_events to only show those events
+                if len(events_on_date) > 0:
+                    print(f"[Chatbot] ✅ Filtering calendar events to show only {len(events_on_date)} event(s) on requested date")
+                    # Update calendar_events to only include events on the requested date
+                    admin_data['calendar_data'] = events_on_date
+                    calendar_events = events_on_date  # Also update local variable for consistency
+                # If no events on the requested date, provide concise response
+                elif len(events_on_date) == 0:
+                    print(f"[Chatbot] 📅 Date-specific calendar query with no events on requested date - providing concise 'no events' response")
+                    calendar_response = f"**School Calendar Events**\n\nI don't see any events scheduled specifically for the date you requested. The school calendar is regularly updated with important dates, holidays, and special events.\n\nFor the most current information, please check with your teachers or the school administration."
+
+                    # Only add holiday context if the requested date is today
+                    if global_holiday_context and target_date_ranges_for_sql:
+                        from datetime import datetime, timezone
+                        today = datetime.now(timezone.utc).date()
+                        # Check if any of the requested date ranges includes today
+                        is_today_query = any(
+                            date_start.date() == today or date_end.date() == today
+                            for date_start, date_end in target_date_ranges_for_sql
+                        )
+                        if is_today_query:
+                            calendar_response += f"\n\n**Holiday Note**: Today is {global_holiday_context['message']} - {global_holiday_context['context']}"
 
-                        return calendar_response
+                    return calendar_response
         except Exception as e:
             print(f"[Chatbot] ❌ Error getting reference data: {e}")
             import traceback
             traceback.print_exc()
             admin_data = {"classroom_data": [], "calendar_data": []}
-    elif should_use_web_crawling_first:
-        # For person detail queries, we still load teacher data above to verify web crawler claims
-        # (web crawler might claim someone is a teacher, we need to verify against Google Classroom data)
-        # So this branch is only reached if ADMIN_FEATURES_AVAILABLE was False
-        print(f"[Chatbot] Person detail query - web crawler used, but teacher data was loaded if available to verify claims")
-        # admin_data should already be populated above if ADMIN_FEATURES_AVAILABLE was True
-        if not admin_data.get('classroom_data'):
-            admin_data = {"classroom_data": [], "calendar_data": []}
-    else:
-        print(f"[Chatbot] ⚠️ Admin features not available - cannot fetch reference data")
+
+    # Collect the background web crawl (whatever arrived by its deadline goes into the prompt)
+    if context.started('web'):
+        web_enhanced_info = context.result('web', default="") or ""
+        if web_enhanced_info:
+            print(f"[Chatbot] ✅ Web enhancement found: {len(web_enhanced_info)} characters")
+        else:
+            print("[Chatbot] ⚠️ Web enhancement returned empty")
+    context.log_summary()
 
     # Step 2: Fallback to LLM with streaming approach
     print("=" * 80)
@@ -3368,13 +3207,15 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
                     f"[Chatbot] 💬 General query — including {len(recent_history)} prior messages for context"
                 )
 
+            # Added to `messages` once the prompt budget is applied (older turns may be condensed)
+            history_messages = []
             for msg in recent_history:
                 if not isinstance(msg, dict):
                     continue
                 r, c = msg.get("role"), msg.get("content")
                 if r not in ("user", "assistant") or c is None:
                     continue
-                messages.append({"role": r, "content": str(c)})
+                history_messages.append({"role": r, "content": str(c)})
             
             # Get today's date for filtering
             from datetime import datetime, timezone, timedelta
@@ -3540,6 +3381,9 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
             
             # Add current user query - minimal format (TOKEN OPTIMIZATION)
             user_content = f"{user_query}\n"
+            # {block: (start, end)} of the per-source sections inside user_content (Web excerpt, Classroom
+            # Data rows, calendar events) - the prompt budget compacts these and keeps the instructions around them
+            budget_spans = {}
             # Courses actually embedded in the prompt (after grade/query filters). Used for title validation — not raw admin_data.
             llm_prompt_classroom_data = None
 
@@ -3575,44 +3419,10 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
                 user_content += "**START YOUR RESPONSE BY LISTING THE ACTUAL ASSIGNMENTS FROM THE DATA - NO GREETINGS, NO QUESTIONS, NO FAKE EXAMPLES!**\n\n"
             
             if web_enhanced_info:
-                # TRUNCATE web info - TOKEN OPTIMIZATION (reduced to 300 chars for queries with classroom data)
-                # EXCEPTION: For person queries, don't truncate - we need full person information
-                if should_use_web_crawling_first:
-                    # Person query - use full information (up to 2000 chars to be safe)
-                    max_web_chars = 2000
-                    print(f"[Chatbot] Person query detected - using full web info ({len(web_enhanced_info)} chars)")
-                elif wants_grounded_roots_post:
-                    max_web_chars = 8000
-                    print(
-                        f"[Chatbot] Specific article title in query — web excerpt cap {max_web_chars} "
-                        f"(have {len(web_enhanced_info)} chars)"
-                    )
-                elif is_bookaroo_article_or_reading_query:
-                    max_web_chars = 2200
-                    print(
-                        f"[Chatbot] book|school+aroo + article/reading request — web excerpt cap {max_web_chars} "
-                        f"(have {len(web_enhanced_info)} chars)"
-                    )
-                elif is_event_nature_explanation_query:
-                    max_web_chars = 2000
-                    print(
-                        f"[Chatbot] Event nature (what is this event) — web excerpt cap {max_web_chars} "
-                        f"(have {len(web_enhanced_info)} chars)"
-                    )
-                elif is_bookaroo_festival_context_query:
-                    max_web_chars = 1500
-                    print(
-                        f"[Chatbot] Bookaroo / literature festival — extended web excerpt "
-                        f"(cap {max_web_chars} chars, have {len(web_enhanced_info)})"
-                    )
-                else:
-                    # If classroom data exists, use less web info to prioritize classroom data
-                    max_web_chars = 300 if admin_data.get('classroom_data') else 400
-                
-                truncated_web_info = web_enhanced_info[:max_web_chars] + ("..." if len(web_enhanced_info) > max_web_chars else "")
-                user_content += f"Web:\n{truncated_web_info}\n"
-                if len(web_enhanced_info) > max_web_chars:
-                    print(f"[Chatbot] Truncated web_enhanced_info from {len(web_enhanced_info)} to {max_web_chars} chars to save tokens")
+                # Full excerpt: the prompt budget trims it by this query's priorities (article / person
+                # questions keep it before anything else, Classroom questions only give it what is left)
+                budget_spans["web"] = (len(user_content), len(user_content) + len(f"Web:\n{web_enhanced_info}\n"))
+                user_content += f"Web:\n{web_enhanced_info}\n"
                 if is_bookaroo_article_or_reading_query and web_enhanced_info:
                     user_content += (
                         "\n**GROUNDING:** Build your answer **only** from the **Web** text above. If the word *bookaroo* (or a clear event title) "
@@ -4286,8 +4096,10 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
                                 + "\n\n"
                             )
                     user_content += "Data:\n"
-                    data_json = json.dumps(filtered_courses, separators=(',', ':'))
-                    user_content += f"{data_json}\n"  # Compact format, no indentation
+                    # Compact format, one course per line so the prompt budget can cut between courses
+                    data_json = "[" + ",\n".join(json.dumps(course, separators=(',', ':')) for course in filtered_courses) + "]"
+                    budget_spans["classroom_data"] = (len(user_content), len(user_content) + len(data_json) + 1)
+                    user_content += f"{data_json}\n"
                     
                     # DEBUG: Log what data is being sent to LLM for coursework queries
                     if is_coursework_query:
@@ -4625,6 +4437,7 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
                                     "(Staff-only PD / facilitators-only events are already removed from this list.)\n"
                                 )
                         user_content += "\n"
+                        calendar_lines_start = len(user_content)
                         for e in calendar_events:
                             title = e.get("summary", "")
                             display_title = sanitize_calendar_title_for_display(title)
@@ -4657,6 +4470,7 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
                                     pass
                             
                             user_content += f"- **{display_title}**: {event_date_str}{day_of_week and f' ({day_of_week})' or ''}{week_info}\n"
+                        budget_spans["calendar_data"] = (calendar_lines_start, len(user_content))
                         if is_calendar_page_content:
                             user_content += "\n⚠️ CRITICAL RULES (OVERVIEW — NOT A FULL SCHEDULE TABLE):\n"
                             user_content += "1. Explain what the calendar page is **for** (year flow, term dates, school-wide events, PTMs, etc.).\n"
@@ -4710,9 +4524,29 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
             
             user_content += "Provide a complete, helpful answer."
             
-            # Estimate token count (rough: 1 token ≈ 4 characters)
-            estimated_tokens = len(user_content) // 4 + sum(len(msg["content"]) // 4 for msg in messages)
-            print(f"[Chatbot] 📊 Estimated token count: ~{estimated_tokens} tokens")
+            # Fit the web excerpt, Data rows, calendar events and history around the required blocks
+            # (system prompt, question + instructions)
+            if should_use_web_crawling_first or wants_grounded_roots_post or is_bookaroo_article_or_reading_query or is_event_nature_explanation_query:
+                budget_intent = "article"
+            elif is_translation_query:
+                budget_intent = "translation"
+            elif "calendar_data" in budget_spans and "classroom_data" not in budget_spans:
+                budget_intent = "calendar"
+            elif admin_data.get('classroom_data') or admin_data.get('calendar_data'):
+                budget_intent = "data"
+            else:
+                budget_intent = "general"
+            prompt_budget = PromptBudget()
+            prompt_budget.require("system", system_content)
+            prompt_budget.require_with_blocks("question", user_content, budget_spans)
+            prompt_budget.add_history("history", history_messages)
+            budgeted = prompt_budget.allocate(INTENT_PRIORITIES[budget_intent])
+            user_content = prompt_budget.assemble("question")
+            messages.extend(budgeted["history"])
+            prompt_budget.log_composition()
+
+            estimated_tokens = prompt_budget.used_tokens
+            print(f"[Chatbot] 📊 Estimated token count: ~{estimated_tokens} tokens ({budget_intent} budget)")
             print(f"[Chatbot] 📊 User content length: {len(user_content)} chars | Messages count: {len(messages)}")
             
             # If too large, optionally use a compact format (announcement-only).
@@ -4825,7 +4659,7 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
                 print(f"[Chatbot] 💰 COST: GPT-4 pricing - Input: $0.03/1K tokens, Output: $0.06/1K tokens")
                 print(f"[Chatbot] ⚡ PERFORMANCE: Maximum quality responses")
 
-            response = openai_client.chat.completions.create(
+            response = yield ChatCompletion(
                 model=model_name,
                 messages=messages,
                 temperature=0.3,
@@ -4848,8 +4682,8 @@ Once you provide the subject and topic, I'll be able to give you detailed assist
             finish_reason = response.choices[0].finish_reason
             
             # Calculate token usage from response (approximate)
-            input_tokens_approx = sum(len(msg["content"]) // 4 for msg in messages)
-            output_tokens_approx = len(content) // 4 if content else 0
+            input_tokens_approx = message_tokens(messages, model_name)
+            output_tokens_approx = count_tokens(content, model_name)
             
             # Calculate cost based on model used
             if model_name == "gpt-4o-mini":
@@ -6099,4 +5933,16 @@ Remember: Every response should reflect Prakriti School's unique identity and ed
 
     # If all attempts failed, return a basic response
 
-    return "I apologize, but I'm having trouble generating a complete response at the moment. Please try rephrasing your question or ask for more specific information." 
\ No newline at end of file
+    return "I apologize, but I'm having trouble generating a complete response at the moment. Please try rephrasing your question or ask for more specific information." 
+
+async def generate_chatbot_response_async(request):
+    """
+    Async entry point for the chat route.
+
+    The main completion (AsyncOpenAI) and the Classroom lookups (async Supabase client) are awaited
+    on the event loop; the synchronous stretches of the pipeline between them run on the bounded
+    blocking pool, and Drive / Sheets / admin data / the web crawl on the context gatherer's pools,
+    since those clients only block. Concurrent chats on one uvicorn worker then overlap their I/O
+    waits, and a chat waiting on the model holds no thread.
+    """
+    return await adrive_steps(_chatbot_response_steps(request))
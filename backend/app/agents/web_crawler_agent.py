@@ -1,20 +1,13 @@
 import os
 import requests
 import json
-from typing import List, Dict, Optional, Tuple
+from typing import Any, List, Dict, Optional, Tuple
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import time
 import re
 from dotenv import load_dotenv
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from webdriver_manager.chrome import ChromeDriverManager
 
 # Ensure environment variables are loaded
 load_dotenv()
@@ -31,16 +24,22 @@ except ImportError:
 
 # Try to import vector search service
 try:
-    from app.services.vector_search_service import VectorSearchService
+    from app.services.vector_search_service import get_vector_search_service
     VECTOR_SEARCH_AVAILABLE = True
-    def get_vector_search_service():
-        return VectorSearchService()
 except ImportError:
     VECTOR_SEARCH_AVAILABLE = False
     def get_vector_search_service():
         return None
     print("[WebCrawler] Vector search not available - using fallback methods")
 
+# Team members on the team page (popup click-through and static parsing both look for these)
+TEAM_KNOWN_NAMES = [
+    'Vinita Krishna', 'Bharti Batra', 'Sh H C Batra', 'Shilpa Tayal',
+    'Mridul Batra', 'Rahul Batra', 'Vidya Vishwanathan', 'Priyanka Oberoi',
+    'Ritu Martin', 'Shuchi Mishra', 'Gayatri Tahiliani', 'Shraddha Rana Goel',
+    'Dr. Priyanka Jain Bhabu', 'Vanila Ghai', 'Gunjan Bhatia'
+]
+
 class WebCrawlerAgent:
     def __init__(self):
         self.session = requests.Session()
@@ -808,8 +807,8 @@ class WebCrawlerAgent:
         team_urls = [content.get('url') for content in content_list if 'team' in content.get('url', '').lower()]
         
         if team_urls:
-            print(f"[WebCrawler] Trying Selenium extraction for {normalized_name} from team page")
-            team_members = self.extract_team_members_with_selenium(team_urls[0])
+            print(f"[WebCrawler] Trying team page extraction for {normalized_name}")
+            team_members = self.extract_team_members(team_urls[0])
             
             # Check if the person is in the Selenium results (try both normalized and original name)
             for member_name, member_info in team_members.items():
@@ -1018,6 +1017,112 @@ class WebCrawlerAgent:
         u = url.lower()
         return 'calendar' in u or 'events.prakriti.edu.in' in u
     
+    def parse_page_html(
+        self,
+        url: str,
+        html,
+        query: str = "",
+        skip_link_following: bool = False,
+    ) -> Dict:
+        """Turn a fetched page (bytes or str) into the title/description/main_content/headings/links dict
+        
+        Shared by extract_content_from_url and the conditional essential-page crawler.
+        """
+        soup = BeautifulSoup(html, 'html.parser')
+        
+        # Extract different types of content
+        content = {
+            'title': '',
+            'description': '',
+            'main_content': '',
+            'headings': [],
+            'links': [],
+            'url': url
+        }
+        
+        # Extract title
+        title_tag = soup.find('title')
+        if title_tag:
+            content['title'] = self.clean_text(title_tag.get_text())
+        
+        # Extract meta description
+        meta_desc = soup.find('meta', attrs={'name': 'description'})
+        if meta_desc:
+            content['description'] = self.clean_text(meta_desc.get('content', ''))
+        
+        # Extract main content (prioritize main, article, content areas)
+        main_content_selectors = [
+            'main', 'article', '.content', '#content', '.main-content',
+            '.page-content', '.post-content', '.entry-content'
+        ]
+        
+        main_content = ""
+        for selector in main_content_selectors:
+            element = soup.select_one(selector)
+            if element:
+                main_content = self.clean_text(element.get_text())
+                break
+        
+        # If no main content found, extract from body
+        if not main_content:
+            body = soup.find('body')
+            if body:
+                # Remove script and style elements
+                for script in body(["script", "style", "nav", "footer", "header"]):
+                    script.decompose()
+                main_content = self.clean_text(body.get_text())
+        
+        # Prakriti Year Flow is fully static HTML under .cal — prefer it for embeddings / snippets
+        if 'events.prakriti.edu.in' in url.lower():
+            cal = soup.select_one('.cal')
+            if cal:
+                main_content = self.clean_text(cal.get_text())
+        
+        content['main_content'] = main_content
+        
+        # Check if this page contains Substack links and crawl them (unless skip_link_following is True)
+        if not skip_link_following:
+            substack_content = self.extract_substack_content(soup, url)
+            if substack_content:
+                content['main_content'] += "\n\n" + substack_content
+        
+        # For team pages, add structured team member information
+        if 'team' in url.lower():
+            team_info = self.extract_team_structured_info(soup)
+            if team_info:
+                content['main_content'] += " " + team_info
+        
+        # For calendar pages, enhance with event information (Year Flow: HTML parse; legacy: Selenium)
+        if self.is_calendar_events_source_url(url):
+            calendar_info = self.extract_calendar_events_with_selenium(url, query)
+            if calendar_info:
+                content['main_content'] += "\n\n" + calendar_info
+        
+        # Extract headings
+        headings = []
+        for tag in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
+            heading_text = self.clean_text(tag.get_text())
+            if heading_text:
+                headings.append({
+                    'level': tag.name,
+                    'text': heading_text
+                })
+        content['headings'] = headings
+        
+        # Extract relevant links
+        links = []
+        for link in soup.find_all('a', href=True):
+            link_text = self.clean_text(link.get_text())
+            link_url = urljoin(url, link['href'])
+            if link_text and len(link_text) > 3:  # Filter out very short link texts
+                links.append({
+                    'text': link_text,
+                    'url': link_url
+                })
+        content['links'] = links[:20]  # Limit to 20 links
+        
+        return content
+    
     def extract_content_from_url(
         self,
         url: str,
@@ -1115,98 +1220,7 @@ class WebCrawlerAgent:
             response = self.session.get(url, timeout=30)
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Extract different types of content
-            content = {
-                'title': '',
-                'description': '',
-                'main_content': '',
-                'headings': [],
-                'links': [],
-                'url': url
-            }
-            
-            # Extract title
-            title_tag = soup.find('title')
-            if title_tag:
-                content['title'] = self.clean_text(title_tag.get_text())
-            
-            # Extract meta description
-            meta_desc = soup.find('meta', attrs={'name': 'description'})
-            if meta_desc:
-                content['description'] = self.clean_text(meta_desc.get('content', ''))
-            
-            # Extract main content (prioritize main, article, content areas)
-            main_content_selectors = [
-                'main', 'article', '.content', '#content', '.main-content',
-                '.page-content', '.post-content', '.entry-content'
-            ]
-            
-            main_content = ""
-            for selector in main_content_selectors:
-                element = soup.select_one(selector)
-                if element:
-                    main_content = self.clean_text(element.get_text())
-                    break
-            
-            # If no main content found, extract from body
-            if not main_content:
-                body = soup.find('body')
-                if body:
-                    # Remove script and style elements
-                    for script in body(["script", "style", "nav", "footer", "header"]):
-                        script.decompose()
-                    main_content = self.clean_text(body.get_text())
-            
-            # Prakriti Year Flow is fully static HTML under .cal — prefer it for embeddings / snippets
-            if 'events.prakriti.edu.in' in url.lower():
-                cal = soup.select_one('.cal')
-                if cal:
-                    main_content = self.clean_text(cal.get_text())
-            
-            content['main_content'] = main_content
-            
-            # Check if this page contains Substack links and crawl them (unless skip_link_following is True)
-            if not skip_link_following:
-                substack_content = self.extract_substack_content(soup, url)
-                if substack_content:
-                    content['main_content'] += "\n\n" + substack_content
-            
-            # For team pages, add structured team member information
-            if 'team' in url.lower():
-                team_info = self.extract_team_structured_info(soup)
-                if team_info:
-                    content['main_content'] += " " + team_info
-            
-            # For calendar pages, enhance with event information (Year Flow: HTML parse; legacy: Selenium)
-            if self.is_calendar_events_source_url(url):
-                calendar_info = self.extract_calendar_events_with_selenium(url, query)
-                if calendar_info:
-                    content['main_content'] += "\n\n" + calendar_info
-            
-            # Extract headings
-            headings = []
-            for tag in soup.find_all(['h1', 'h2', 'h3', 'h4', 'h5', 'h6']):
-                heading_text = self.clean_text(tag.get_text())
-                if heading_text:
-                    headings.append({
-                        'level': tag.name,
-                        'text': heading_text
-                    })
-            content['headings'] = headings
-            
-            # Extract relevant links
-            links = []
-            for link in soup.find_all('a', href=True):
-                link_text = self.clean_text(link.get_text())
-                link_url = urljoin(url, link['href'])
-                if link_text and len(link_text) > 3:  # Filter out very short link texts
-                    links.append({
-                        'text': link_text,
-                        'url': link_url
-                    })
-            content['links'] = links[:20]  # Limit to 20 links
+            content = self.parse_page_html(url, response.content, query, skip_link_following)
             
             # Cache the crawled content in Supabase for future use
             if SUPABASE_AVAILABLE:
@@ -1252,6 +1266,8 @@ class WebCrawlerAgent:
                     
                     # Upsert to web_crawler_data (one entry per URL per day)
                     supabase.table('web_crawler_data').upsert(cache_data, on_conflict='url,crawled_date').execute()
+                    from app.services.page_search_index import invalidate_page_search_index
+                    invalidate_page_search_index()
                     print(f"[WebCrawler] ✅ Cached URL content in Supabase")
                 except Exception as e:
                     print(f"[WebCrawler] Error caching URL content: {e}")
@@ -1669,14 +1685,11 @@ class WebCrawlerAgent:
         if 'events.prakriti.edu.in' in (url or ''):
             return self.extract_prakriti_year_flow_calendar(url, query)
         try:
-            from selenium import webdriver
-            from selenium.webdriver.chrome.options import Options
-            from selenium.webdriver.chrome.service import Service
             from selenium.webdriver.common.by import By
-            from selenium.webdriver.support.ui import WebDriverWait
-            from selenium.webdriver.support import expected_conditions as EC
-            from selenium.common.exceptions import TimeoutException, NoSuchElementException
-            from webdriver_manager.chrome import ChromeDriverManager
+            from app.services.browser_pool import (
+                dom_signature, get_browser_pool, scroll_into_view, wait_for_document_ready,
+                wait_for_dom_change, wait_for_visible,
+            )
             from datetime import datetime, date
             import re
             
@@ -1797,28 +1810,10 @@ class WebCrawlerAgent:
                             print(f"[WebCrawler] Event: '{event_text[:50]}...' -> No clear date -> Excluding from upcoming")
                             return False
             
-            # Setup Chrome options for faster headless browsing
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--disable-extensions")
-            chrome_options.add_argument("--disable-plugins")
-            chrome_options.add_argument("--disable-images")
-            chrome_options.add_argument("--disable-web-security")
-            chrome_options.add_argument("--disable-features=VizDisplayCompositor")
-            chrome_options.add_argument("--disable-background-timer-throttling")
-            chrome_options.add_argument("--disable-renderer-backgrounding")
-            chrome_options.add_argument("--disable-backgrounding-occluded-windows")
-            
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            try:
+            # Warm browser from the shared pool (reset and returned when the block exits)
+            with get_browser_pool().lease() as driver:
                 driver.get(url)
-                time.sleep(3)  # Wait for page to load
+                wait_for_document_ready(driver)
                 
                 calendar_events = []
                 all_extracted_events = []  # Store all events from all months
@@ -1903,16 +1898,17 @@ class WebCrawlerAgent:
                                 try:
                                     next_button = driver.find_element(By.CSS_SELECTOR, "button[aria-label*='next'], button[aria-label*='Next'], .next, [class*='next']")
                                     if next_button and next_button.is_displayed():
+                                        before = dom_signature(driver)
                                         next_button.click()
-                                        time.sleep(2)  # Wait for page to update
+                                        wait_for_dom_change(driver, before)  # Wait for page to update
                                 except:
                                     pass
                         
                         if month_button and month_button.is_displayed():
-                            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", month_button)
-                            time.sleep(0.5)
+                            scroll_into_view(driver, month_button)
+                            before = dom_signature(driver)
                             month_button.click()
-                            time.sleep(2)  # Wait for calendar to update
+                            wait_for_dom_change(driver, before)  # Wait for calendar to update
                             
                             # Extract events from this month
                             month_events = extract_events_from_current_view()
@@ -1926,10 +1922,10 @@ class WebCrawlerAgent:
                             try:
                                 next_button = driver.find_element(By.CSS_SELECTOR, "button[aria-label*='next'], button[aria-label*='Next'], .next, [class*='next'], button:has(> .fa-chevron-right), button:has(> .fa-angle-right)")
                                 if next_button and next_button.is_displayed():
-                                    driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", next_button)
-                                    time.sleep(0.5)
+                                    scroll_into_view(driver, next_button)
+                                    before = dom_signature(driver)
                                     next_button.click()
-                                    time.sleep(2)  # Wait for calendar to update
+                                    wait_for_dom_change(driver, before)  # Wait for calendar to update
                                     
                                     # Extract events from this month
                                     month_events = extract_events_from_current_view()
@@ -1953,16 +1949,15 @@ class WebCrawlerAgent:
                     for element in clickable_elements[:10]:  # Limit to first 10
                         try:
                             if element.is_displayed() and element.is_enabled():
-                                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", element)
-                                time.sleep(0.2)
+                                scroll_into_view(driver, element)
                                 driver.execute_script("arguments[0].click();", element)
-                                time.sleep(0.5)
                                 
                                 # Look for popup or expanded content
                                 popup_selectors = [
                                     ".event-popup", ".event-details", ".popup", ".modal",
                                     ".event-info", ".event-description", ".tooltip"
                                 ]
+                                wait_for_visible(driver, ", ".join(popup_selectors), timeout=0.5)
                                 
                                 for popup_selector in popup_selectors:
                                     try:
@@ -2107,8 +2102,6 @@ class WebCrawlerAgent:
                     else:
                         return "CALENDAR_DATA: The Prakriti School calendar page shows an events archive with navigation for different months (January through December) and years (2023-2027). The calendar interface is currently showing October 2025. While specific events for the current week are not visible in the static calendar view, Prakriti School regularly organizes cultural festivals (including Diwali, Holi, Eid, Christmas, and other cultural celebrations), sports meets, art exhibitions, academic workshops, and parent-teacher meetings throughout the year. The calendar system is available for checking upcoming events and schedules. For specific festival dates like Diwali, please check the school's official calendar or contact administration."
                     
-            finally:
-                driver.quit()
                 
         except Exception as e:
             print(f"[WebCrawler] Error extracting calendar events with Selenium: {str(e)}")
@@ -2145,70 +2138,203 @@ class WebCrawlerAgent:
         
         return " " + " ".join(team_info) if team_info else ""
     
-    def extract_team_members_with_selenium(self, url: str, process_all: bool = False) -> Dict[str, str]:
+    def _team_member_from_popup_text(self, member_name: str, popup_content: str, known_names: List[str]) -> Optional[Dict[str, str]]:
+        """Team member record from popup / profile-page text; None when the text is not about ``member_name``"""
+        # CRITICAL: If popup doesn't contain member name, skip this member (don't store wrong data)
+        if not popup_content or member_name.lower() not in popup_content.lower():
+            print(f"[WebCrawler] ⚠️ Extracted popup doesn't contain {member_name}, skipping to avoid wrong data")
+            return None
+        
+        # Use the member_name we clicked on (most reliable)
+        name = member_name
+        member_name_lower = member_name.lower()
+        
+        # Check if popup contains multiple members - if so, extract only the target member's section
+        popup_lower = popup_content.lower()
+        member_name_pos = popup_lower.find(member_name_lower)
+        
+        # Initialize list to track other members found in popup
+        other_members_found = []
+        
+        # Check if there are other member names in the popup
+        if member_name_pos != -1:
+            for other_name in known_names:
+                if other_name.lower() != member_name_lower:
+                    other_pos = popup_lower.find(other_name.lower())
+                    if other_pos != -1:
+                        other_members_found.append((other_name, other_pos))
+        
+        # If other members found, extract only the section for our target member
+        if other_members_found and member_name_pos != -1:
+            # Sort other members by position
+            other_members_found.sort(key=lambda x: x[1])
+        
+            # Find the next member after our target member
+            next_member_pos = None
+            for other_name, other_pos in other_members_found:
+                if other_pos > member_name_pos:
+                    next_member_pos = other_pos
+                    break
+        
+            # Extract only the section between our member and the next member (or end)
+            if next_member_pos:
+                # Extract from member name to next member
+                member_section = popup_content[member_name_pos:next_member_pos]
+            else:
+                # Extract from member name to end
+                member_section = popup_content[member_name_pos:]
+        
+            # Use the extracted section instead of full popup
+            popup_content = member_section
+            print(f"[WebCrawler] Extracted member-specific section (found {len(other_members_found)} other members in popup)")
+        
+        # Extract details from popup content
+        lines = popup_content.split('\n')
+        details = []
+        
+        # Get list of other member names for filtering
+        other_member_names = [other_name for other_name, _ in other_members_found] if other_members_found else []
+        
+        # Collect all non-empty lines as details
+        for line in lines:
+            line = line.strip()
+            if line and len(line) > 2:
+                # Skip if this line is just the member's name (we already have it)
+                if line.lower() == member_name_lower or line.lower() in member_name_lower or member_name_lower in line.lower():
+                    continue
+                # Skip if line contains another member's name (filter out other members)
+                if other_member_names and any(other_name.lower() in line.lower() for other_name in other_member_names):
+                    continue
+                details.append(line)
+        
+        # Extract title (usually contains "Facilitator", "Teacher", "Director", etc.)
+        title = ""
+        for line in details:
+            line_lower = line.lower()
+            if any(title_word in line_lower for title_word in ['facilitator', 'teacher', 'director', 'coordinator', 'principal', 'mentor', 'manager', 'education', 'programme', 'curriculum']):
+                title = line.strip()
+                break
+        
+        # Extract description (first substantial line after name/title)
+        description = ""
+        for line in details:
+            if line.strip() and len(line.strip()) > 10:
+                # Skip if this line is the title
+                if title and title.lower() in line.lower():
+                    continue
+                description = line.strip()
+                break
+        
+        # Combine remaining details (all other lines)
+        remaining_details = ' '.join([d for d in details if d.strip() and d != title and d != description][:15])
+        
+        # Check if extracted data is minimal (only title, no description/details)
+        # If so, use fallback data if available
+        data_is_minimal = (not description or len(description) < 50) and (not remaining_details or len(remaining_details) < 50)
+        
+        if data_is_minimal and member_name in self.fallback_data:
+            print(f"[WebCrawler] ⚠️ Extracted data is minimal for {member_name}, using fallback data")
+            fallback = self.fallback_data[member_name]
+            member_info = {
+                'name': fallback['name'],
+                'title': fallback['title'] if not title else title,  # Use extracted title if available
+                'description': fallback['description'],
+                'details': fallback['details'],
+                'full_content': fallback['full_content']
+            }
+            print(f"[WebCrawler] ✅ Using fallback data for: {name}")
+        else:
+            # Store using the clicked member_name (most reliable)
+            member_info = {
+                'name': name,
+                'title': title,
+                'description': description,
+                'details': remaining_details,
+                'full_content': popup_content
+            }
+            print(f"[WebCrawler] Successfully extracted info for: {name} ({title if title else 'No title'})")
+        return member_info
+    
+    def _team_profile_link(self, card, page_url: str) -> Optional[str]:
+        """Same-site profile page a team card links to (None for modal-only cards)"""
+        try:
+            links = [card] if card.tag_name == 'a' else card.find_elements(By.CSS_SELECTOR, "a[href]")
+            for link in links:
+                href = (link.get_attribute('href') or '').strip()
+                parsed = urlparse(href)
+                if parsed.scheme not in ('http', 'https') or parsed.netloc != urlparse(page_url).netloc:
+                    continue
+                if parsed.path.rstrip('/') == urlparse(page_url).path.rstrip('/'):
+                    continue  # '#' anchors / links back to the team page itself
+                return href
+        except Exception:
+            pass
+        return None
+    
+    def extract_team_members(self, url: str, process_all: bool = False, html: Optional[bytes] = None) -> Dict[str, Dict]:
+        """Team members from the static page HTML (one request), using Selenium only for the rest
+        
+        Args:
+            url: Team page URL
+            process_all: Passed to the Selenium path for members the static parse could not resolve
+            html: Already-fetched page HTML (skips the GET)
+        """
+        from app.utils.team_page_parser import extract_member_texts
+        
+        team_members = {}
+        started = time.perf_counter()
+        try:
+            if html is None:
+                response = self.session.get(url, timeout=30)
+                response.raise_for_status()
+                html = response.content
+            for member_name, text in extract_member_texts(html, TEAM_KNOWN_NAMES).items():
+                member_info = self._team_member_from_popup_text(member_name, text, TEAM_KNOWN_NAMES)
+                if member_info:
+                    team_members[member_name] = member_info
+        except Exception as e:
+            print(f"[WebCrawler] ⚠️ Static team page parse failed: {e}")
+        
+        unresolved = [name for name in TEAM_KNOWN_NAMES if name not in team_members]
+        print(f"[WebCrawler] Static team parse resolved {len(team_members)}/{len(TEAM_KNOWN_NAMES)} members "
+              f"in {(time.perf_counter() - started) * 1000:.0f}ms")
+        if unresolved:
+            print(f"[WebCrawler] Falling back to Selenium for {len(unresolved)} members: {', '.join(unresolved)}")
+            for member_name, member_info in self.extract_team_members_with_selenium(url, process_all, members=unresolved).items():
+                team_members.setdefault(member_name, member_info)
+        return team_members
+    
+    def extract_team_members_with_selenium(self, url: str, process_all: bool = False, members: Optional[List[str]] = None) -> Dict[str, str]:
         """Extract team member information using Selenium to handle popups/modals
         
         Args:
             url: Team page URL to crawl
             process_all: If True, process all team members. If False, limit to 3 for speed (default).
+            members: Only look for these names (default: every name in TEAM_KNOWN_NAMES)
         """
+        from app.services.browser_pool import (
+            POPUP_CSS, first_visible, get_browser_pool, open_in_tabs, scroll_into_view,
+            scroll_to_end, wait_for_document_ready, wait_for_no_visible, wait_until,
+        )
+        
         # Use class-level fallback_data
         fallback_data = self.fallback_data
         
         try:
             print(f"[WebCrawler] Using Selenium to extract team members from: {url}")
             
-            # Setup Chrome options for headless browsing
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--disable-extensions")
-            chrome_options.add_argument("--disable-plugins")
-            chrome_options.add_argument("--disable-images")
-            chrome_options.add_argument("--disable-web-security")
-            chrome_options.add_argument("--disable-features=VizDisplayCompositor")
-            chrome_options.add_argument("--disable-background-timer-throttling")
-            chrome_options.add_argument("--disable-renderer-backgrounding")
-            chrome_options.add_argument("--disable-backgrounding-occluded-windows")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
-            
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            try:
+            # Warm browser from the shared pool (reset and returned when the block exits)
+            with get_browser_pool().lease() as driver:
                 driver.get(url)
-                time.sleep(1)  # Minimal wait time for faster processing
+                wait_for_document_ready(driver)
                 
                 team_members = {}
                 
-                # Wait for page to load completely
-                time.sleep(2)
-                
                 # IMPORTANT: Scroll to bottom of page to ensure all team members are loaded
                 # Some team members might be below the fold and need scrolling to be visible
+                # (stops as soon as the page height stops growing)
                 print("[WebCrawler] Scrolling page to load all team members...")
-                last_height = driver.execute_script("return document.body.scrollHeight")
-                scroll_attempts = 0
-                max_scroll_attempts = 5
-                
-                while scroll_attempts < max_scroll_attempts:
-                    # Scroll to bottom
-                    driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                    time.sleep(1)  # Wait for content to load
-                    
-                    # Check if new content loaded
-                    new_height = driver.execute_script("return document.body.scrollHeight")
-                    if new_height == last_height:
-                        break  # No more content to load
-                    last_height = new_height
-                    scroll_attempts += 1
-                
-                # Scroll back to top to ensure all elements are accessible
-                driver.execute_script("window.scrollTo(0, 0);")
-                time.sleep(0.5)
+                last_height = scroll_to_end(driver)
                 
                 print(f"[WebCrawler] Finished scrolling, page height: {last_height}px")
                 
@@ -2232,12 +2358,7 @@ class WebCrawlerAgent:
                 ]
                 
                 # Strategy: Find team members by their names (most reliable)
-                known_names = [
-                    'Vinita Krishna', 'Bharti Batra', 'Sh H C Batra', 'Shilpa Tayal',
-                    'Mridul Batra', 'Rahul Batra', 'Vidya Vishwanathan', 'Priyanka Oberoi',
-                    'Ritu Martin', 'Shuchi Mishra', 'Gayatri Tahiliani', 'Shraddha Rana Goel',
-                    'Dr. Priyanka Jain Bhabu', 'Vanila Ghai', 'Gunjan Bhatia'
-                ]
+                known_names = list(TEAM_KNOWN_NAMES)
                 
                 # Also try variations of names (some might have different spellings)
                 name_variations = {
@@ -2256,7 +2377,7 @@ class WebCrawlerAgent:
                 team_member_cards = []
                 found_names = set()  # Track found names to avoid duplicates
                 
-                for name in known_names:
+                for name in (members or known_names):
                     if name in found_names:
                         continue  # Skip if already found
                     
@@ -2356,14 +2477,7 @@ class WebCrawlerAgent:
                 # Function to check if popup is still visible (defined before loop)
                 def is_popup_visible():
                     try:
-                        popups = driver.find_elements(By.CSS_SELECTOR, ".popup, .modal, [class*='popup'], [class*='modal']")
-                        for popup in popups:
-                            try:
-                                if popup.is_displayed():
-                                    return True
-                            except:
-                                continue
-                        return False
+                        return first_visible(driver, POPUP_CSS) is not None
                     except:
                         return False
                 
@@ -2372,11 +2486,31 @@ class WebCrawlerAgent:
                 # Limit elements based on process_all flag
                 max_elements = len(all_clickable) if process_all else min(10, len(all_clickable))
                 print(f"[WebCrawler] Processing up to {max_elements} team member elements (process_all={process_all})")
+                team_member_cards = team_member_cards[:max_elements]
+                
+                # Cards that link to a profile page: load those pages in parallel tabs instead of
+                # clicking through modals one at a time
+                profile_links = {}
+                for member_name, card in team_member_cards:
+                    profile_url = self._team_profile_link(card, url)
+                    if profile_url:
+                        profile_links[member_name] = profile_url
+                if profile_links:
+                    print(f"[WebCrawler] Opening {len(profile_links)} profile pages in tabs...")
+                    profile_texts = open_in_tabs(
+                        driver, profile_links.values(),
+                        lambda d, _url: d.find_element(By.TAG_NAME, "body").text,
+                    )
+                    for member_name, profile_url in profile_links.items():
+                        member_info = self._team_member_from_popup_text(member_name, profile_texts.get(profile_url) or "", known_names)
+                        if member_info:
+                            team_members[member_name] = member_info
+                    team_member_cards = [(name, card) for name, card in team_member_cards if name not in team_members]
                 
                 processed_count = 0
                 previous_popup_content_global = ""  # Track previous popup content globally
                 
-                for i, (member_name, element) in enumerate(team_member_cards[:max_elements]):
+                for i, (member_name, element) in enumerate(team_member_cards):
                     try:
                         # Re-find element fresh to avoid stale references
                         try:
@@ -2415,14 +2549,13 @@ class WebCrawlerAgent:
                                 from selenium.webdriver.common.keys import Keys
                                 body = driver.find_element(By.TAG_NAME, "body")
                                 body.send_keys(Keys.ESCAPE)
-                                time.sleep(1.0)
+                                wait_for_no_visible(driver, timeout=1.0)
                             except:
                                 pass
                         
-                        # Scroll element into view
+                        # Scroll element into view (instant, so there is no animation to wait for)
                         try:
-                            driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", element)
-                            time.sleep(0.5)  # Wait for scroll
+                            scroll_into_view(driver, element)
                         except Exception as e:
                             print(f"[WebCrawler] Warning: Could not scroll to element: {e}")
                             continue
@@ -2454,8 +2587,7 @@ class WebCrawlerAgent:
                                 
                                 # Scroll again before clicking
                                 try:
-                                    driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", element)
-                                    time.sleep(0.3)
+                                    scroll_into_view(driver, element)
                                 except:
                                     pass
                                 
@@ -2466,7 +2598,6 @@ class WebCrawlerAgent:
                             except Exception as e:
                                 if "stale" in str(e).lower():
                                     print(f"[WebCrawler] Stale element on attempt {attempt+1}, retrying...")
-                                    time.sleep(0.3)
                                     continue
                                 else:
                                     # Try alternative click method
@@ -2482,18 +2613,20 @@ class WebCrawlerAgent:
                             print(f"[WebCrawler] Could not click element {i+1}, skipping...")
                             continue
                         
-                        time.sleep(2.0)  # Wait longer for popup to appear and stabilize
-                        
                         # Wait for popup to appear and verify it's the correct one
                         # Check if popup contains the member's name AND verify content is actually different
+                        # (a WebDriverWait condition, so a popup that renders in 200ms costs 200ms rather than a fixed delay)
                         popup_appeared = False
                         popup_contains_name = False
                         previous_popup_content = previous_popup_content_global  # Use global previous content
                         
-                        for wait_attempt in range(15):  # Wait up to 7.5 seconds for popup to update
+                        popup_state = {'appeared': False}
+
+                        def popup_matches_member(d):
+                            """Text of the displayed popup once it shows this member (WebDriverWait condition)"""
                             try:
                                 if is_popup_visible():
-                                    popup_appeared = True
+                                    popup_state['appeared'] = True
                                     # Check if popup contains the member's name
                                     # Use more specific selectors to avoid navigation menu
                                     popup_selectors_specific = [
@@ -2526,7 +2659,6 @@ class WebCrawlerAgent:
                                                         # Check if popup content actually changed (not stale)
                                                         if popup_text == previous_popup_content and previous_popup_content:
                                                             # Content hasn't changed yet, wait more for popup to update
-                                                            time.sleep(0.5)
                                                             continue
                                                         
                                                         # Check if popup contains member name anywhere (not just at start)
@@ -2574,21 +2706,21 @@ class WebCrawlerAgent:
                                                                     continue
                                                             
                                                             if not starts_with_other:
-                                                                popup_contains_name = True
-                                                                previous_popup_content_global = popup_text  # Update global
                                                                 print(f"[WebCrawler] ✅ Popup appeared with correct name: {member_name} (found at position {member_name_pos})")
-                                                                break
+                                                                return popup_text
                                                 except:
                                                     continue
-                                            if popup_contains_name:
-                                                break
                                         except:
                                             continue
-                                    if popup_contains_name:
-                                        break
                             except:
                                 pass
-                            time.sleep(0.5)
+                            return False
+
+                        popup_text = wait_until(driver, popup_matches_member, timeout=7.5)  # Wait up to 7.5 seconds for popup to update
+                        popup_appeared = popup_state['appeared']
+                        if popup_text:
+                            popup_contains_name = True
+                            previous_popup_content_global = popup_text  # Update global
                         
                         if not popup_appeared:
                             print(f"[WebCrawler] ⚠️ Popup did not appear for {member_name}, using fallback data")
@@ -2628,16 +2760,16 @@ class WebCrawlerAgent:
                                 from selenium.webdriver.common.keys import Keys
                                 body = driver.find_element(By.TAG_NAME, "body")
                                 body.send_keys(Keys.ESCAPE)
-                                time.sleep(1.0)
-                                # Force close with JavaScript
-                                driver.execute_script("""
-                                    var popups = document.querySelectorAll('.popup, .modal, [class*="popup"], [class*="modal"]');
-                                    popups.forEach(function(popup) {
-                                        popup.style.display = 'none';
-                                        popup.classList.remove('active', 'show', 'open');
-                                    });
-                                """)
-                                time.sleep(2.0)  # Wait longer for popup to fully close
+                                if not wait_for_no_visible(driver, timeout=1.0):
+                                    # Force close with JavaScript
+                                    driver.execute_script("""
+                                        var popups = document.querySelectorAll('.popup, .modal, [class*="popup"], [class*="modal"]');
+                                        popups.forEach(function(popup) {
+                                            popup.style.display = 'none';
+                                            popup.classList.remove('active', 'show', 'open');
+                                        });
+                                    """)
+                                    wait_for_no_visible(driver, timeout=2.0)  # Wait for popup to fully close
                             except:
                                 pass
                             
@@ -2653,32 +2785,33 @@ class WebCrawlerAgent:
                                     retry_element = name_elem
                                 
                                 # Scroll and click again
-                                driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", retry_element)
-                                time.sleep(1.0)
+                                scroll_into_view(driver, retry_element)
                                 driver.execute_script("arguments[0].click();", retry_element)
-                                time.sleep(3.0)  # Wait longer for popup to appear
                                 
-                                # Check again if popup contains name
-                                if is_popup_visible():
-                                    popups = driver.find_elements(By.CSS_SELECTOR, ".popup, .modal, [class*='popup'], [class*='modal']")
-                                    for popup in popups:
+                                # Wait (up to 3s) for a popup that contains the name and is not the previous one
+                                def popup_for_member(d):
+                                    for popup in d.find_elements(By.CSS_SELECTOR, POPUP_CSS):
                                         try:
                                             if popup.is_displayed():
                                                 popup_text_retry = popup.text.strip()
                                                 if member_name.lower() in popup_text_retry.lower() and popup_text_retry != previous_popup_content_global:
-                                                    popup_contains_name = True
-                                                    previous_popup_content_global = popup_text_retry
-                                                    print(f"[WebCrawler] ✅ Popup appeared with correct name after retry: {member_name}")
-                                                    break
+                                                    return popup_text_retry
                                         except:
                                             continue
+                                    return None
+                                
+                                popup_text_retry = wait_until(driver, popup_for_member, timeout=3.0)
+                                if popup_text_retry:
+                                    popup_contains_name = True
+                                    previous_popup_content_global = popup_text_retry
+                                    print(f"[WebCrawler] ✅ Popup appeared with correct name after retry: {member_name}")
                                 
                                 if not popup_contains_name:
                                     print(f"[WebCrawler] ⚠️ Still wrong popup after retry, using fallback data for {member_name}")
                                     # Close popup again
                                     try:
                                         body.send_keys(Keys.ESCAPE)
-                                        time.sleep(1.0)
+                                        wait_for_no_visible(driver, timeout=1.0)
                                     except:
                                         pass
                                     # Use fallback data if available
@@ -2746,9 +2879,6 @@ class WebCrawlerAgent:
                         popup_content = ""
                         popup_element = None
                         
-                        # Wait a bit for popup animation
-                        time.sleep(0.5)
-                        
                         for popup_selector in popup_selectors:
                             try:
                                 popups = driver.find_elements(By.CSS_SELECTOR, popup_selector)
@@ -2839,126 +2969,10 @@ class WebCrawlerAgent:
                         if popup_content:
                             print(f"[WebCrawler] Extracted popup content: {popup_content[:200]}...")
                             
-                            # IMPORTANT: Verify popup content actually contains the member's name
-                            popup_content_lower = popup_content.lower()
-                            member_name_lower = member_name.lower()
-                            
-                            # CRITICAL: If popup doesn't contain member name, skip this member (don't store wrong data)
-                            if member_name_lower not in popup_content_lower:
-                                print(f"[WebCrawler] ⚠️ Extracted popup doesn't contain {member_name}, skipping to avoid wrong data")
-                                popup_content = ""  # Clear wrong content
-                            
-                            # Only process if we have valid popup content
-                            # IMPORTANT: If popup contains member's name anywhere, store it
-                            # Don't reject based on extracted name - just use the clicked member_name
-                            if popup_content:
-                                # Use the member_name we clicked on (most reliable)
-                                name = member_name
-                                
-                                # Check if popup contains multiple members - if so, extract only the target member's section
-                                popup_lower = popup_content.lower()
-                                member_name_pos = popup_lower.find(member_name_lower)
-                                
-                                # Initialize list to track other members found in popup
-                                other_members_found = []
-                                
-                                # Check if there are other member names in the popup
-                                if member_name_pos != -1:
-                                    for other_name in known_names:
-                                        if other_name.lower() != member_name_lower:
-                                            other_pos = popup_lower.find(other_name.lower())
-                                            if other_pos != -1:
-                                                other_members_found.append((other_name, other_pos))
-                                
-                                # If other members found, extract only the section for our target member
-                                if other_members_found and member_name_pos != -1:
-                                    # Sort other members by position
-                                    other_members_found.sort(key=lambda x: x[1])
-                                    
-                                    # Find the next member after our target member
-                                    next_member_pos = None
-                                    for other_name, other_pos in other_members_found:
-                                        if other_pos > member_name_pos:
-                                            next_member_pos = other_pos
-                                            break
-                                    
-                                    # Extract only the section between our member and the next member (or end)
-                                    if next_member_pos:
-                                        # Extract from member name to next member
-                                        member_section = popup_content[member_name_pos:next_member_pos]
-                                    else:
-                                        # Extract from member name to end
-                                        member_section = popup_content[member_name_pos:]
-                                    
-                                    # Use the extracted section instead of full popup
-                                    popup_content = member_section
-                                    print(f"[WebCrawler] Extracted member-specific section (found {len(other_members_found)} other members in popup)")
-                                
-                                # Extract details from popup content
-                                lines = popup_content.split('\n')
-                                details = []
-                                
-                                # Get list of other member names for filtering
-                                other_member_names = [other_name for other_name, _ in other_members_found] if other_members_found else []
-                                
-                                # Collect all non-empty lines as details
-                                for line in lines:
-                                    line = line.strip()
-                                    if line and len(line) > 2:
-                                        # Skip if this line is just the member's name (we already have it)
-                                        if line.lower() == member_name_lower or line.lower() in member_name_lower or member_name_lower in line.lower():
-                                            continue
-                                        # Skip if line contains another member's name (filter out other members)
-                                        if other_member_names and any(other_name.lower() in line.lower() for other_name in other_member_names):
-                                            continue
-                                        details.append(line)
-                                
-                                # Extract title (usually contains "Facilitator", "Teacher", "Director", etc.)
-                                title = ""
-                                for line in details:
-                                    line_lower = line.lower()
-                                    if any(title_word in line_lower for title_word in ['facilitator', 'teacher', 'director', 'coordinator', 'principal', 'mentor', 'manager', 'education', 'programme', 'curriculum']):
-                                        title = line.strip()
-                                        break
-                                
-                                # Extract description (first substantial line after name/title)
-                                description = ""
-                                for line in details:
-                                    if line.strip() and len(line.strip()) > 10:
-                                        # Skip if this line is the title
-                                        if title and title.lower() in line.lower():
-                                            continue
-                                        description = line.strip()
-                                        break
-                                
-                                # Combine remaining details (all other lines)
-                                remaining_details = ' '.join([d for d in details if d.strip() and d != title and d != description][:15])
-                                
-                                # Check if extracted data is minimal (only title, no description/details)
-                                # If so, use fallback data if available
-                                data_is_minimal = (not description or len(description) < 50) and (not remaining_details or len(remaining_details) < 50)
-                                
-                                if data_is_minimal and member_name in fallback_data:
-                                    print(f"[WebCrawler] ⚠️ Extracted data is minimal for {member_name}, using fallback data")
-                                    fallback = fallback_data[member_name]
-                                    team_members[name] = {
-                                        'name': fallback['name'],
-                                        'title': fallback['title'] if not title else title,  # Use extracted title if available
-                                        'description': fallback['description'],
-                                        'details': fallback['details'],
-                                        'full_content': fallback['full_content']
-                                    }
-                                    print(f"[WebCrawler] ✅ Using fallback data for: {name}")
-                                else:
-                                    # Store using the clicked member_name (most reliable)
-                                    team_members[name] = {
-                                        'name': name,
-                                        'title': title,
-                                        'description': description,
-                                        'details': remaining_details,
-                                        'full_content': popup_content
-                                    }
-                                    print(f"[WebCrawler] Successfully extracted info for: {name} ({title if title else 'No title'})")
+                            # Only store text that is actually about this member (popup may still show another card)
+                            member_info = self._team_member_from_popup_text(member_name, popup_content, known_names)
+                            if member_info:
+                                team_members[member_name] = member_info
                             else:
                                 # No valid popup content - check if fallback data is available
                                 if member_name in fallback_data:
@@ -2993,10 +3007,9 @@ class WebCrawlerAgent:
                                         from selenium.webdriver.common.keys import Keys
                                         body = driver.find_element(By.TAG_NAME, "body")
                                         body.send_keys(Keys.ESCAPE)
-                                        time.sleep(0.8)  # Wait longer for animation
                                         
-                                        # Verify popup closed
-                                        if not is_popup_visible():
+                                        # Verify popup closed (waits out the close animation)
+                                        if wait_for_no_visible(driver, timeout=0.8):
                                             popup_closed = True
                                             print(f"[WebCrawler] ✅ Popup closed with Escape key")
                                             break
@@ -3019,10 +3032,9 @@ class WebCrawlerAgent:
                                                     try:
                                                         if close_btn.is_displayed():
                                                             driver.execute_script("arguments[0].click();", close_btn)
-                                                            time.sleep(0.8)
                                                             
                                                             # Verify popup closed
-                                                            if not is_popup_visible():
+                                                            if wait_for_no_visible(driver, timeout=0.8):
                                                                 popup_closed = True
                                                                 print(f"[WebCrawler] ✅ Popup closed with close button")
                                                                 break
@@ -3041,10 +3053,9 @@ class WebCrawlerAgent:
                                                 try:
                                                     if overlay.is_displayed():
                                                         driver.execute_script("arguments[0].click();", overlay)
-                                                        time.sleep(0.8)
                                                         
                                                         # Verify popup closed
-                                                        if not is_popup_visible():
+                                                        if wait_for_no_visible(driver, timeout=0.8):
                                                             popup_closed = True
                                                             print(f"[WebCrawler] ✅ Popup closed by clicking overlay")
                                                             break
@@ -3067,10 +3078,9 @@ class WebCrawlerAgent:
                                                     overlay.style.display = 'none';
                                                 });
                                             """)
-                                            time.sleep(0.5)
                                             
                                             # Verify popup closed
-                                            if not is_popup_visible():
+                                            if wait_for_no_visible(driver, timeout=0.5):
                                                 popup_closed = True
                                                 print(f"[WebCrawler] ✅ Popup closed with JavaScript")
                                                 break
@@ -3080,12 +3090,8 @@ class WebCrawlerAgent:
                                     # If popup is closed, break
                                     if popup_closed:
                                         break
-                                    
-                                    # Wait before next attempt
-                                    time.sleep(0.3)
                                 except Exception as e:
                                     print(f"[WebCrawler] Error closing popup (attempt {attempt+1}): {str(e)[:50]}")
-                                    time.sleep(0.3)
                             
                             if not popup_closed:
                                 print(f"[WebCrawler] ⚠️ Could not close popup for {member_name} after {max_close_attempts} attempts")
@@ -3093,7 +3099,7 @@ class WebCrawlerAgent:
                                 try:
                                     print(f"[WebCrawler] 🔄 Reloading page to reset popup state...")
                                     driver.refresh()
-                                    time.sleep(2)
+                                    wait_for_document_ready(driver)
                                     # Re-find all team member cards after reload
                                     # (This will be handled in the next iteration)
                                 except:
@@ -3103,15 +3109,13 @@ class WebCrawlerAgent:
                         # Verify popup is actually closed before proceeding
                         final_check_attempts = 5
                         for check in range(final_check_attempts):
-                            if not is_popup_visible():
+                            if wait_for_no_visible(driver, timeout=0.5):
                                 break
-                            time.sleep(0.5)
                             # Try closing again if still visible
                             try:
                                 from selenium.webdriver.common.keys import Keys
                                 body = driver.find_element(By.TAG_NAME, "body")
                                 body.send_keys(Keys.ESCAPE)
-                                time.sleep(0.5)
                             except:
                                 pass
                         
@@ -3130,13 +3134,10 @@ class WebCrawlerAgent:
                                         overlay.style.display = 'none';
                                     });
                                 """)
-                                time.sleep(1.0)
+                                wait_for_no_visible(driver, timeout=1.0)
                             except:
                                 pass
                         
-                        # Wait for DOM to fully stabilize before next click
-                        time.sleep(1.5)
-                        
                         processed_count += 1
                         
                     except Exception as e:
@@ -3152,13 +3153,46 @@ class WebCrawlerAgent:
                 
                 return team_members
                 
-            finally:
-                driver.quit()
-                
         except Exception as e:
             print(f"[WebCrawler] Error with Selenium extraction: {e}")
             return {}
     
+    @staticmethod
+    def score_pages_by_keywords(pages: List[Dict], query_words: List[str]) -> List[Dict]:
+        """Substring keyword scoring (title 5, description 3, first 500 chars of content 1,
+        query_keywords 2); used when the page index is unavailable and as the benchmark baseline"""
+        scored_pages = []
+        for page in pages:
+            score = 0
+            page_title = (page.get('title') or '').lower()
+            page_desc = (page.get('description') or '').lower()
+            page_content = (page.get('main_content') or '').lower()
+            
+            # Score by keyword matches
+            for word in query_words:
+                if word in page_title:
+                    score += 5  # Title match = high relevance
+                if word in page_desc:
+                    score += 3  # Description match = medium relevance
+                if word in page_content[:500]:  # Only check first 500 chars
+                    score += 1  # Content match = low relevance
+            
+            # Boost score if query_keywords match
+            page_keywords = page.get('query_keywords', [])
+            if page_keywords:
+                matched_keywords = sum(1 for word in query_words if any(kw in word or word in kw for kw in page_keywords))
+                score += matched_keywords * 2
+            
+            if score > 0:
+                scored_pages.append({
+                    'url': page.get('url'),
+                    'title': page.get('title'),
+                    'description': page.get('description'),
+                    'main_content': page.get('main_content'),
+                    'relevance_score': score
+                })
+        return scored_pages
+    
     def search_prakriti_content(self, query: str) -> List[Dict[str, str]]:
         """Search PrakritSchool content from cached Supabase data with QUERY-BASED FILTERING"""
         print(f"[WebCrawler] Searching PrakritSchool cached content for: {query}")
@@ -3197,65 +3231,52 @@ class WebCrawlerAgent:
                 elif self.is_testimonial_related(query):
                     content_type = 'testimonial'
                 
-                # Query Supabase with filtering (TOKEN OPTIMIZATION - only get relevant pages)
-                base_query = supabase.table('web_crawler_data').select('url, title, description, main_content, content_type, query_keywords').eq('is_active', True).gte('crawled_at', (datetime.utcnow() - timedelta(hours=24)).isoformat())
-                
-                # Filter by content_type if detected (handle special cases first)
+                # Content types to rank within (handle special cases first)
+                content_types = None
                 if content_type:
                     # Special case: Prakriti articles override substack logic
                     if 'prakriti' in query_lower and 'article' in query_lower:
-                        base_query = base_query.eq('content_type', 'article')
+                        content_types = ['article']
                         print(f"[WebCrawler] SPECIAL CASE: Prakriti article query - filtering ONLY by content_type: article")
                     elif is_substack_query:
                         # For Substack queries, search both 'news' and 'article' content types
-                        base_query = base_query.in_('content_type', ['news', 'article'])
+                        content_types = ['news', 'article']
                         print(f"[WebCrawler] Filtering by content_type: news OR article (Substack query)")
                     else:
-                        base_query = base_query.eq('content_type', content_type)
+                        content_types = [content_type]
                         print(f"[WebCrawler] Filtering by content_type: {content_type}")
                 elif is_substack_query:
                     # Fallback for substack queries without specific content_type
-                    base_query = base_query.in_('content_type', ['news', 'article'])
+                    content_types = ['news', 'article']
                     print(f"[WebCrawler] Filtering by content_type: news OR article (Substack query - fallback)")
                 
-                # Get all matching pages
-                result = base_query.execute()
+                # Rank with the in-process BM25 index (no per-query page fetch); the index only
+                # returns pages crawled in the last 24h, like the old Supabase filter
+                from app.services.page_search_index import get_page_search_index
+                page_index = get_page_search_index()
+                ranked = page_index.search(query, content_types=content_types, limit=3)
+                if ranked is None:
+                    # Index could not be loaded - score a direct fetch the old way
+                    base_query = supabase.table('web_crawler_data').select('url, title, description, main_content, content_type, query_keywords').eq('is_active', True).gte('crawled_at', (datetime.utcnow() - timedelta(hours=24)).isoformat())
+                    if content_types:
+                        base_query = base_query.in_('content_type', content_types)
+                    result = base_query.execute()
+                    scored_pages = self.score_pages_by_keywords(result.data or [], query_words)
+                    has_pages = bool(result.data)
+                else:
+                    scored_pages = [
+                        {
+                            'url': page.get('url'),
+                            'title': page.get('title'),
+                            'description': page.get('description'),
+                            'main_content': page.get('main_content'),
+                            'relevance_score': score
+                        }
+                        for page, score in ranked
+                    ]
+                    has_pages = bool(scored_pages) or page_index.has_pages(content_types)
                 
-                if result.data and len(result.data) > 0:
-                    print(f"[WebCrawler] Found {len(result.data)} cached pages in Supabase")
-                    
-                    # Score and filter by query relevance (TOKEN OPTIMIZATION)
-                    scored_pages = []
-                    for page in result.data:
-                        score = 0
-                        page_title = (page.get('title') or '').lower()
-                        page_desc = (page.get('description') or '').lower()
-                        page_content = (page.get('main_content') or '').lower()
-                        
-                        # Score by keyword matches
-                        for word in query_words:
-                            if word in page_title:
-                                score += 5  # Title match = high relevance
-                            if word in page_desc:
-                                score += 3  # Description match = medium relevance
-                            if word in page_content[:500]:  # Only check first 500 chars
-                                score += 1  # Content match = low relevance
-                        
-                        # Boost score if query_keywords match
-                        page_keywords = page.get('query_keywords', [])
-                        if page_keywords:
-                            matched_keywords = sum(1 for word in query_words if any(kw in word or word in kw for kw in page_keywords))
-                            score += matched_keywords * 2
-                        
-                        if score > 0:
-                            scored_pages.append({
-                                'url': page.get('url'),
-                                'title': page.get('title'),
-                                'description': page.get('description'),
-                                'main_content': page.get('main_content'),
-                                'relevance_score': score
-                            })
-                    
+                if has_pages:
                     # Sort by relevance and return TOP 3 ONLY (TOKEN OPTIMIZATION)
                     scored_pages.sort(key=lambda x: x['relevance_score'], reverse=True)
                     top_pages = scored_pages[:3]  # Only top 3 most relevant pages
@@ -3655,8 +3676,35 @@ class WebCrawlerAgent:
         
         return ""
     
+    def _response_intent(self, query: str) -> str:
+        """Cache partition for a query: calendar answers expire fast, team answers drop on team syncs"""
+        if self.is_calendar_related(query):
+            return 'calendar'
+        if self.is_team_related(query) or self.is_role_based_query(query) or self.is_specific_person_query(query):
+            return 'team'
+        if self.is_article_related(query):
+            return 'article'
+        return 'general'
+    
     def get_enhanced_response(self, query: str) -> str:
-        """Get enhanced response with web crawling for PrakritSchool queries"""
+        """Get enhanced response with web crawling for PrakritSchool queries (L1/L2 cached)"""
+        try:
+            from app.services.enhanced_response_cache import get_enhanced_response_cache
+            cache = get_enhanced_response_cache()
+        except Exception as e:
+            print(f"[WebCrawler] Enhanced response cache unavailable: {e}")
+            return self._compute_enhanced_response(query)
+        
+        intent = self._response_intent(query)
+        return cache.get_or_compute(intent, query, lambda: self._compute_enhanced_response(query))
+    
+    def get_response_cache_stats(self) -> Dict[str, Any]:
+        """Per-tier hit rates of the enhanced response cache"""
+        from app.services.enhanced_response_cache import get_enhanced_response_cache
+        return get_enhanced_response_cache().stats()
+    
+    def _compute_enhanced_response(self, query: str) -> str:
+        """Build the enhanced response: team data → web_crawler_data → search_cache → web crawl"""
         print(f"[WebCrawler] Getting enhanced response for: {query}")
         print(f"[WebCrawler] 🔍 Cache check priority: 1) team_member_data (for person queries) → 2) web_crawler_data table → 3) search_cache table → 4) Web crawl")
 
@@ -1,12 +1,12 @@
 import os
-import json
 import hashlib
 from typing import List, Dict, Optional, Any
-from datetime import datetime, timedelta
-import sqlite3
+from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
-from supabase import create_client, Client
+from supabase import Client
+from supabase_config import get_supabase_client
+from app.services.local_query_cache import LocalQueryCache
 
 load_dotenv()
 
@@ -19,52 +19,29 @@ class WebCrawlerCacheManager:
         if not self.supabase_url or not self.supabase_key:
             raise ValueError("Supabase URL and Service Role Key must be set in environment variables")
         
-        self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
-        
-        # Local SQLite database for caching
-        self.cache_db_path = Path("web_crawler_cache.db")
-        self.init_local_cache()
+        # Shared pooled client (one per process) instead of a fresh connection per manager
+        self.supabase: Client = get_supabase_client()
         
         # Cache settings
         self.cache_duration_hours = 24  # 24 hours cache
         self.max_cache_size = 1000  # Maximum number of cached items
         
+        # Local SQLite database for caching
+        self.cache_db_path = Path("web_crawler_cache.db")
+        self.init_local_cache()
+        
     def init_local_cache(self):
-        """Initialize local SQLite cache database"""
+        """Initialize local SQLite cache database (WAL, one connection per thread)"""
         try:
-            conn = sqlite3.connect(self.cache_db_path)
-            cursor = conn.cursor()
-            
-            # Create cache table
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS web_crawler_cache (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    query_hash TEXT UNIQUE NOT NULL,
-                    query_text TEXT NOT NULL,
-                    content_type TEXT,
-                    results TEXT NOT NULL, -- JSON string
-                    cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    expires_at TIMESTAMP NOT NULL,
-                    access_count INTEGER DEFAULT 0,
-                    last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Create index for faster lookups
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_query_hash ON web_crawler_cache(query_hash)
-            ''')
-            
-            cursor.execute('''
-                CREATE INDEX IF NOT EXISTS idx_expires_at ON web_crawler_cache(expires_at)
-            ''')
-            
-            conn.commit()
-            conn.close()
-            
+            self.local_cache = LocalQueryCache(
+                self.cache_db_path,
+                max_entries=self.max_cache_size,
+                ttl_hours=self.cache_duration_hours,
+            )
             print("[CacheManager] Local cache database initialized")
             
         except Exception as e:
+            self.local_cache = None
             print(f"[CacheManager] Error initializing local cache: {e}")
     
     def get_query_hash(self, query: str) -> str:
@@ -81,62 +58,24 @@ class WebCrawlerCacheManager:
     
     def get_from_local_cache(self, query: str) -> Optional[List[Dict[str, Any]]]:
         """Get data from local cache if available and valid"""
+        if self.local_cache is None:
+            return None
         try:
-            query_hash = self.get_query_hash(query)
-            
-            conn = sqlite3.connect(self.cache_db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT results, expires_at FROM web_crawler_cache 
-                WHERE query_hash = ? AND expires_at > CURRENT_TIMESTAMP
-            ''', (query_hash,))
-            
-            result = cursor.fetchone()
-            
-            if result:
-                results_json, expires_at = result
-                results = json.loads(results_json)
-                
-                # Update access count and last accessed
-                cursor.execute('''
-                    UPDATE web_crawler_cache 
-                    SET access_count = access_count + 1, last_accessed = CURRENT_TIMESTAMP
-                    WHERE query_hash = ?
-                ''', (query_hash,))
-                
-                conn.commit()
-                conn.close()
-                
+            results = self.local_cache.get(self.get_query_hash(query))
+            if results is not None:
                 print(f"[CacheManager] Found valid cache for query: {query}")
-                return results
-            
-            conn.close()
-            return None
+            return results
             
         except Exception as e:
             print(f"[CacheManager] Error getting from local cache: {e}")
             return None
     
     def store_in_local_cache(self, query: str, results: List[Dict[str, Any]], content_type: str = None) -> bool:
-        """Store data in local cache"""
+        """Store data in local cache (evicts least recently used entries beyond max_cache_size)"""
+        if self.local_cache is None:
+            return False
         try:
-            query_hash = self.get_query_hash(query)
-            expires_at = datetime.now() + timedelta(hours=self.cache_duration_hours)
-            
-            conn = sqlite3.connect(self.cache_db_path)
-            cursor = conn.cursor()
-            
-            # Insert or replace cache entry
-            cursor.execute('''
-                INSERT OR REPLACE INTO web_crawler_cache 
-                (query_hash, query_text, content_type, results, expires_at, access_count, last_accessed)
-                VALUES (?, ?, ?, ?, ?, 0, CURRENT_TIMESTAMP)
-            ''', (query_hash, query, content_type, json.dumps(results), expires_at.isoformat()))
-            
-            conn.commit()
-            conn.close()
-            
+            self.local_cache.put(self.get_query_hash(query), query, results, content_type)
             print(f"[CacheManager] Stored in local cache: {query}")
             return True
             
@@ -271,69 +210,21 @@ Our system crawls the website daily to keep information fresh. Please try again
     
     def cleanup_expired_cache(self):
         """Clean up expired cache entries"""
+        if self.local_cache is None:
+            return
         try:
-            conn = sqlite3.connect(self.cache_db_path)
-            cursor = conn.cursor()
-            
-            # Delete expired entries
-            cursor.execute('DELETE FROM web_crawler_cache WHERE expires_at < CURRENT_TIMESTAMP')
-            deleted_count = cursor.rowcount
-            
-            # If cache is too large, delete oldest entries
-            cursor.execute('SELECT COUNT(*) FROM web_crawler_cache')
-            count = cursor.fetchone()[0]
-            
-            if count > self.max_cache_size:
-                excess = count - self.max_cache_size
-                cursor.execute('''
-                    DELETE FROM web_crawler_cache 
-                    WHERE id IN (
-                        SELECT id FROM web_crawler_cache 
-                        ORDER BY last_accessed ASC 
-                        LIMIT ?
-                    )
-                ''', (excess,))
-                deleted_count += cursor.rowcount
-            
-            conn.commit()
-            conn.close()
-            
+            deleted_count = self.local_cache.evict()
             print(f"[CacheManager] Cleaned up {deleted_count} expired cache entries")
             
         except Exception as e:
             print(f"[CacheManager] Error cleaning up cache: {e}")
     
     def get_cache_stats(self) -> Dict[str, Any]:
-        """Get cache statistics"""
+        """Get cache statistics, including lookup/store latency percentiles"""
+        if self.local_cache is None:
+            return {}
         try:
-            conn = sqlite3.connect(self.cache_db_path)
-            cursor = conn.cursor()
-            
-            # Total entries
-            cursor.execute('SELECT COUNT(*) FROM web_crawler_cache')
-            total_entries = cursor.fetchone()[0]
-            
-            # Valid entries
-            cursor.execute('SELECT COUNT(*) FROM web_crawler_cache WHERE expires_at > CURRENT_TIMESTAMP')
-            valid_entries = cursor.fetchone()[0]
-            
-            # Most accessed queries
-            cursor.execute('''
-                SELECT query_text, access_count 
-                FROM web_crawler_cache 
-                ORDER BY access_count DESC 
-                LIMIT 5
-            ''')
-            top_queries = cursor.fetchall()
-            
-            conn.close()
-            
-            return {
-                'total_entries': total_entries,
-                'valid_entries': valid_entries,
-                'expired_entries': total_entries - valid_entries,
-                'top_queries': top_queries
-            }
+            return self.local_cache.stats()
             
         except Exception as e:
             print(f"[CacheManager] Error getting cache stats: {e}")
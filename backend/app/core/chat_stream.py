@@ -0,0 +1,177 @@
+"""
+Event channel between the (blocking) chat pipeline and the streaming chatbot route.
+
+generate_chatbot_response runs on the bounded blocking pool, so it cannot yield to the HTTP
+response directly. The streaming route binds a ChatStream to the worker thread (contextvar);
+the pipeline calls create_chat_completion() instead of ``client.chat.completions.create`` for
+the user-facing answer, which switches to ``stream=True`` when a stream is bound and forwards
+each content delta as it arrives. Without a bound stream (the plain JSON route, scripts) it is
+a normal non-streaming call, and both paths return the same response shape.
+
+The async chat path yields a ChatCompletion step instead (see app.core.io_steps), awaited on the
+event loop with AsyncOpenAI through acreate_chat_completion(); it streams the same way.
+
+Events are (name, payload) pairs; the route renders them as SSE or NDJSON.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import json
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, Optional, Tuple
+
+from app.core.io_steps import IoStep
+
+_current_stream: contextvars.ContextVar[Optional["ChatStream"]] = contextvars.ContextVar("chat_stream", default=None)
+_FINISHED = object()
+
+
+class ChatStream:
+    """Thread-safe emitter: pipeline thread -> asyncio queue on the route's event loop"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, queue: "asyncio.Queue"):
+        self._loop = loop
+        self._queue = queue
+        self.completions = 0
+
+    def emit(self, event: str, data: Any) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, (event, data))
+
+
+def current_stream() -> Optional[ChatStream]:
+    return _current_stream.get()
+
+
+@contextlib.contextmanager
+def bind_stream(stream: ChatStream) -> Iterator[ChatStream]:
+    token = _current_stream.set(stream)
+    try:
+        yield stream
+    finally:
+        _current_stream.reset(token)
+
+
+class _StreamedReply:
+    """Collects streamed chunks into the non-streaming response shape, emitting each content delta"""
+
+    def __init__(self, stream: ChatStream):
+        # A retry / second completion replaces whatever the client has rendered so far
+        if stream.completions:
+            stream.emit("reset", {})
+        stream.completions += 1
+        self.stream = stream
+        self.parts = []
+        self.finish_reason = None
+        self.model = None
+
+    def add(self, chunk) -> None:
+        self.model = self.model or getattr(chunk, "model", None)
+        for choice in getattr(chunk, "choices", None) or []:
+            delta = getattr(choice, "delta", None)
+            text = getattr(delta, "content", None) if delta is not None else None
+            if text:
+                self.parts.append(text)
+                self.stream.emit("delta", {"text": text})
+            if getattr(choice, "finish_reason", None):
+                self.finish_reason = choice.finish_reason
+
+    def response(self) -> SimpleNamespace:
+        message = SimpleNamespace(role="assistant", content="".join(self.parts))
+        return SimpleNamespace(
+            model=self.model,
+            choices=[SimpleNamespace(index=0, message=message, finish_reason=self.finish_reason)],
+            usage=None,
+        )
+
+
+def create_chat_completion(client, **kwargs):
+    """``client.chat.completions.create(**kwargs)``, streamed to the bound ChatStream when there is one"""
+    stream = current_stream()
+    if stream is None:
+        return client.chat.completions.create(**kwargs)
+
+    reply = _StreamedReply(stream)
+    for chunk in client.chat.completions.create(stream=True, **kwargs):
+        reply.add(chunk)
+    return reply.response()
+
+
+async def acreate_chat_completion(client, **kwargs):
+    """create_chat_completion() for an AsyncOpenAI client"""
+    stream = current_stream()
+    if stream is None:
+        return await client.chat.completions.create(**kwargs)
+
+    reply = _StreamedReply(stream)
+    async for chunk in await client.chat.completions.create(stream=True, **kwargs):
+        reply.add(chunk)
+    return reply.response()
+
+
+class ChatCompletion(IoStep):
+    """The user-facing answer as a pipeline step: blocking OpenAI client, or AsyncOpenAI on the loop"""
+
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+
+    def run(self):
+        from app.core.openai_client import get_openai_client
+
+        return create_chat_completion(get_openai_client(), **self.kwargs)
+
+    async def arun(self):
+        from app.core.openai_client import get_async_openai_client
+
+        return await acreate_chat_completion(get_async_openai_client(), **self.kwargs)
+
+
+async def _stream_events(start: Callable[[], Awaitable[Any]], stream: ChatStream,
+                         queue: "asyncio.Queue") -> AsyncIterator[Tuple[str, Any]]:
+    # The task copies the context here, so a coroutine started under bind_stream() sees the stream
+    with bind_stream(stream):
+        future = asyncio.ensure_future(start())
+    # Delivered after every emit() (all go through the loop's FIFO callbacks / the queue, in order)
+    future.add_done_callback(lambda _: queue.put_nowait(_FINISHED))
+    while True:
+        item = await queue.get()
+        if item is _FINISHED:
+            break
+        yield item
+    yield "result", future.result()
+
+
+async def stream_blocking(func: Callable[..., Any], *args: Any, **kwargs: Any) -> AsyncIterator[Tuple[str, Any]]:
+    """Run ``func`` on the blocking pool with a ChatStream bound; yield its events, then ("result", value)
+
+    Exceptions from ``func`` propagate after the events emitted before the failure.
+    """
+    from app.core.executor import run_blocking
+
+    queue: asyncio.Queue = asyncio.Queue()
+    stream = ChatStream(asyncio.get_running_loop(), queue)
+
+    def run():
+        with bind_stream(stream):
+            return func(*args, **kwargs)
+
+    async for item in _stream_events(lambda: run_blocking(run), stream, queue):
+        yield item
+
+
+async def stream_async(func: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> AsyncIterator[Tuple[str, Any]]:
+    """stream_blocking() for a coroutine function (e.g. generate_chatbot_response_async), run as a task"""
+    queue: asyncio.Queue = asyncio.Queue()
+    stream = ChatStream(asyncio.get_running_loop(), queue)
+    async for item in _stream_events(lambda: func(*args, **kwargs), stream, queue):
+        yield item
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def format_ndjson(event: str, data: Any) -> str:
+    return json.dumps({"event": event, "data": data}, default=str) + "\n"
@@ -0,0 +1,62 @@
+"""
+Bounded thread pool for blocking work called from async routes.
+
+The chatbot pipeline still talks to Supabase (PostgREST), OpenAI, Google Drive and the
+web crawler through synchronous clients. Running that work directly inside an
+``async def`` route blocks the uvicorn event loop, so one slow round-trip stalls every
+other request on the worker. Routes hand the blocking call to this pool instead; the
+pool is sized explicitly so a burst of chats cannot spawn unbounded threads.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+T = TypeVar("T")
+
+DEFAULT_BLOCKING_POOL_SIZE = 16
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _pool_size_from_env() -> int:
+    raw = os.getenv("CHAT_BLOCKING_POOL_SIZE", "")
+    try:
+        size = int(raw)
+    except ValueError:
+        return DEFAULT_BLOCKING_POOL_SIZE
+    return size if size > 0 else DEFAULT_BLOCKING_POOL_SIZE
+
+
+def get_blocking_executor() -> ThreadPoolExecutor:
+    """Process-wide executor for blocking I/O (created on first use)."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                size = _pool_size_from_env()
+                _executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="chat-blocking")
+                print(f"[Executor] Blocking pool started with {size} worker(s)")
+    return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Await ``func(*args, **kwargs)`` on the bounded pool without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    return await loop.run_in_executor(get_blocking_executor(), call)
+
+
+def shutdown_blocking_executor(wait: bool = False) -> None:
+    """Stop the pool (app shutdown / tests). A later call to run_blocking recreates it."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
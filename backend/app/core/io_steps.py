@@ -0,0 +1,85 @@
+"""
+I/O points for generator pipelines that serve both the sync and the async chat paths.
+
+The chatbot pipeline is one long synchronous function. Rather than keep a second, async copy of
+it, the pipeline is a generator that ``yield``s the I/O it wants done (an IoStep) and is sent the
+result back. drive_steps() runs every step with the blocking clients (scripts, sync callers);
+adrive_steps() awaits each step's async twin on the event loop (AsyncOpenAI, the async Supabase
+client) and runs only the synchronous stretches between steps on the bounded blocking pool. A
+failing step is thrown back into the generator at its ``yield``, so the pipeline's own
+try/except handles it on both paths.
+"""
+
+from __future__ import annotations
+
+import contextvars
+from typing import Any, Callable, Generator, Tuple
+
+Steps = Generator["IoStep", Any, Any]
+
+
+class IoStep:
+    """One unit of I/O with a blocking and an awaitable implementation returning the same value"""
+
+    def run(self) -> Any:
+        raise NotImplementedError
+
+    async def arun(self) -> Any:
+        raise NotImplementedError
+
+
+class SupabaseQuery(IoStep):
+    """``build(client)`` returns a PostgREST query; it is executed on the sync or the async client"""
+
+    def __init__(self, build: Callable[[Any], Any]):
+        self.build = build
+
+    def run(self) -> Any:
+        from supabase_config import get_supabase_client
+
+        return self.build(get_supabase_client()).execute()
+
+    async def arun(self) -> Any:
+        from supabase_config import get_async_supabase_client
+
+        return await self.build(await get_async_supabase_client()).execute()
+
+
+def _advance(advance: Callable[[Any], Any], value: Any) -> Tuple[bool, Any]:
+    # StopIteration cannot be set on a Future, so the finished value travels as (True, value)
+    try:
+        return False, advance(value)
+    except StopIteration as done:
+        return True, done.value
+
+
+def drive_steps(steps: Steps) -> Any:
+    """Run a step generator to completion with the blocking clients; returns its return value"""
+    advance, value = steps.send, None
+    while True:
+        finished, step = _advance(advance, value)
+        if finished:
+            return step
+        try:
+            advance, value = steps.send, step.run()
+        except Exception as e:
+            advance, value = steps.throw, e
+
+
+async def adrive_steps(steps: Steps) -> Any:
+    """
+    Async twin of drive_steps(): steps are awaited on the running loop, the code between them runs
+    on the blocking pool (one stretch at a time, with the caller's contextvars, e.g. a bound ChatStream).
+    """
+    from app.core.executor import run_blocking
+
+    context = contextvars.copy_context()
+    advance, value = steps.send, None
+    while True:
+        finished, step = await run_blocking(context.run, _advance, advance, value)
+        if finished:
+            return step
+        try:
+            advance, value = steps.send, await step.arun()
+        except Exception as e:
+            advance, value = steps.throw, e
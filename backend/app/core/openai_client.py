@@ -1,5 +1,5 @@
 import os
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -11,6 +11,18 @@ def get_openai_client():
         raise RuntimeError("OPENAI_API_KEY not set in environment.")
     return OpenAI(api_key=api_key)
 
+_async_client = None
+
+def get_async_openai_client():
+    """Process-wide AsyncOpenAI client for the event loop (keeps its pooled connections warm)"""
+    global _async_client
+    if _async_client is None:
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY not set in environment.")
+        _async_client = AsyncOpenAI(api_key=api_key)
+    return _async_client
+
 def get_default_gpt_model():
     """Get the default GPT model to use for chatbot responses"""
     # Using GPT-4o-mini for better performance and cost-effectiveness
@@ -42,6 +42,13 @@ async def startup_event():
         import traceback
         traceback.print_exc()
 
+    # Snapshot vectorized tables for in-process search (VECTOR_SEARCH_LOCAL_INDEX)
+    try:
+        from app.services.local_vector_index import start_local_vector_index
+        start_local_vector_index()
+    except Exception as e:
+        print(f"[App] Warning: Failed to start local vector index: {e}")
+
     # Log DWD status for production debugging
     try:
         from app.services.google_dwd_service import get_dwd_service
@@ -69,6 +76,12 @@ async def shutdown_event():
     except Exception as e:
         print(f"[App] Warning: Error stopping auto-sync scheduler: {e}")
 
+    try:
+        from app.core.executor import shutdown_blocking_executor
+        shutdown_blocking_executor(wait=False)
+    except Exception as e:
+        print(f"[App] Warning: Error stopping blocking pool: {e}")
+
 @app.get("/")
 async def root():
     return {"message": "AI School Automation System Backend is running."}
@@ -82,8 +95,33 @@ async def health_check():
     if scheduler.is_running and scheduler.scheduler.get_job('auto_sync_job'):
         next_run = scheduler.scheduler.get_job('auto_sync_job').next_run_time.isoformat() if scheduler.scheduler.get_job('auto_sync_job').next_run_time else None
     
+    supabase_pool = None
+    try:
+        from supabase_config import get_supabase_pool_metrics
+        supabase_pool = get_supabase_pool_metrics()
+    except Exception as e:
+        print(f"[App] Warning: Could not read Supabase pool metrics: {e}")
+
+    response_cache = None
+    try:
+        from app.services.semantic_response_cache import get_response_cache
+        response_cache = get_response_cache().stats()
+    except Exception as e:
+        print(f"[App] Warning: Could not read response cache stats: {e}")
+
+    local_vector_index = None
+    try:
+        from app.services.local_vector_index import LOCAL_INDEX_MODE, get_local_vector_index
+        if LOCAL_INDEX_MODE != 'off':
+            local_vector_index = get_local_vector_index().stats()
+    except Exception as e:
+        print(f"[App] Warning: Could not read local vector index stats: {e}")
+
     return {
         "status": "healthy",
         "scheduler": scheduler_status,
-        "next_sync": next_run
+        "next_sync": next_run,
+        "supabase_pool": supabase_pool,
+        "response_cache": response_cache,
+        "local_vector_index": local_vector_index
     } 
\ No newline at end of file
@@ -14,6 +14,11 @@ from ..models.admin import Admin, GoogleIntegration, ClassroomData, CalendarData
 from ..services.supabase_admin import SupabaseAdminService
 from ..services.google_dwd_service import get_dwd_service
 from ..services.embedding_generator import get_embedding_generator
+from ..services.embedding_pipeline import EmbeddingRefreshQueue
+from ..services.sync_bulk_writer import BulkUpsertWriter
+from ..services.classroom_sync_state import ClassroomSyncState, load_coursework_ids, roster_fingerprint
+from ..services.calendar_event_sync import SOURCE_DWD, CalendarSyncTokens, soft_delete_events, soft_delete_missing_events
+from ..core.executor import run_blocking
 from ..services.auto_sync_scheduler import get_auto_sync_scheduler
 from ..utils.google_calendar_sync_config import (
     GOOGLE_CALENDAR_SYNC_DISABLED_MESSAGE,
@@ -375,9 +380,11 @@ async def sync_website_data(email: Optional[str] = None):
         # Clear old cache entries (older than 1 hour) to force fresh crawl
         cutoff_date = (datetime.utcnow() - timedelta(hours=1)).isoformat()
         
-        # Mark old cache entries as inactive
+        # Mark old cache entries as inactive. Essential pages stay active: the crawl revalidates
+        # them in place (conditional GET + content hash) instead of re-inserting them.
         try:
-            supabase.table('web_crawler_data').update({'is_active': False}).lt('crawled_at', cutoff_date).execute()
+            from app.config.essential_pages import ESSENTIAL_PRAKRITI_PAGES_FOR_AUTO_CRAWL
+            supabase.table('web_crawler_data').update({'is_active': False}).lt('crawled_at', cutoff_date).not_.in_('url', ESSENTIAL_PRAKRITI_PAGES_FOR_AUTO_CRAWL).execute()
             supabase.table('search_cache').update({'is_active': False}).lt('expires_at', datetime.utcnow().isoformat()).execute()
             print(f"[Admin] ✅ Cleared old cache entries")
         except Exception as e:
@@ -386,7 +393,7 @@ async def sync_website_data(email: Optional[str] = None):
         # Run the daily crawl essential script
         try:
             print(f"[Admin] Running daily_crawl_essential.py to crawl all essential pages...")
-            crawl_essential_pages()
+            crawl_stats = await run_blocking(crawl_essential_pages)
             print(f"[Admin] ✅ Daily crawl completed successfully")
             
             # Count pages crawled (check web_crawler_data updated in last hour)
@@ -403,7 +410,8 @@ async def sync_website_data(email: Optional[str] = None):
                 "stats": {
                     "pages_crawled": pages_count,
                     "team_members": team_members_count,
-                    "cache_cleared": True
+                    "cache_cleared": True,
+                    "crawl": crawl_stats
                 },
                 "summary": {
                     "pages": pages_count,
@@ -800,11 +808,28 @@ async def diagnose_dwd():
 # DWD Sync Endpoint
 class DWDSyncRequest(BaseModel):
     user_email: str
+    # Classroom: ignore the delta-sync watermarks; Calendar: ignore stored sync tokens. Rewrites every row.
+    full_sync: bool = False
 
 class GradeRoleSyncRequest(BaseModel):
     service: str
     email: Optional[str] = None
 
+# Relations read per course by the DWD Classroom sync (submissions are listed per course, not per coursework)
+CLASSROOM_SYNC_RELATIONS = ['teachers', 'students', 'coursework', 'announcements', 'submissions']
+
+# Embedding refreshes started by syncs; referenced until done so they are not garbage collected
+_background_embedding_tasks = set()
+
+def _refresh_embeddings_in_background(embedding_queue: EmbeddingRefreshQueue) -> dict:
+    """Run the queued (batched) embedding refresh after the sync has responded; rows are already written"""
+    queued = len(embedding_queue)
+    if queued:
+        task = asyncio.ensure_future(run_blocking(embedding_queue.flush))
+        _background_embedding_tasks.add(task)
+        task.add_done_callback(_background_embedding_tasks.discard)
+    return {"queued": queued, "mode": "background"}
+
 @router.post("/sync-dwd/{service}")
 async def sync_dwd(service: str, request: DWDSyncRequest):
     """
@@ -853,6 +878,8 @@ async def sync_dwd(service: str, request: DWDSyncRequest):
         "calendars": {"created": 0, "updated": 0},
         "events": {"created": 0, "updated": 0}
     }
+    # Touched rows are re-embedded once at the end, and only if their source text changed
+    embedding_queue = EmbeddingRefreshQueue()
     
     def parse_google_timestamp(timestamp: str = None) -> str:
         """Parse Google timestamp to ISO format"""
@@ -871,16 +898,31 @@ async def sync_dwd(service: str, request: DWDSyncRequest):
             courses = dwd_service.fetch_user_courses(user_email)
             print(f"🔍 DWD: Found {len(courses)} courses")
             
-            # Process each course
+            # Delta sync: per-course updateTime watermarks decide which rows are written (and re-embedded).
+            # Unchanged archived courses are not read at all; request.full_sync rewrites everything.
+            state = ClassroomSyncState(supabase, user_id, full_sync=request.full_sync)
+            await run_blocking(state.load)
+            active_courses = [c for c in courses if c.get('id') and not state.can_skip_course(c)]
+            skipped_courses = sum(1 for c in courses if c.get('id')) - len(active_courses)
+            
+            # Read every course's relations (and all of its submissions) as batch requests up front.
+            # A relation missing from the result failed to load and is skipped.
+            course_ids = [c['id'] for c in active_courses]
+            relations_by_course = await run_blocking(
+                dwd_service.fetch_courses_relations, user_email, course_ids, CLASSROOM_SYNC_RELATIONS
+            )
+            
+            # Rows are buffered per table and written with bulk upserts on their natural keys.
+            # Parents are flushed first so children can reference their database ids.
+            writer = BulkUpsertWriter(supabase, embedding_queue=embedding_queue, stats=sync_stats)
+            
             for course in courses:
                 course_id = course.get('id')
-                if not course_id:
+                if not course_id or not state.course_changed(course):
                     continue
                 
                 print(f"🔍 DWD: Processing course: {course.get('name', 'Unknown')} ({course_id})")
-                
-                # Prepare course data
-                course_data = {
+                writer.add('google_classroom_courses', {
                     "user_id": user_id,
                     "course_id": course_id,
                     "name": course.get('name', ''),
@@ -901,281 +943,172 @@ async def sync_dwd(service: str, request: DWDSyncRequest):
                     "description_heading": course.get('descriptionHeading'),
                     "update_time": parse_google_timestamp(course.get('updateTime')),
                     "last_synced_at": datetime.now(timezone.utc).isoformat()
-                }
-                
-                # Upsert course - check if exists first (use limit(1) instead of single() to handle 0 rows)
-                existing_course_result = supabase.table('google_classroom_courses').select('id').eq('user_id', user_id).eq('course_id', course_id).limit(1).execute()
-                
-                db_course_id = None
-                if existing_course_result.data and len(existing_course_result.data) > 0:
-                    # Course exists - update it
-                    existing_course_id = existing_course_result.data[0]['id']
-                    supabase.table('google_classroom_courses').update(course_data).eq('id', existing_course_id).execute()
-                    db_course_id = existing_course_id
-                    sync_stats["courses"]["updated"] += 1
-                    # Generate embedding for updated course
-                    try:
-                        embedding_gen = get_embedding_generator()
-                        embedding_gen.generate_for_course(existing_course_id)
-                    except Exception as e:
-                        print(f"⚠️ DWD: Failed to generate embedding for course {existing_course_id}: {e}")
-                else:
-                    # Course doesn't exist - insert it
-                    result = supabase.table('google_classroom_courses').insert(course_data).execute()
-                    if result.data and len(result.data) > 0:
-                        db_course_id = result.data[0].get('id')
-                        sync_stats["courses"]["created"] += 1
-                        # Generate embedding for new course
-                        try:
-                            embedding_gen = get_embedding_generator()
-                            embedding_gen.generate_for_course(db_course_id)
-                        except Exception as e:
-                            print(f"⚠️ DWD: Failed to generate embedding for course {db_course_id}: {e}")
-                
+                })
+            await run_blocking(writer.flush, 'google_classroom_courses')
+            
+            db_course_ids = {}
+            for course in active_courses:
+                course_id = course['id']
+                db_course_id = writer.id_for('google_classroom_courses', user_id, course_id) or state.db_course_id(course_id)
                 if not db_course_id:
-                    # Fallback: try to get ID
-                    result = supabase.table('google_classroom_courses').select('id').eq('user_id', user_id).eq('course_id', course_id).limit(1).execute()
-                    if result.data and len(result.data) > 0:
-                        db_course_id = result.data[0]['id']
+                    print(f"⚠️ DWD: Could not get database course ID for {course_id}")
+                    continue
+                db_course_ids[course_id] = db_course_id
+                relations = relations_by_course.get(course_id, {})
+                
+                # Rosters have no updateTime: rewrite them only when their fingerprint changed
+                teachers = relations.get('teachers')
+                students = relations.get('students')
+                roster_hash = None
+                if teachers is not None and students is not None:
+                    roster_hash = roster_fingerprint(teachers, students)
+                    if state.roster_changed(course_id, roster_hash):
+                        state.advance(course_id, roster_hash=roster_hash)
                     else:
-                        print(f"⚠️ DWD: Could not get database course ID for {course_id}")
-                        continue
+                        teachers, students = [], []
                 
-                # Fetch and store teachers
-                try:
-                    teachers = dwd_service.fetch_course_teachers(user_email, course_id)
-                    for teacher in teachers:
-                        teacher_data = {
-                            "course_id": db_course_id,
-                            "user_id": teacher.get('userId', ''),
-                            "course_user_id": f"{course_id}_{teacher.get('userId', '')}",
-                            "profile": teacher.get('profile', {})
-                        }
-                        
-                        existing = supabase.table('google_classroom_teachers').select('id').eq('course_id', db_course_id).eq('course_user_id', teacher_data['course_user_id']).limit(1).execute()
-                        
-                        if existing.data and len(existing.data) > 0:
-                            teacher_db_id = existing.data[0]['id']
-                            supabase.table('google_classroom_teachers').update(teacher_data).eq('id', teacher_db_id).execute()
-                            sync_stats["teachers"]["updated"] += 1
-                            # Generate embedding for updated teacher
-                            try:
-                                embedding_gen = get_embedding_generator()
-                                embedding_gen.generate_for_teacher(teacher_db_id)
-                            except Exception as e:
-                                print(f"⚠️ DWD: Failed to generate embedding for teacher {teacher_db_id}: {e}")
-                        else:
-                            result = supabase.table('google_classroom_teachers').insert(teacher_data).execute()
-                            if result.data and len(result.data) > 0:
-                                teacher_db_id = result.data[0].get('id')
-                                sync_stats["teachers"]["created"] += 1
-                                # Generate embedding for new teacher
-                                try:
-                                    embedding_gen = get_embedding_generator()
-                                    embedding_gen.generate_for_teacher(teacher_db_id)
-                                except Exception as e:
-                                    print(f"⚠️ DWD: Failed to generate embedding for teacher {teacher_db_id}: {e}")
-                except Exception as e:
-                    print(f"⚠️ DWD: Error fetching teachers for course {course_id}: {e}")
+                for teacher in teachers or []:
+                    writer.add('google_classroom_teachers', {
+                        "course_id": db_course_id,
+                        "user_id": teacher.get('userId', ''),
+                        "course_user_id": f"{course_id}_{teacher.get('userId', '')}",
+                        "profile": teacher.get('profile', {})
+                    })
                 
-                # Fetch and store students
-                try:
-                    students = dwd_service.fetch_course_students(user_email, course_id)
-                    for student in students:
-                        student_data = {
-                            "course_id": db_course_id,
-                            "user_id": student.get('userId', ''),
-                            "course_user_id": f"{course_id}_{student.get('userId', '')}",
-                            "profile": student.get('profile', {}),
-                            "student_work_folder": student.get('studentWorkFolder')
-                        }
-                        
-                        existing = supabase.table('google_classroom_students').select('id').eq('course_id', db_course_id).eq('course_user_id', student_data['course_user_id']).limit(1).execute()
-                        
-                        if existing.data and len(existing.data) > 0:
-                            student_db_id = existing.data[0]['id']
-                            supabase.table('google_classroom_students').update(student_data).eq('id', student_db_id).execute()
-                            sync_stats["students"]["updated"] += 1
-                            # Generate embedding for updated student
-                            try:
-                                embedding_gen = get_embedding_generator()
-                                embedding_gen.generate_for_student(student_db_id)
-                            except Exception as e:
-                                print(f"⚠️ DWD: Failed to generate embedding for student {student_db_id}: {e}")
-                        else:
-                            result = supabase.table('google_classroom_students').insert(student_data).execute()
-                            if result.data and len(result.data) > 0:
-                                student_db_id = result.data[0].get('id')
-                                sync_stats["students"]["created"] += 1
-                                # Generate embedding for new student
-                                try:
-                                    embedding_gen = get_embedding_generator()
-                                    embedding_gen.generate_for_student(student_db_id)
-                                except Exception as e:
-                                    print(f"⚠️ DWD: Failed to generate embedding for student {student_db_id}: {e}")
-                except Exception as e:
-                    print(f"⚠️ DWD: Error fetching students for course {course_id}: {e}")
+                for student in students or []:
+                    writer.add('google_classroom_students', {
+                        "course_id": db_course_id,
+                        "user_id": student.get('userId', ''),
+                        "course_user_id": f"{course_id}_{student.get('userId', '')}",
+                        "profile": student.get('profile', {}),
+                        "student_work_folder": student.get('studentWorkFolder')
+                    })
                 
-                # Fetch and store coursework
-                try:
-                    coursework_list = dwd_service.fetch_course_coursework(user_email, course_id)
-                    for cw in coursework_list:
-                        cw_id = cw.get('id')
-                        if not cw_id:
-                            continue
-                        
-                        due_date = None
-                        if cw.get('dueDate'):
-                            due_date_str = f"{cw['dueDate'].get('year', 2000)}-{cw['dueDate'].get('month', 1):02d}-{cw['dueDate'].get('day', 1):02d}"
-                            due_date = parse_google_timestamp(f"{due_date_str}T00:00:00Z")
-                        elif cw.get('dueTime'):
-                            due_date = parse_google_timestamp(cw['dueTime'])
-                        
-                        coursework_data = {
-                            "course_id": db_course_id,
-                            "coursework_id": cw_id,
-                            "title": cw.get('title', ''),
-                            "description": cw.get('description'),
-                            "materials": cw.get('materials'),
-                            "state": cw.get('state'),
-                            "alternate_link": cw.get('alternateLink'),
-                            "creation_time": parse_google_timestamp(cw.get('creationTime')),
-                            "update_time": parse_google_timestamp(cw.get('updateTime')),
-                            "due_date": due_date,
-                            "due_time": cw.get('dueTime'),
-                            "max_points": float(cw['maxPoints'].get('value', 0)) if cw.get('maxPoints') else None,
-                            "work_type": cw.get('workType'),
-                            "associated_with_developer": cw.get('associatedWithDeveloper', False),
-                            "assignee_mode": cw.get('assigneeMode'),
-                            "individual_students_options": cw.get('individualStudentsOptions'),
-                            "submission_modification_mode": cw.get('submissionModificationMode'),
-                            "creator_user_id": cw.get('creatorUserId'),
-                            "topic_id": cw.get('topicId'),
-                            "grade_category": cw.get('gradeCategory'),
-                            "assignment": cw.get('assignment'),
-                            "multiple_choice_question": cw.get('multipleChoiceQuestion'),
-                            "last_synced_at": datetime.now(timezone.utc).isoformat()
-                        }
-                        
-                        existing = supabase.table('google_classroom_coursework').select('id').eq('course_id', db_course_id).eq('coursework_id', cw_id).limit(1).execute()
-                        
-                        cw_db_id = None
-                        if existing.data and len(existing.data) > 0:
-                            supabase.table('google_classroom_coursework').update(coursework_data).eq('id', existing.data[0]['id']).execute()
-                            cw_db_id = existing.data[0]['id']
-                            sync_stats["coursework"]["updated"] += 1
-                        else:
-                            result = supabase.table('google_classroom_coursework').insert(coursework_data).execute()
-                            if result.data and len(result.data) > 0:
-                                cw_db_id = result.data[0].get('id')
-                                sync_stats["coursework"]["created"] += 1
-                        
-                        # Generate embedding for coursework
-                        if cw_db_id:
-                            try:
-                                embedding_gen = get_embedding_generator()
-                                embedding_gen.generate_for_coursework(cw_db_id)
-                            except Exception as e:
-                                print(f"⚠️ DWD: Failed to generate embedding for coursework {cw_id}: {e}")
-                        
-                        # Fetch and store submissions
-                        if cw_db_id:
-                            try:
-                                submissions = dwd_service.fetch_course_submissions(user_email, course_id, cw_id)
-                                for sub in submissions:
-                                    submission_data = {
-                                        "coursework_id": cw_db_id,
-                                        "submission_id": sub.get('id', ''),
-                                        "course_id": course_id,
-                                        "coursework_id_google": cw_id,
-                                        "user_id": sub.get('userId', ''),
-                                        "state": sub.get('state'),
-                                        "alternate_link": sub.get('alternateLink'),
-                                        "assigned_grade": float(sub['assignedGrade']) if sub.get('assignedGrade') else None,
-                                        "draft_grade": float(sub['draftGrade']) if sub.get('draftGrade') else None,
-                                        "course_work_type": sub.get('courseWorkType'),
-                                        "associated_with_developer": sub.get('associatedWithDeveloper', False),
-                                        "submission_history": sub.get('submissionHistory'),
-                                        "last_synced_at": datetime.now(timezone.utc).isoformat()
-                                    }
-                                    
-                                    existing = supabase.table('google_classroom_submissions').select('id').eq('coursework_id', cw_db_id).eq('submission_id', submission_data['submission_id']).limit(1).execute()
-                                    
-                                    if existing.data and len(existing.data) > 0:
-                                        submission_db_id = existing.data[0]['id']
-                                        supabase.table('google_classroom_submissions').update(submission_data).eq('id', submission_db_id).execute()
-                                        sync_stats["submissions"]["updated"] += 1
-                                        # Generate embedding for updated submission
-                                        try:
-                                            embedding_gen = get_embedding_generator()
-                                            embedding_gen.generate_for_submission(submission_db_id)
-                                        except Exception as e:
-                                            print(f"⚠️ DWD: Failed to generate embedding for submission {submission_db_id}: {e}")
-                                    else:
-                                        result = supabase.table('google_classroom_submissions').insert(submission_data).execute()
-                                        if result.data and len(result.data) > 0:
-                                            submission_db_id = result.data[0].get('id')
-                                            sync_stats["submissions"]["created"] += 1
-                                            # Generate embedding for new submission
-                                            try:
-                                                embedding_gen = get_embedding_generator()
-                                                embedding_gen.generate_for_submission(submission_db_id)
-                                            except Exception as e:
-                                                print(f"⚠️ DWD: Failed to generate embedding for submission {submission_db_id}: {e}")
-                            except Exception as e:
-                                print(f"⚠️ DWD: Error fetching submissions for coursework {cw_id}: {e}")
-                except Exception as e:
-                    print(f"⚠️ DWD: Error fetching coursework for course {course_id}: {e}")
+                if 'coursework' in relations:
+                    state.advance_watermark(course_id, 'coursework', relations['coursework'])
+                for cw in state.changed(course_id, 'coursework', relations.get('coursework', [])):
+                    cw_id = cw.get('id')
+                    if not cw_id:
+                        continue
+                    
+                    due_date = None
+                    if cw.get('dueDate'):
+                        due_date_str = f"{cw['dueDate'].get('year', 2000)}-{cw['dueDate'].get('month', 1):02d}-{cw['dueDate'].get('day', 1):02d}"
+                        due_date = parse_google_timestamp(f"{due_date_str}T00:00:00Z")
+                    elif cw.get('dueTime'):
+                        due_date = parse_google_timestamp(cw['dueTime'])
+                    
+                    writer.add('google_classroom_coursework', {
+                        "course_id": db_course_id,
+                        "coursework_id": cw_id,
+                        "title": cw.get('title', ''),
+                        "description": cw.get('description'),
+                        "materials": cw.get('materials'),
+                        "state": cw.get('state'),
+                        "alternate_link": cw.get('alternateLink'),
+                        "creation_time": parse_google_timestamp(cw.get('creationTime')),
+                        "update_time": parse_google_timestamp(cw.get('updateTime')),
+                        "due_date": due_date,
+                        "due_time": cw.get('dueTime'),
+                        "max_points": float(cw['maxPoints'].get('value', 0)) if cw.get('maxPoints') else None,
+                        "work_type": cw.get('workType'),
+                        "associated_with_developer": cw.get('associatedWithDeveloper', False),
+                        "assignee_mode": cw.get('assigneeMode'),
+                        "individual_students_options": cw.get('individualStudentsOptions'),
+                        "submission_modification_mode": cw.get('submissionModificationMode'),
+                        "creator_user_id": cw.get('creatorUserId'),
+                        "topic_id": cw.get('topicId'),
+                        "grade_category": cw.get('gradeCategory'),
+                        "assignment": cw.get('assignment'),
+                        "multiple_choice_question": cw.get('multipleChoiceQuestion'),
+                        "last_synced_at": datetime.now(timezone.utc).isoformat()
+                    })
                 
-                # Fetch and store announcements
-                try:
-                    announcements = dwd_service.fetch_course_announcements(user_email, course_id)
-                    for ann in announcements:
-
-                        announcement_data = {
-                            "course_id": db_course_id,
-                            "announcement_id": ann.get('id', ''),
-                            "text": ann.get('text'),
-                            "materials": ann.get('materials'),
-                            "state": ann.get('state'),
-                            "alternate_link": ann.get('alternateLink'),
-                            "creation_time": parse_google_timestamp(ann.get('creationTime')),
-                            "update_time": parse_google_timestamp(ann.get('updateTime')),
-                            "scheduled_time": parse_google_timestamp(ann.get('scheduledTime')),
-                            "assignee_mode": ann.get('assigneeMode'),
-                            "individual_students_options": ann.get('individualStudentsOptions'),
-                            "creator_user_id": ann.get('creatorUserId'),
-                            "course_work_type": ann.get('courseWorkType'),
-                            "last_synced_at": datetime.now(timezone.utc).isoformat()
-                        }
-
-                        existing = supabase.table('google_classroom_announcements').select('id').eq('course_id', db_course_id).eq('announcement_id', announcement_data['announcement_id']).limit(1).execute()
-
-                        ann_db_id = None
-                        if existing.data and len(existing.data) > 0:
-                            supabase.table('google_classroom_announcements').update(announcement_data).eq('id', existing.data[0]['id']).execute()
-                            ann_db_id = existing.data[0]['id']
-                            sync_stats["announcements"]["updated"] += 1
-                        else:
-                            result = supabase.table('google_classroom_announcements').insert(announcement_data).execute()
-                            if result.data and len(result.data) > 0:
-                                ann_db_id = result.data[0].get('id')
-                                sync_stats["announcements"]["created"] += 1
-
-                        # Generate embedding for announcement
-                        if ann_db_id:
-                            try:
-                                embedding_gen = get_embedding_generator()
-                                embedding_gen.generate_for_announcement(ann_db_id)
-                            except Exception as e:
-                                print(f"⚠️ DWD: Failed to generate embedding for announcement {ann.get('id', 'Unknown')}: {e}")
-                except Exception as e:
-                    print(f"⚠️ DWD: Error fetching announcements for course {course_id}: {e}")
+                if 'announcements' in relations:
+                    state.advance_watermark(course_id, 'announcements', relations['announcements'])
+                for ann in state.changed(course_id, 'announcements', relations.get('announcements', [])):
+                    writer.add('google_classroom_announcements', {
+                        "course_id": db_course_id,
+                        "announcement_id": ann.get('id', ''),
+                        "text": ann.get('text'),
+                        "materials": ann.get('materials'),
+                        "state": ann.get('state'),
+                        "alternate_link": ann.get('alternateLink'),
+                        "creation_time": parse_google_timestamp(ann.get('creationTime')),
+                        "update_time": parse_google_timestamp(ann.get('updateTime')),
+                        "scheduled_time": parse_google_timestamp(ann.get('scheduledTime')),
+                        "assignee_mode": ann.get('assigneeMode'),
+                        "individual_students_options": ann.get('individualStudentsOptions'),
+                        "creator_user_id": ann.get('creatorUserId'),
+                        "course_work_type": ann.get('courseWorkType'),
+                        "last_synced_at": datetime.now(timezone.utc).isoformat()
+                    })
+            await run_blocking(writer.flush)
             
+            # Submissions reference the coursework rows' database ids; coursework this sync didn't
+            # rewrite is looked up in one query.
+            changed_submissions = {
+                course_id: state.changed(course_id, 'submissions', relations_by_course[course_id]['submissions'])
+                for course_id in db_course_ids
+                if 'submissions' in relations_by_course.get(course_id, {})
+            }
+            stored_coursework_ids = {}
+            if any(changed_submissions.values()):
+                stored_coursework_ids = await run_blocking(
+                    load_coursework_ids, supabase, [db_course_ids[cid] for cid, subs in changed_submissions.items() if subs]
+                )
+            for course_id, submissions in changed_submissions.items():
+                db_course_id = db_course_ids[course_id]
+                unmatched = 0
+                for sub in submissions:
+                    cw_id = sub.get('courseWorkId')
+                    cw_db_id = (
+                        writer.id_for('google_classroom_coursework', db_course_id, cw_id)
+                        or stored_coursework_ids.get((str(db_course_id), str(cw_id)))
+                    )
+                    if not cw_db_id:
+                        unmatched += 1
+                        continue
+                    writer.add('google_classroom_submissions', {
+                        "coursework_id": cw_db_id,
+                        "submission_id": sub.get('id', ''),
+                        "course_id": course_id,
+                        "coursework_id_google": cw_id,
+                        "user_id": sub.get('userId', ''),
+                        "state": sub.get('state'),
+                        "alternate_link": sub.get('alternateLink'),
+                        "assigned_grade": float(sub['assignedGrade']) if sub.get('assignedGrade') else None,
+                        "draft_grade": float(sub['draftGrade']) if sub.get('draftGrade') else None,
+                        "course_work_type": sub.get('courseWorkType'),
+                        "associated_with_developer": sub.get('associatedWithDeveloper', False),
+                        "submission_history": sub.get('submissionHistory'),
+                        "last_synced_at": datetime.now(timezone.utc).isoformat()
+                    })
+                # Keep the old watermark while some submissions had no coursework row to attach to
+                if not unmatched:
+                    state.advance_watermark(course_id, 'submissions', relations_by_course[course_id]['submissions'])
+            await run_blocking(writer.flush)
+            print(f"✅ DWD: Classroom rows written in {writer.round_trips} database round-trips")
+            
+            # Advance the watermarks only if every row was written, so failures are retried next sync
+            for course in active_courses:
+                if course['id'] in db_course_ids:
+                    state.finish_course(course, db_course_ids[course['id']])
+            if writer.failed_rows:
+                print(f"⚠️ DWD: {writer.failed_rows} Classroom rows failed to write; keeping previous watermarks")
+                state.discard()
+            saved_courses = await run_blocking(state.save)
+            print(f"✅ DWD: Classroom {'full' if request.full_sync else 'delta'} sync: {skipped_courses} unchanged courses skipped, "
+                  f"watermarks saved for {saved_courses} courses")
+            
+            embedding_stats = _refresh_embeddings_in_background(embedding_queue)
             return {
                 "success": True,
                 "message": f"Synced Google Classroom data for {user_email}",
+                "mode": "full" if request.full_sync else "delta",
                 "stats": sync_stats,
+                "embeddings": embedding_stats,
+                "skipped_courses": skipped_courses,
                 "summary": {
                     "courses": sync_stats["courses"]["created"] + sync_stats["courses"]["updated"],
                     "teachers": sync_stats["teachers"]["created"] + sync_stats["teachers"]["updated"],
@@ -1205,6 +1138,14 @@ async def sync_dwd(service: str, request: DWDSyncRequest):
             calendars = dwd_service.fetch_user_calendars(user_email)
             print(f"🔍 DWD: Found {len(calendars)} calendars")
             
+            # Incremental sync: with a stored syncToken only changed / deleted events are fetched.
+            # Changed events are bulk-upserted, deleted ones soft-deleted (status 'cancelled').
+            sync_tokens = CalendarSyncTokens(supabase, user_id, full_sync=request.full_sync, source=SOURCE_DWD)
+            await run_blocking(sync_tokens.load)
+            writer = BulkUpsertWriter(supabase, embedding_queue=embedding_queue, stats=sync_stats)
+            full_listings = {}
+            deleted_events = 0
+            
             for cal in calendars:
                 cal_id = cal.get('id')
                 if not cal_id:
@@ -1228,116 +1169,93 @@ async def sync_dwd(service: str, request: DWDSyncRequest):
                     "notification_settings": cal.get('notificationSettings'),
                     "last_synced_at": datetime.now(timezone.utc).isoformat()
                 }
+                writer.add('google_calendar_calendars', calendar_data)
                 
-                # Check if calendar exists - use limit(1) instead of single() to handle 0 rows
-                existing_result = supabase.table('google_calendar_calendars').select('id').eq('user_id', user_id).eq('calendar_id', cal_id).limit(1).execute()
-                
-                if existing_result.data and len(existing_result.data) > 0:
-                    # Calendar exists - update it
-                    existing_id = existing_result.data[0]['id']
-                    supabase.table('google_calendar_calendars').update(calendar_data).eq('id', existing_id).execute()
-                    sync_stats["calendars"]["updated"] += 1
-                    # Generate embedding for updated calendar
-                    try:
-                        embedding_gen = get_embedding_generator()
-                        embedding_gen.generate_for_calendar(existing_id)
-                    except Exception as e:
-                        print(f"⚠️ DWD: Failed to generate embedding for calendar {existing_id}: {e}")
-                else:
-                    # Calendar doesn't exist - insert it
-                    result = supabase.table('google_calendar_calendars').insert(calendar_data).execute()
-                    if result.data and len(result.data) > 0:
-                        calendar_db_id = result.data[0].get('id')
-                        sync_stats["calendars"]["created"] += 1
-                        # Generate embedding for new calendar
-                        try:
-                            embedding_gen = get_embedding_generator()
-                            embedding_gen.generate_for_calendar(calendar_db_id)
-                        except Exception as e:
-                            print(f"⚠️ DWD: Failed to generate embedding for calendar {calendar_db_id}: {e}")
-                
-                # Fetch events for this calendar
+                # Fetch events changed since the last sync (all events on the first run or after a 410)
                 try:
-                    events = dwd_service.fetch_calendar_events(user_email, cal_id)
-                    for event in events:
-                        event_id = event.get('id')
-                        if not event_id:
-                            continue
-                        
-                        # Parse start/end times
-                        start_time = None
-                        end_time = None
-                        all_day = False
-                        
-                        if event.get('start'):
-                            if event['start'].get('dateTime'):
-                                start_time = parse_google_timestamp(event['start']['dateTime'])
-                            elif event['start'].get('date'):
-                                start_time = parse_google_timestamp(f"{event['start']['date']}T00:00:00Z")
-                                all_day = True
-                        
-                        if event.get('end'):
-                            if event['end'].get('dateTime'):
-                                end_time = parse_google_timestamp(event['end']['dateTime'])
-                            elif event['end'].get('date'):
-                                end_time = parse_google_timestamp(f"{event['end']['date']}T00:00:00Z")
-                        
-                        event_data = {
-                            "user_id": user_id,
-                            "event_id": event_id,
-                            "calendar_id": cal_id,
-                            "summary": event.get('summary'),
-                            "description": event.get('description'),
-                            "location": event.get('location'),
-                            "start_time": start_time,
-                            "end_time": end_time,
-                            "all_day": all_day,
-                            "timezone": event.get('start', {}).get('timeZone') if not all_day else None,
-                            "recurrence": event.get('recurrence'),
-                            "attendees": event.get('attendees'),
-                            "creator": event.get('creator'),
-                            "organizer": event.get('organizer'),
-                            "html_link": event.get('htmlLink'),
-                            "hangout_link": event.get('hangoutLink'),
-                            "conference_data": event.get('conferenceData'),
-                            "visibility": event.get('visibility'),
-                            "transparency": event.get('transparency'),
-                            "status": event.get('status'),
-                            "event_type": event.get('eventType'),
-                            "color_id": event.get('colorId'),
-                            "last_synced_at": datetime.now(timezone.utc).isoformat()
-                        }
-                        
-                        existing = supabase.table('google_calendar_events').select('id').eq('user_id', user_id).eq('event_id', event_id).limit(1).execute()
-                        
-                        if existing.data and len(existing.data) > 0:
-                            event_db_id = existing.data[0]['id']
-                            supabase.table('google_calendar_events').update(event_data).eq('id', event_db_id).execute()
-                            sync_stats["events"]["updated"] += 1
-                            # Generate embedding for updated event
-                            try:
-                                embedding_gen = get_embedding_generator()
-                                embedding_gen.generate_for_calendar_event(event_db_id)
-                            except Exception as e:
-                                print(f"⚠️ DWD: Failed to generate embedding for calendar event {event_db_id}: {e}")
-                        else:
-                            result = supabase.table('google_calendar_events').insert(event_data).execute()
-                            if result.data and len(result.data) > 0:
-                                event_db_id = result.data[0].get('id')
-                                sync_stats["events"]["created"] += 1
-                                # Generate embedding for new event
-                                try:
-                                    embedding_gen = get_embedding_generator()
-                                    embedding_gen.generate_for_calendar_event(event_db_id)
-                                except Exception as e:
-                                    print(f"⚠️ DWD: Failed to generate embedding for calendar event {event_db_id}: {e}")
+                    result = await run_blocking(dwd_service.sync_calendar_events, user_email, cal_id, sync_tokens.get(cal_id))
                 except Exception as e:
                     print(f"⚠️ DWD: Error fetching events for calendar {cal_id}: {e}")
+                    continue
+                print(f"🔍 DWD: Calendar {cal_id}: {'full' if result.full else 'incremental'} listing, "
+                      f"{len(result.changed)} changed / {len(result.deleted)} deleted in {result.pages} page(s)")
+                
+                for event in result.changed:
+                    event_id = event.get('id')
+                    
+                    # Parse start/end times
+                    start_time = None
+                    end_time = None
+                    all_day = False
+                    
+                    if event.get('start'):
+                        if event['start'].get('dateTime'):
+                            start_time = parse_google_timestamp(event['start']['dateTime'])
+                        elif event['start'].get('date'):
+                            start_time = parse_google_timestamp(f"{event['start']['date']}T00:00:00Z")
+                            all_day = True
+                    
+                    if event.get('end'):
+                        if event['end'].get('dateTime'):
+                            end_time = parse_google_timestamp(event['end']['dateTime'])
+                        elif event['end'].get('date'):
+                            end_time = parse_google_timestamp(f"{event['end']['date']}T00:00:00Z")
+                    
+                    event_data = {
+                        "user_id": user_id,
+                        "event_id": event_id,
+                        "calendar_id": cal_id,
+                        "summary": event.get('summary'),
+                        "description": event.get('description'),
+                        "location": event.get('location'),
+                        "start_time": start_time,
+                        "end_time": end_time,
+                        "all_day": all_day,
+                        "timezone": event.get('start', {}).get('timeZone') if not all_day else None,
+                        "recurrence": event.get('recurrence'),
+                        "attendees": event.get('attendees'),
+                        "creator": event.get('creator'),
+                        "organizer": event.get('organizer'),
+                        "html_link": event.get('htmlLink'),
+                        "hangout_link": event.get('hangoutLink'),
+                        "conference_data": event.get('conferenceData'),
+                        "visibility": event.get('visibility'),
+                        "transparency": event.get('transparency'),
+                        "status": event.get('status'),
+                        "event_type": event.get('eventType'),
+                        "color_id": event.get('colorId'),
+                        "last_synced_at": datetime.now(timezone.utc).isoformat()
+                    }
+                    writer.add('google_calendar_events', event_data)
+                
+                if result.deleted:
+                    deleted_events += await run_blocking(soft_delete_events, supabase, user_id, result.deleted)
+                if result.full:
+                    full_listings[cal_id] = {e['id'] for e in result.changed}
+                sync_tokens.set(cal_id, result)
+            
+            await run_blocking(writer.flush)
             
+            # A full listing has no deletion records: stored upcoming events it didn't return are soft-deleted
+            for cal_id, seen_ids in full_listings.items():
+                deleted_events += await run_blocking(
+                    soft_delete_missing_events, supabase, user_id, cal_id, seen_ids, datetime.now(timezone.utc).isoformat()
+                )
+            
+            # Keep the previous tokens if any row failed, so those events are fetched again next time
+            if writer.failed_rows:
+                print(f"⚠️ DWD: {writer.failed_rows} Calendar rows failed to write; keeping previous sync tokens")
+                sync_tokens.discard()
+            await run_blocking(sync_tokens.save)
+            print(f"✅ DWD: Calendar rows written in {writer.round_trips} database round-trips, {deleted_events} events soft-deleted")
+            
+            embedding_stats = _refresh_embeddings_in_background(embedding_queue)
             return {
                 "success": True,
                 "message": f"Synced Google Calendar data for {user_email}",
                 "stats": sync_stats,
+                "embeddings": embedding_stats,
+                "deleted_events": deleted_events,
                 "summary": {
                     "calendars": sync_stats["calendars"]["created"] + sync_stats["calendars"]["updated"],
                     "events": sync_stats["events"]["created"] + sync_stats["events"]["updated"]
@@ -1348,6 +1266,8 @@ async def sync_dwd(service: str, request: DWDSyncRequest):
         print(f"❌ DWD: Sync failed for {user_email}: {str(e)}")
         import traceback
         traceback.print_exc()
+        # Rows written before the failure still get their embeddings refreshed
+        await run_blocking(embedding_queue.flush)
         
         # Extract meaningful error message
         error_detail = str(e)
@@ -1584,8 +1504,14 @@ async def sync_individual_course(course_id: str, email: Optional[str] = None):
         
         # Fetch and update related data using DWD
         try:
+            # One batch request for the three relations
+            # (off the event loop: the batch fetcher backs off with time.sleep on rate limits)
+            course_relations = (await run_blocking(
+                dwd_service.fetch_courses_relations, user_email, [course_id], ['teachers', 'students', 'announcements']
+            )).get(course_id, {})
+
             # Teachers
-            teachers = dwd_service.fetch_course_teachers(user_email, course_id)
+            teachers = course_relations.get('teachers', [])
             for teacher in teachers:
                 teacher_data = {
                     "user_id": user_id,
@@ -1602,7 +1528,7 @@ async def sync_individual_course(course_id: str, email: Optional[str] = None):
                     admin_service.supabase.table('google_classroom_teachers').insert(teacher_data).execute()
             
             # Students
-            students = dwd_service.fetch_course_students(user_email, course_id)
+            students = course_relations.get('students', [])
             for student in students:
                 student_data = {
                     "user_id": user_id,
@@ -1619,7 +1545,7 @@ async def sync_individual_course(course_id: str, email: Optional[str] = None):
                     admin_service.supabase.table('google_classroom_students').insert(student_data).execute()
             
             # Announcements
-            announcements = dwd_service.fetch_course_announcements(user_email, course_id)
+            announcements = course_relations.get('announcements', [])
             for ann in announcements:
                 ann_data = {
                     "user_id": user_id,
@@ -2008,11 +1934,16 @@ async def sync_individual_website(url: str, email: Optional[str] = None):
             result = supabase.table('web_crawler_data').insert(cache_data).select('id').execute()
             record_id = result.data[0].get('id') if result.data else None
         
-        # Generate embedding
+        from app.services.page_search_index import invalidate_page_search_index
+        invalidate_page_search_index()
+        from app.services.enhanced_response_cache import invalidate_enhanced_responses
+        invalidate_enhanced_responses('website')
+        
+        # Re-embed only if the page text changed
         if record_id:
             try:
                 embedding_gen = get_embedding_generator()
-                embedding_gen.generate_for_web_crawler(record_id)
+                embedding_gen.refresh_changed('web_crawler_data', [record_id])
             except Exception as e:
                 print(f"Warning: Failed to generate embedding: {e}")
         
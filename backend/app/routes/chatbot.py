@@ -1,7 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from app.models.chatbot import ChatbotRequest, ChatbotResponse
-from app.agents.chatbot_agent import generate_chatbot_response
+from app.agents.chatbot_agent import generate_chatbot_response_async
+from app.core.chat_stream import format_ndjson, format_sse, stream_async
+from app.core.executor import run_blocking
 from dotenv import load_dotenv
 
 # Ensure environment variables are loaded
@@ -9,6 +11,94 @@ load_dotenv()
 
 router = APIRouter()
 
+
+async def _fetch_user_profile(user_id: str):
+    """Load minimal profile fields + embedding for personalization (async PostgREST, pooled)."""
+    try:
+        from supabase_config import get_async_supabase_client
+        supabase = await get_async_supabase_client()
+        if supabase:
+            # Fetch minimal essential fields + embedding for semantic personalization
+            # Privacy: excludes sensitive data (phone, address, emergency contacts, etc.)
+            result = await supabase.table('user_profiles').select('id, user_id, first_name, role, grade, embedding').eq('user_id', user_id).execute()
+            if result.data and len(result.data) > 0:
+                print(f"[Chatbot] ✅ Fetched user profile embedding for user: {user_id}")
+                return result.data[0]
+            print(f"[Chatbot] ⚠️ No user profile found for user_id: {user_id}")
+    except Exception as e:
+        print(f"[Chatbot] ❌ Error fetching user profile: {e}")
+    return None
+
+
+def _serialize_video(video):
+    if hasattr(video, 'model_dump'):  # Pydantic v2
+        return video.model_dump()
+    if hasattr(video, 'dict'):  # Pydantic v1
+        return video.dict()
+    if isinstance(video, dict):
+        return video
+    # Fallback: convert to dict manually
+    return {
+        'video_id': getattr(video, 'video_id', ''),
+        'title': getattr(video, 'title', ''),
+        'description': getattr(video, 'description', ''),
+        'category': getattr(video, 'category', ''),
+        'tags': getattr(video, 'tags', []),
+        'duration': getattr(video, 'duration', ''),
+        'thumbnail_url': getattr(video, 'thumbnail_url', '')
+    }
+
+
+def _serialize_result(result):
+    """(type, JSON-safe payload) for an agent result: text, calendar, map or mixed"""
+    if isinstance(result, dict):
+        if result.get('type') in ('calendar', 'map'):
+            return result['type'], result
+        return "text", str(result)
+    if isinstance(result, list):
+        # List responses (like location with map or videos)
+        serialized_result = []
+        for item in result:
+            if isinstance(item, dict) and item.get('type') == 'videos' and 'videos' in item:
+                # Convert YouTubeVideo objects to dictionaries for JSON serialization
+                serialized_result.append({
+                    'type': 'videos',
+                    'videos': [_serialize_video(video) for video in item['videos']]
+                })
+            else:
+                serialized_result.append(item)
+        return "mixed", serialized_result
+    return "text", str(result)
+
+
+def _structured_events(response_type, payload):
+    """Typed events for the non-delta parts of a result (calendar / map / videos / text blocks)"""
+    if response_type in ('calendar', 'map'):
+        yield response_type, payload
+    elif response_type == 'mixed':
+        for item in payload:
+            if isinstance(item, dict):
+                yield item.get('type') or 'data', item
+            else:
+                yield 'text', {'text': str(item)}
+
+
+async def _record_analytics(request: ChatbotRequest):
+    """Engagement analytics: one row per successful response (fails open if table missing)"""
+    try:
+        from app.utils.ai_chat_analytics import record_ai_chat_event
+
+        _uid = request.user_id if request.user_id else None
+        await run_blocking(
+            record_ai_chat_event,
+            user_id=_uid,
+            is_authenticated=bool(_uid),
+            source="web",
+        )
+    except Exception as _e:
+        print(f"[Chatbot] ai_chat_events: {_e}")
+
+
 @router.post("/", response_model=ChatbotResponse)
 async def chat_with_bot(request: ChatbotRequest):
     """
@@ -21,105 +111,74 @@ async def chat_with_bot(request: ChatbotRequest):
         # Fetch user profile embedding if user_id is provided
         user_profile = None
         if request.user_id:
-            try:
-                from supabase_config import get_supabase_client
-                supabase = get_supabase_client()
-                if supabase:
-                    # Fetch minimal essential fields + embedding for semantic personalization
-                    # Privacy: excludes sensitive data (phone, address, emergency contacts, etc.)
-                    result = supabase.table('user_profiles').select('id, user_id, first_name, role, grade, embedding').eq('user_id', request.user_id).execute()
-                    if result.data and len(result.data) > 0:
-                        user_profile = result.data[0]
-                        print(f"[Chatbot] ✅ Fetched user profile embedding for user: {request.user_id}")
-                    else:
-                        print(f"[Chatbot] ⚠️ No user profile found for user_id: {request.user_id}")
-            except Exception as e:
-                print(f"[Chatbot] ❌ Error fetching user profile: {e}")
+            user_profile = await _fetch_user_profile(request.user_id)
 
         # Add user profile to request
         request.user_profile = user_profile
 
-        # Use the chatbot agent
-        result = generate_chatbot_response(request)
+        # Use the chatbot agent (model and Supabase waits on the event loop, blocking work on the bounded pool)
+        result = await generate_chatbot_response_async(request)
 
-        # Engagement analytics: one row per successful response (fails open if table missing)
-        try:
-            from app.utils.ai_chat_analytics import record_ai_chat_event
-
-            _uid = request.user_id if request.user_id else None
-            record_ai_chat_event(
-                user_id=_uid,
-                is_authenticated=bool(_uid),
-                source="web",
-            )
-        except Exception as _e:
-            print(f"[Chatbot] ai_chat_events: {_e}")
+        await _record_analytics(request)
 
         print(f"Chatbot agent result: {result}")  # Debug log
         
         # Handle different response types
-        if isinstance(result, dict):
-            if result.get('type') == 'calendar':
-                # Return calendar data as structured response
-                return JSONResponse(content={
-                    "response": result,
-                    "type": "calendar"
-                })
-            elif result.get('type') == 'map':
-                return JSONResponse(content={
-                    "response": result,
-                    "type": "map"
-                })
-            else:
-                return ChatbotResponse(response=str(result))
-        elif isinstance(result, list):
-            # Handle list responses (like location with map or videos)
-            # Convert YouTubeVideo objects to dictionaries for JSON serialization
-            serialized_result = []
-            for item in result:
-                if isinstance(item, dict):
-                    # Check if this is a videos response
-                    if item.get('type') == 'videos' and 'videos' in item:
-                        # Convert YouTubeVideo objects to dictionaries
-                        videos = item['videos']
-                        converted_videos = []
-                        for video in videos:
-                            if hasattr(video, 'model_dump'):  # Pydantic v2
-                                converted_videos.append(video.model_dump())
-                            elif hasattr(video, 'dict'):  # Pydantic v1
-                                converted_videos.append(video.dict())
-                            elif isinstance(video, dict):
-                                converted_videos.append(video)
-                            else:
-                                # Fallback: convert to dict manually
-                                converted_videos.append({
-                                    'video_id': getattr(video, 'video_id', ''),
-                                    'title': getattr(video, 'title', ''),
-                                    'description': getattr(video, 'description', ''),
-                                    'category': getattr(video, 'category', ''),
-                                    'tags': getattr(video, 'tags', []),
-                                    'duration': getattr(video, 'duration', ''),
-                                    'thumbnail_url': getattr(video, 'thumbnail_url', '')
-                                })
-                        serialized_result.append({
-                            'type': 'videos',
-                            'videos': converted_videos
-                        })
-                    else:
-                        serialized_result.append(item)
-                else:
-                    serialized_result.append(item)
-            
-            return JSONResponse(content={
-                "response": serialized_result,
-                "type": "mixed"
-            })
-        else:
-            # Handle string responses
-            return ChatbotResponse(response=str(result))
+        response_type, payload = _serialize_result(result)
+        if response_type == "text":
+            return ChatbotResponse(response=payload)
+        return JSONResponse(content={
+            "response": payload,
+            "type": response_type
+        })
             
     except Exception as e:
         print(f"Error in chatbot route: {str(e)}")  # Debug log
         import traceback
         traceback.print_exc()  # Print full traceback
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e)) 
+
+
+@router.post("/stream")
+async def chat_with_bot_stream(request: ChatbotRequest, format: str = Query("sse", pattern="^(sse|ndjson)$")):
+    """
+    Streaming variant of the chatbot endpoint (Server-Sent Events, or NDJSON with ?format=ndjson).
+
+    Events:
+      delta    {"text": ...}   answer tokens as the model produces them
+      reset    {}              a retry started; discard the text streamed so far
+      calendar / map / videos / text    structured parts of the final result
+      done     {"type": ..., "response": ...}   final result, same shape as POST /chatbot/
+      error    {"detail": ...}
+    """
+    print(f"Chatbot stream request: {request.message}")  # Debug log
+    render = format_ndjson if format == "ndjson" else format_sse
+
+    async def events():
+        try:
+            if request.user_id:
+                request.user_profile = await _fetch_user_profile(request.user_id)
+
+            result = None
+            async for event, data in stream_async(generate_chatbot_response_async, request):
+                if event == "result":
+                    result = data
+                else:
+                    yield render(event, data)
+
+            response_type, payload = _serialize_result(result)
+            for event, data in _structured_events(response_type, payload):
+                yield render(event, data)
+            yield render("done", {"type": response_type, "response": payload})
+            await _record_analytics(request)
+        except Exception as e:
+            print(f"Error in chatbot stream route: {str(e)}")  # Debug log
+            import traceback
+            traceback.print_exc()
+            yield render("error", {"detail": str(e)})
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/event-stream"
+    return StreamingResponse(events(), media_type=media_type, headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",  # don't let proxies buffer the stream
+    })
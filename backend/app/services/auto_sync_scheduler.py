@@ -13,6 +13,11 @@ import os
 from supabase_config import get_supabase_client
 from ..services.supabase_admin import SupabaseAdminService
 from ..utils.google_calendar_sync_config import is_google_calendar_sync_disabled
+from ..core.executor import run_blocking
+from ..services.calendar_event_sync import (
+    SOURCE_OAUTH, CalendarEventSync, CalendarSyncTokens, soft_delete_events, soft_delete_missing_events,
+)
+from ..services.sync_bulk_writer import BulkUpsertWriter
 
 # Google OAuth configuration
 GOOGLE_CLIENT_ID = os.getenv("GOOGLE_CLIENT_ID")
@@ -346,18 +351,33 @@ class AutoSyncScheduler:
             
             calendars = calendars_response.json().get('items', [])
             print(f"[AutoSync] Found {len(calendars)} calendars for {admin_email}")
-            
-            # Sync each calendar
-            time_min = datetime.utcnow().isoformat() + 'Z'
-            time_max = (datetime.utcnow() + timedelta(days=90)).isoformat() + 'Z'
-            
+        
+        # Events are fetched incrementally with each calendar's stored syncToken (a full 90-day
+        # listing the first time or after a 410), then bulk-upserted / soft-deleted.
+        time_min = datetime.utcnow().isoformat() + 'Z'
+        time_max = (datetime.utcnow() + timedelta(days=90)).isoformat() + 'Z'
+        sync_tokens = CalendarSyncTokens(self.supabase, user_id, source=SOURCE_OAUTH)
+        await run_blocking(sync_tokens.load)
+        writer = BulkUpsertWriter(self.supabase)
+        full_listings = {}
+        http = httpx.Client(headers={"Authorization": f"Bearer {access_token}"}, timeout=30.0)
+        
+        def parse_timestamp(ts):
+            if not ts:
+                return None
+            try:
+                return datetime.fromisoformat(ts.replace('Z', '+00:00')).isoformat()
+            except:
+                return None
+        
+        try:
             for calendar in calendars:
                 calendar_id = calendar.get('id')
                 if not calendar_id:
                     continue
                 
                 # Update calendar metadata
-                calendar_data = {
+                writer.add('google_calendar_calendars', {
                     "user_id": user_id,
                     "calendar_id": calendar_id,
                     "summary": calendar.get('summary', ''),
@@ -365,74 +385,57 @@ class AutoSyncScheduler:
                     "time_zone": calendar.get('timeZone'),
                     "location": calendar.get('location'),
                     "last_synced_at": datetime.utcnow().isoformat()
-                }
+                })
                 
-                try:
-                    existing = self.supabase.table('google_calendar_calendars').select('id').eq('user_id', user_id).eq('calendar_id', calendar_id).single().execute()
-                    if existing.data:
-                        self.supabase.table('google_calendar_calendars').update(calendar_data).eq('id', existing.data['id']).execute()
-                    else:
-                        self.supabase.table('google_calendar_calendars').insert(calendar_data).execute()
-                except (httpx.ConnectError, httpx.ConnectTimeout, Exception) as e:
-                    print(f"[AutoSync] ⚠️ Network error saving calendar {calendar_id}: {type(e).__name__}")
-                    continue
+                def list_page(params, calendar_id=calendar_id):
+                    response = http.get(f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events", params=params)
+                    response.raise_for_status()
+                    return response.json()
                 
-                # Fetch events for this calendar
+                event_sync = CalendarEventSync(list_page, full_sync_params={"timeMin": time_min, "timeMax": time_max})
                 try:
-                    events_response = await client.get(
-                        f"https://www.googleapis.com/calendar/v3/calendars/{calendar_id}/events",
-                        headers={"Authorization": f"Bearer {access_token}"},
-                        params={
-                            "timeMin": time_min,
-                            "timeMax": time_max,
-                            "singleEvents": True,
-                            "orderBy": "startTime"
-                        }
-                    )
-                    
-                    if events_response.status_code == 200:
-                        events = events_response.json().get('items', [])
-                        for event in events:
-                            event_id = event.get('id')
-                            if not event_id:
-                                continue
-                            
-                            start_time = event.get('start', {}).get('dateTime') or event.get('start', {}).get('date')
-                            end_time = event.get('end', {}).get('dateTime') or event.get('end', {}).get('date')
-                            
-                            def parse_timestamp(ts):
-                                if not ts:
-                                    return None
-                                try:
-                                    return datetime.fromisoformat(ts.replace('Z', '+00:00')).isoformat()
-                                except:
-                                    return None
-                            
-                            event_data = {
-                                "user_id": user_id,
-                                "calendar_id": calendar_id,
-                                "event_id": event_id,
-                                "summary": event.get('summary', ''),
-                                "description": event.get('description'),
-                                "location": event.get('location'),
-                                "start_time": parse_timestamp(start_time),
-                                "end_time": parse_timestamp(end_time),
-                                "status": event.get('status'),
-                                "html_link": event.get('htmlLink'),
-                                "last_synced_at": datetime.utcnow().isoformat()
-                            }
-                            
-                            try:
-                                existing_event = self.supabase.table('google_calendar_events').select('id').eq('user_id', user_id).eq('calendar_id', calendar_id).eq('event_id', event_id).single().execute()
-                                if existing_event.data:
-                                    self.supabase.table('google_calendar_events').update(event_data).eq('id', existing_event.data['id']).execute()
-                                else:
-                                    self.supabase.table('google_calendar_events').insert(event_data).execute()
-                            except (httpx.ConnectError, httpx.ConnectTimeout, Exception) as e:
-                                print(f"[AutoSync] ⚠️ Network error saving event {event_id}: {type(e).__name__}")
-                                continue
+                    result = await run_blocking(event_sync.sync, sync_tokens.get(calendar_id))
                 except Exception as e:
                     print(f"[AutoSync] Error fetching events for calendar {calendar_id}: {e}")
+                    continue
+                
+                for event in result.changed:
+                    start_time = event.get('start', {}).get('dateTime') or event.get('start', {}).get('date')
+                    end_time = event.get('end', {}).get('dateTime') or event.get('end', {}).get('date')
+                    writer.add('google_calendar_events', {
+                        "user_id": user_id,
+                        "calendar_id": calendar_id,
+                        "event_id": event['id'],
+                        "summary": event.get('summary', ''),
+                        "description": event.get('description'),
+                        "location": event.get('location'),
+                        "start_time": parse_timestamp(start_time),
+                        "end_time": parse_timestamp(end_time),
+                        "status": event.get('status'),
+                        "html_link": event.get('htmlLink'),
+                        "last_synced_at": datetime.utcnow().isoformat()
+                    })
+                if result.deleted:
+                    await run_blocking(soft_delete_events, self.supabase, user_id, result.deleted)
+                if result.full:
+                    full_listings[calendar_id] = {e['id'] for e in result.changed}
+                sync_tokens.set(calendar_id, result)
+            
+            await run_blocking(writer.flush)
+            
+            # A full listing has no deletion records: stored events in its window it didn't return are soft-deleted
+            for calendar_id, seen_ids in full_listings.items():
+                await run_blocking(
+                    soft_delete_missing_events, self.supabase, user_id, calendar_id, seen_ids, time_min, time_max
+                )
+            if writer.failed_rows:
+                print(f"[AutoSync] ⚠️ {writer.failed_rows} calendar rows failed to write; keeping previous sync tokens")
+                sync_tokens.discard()
+            await run_blocking(sync_tokens.save)
+        except (httpx.ConnectError, httpx.ConnectTimeout, Exception) as e:
+            print(f"[AutoSync] ⚠️ Error syncing calendars for {admin_email}: {type(e).__name__}")
+        finally:
+            http.close()
 
 # Global scheduler instance
 _scheduler_instance: AutoSyncScheduler = None
@@ -0,0 +1,343 @@
+"""
+Browser Pool
+Warm, reusable headless Chrome instances for the Selenium extraction paths
+(WebCrawlerAgent.extract_team_members_with_selenium / extract_calendar_events_with_selenium).
+
+- The chromedriver binary is resolved once per process (ChromeDriverManager().install() does a
+  network version check every call) and browsers are started lazily, up to BROWSER_POOL_SIZE.
+- lease() hands out a browser and resets it afterwards (extra tabs closed, cookies cleared,
+  about:blank) so the next caller starts clean; a browser that errored or served
+  BROWSER_POOL_MAX_USES leases is quit and replaced.
+- wait_until() and friends replace fixed time.sleep() calls with polling on a DOM condition, so
+  a step takes as long as the page needs instead of a worst-case constant.
+- open_in_tabs() loads several pages in tabs of one browser at once (the loads overlap), then
+  extracts each in turn.
+"""
+import atexit
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Optional
+
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+
+try:
+    BROWSER_POOL_SIZE = max(1, int(os.getenv('BROWSER_POOL_SIZE', '2')))
+except ValueError:
+    BROWSER_POOL_SIZE = 2
+try:
+    BROWSER_POOL_MAX_USES = max(1, int(os.getenv('BROWSER_POOL_MAX_USES', '50')))
+except ValueError:
+    BROWSER_POOL_MAX_USES = 50
+
+POLL_INTERVAL = 0.1
+POPUP_CSS = ".popup, .modal, [class*='popup'], [class*='modal']"
+USER_AGENT = ("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36")
+CHROME_ARGUMENTS = [
+    "--headless",
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-extensions",
+    "--disable-plugins",
+    "--disable-images",
+    "--disable-web-security",
+    "--disable-features=VizDisplayCompositor",
+    "--disable-background-timer-throttling",
+    "--disable-renderer-backgrounding",
+    "--disable-backgrounding-occluded-windows",
+    "--window-size=1920,1080",
+    f"--user-agent={USER_AGENT}",
+]
+
+_driver_path: Optional[str] = None
+_driver_path_lock = threading.Lock()
+
+
+def chromedriver_path() -> Optional[str]:
+    """Resolve chromedriver once; None lets Selenium Manager / PATH find it"""
+    global _driver_path
+    if _driver_path is None:
+        with _driver_path_lock:
+            if _driver_path is None:
+                override = os.getenv('CHROMEDRIVER_PATH')
+                if override:
+                    _driver_path = override
+                else:
+                    try:
+                        from webdriver_manager.chrome import ChromeDriverManager
+                        _driver_path = ChromeDriverManager().install()
+                    except Exception as e:
+                        print(f"[BrowserPool] ⚠️ ChromeDriverManager failed, falling back to Selenium Manager: {e}")
+                        _driver_path = ''
+    return _driver_path or None
+
+
+def create_chrome_driver():
+    """Headless Chrome with the options both Selenium paths used"""
+    options = Options()
+    for argument in CHROME_ARGUMENTS:
+        options.add_argument(argument)
+    # Return from get() at DOMContentLoaded; callers wait for the elements they need
+    options.page_load_strategy = 'eager'
+    path = chromedriver_path()
+    service = Service(path) if path else Service()
+    return webdriver.Chrome(service=service, options=options)
+
+
+# ---- Waits ----------------------------------------------------------------
+
+def wait_until(driver, condition: Callable, timeout: float = 5.0, poll: float = POLL_INTERVAL):
+    """Poll ``condition(driver)`` until truthy; returns its value, or False on timeout"""
+    try:
+        return WebDriverWait(driver, timeout, poll_frequency=poll).until(condition)
+    except TimeoutException:
+        return False
+
+
+def wait_for_document_ready(driver, timeout: float = 10.0) -> bool:
+    return bool(wait_until(
+        driver, lambda d: d.execute_script("return document.readyState") in ('interactive', 'complete'), timeout
+    ))
+
+
+def wait_for_visible(driver, css: str, timeout: float = 5.0):
+    """First displayed element matching ``css``, or False"""
+    return wait_until(driver, lambda d: first_visible(d, css), timeout)
+
+
+def wait_for_no_visible(driver, css: str = POPUP_CSS, timeout: float = 5.0) -> bool:
+    return bool(wait_until(driver, lambda d: not first_visible(d, css), timeout))
+
+
+def first_visible(driver, css: str):
+    for element in driver.find_elements(By.CSS_SELECTOR, css):
+        try:
+            if element.is_displayed():
+                return element
+        except WebDriverException:
+            continue
+    return None
+
+
+_DOM_SIGNATURE_JS = """
+var text = document.body ? document.body.innerText : '';
+var hash = 0;
+for (var i = 0; i < text.length; i++) { hash = (hash * 31 + text.charCodeAt(i)) | 0; }
+return text.length + ':' + hash + ':' + document.getElementsByTagName('*').length;
+"""
+
+
+def dom_signature(driver) -> str:
+    """Cheap fingerprint of the rendered page (visible text hash + node count)"""
+    return driver.execute_script(_DOM_SIGNATURE_JS)
+
+
+def wait_for_dom_change(driver, before: str, timeout: float = 2.0) -> bool:
+    """Wait until dom_signature() differs from ``before`` (e.g. after a click re-renders a view)"""
+    return bool(wait_until(driver, lambda d: dom_signature(d) != before, timeout))
+
+
+def scroll_to_end(driver, max_rounds: int = 5, settle_timeout: float = 1.0) -> int:
+    """Scroll to the bottom until the page stops growing (lazy-loaded content); returns final height"""
+    height = driver.execute_script("return document.body.scrollHeight")
+    for _ in range(max_rounds):
+        driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+        grown = wait_until(
+            driver, lambda d: (d.execute_script("return document.body.scrollHeight") or 0) > height, settle_timeout
+        )
+        if not grown:
+            break
+        height = driver.execute_script("return document.body.scrollHeight")
+    driver.execute_script("window.scrollTo(0, 0);")
+    return height
+
+
+def scroll_into_view(driver, element) -> None:
+    driver.execute_script("arguments[0].scrollIntoView({behavior: 'instant', block: 'center'});", element)
+
+
+def open_in_tabs(driver, urls: Iterable[str], extract: Callable, timeout: float = 15.0) -> Dict[str, object]:
+    """Open every URL in its own tab (loads overlap), then run ``extract(driver, url)`` in each tab.
+
+    Tabs are closed afterwards and the original tab is re-selected; a failed page maps to None.
+    """
+    original = driver.current_window_handle
+    handles = {}
+    for url in dict.fromkeys(urls):
+        driver.switch_to.new_window('tab')
+        handles[url] = driver.current_window_handle
+        # Non-blocking navigation so the next tab starts loading immediately
+        driver.execute_script("window.location.href = arguments[0];", url)
+
+    results: Dict[str, object] = {}
+    for url, handle in handles.items():
+        try:
+            driver.switch_to.window(handle)
+            wait_until(
+                driver,
+                lambda d: d.execute_script("return location.href") != 'about:blank'
+                and d.execute_script("return document.readyState") in ('interactive', 'complete'),
+                timeout,
+            )
+            results[url] = extract(driver, url)
+        except Exception as e:
+            print(f"[BrowserPool] ⚠️ Tab extraction failed for {url}: {str(e)[:100]}")
+            results[url] = None
+        finally:
+            try:
+                driver.close()
+            except WebDriverException:
+                pass
+    driver.switch_to.window(original)
+    return results
+
+
+# ---- Pool -----------------------------------------------------------------
+
+class BrowserPool:
+    """Bounded pool of warm browsers handed out with lease()"""
+
+    def __init__(self, size: int = BROWSER_POOL_SIZE, factory: Callable = create_chrome_driver,
+                 max_uses: int = BROWSER_POOL_MAX_USES):
+        self.size = max(1, size)
+        self.factory = factory
+        self.max_uses = max(1, max_uses)
+        self._idle: "queue.LifoQueue" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._live = 0
+        self._uses: Dict[int, int] = {}
+        self._closed = False
+        self.created = 0
+        self.leases = 0
+        self.discarded = 0
+
+    def _acquire(self, timeout: Optional[float]):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._live < self.size:
+                self._live += 1
+                create = True
+            else:
+                create = False
+        if create:
+            try:
+                started = time.perf_counter()
+                driver = self.factory()
+            except Exception:
+                with self._lock:
+                    self._live -= 1
+                raise
+            self.created += 1
+            print(f"[BrowserPool] Started browser {self.created} in {time.perf_counter() - started:.2f}s")
+            return driver
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No browser free within {timeout}s (pool size {self.size})")
+
+    def _reset(self, driver) -> None:
+        """Back to a single blank tab with no cookies"""
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.delete_all_cookies()
+        driver.get('about:blank')
+
+    def _discard(self, driver) -> None:
+        with self._lock:
+            self._live -= 1
+            self._uses.pop(id(driver), None)
+        self.discarded += 1
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    @contextmanager
+    def lease(self, timeout: Optional[float] = 120.0):
+        """``with pool.lease() as driver:`` - a warm browser, returned (reset) or replaced afterwards"""
+        if self._closed:
+            raise RuntimeError("BrowserPool is shut down")
+        driver = self._acquire(timeout)
+        self.leases += 1
+        healthy = False
+        try:
+            yield driver
+            healthy = True
+        finally:
+            uses = self._uses.get(id(driver), 0) + 1
+            self._uses[id(driver)] = uses
+            if healthy and not self._closed and uses < self.max_uses:
+                try:
+                    self._reset(driver)
+                    self._idle.put(driver)
+                except Exception as e:
+                    print(f"[BrowserPool] ⚠️ Browser reset failed, replacing it: {str(e)[:100]}")
+                    self._discard(driver)
+            else:
+                self._discard(driver)
+
+    def warm(self, count: Optional[int] = None) -> int:
+        """Start up to ``count`` browsers ahead of time (e.g. before a sync); returns how many started"""
+        started = []
+        for _ in range(min(count or self.size, self.size)):
+            with self._lock:
+                if self._live >= self.size:
+                    break
+            try:
+                started.append(self._acquire(timeout=0))
+            except Exception as e:
+                print(f"[BrowserPool] ⚠️ Could not warm browser: {e}")
+                break
+        for driver in started:
+            self._idle.put(driver)
+        return len(started)
+
+    def shutdown(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._discard(driver)
+
+    def stats(self) -> dict:
+        return {
+            'size': self.size,
+            'live': self._live,
+            'idle': self._idle.qsize(),
+            'created': self.created,
+            'leases': self.leases,
+            'discarded': self.discarded,
+        }
+
+
+# Singleton instance
+_browser_pool = None
+_browser_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Get or create singleton instance of BrowserPool (browsers are quit at interpreter exit)"""
+    global _browser_pool
+    if _browser_pool is None:
+        with _browser_pool_lock:
+            if _browser_pool is None:
+                _browser_pool = BrowserPool()
+                atexit.register(_browser_pool.shutdown)
+    return _browser_pool
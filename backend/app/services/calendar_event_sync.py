@@ -0,0 +1,195 @@
+"""
+Incremental Google Calendar event sync.
+
+Event listings used to be one ``events.list`` call from ``timeMin`` with ``maxResults=2500`` and
+no paging, and every event was rewritten on every sync. CalendarEventSync pages through
+``events.list`` and returns Google's ``nextSyncToken``. The token is kept per (user, calendar,
+source) in ``google_calendar_sync_state`` (migrations/add_calendar_sync_state.sql), so the next run
+sends only ``syncToken`` and gets back just the events that changed or were deleted since then.
+A token carries the timeMin / timeMax of the full listing it came from, so the DWD route and the
+scheduled OAuth sync (different windows) each keep their own.
+
+- Deleted events come back with ``status == 'cancelled'``; callers soft-delete them (the row is
+  kept with status ``cancelled``) instead of rewriting the calendar.
+- A ``410 Gone`` means the token expired. The calendar is then listed in full again, and rows
+  missing from that full listing are soft-deleted by ``soft_delete_missing_events``.
+
+The engine doesn't know how requests are sent: ``list_page(params)`` runs one ``events.list``
+call for a calendar, either through the DWD discovery client or through the OAuth REST API.
+"""
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+SYNC_STATE_TABLE = 'google_calendar_sync_state'
+SOURCE_DWD = 'dwd'  # admin DWD sync: full listings from now on
+SOURCE_OAUTH = 'oauth'  # scheduled OAuth sync: full listings over a 90-day window
+EVENTS_TABLE = 'google_calendar_events'
+PAGE_SIZE = 2500  # events.list maximum
+MAX_PAGES = 200
+
+
+class SyncTokenExpired(Exception):
+    """Google answered 410 Gone: the stored syncToken can't be used any more"""
+
+
+def _is_gone(error: Exception) -> bool:
+    # googleapiclient HttpError (resp.status) or httpx.HTTPStatusError (response.status_code)
+    status = getattr(getattr(error, 'resp', None), 'status', None)
+    if status is None:
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    try:
+        return int(status) == 410
+    except (TypeError, ValueError):
+        return False
+
+
+@dataclass
+class CalendarSyncResult:
+    changed: List[Dict[str, Any]] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    next_sync_token: Optional[str] = None
+    full: bool = False
+    pages: int = 0
+
+
+class CalendarEventSync:
+    """Pages through one calendar's events, incrementally when a syncToken is available"""
+
+    def __init__(self, list_page: Callable[[Dict[str, Any]], Dict[str, Any]], page_size: int = PAGE_SIZE,
+                 full_sync_params: Optional[Dict[str, Any]] = None):
+        self.list_page = list_page
+        self.page_size = page_size
+        # Parameters of a full listing (e.g. timeMin); Google remembers them inside the sync token
+        self.full_sync_params = dict(full_sync_params or {})
+
+    def sync(self, sync_token: Optional[str] = None) -> CalendarSyncResult:
+        if sync_token:
+            try:
+                return self._list({'syncToken': sync_token}, full=False)
+            except SyncTokenExpired:
+                print("[CalendarSync] ⚠️ Sync token expired (410), resyncing the calendar in full")
+        return self._list(dict(self.full_sync_params), full=True)
+
+    def _list(self, params: Dict[str, Any], full: bool) -> CalendarSyncResult:
+        result = CalendarSyncResult(full=full)
+        page_token = None
+        while result.pages < MAX_PAGES:
+            request = {**params, 'singleEvents': True, 'maxResults': self.page_size}
+            if page_token:
+                request['pageToken'] = page_token
+            try:
+                response = self.list_page(request) or {}
+            except Exception as e:
+                if not full and _is_gone(e):
+                    raise SyncTokenExpired() from e
+                raise
+            result.pages += 1
+            for event in response.get('items', []):
+                if not event.get('id'):
+                    continue
+                if event.get('status') == 'cancelled':
+                    result.deleted.append(event['id'])
+                else:
+                    result.changed.append(event)
+            page_token = response.get('nextPageToken')
+            if not page_token:
+                result.next_sync_token = response.get('nextSyncToken')
+                break
+        else:
+            # Page limit hit: don't store a token, the next run lists the calendar again
+            print(f"[CalendarSync] ⚠️ Stopped after {MAX_PAGES} pages without a sync token")
+        return result
+
+
+class CalendarSyncTokens:
+    """Per-calendar sync tokens for one user and sync path (``source``)"""
+
+    def __init__(self, client, user_id: str, full_sync: bool = False, source: str = SOURCE_DWD):
+        self.client = client
+        self.user_id = user_id
+        self.full_sync = full_sync
+        self.source = source
+        self._tokens: Dict[str, Optional[str]] = {}
+        self._updates: Dict[str, Dict[str, Any]] = {}
+
+    def load(self) -> None:
+        if self.full_sync:
+            return
+        try:
+            result = self.client.table(SYNC_STATE_TABLE).select('calendar_id,sync_token') \
+                .eq('user_id', self.user_id).eq('source', self.source).execute()
+            self._tokens = {row['calendar_id']: row.get('sync_token') for row in (result.data or [])}
+        except Exception as e:
+            # No stored tokens: every calendar is listed in full, as before
+            print(f"⚠️ DWD: Calendar sync state unavailable ({e}); listing calendars in full")
+            self._tokens = {}
+
+    def get(self, calendar_id: str) -> Optional[str]:
+        return None if self.full_sync else self._tokens.get(calendar_id)
+
+    def set(self, calendar_id: str, result: CalendarSyncResult) -> None:
+        now = datetime.now(timezone.utc).isoformat()
+        fields = {"sync_token": result.next_sync_token, "last_synced_at": now, "updated_at": now}
+        if result.full:
+            fields["last_full_sync_at"] = now
+        self._updates[calendar_id] = fields
+
+    def discard(self) -> None:
+        self._updates = {}
+
+    def save(self) -> int:
+        if not self._updates:
+            return 0
+        rows = [
+            {"user_id": self.user_id, "calendar_id": cid, "source": self.source, **fields}
+            for cid, fields in self._updates.items()
+        ]
+        try:
+            self.client.table(SYNC_STATE_TABLE).upsert(rows, on_conflict='user_id,calendar_id,source').execute()
+        except Exception as e:
+            print(f"⚠️ DWD: Could not save Calendar sync tokens: {e}")
+            return 0
+        for calendar_id, fields in self._updates.items():
+            self._tokens[calendar_id] = fields["sync_token"]
+        self._updates = {}
+        return len(rows)
+
+
+def soft_delete_events(client, user_id: str, event_ids: Iterable[str], chunk_size: int = 200) -> int:
+    """Mark events as cancelled (rows and their history are kept); returns the number of rows updated"""
+    event_ids = list(dict.fromkeys(event_ids))
+    now = datetime.now(timezone.utc).isoformat()
+    updated = 0
+    for start in range(0, len(event_ids), chunk_size):
+        chunk = event_ids[start:start + chunk_size]
+        try:
+            result = client.table(EVENTS_TABLE).update({"status": "cancelled", "last_synced_at": now}) \
+                .eq('user_id', user_id).in_('event_id', chunk).execute()
+            updated += len(result.data or [])
+        except Exception as e:
+            print(f"⚠️ DWD: Could not soft-delete {len(chunk)} calendar events: {e}")
+    return updated
+
+
+def soft_delete_missing_events(client, user_id: str, calendar_id: str, seen_ids: Set[str],
+                               time_min: Optional[str] = None, time_max: Optional[str] = None) -> int:
+    """After a full listing: soft-delete stored events of the calendar that Google no longer returns
+
+    Only events inside the listing's window (``time_min`` / ``time_max``) are considered.
+    """
+    try:
+        query = client.table(EVENTS_TABLE).select('event_id,status').eq('user_id', user_id).eq('calendar_id', calendar_id)
+        if time_min:
+            query = query.gte('start_time', time_min)
+        if time_max:
+            query = query.lt('start_time', time_max)
+        result = query.execute()
+    except Exception as e:
+        print(f"⚠️ DWD: Could not read stored events for calendar {calendar_id}: {e}")
+        return 0
+    missing = [
+        row['event_id'] for row in (result.data or [])
+        if row.get('event_id') not in seen_ids and row.get('status') != 'cancelled'
+    ]
+    return soft_delete_events(client, user_id, missing) if missing else 0
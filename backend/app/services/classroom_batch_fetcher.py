@@ -0,0 +1,205 @@
+"""
+Batched Google Classroom reads for the DWD sync.
+
+The sync used to make one HTTP call per course per relation (teachers, students, coursework,
+announcements) plus one per coursework item for submissions. ClassroomBatchFetcher sends the
+same list calls as Google API batch requests (``new_batch_http_request``, up to 100
+sub-requests each):
+
+- every sub-request is a ``list`` call; a response with ``nextPageToken`` queues the next page
+  for the following round, so results are complete (the single calls only read page one);
+- sub-requests rejected for quota / rate limits or with 5xx are retried in a later round with
+  exponential backoff (honouring ``Retry-After``); other failures are recorded per
+  sub-request in ``errors`` and do not affect the rest of the batch;
+- a batch that fails as a whole (transport error) retries all of its sub-requests.
+"""
+import json
+import random
+import time
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+from googleapiclient.errors import HttpError
+
+BATCH_LIMIT = 100  # Google's maximum sub-requests per batch
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+RATE_LIMIT_REASONS = {"rateLimitExceeded", "userRateLimitExceeded", "quotaExceeded", "backendError"}
+
+# relation -> (list request builder, response field with the items)
+COURSE_RELATIONS: Dict[str, Tuple[Callable[..., Any], str]] = {
+    "teachers": (lambda svc, course_id, **kw: svc.courses().teachers().list(courseId=course_id, **kw), "teachers"),
+    "students": (lambda svc, course_id, **kw: svc.courses().students().list(courseId=course_id, **kw), "students"),
+    "coursework": (lambda svc, course_id, **kw: svc.courses().courseWork().list(courseId=course_id, **kw), "courseWork"),
+    "announcements": (lambda svc, course_id, **kw: svc.courses().announcements().list(courseId=course_id, **kw), "announcements"),
+    # Every submission in the course (courseWorkId "-"); items carry their courseWorkId
+    "submissions": (lambda svc, course_id, **kw: svc.courses().courseWork().studentSubmissions().list(
+        courseId=course_id, courseWorkId="-", **kw), "studentSubmissions"),
+}
+DEFAULT_RELATIONS = ("teachers", "students", "coursework", "announcements")
+
+
+def _submissions_request(svc, course_id, coursework_id, **kw):
+    return svc.courses().courseWork().studentSubmissions().list(courseId=course_id, courseWorkId=coursework_id, **kw)
+
+
+def _http_error_is_retryable(error: HttpError) -> bool:
+    status = getattr(getattr(error, "resp", None), "status", None)
+    if status in RETRYABLE_STATUS:
+        return True
+    if status == 403:
+        try:
+            payload = json.loads(error.content.decode("utf-8") if isinstance(error.content, bytes) else error.content)
+            reasons = {e.get("reason") for e in payload.get("error", {}).get("errors", [])}
+        except Exception:
+            return False
+        return bool(reasons & RATE_LIMIT_REASONS)
+    return False
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    resp = getattr(error, "resp", None)
+    try:
+        value = resp.get("retry-after") if resp is not None else None
+        return float(value) if value else None
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class _Job:
+    __slots__ = ("key", "build", "field", "items", "page_token", "attempts", "error", "done")
+
+    def __init__(self, key: Hashable, build: Callable[..., Any], field: str):
+        self.key = key
+        self.build = build
+        self.field = field
+        self.items: List[Dict] = []
+        self.page_token: Optional[str] = None
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.done = False
+
+
+class ClassroomBatchFetcher:
+    """Runs Classroom list calls as batch requests with paging and retry"""
+
+    def __init__(self, service_factory: Callable[[], Any], batch_size: int = BATCH_LIMIT,
+                 max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 32.0,
+                 page_size: Optional[int] = None, sleep: Callable[[float], None] = time.sleep):
+        self._service_factory = service_factory
+        self.batch_size = max(1, min(batch_size, BATCH_LIMIT))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.page_size = page_size
+        self._sleep = sleep
+        self.errors: Dict[Hashable, str] = {}
+        self.stats = {"batches": 0, "sub_requests": 0, "retried": 0, "failed": 0}
+
+    # ---- Public --------------------------------------------------------------
+
+    def fetch_course_relations(self, course_ids: Iterable[str],
+                               relations: Iterable[str] = DEFAULT_RELATIONS) -> Dict[str, Dict[str, List[Dict]]]:
+        """course_id -> relation -> items (relations whose sub-request failed are absent)"""
+        course_ids = list(course_ids)
+        relations = list(relations)
+        jobs = []
+        for course_id in course_ids:
+            for relation in relations:
+                builder, field = COURSE_RELATIONS[relation]
+                jobs.append(_Job((course_id, relation),
+                                 lambda svc, cid=course_id, b=builder, **kw: b(svc, cid, **kw), field))
+        results: Dict[str, Dict[str, List[Dict]]] = {course_id: {} for course_id in course_ids}
+        for (course_id, relation), items in self._run(jobs).items():
+            results[course_id][relation] = items
+        return results
+
+    def fetch_submissions(self, coursework: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], List[Dict]]:
+        """(course_id, coursework_id) -> student submissions"""
+        jobs = [
+            _Job((course_id, coursework_id),
+                 lambda svc, cid=course_id, cwid=coursework_id, **kw: _submissions_request(svc, cid, cwid, **kw),
+                 "studentSubmissions")
+            for course_id, coursework_id in coursework
+        ]
+        return self._run(jobs)
+
+    # ---- Batching ------------------------------------------------------------
+
+    def _run(self, jobs: List[_Job]) -> Dict[Hashable, List[Dict]]:
+        if not jobs:
+            return {}
+        service = self._service_factory()
+        pending = list(jobs)
+        round_no = 0
+        while pending:
+            retry: List[_Job] = []
+            delay_hint = 0.0
+            for start in range(0, len(pending), self.batch_size):
+                chunk = pending[start:start + self.batch_size]
+                chunk_retry, hint = self._execute_batch(service, chunk)
+                retry.extend(chunk_retry)
+                delay_hint = max(delay_hint, hint)
+            # Next round: following pages (immediately) and retries (after backoff)
+            next_pages = [job for job in pending if not job.done and job.error is None and job not in retry]
+            retry_now = []
+            for job in retry:
+                job.attempts += 1
+                if job.attempts > self.max_retries:
+                    job.error = job.error or "retries exhausted"
+                    self._fail(job)
+                else:
+                    retry_now.append(job)
+            if retry_now:
+                self.stats["retried"] += len(retry_now)
+                backoff = min(self.max_delay, self.base_delay * (2 ** round_no)) + random.uniform(0, self.base_delay)
+                wait = max(backoff, delay_hint)
+                print(f"[ClassroomBatch] ⏳ {len(retry_now)} sub-request(s) throttled/failed, retrying in {wait:.1f}s")
+                self._sleep(wait)
+                round_no += 1
+            pending = next_pages + retry_now
+        return {job.key: job.items for job in jobs if job.error is None}
+
+    def _execute_batch(self, service, chunk: List[_Job]) -> Tuple[List[_Job], float]:
+        retry: List[_Job] = []
+        answered = set()
+        delay_hint = [0.0]
+        by_id = {str(i): job for i, job in enumerate(chunk)}
+
+        def callback(request_id, response, exception):
+            job = by_id[request_id]
+            answered.add(request_id)
+            if exception is not None:
+                if isinstance(exception, HttpError) and not _http_error_is_retryable(exception):
+                    job.error = str(exception)
+                    self._fail(job)
+                else:
+                    job.error = None
+                    retry.append(job)
+                    delay_hint[0] = max(delay_hint[0], _retry_after(exception) or 0.0)
+                return
+            job.items.extend((response or {}).get(job.field, []))
+            job.page_token = (response or {}).get("nextPageToken")
+            job.done = not job.page_token
+
+        batch = service.new_batch_http_request(callback=callback)
+        for request_id, job in by_id.items():
+            kwargs = {}
+            if job.page_token:
+                kwargs["pageToken"] = job.page_token
+            if self.page_size:
+                kwargs["pageSize"] = self.page_size
+            batch.add(job.build(service, **kwargs), request_id=request_id)
+        self.stats["batches"] += 1
+        self.stats["sub_requests"] += len(chunk)
+        try:
+            batch.execute()
+        except Exception as e:
+            # Whole batch rejected / transport error: every sub-request without a result goes again
+            print(f"[ClassroomBatch] ⚠️ Batch of {len(chunk)} failed: {e}")
+            retry.extend(job for request_id, job in by_id.items() if request_id not in answered)
+            delay_hint[0] = max(delay_hint[0], _retry_after(e) or 0.0)
+        return retry, delay_hint[0]
+
+    def _fail(self, job: _Job) -> None:
+        self.errors[job.key] = job.error or "unknown error"
+        self.stats["failed"] += 1
+        print(f"[ClassroomBatch] ❌ {job.key}: {job.error}")
@@ -0,0 +1,197 @@
+"""
+Watermarks for the DWD Classroom delta sync.
+
+Classroom objects carry an ``updateTime``. For every (user, course) the sync records, in
+``google_classroom_sync_state`` (migrations/add_classroom_sync_state.sql):
+
+- the course's own updateTime and database id;
+- the newest updateTime seen for its coursework, announcements and submissions;
+- a fingerprint of its roster (teachers / students have no updateTime).
+
+The next sync writes, and so re-embeds, only rows whose updateTime moved past the watermark.
+Unchanged archived courses are not fetched at all. A course gets a full resync when it has no
+state, when its last full sync is older than DWD_CLASSROOM_FULL_SYNC_DAYS, or when the caller
+asks for one. If the state table can't be read, every course is synced in full, as before.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional
+
+SYNC_STATE_TABLE = 'google_classroom_sync_state'
+FULL_SYNC_INTERVAL_DAYS = float(os.getenv('DWD_CLASSROOM_FULL_SYNC_DAYS', '7'))
+
+# relation -> watermark column
+WATERMARK_COLUMNS = {
+    'coursework': 'coursework_watermark',
+    'announcements': 'announcements_watermark',
+    'submissions': 'submissions_watermark',
+}
+
+
+def parse_update_time(value: Any) -> Optional[datetime]:
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def latest_update_time(items: Iterable[Dict[str, Any]], current: Optional[datetime] = None) -> Optional[datetime]:
+    """Newest ``updateTime`` among ``items`` (or ``current`` if that is newer)"""
+    latest = current
+    for item in items:
+        ts = parse_update_time(item.get('updateTime'))
+        if ts and (latest is None or ts > latest):
+            latest = ts
+    return latest
+
+
+def roster_fingerprint(teachers: List[Dict[str, Any]], students: List[Dict[str, Any]]) -> str:
+    """Stable hash of the roster members and the profile fields the sync stores"""
+    def members(people):
+        return sorted(
+            [p.get('userId', ''), p.get('profile', {}), p.get('studentWorkFolder')] for p in people
+        )
+    payload = json.dumps([members(teachers), members(students)], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ClassroomSyncState:
+    """Per-course watermarks for one user's Classroom sync"""
+
+    def __init__(self, client, user_id: str, full_sync: bool = False,
+                 full_sync_interval: timedelta = timedelta(days=FULL_SYNC_INTERVAL_DAYS)):
+        self.client = client
+        self.user_id = user_id
+        self.full_sync = full_sync
+        self.full_sync_interval = full_sync_interval
+        self.started_at = datetime.now(timezone.utc)
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._updates: Dict[str, Dict[str, Any]] = {}
+
+    # ---- Persistence ---------------------------------------------------------
+
+    def load(self) -> None:
+        if self.full_sync:
+            return
+        try:
+            result = self.client.table(SYNC_STATE_TABLE).select('*').eq('user_id', self.user_id).execute()
+            self._rows = {row['course_id']: row for row in (result.data or [])}
+        except Exception as e:
+            # Without watermarks every course is treated as new (full sync)
+            print(f"⚠️ DWD: Classroom sync state unavailable ({e}); running a full sync")
+            self._rows = {}
+
+    def save(self) -> int:
+        """Write the watermarks advanced during this sync; returns the number of courses saved"""
+        if not self._updates:
+            return 0
+        now = self.started_at.isoformat()
+        rows = [
+            {"user_id": self.user_id, "course_id": course_id, **fields, "last_synced_at": now, "updated_at": now}
+            for course_id, fields in self._updates.items()
+        ]
+        try:
+            self.client.table(SYNC_STATE_TABLE).upsert(rows, on_conflict='user_id,course_id').execute()
+        except Exception as e:
+            print(f"⚠️ DWD: Could not save Classroom sync state: {e}")
+            return 0
+        for course_id, fields in self._updates.items():
+            self._rows[course_id] = {**self._rows.get(course_id, {}), **fields}
+        self._updates = {}
+        return len(rows)
+
+    # ---- Decisions -----------------------------------------------------------
+
+    def _row(self, course_id: str) -> Dict[str, Any]:
+        return {**self._rows.get(course_id, {}), **self._updates.get(course_id, {})}
+
+    def is_full(self, course_id: str) -> bool:
+        """True when this course must be synced without watermarks"""
+        if self.full_sync or course_id not in self._rows:
+            return True
+        last_full = parse_update_time(self._rows[course_id].get('last_full_sync_at'))
+        return last_full is None or self.started_at - last_full >= self.full_sync_interval
+
+    def course_changed(self, course: Dict[str, Any]) -> bool:
+        course_id = course.get('id')
+        if self.is_full(course_id):
+            return True
+        stored = parse_update_time(self._rows[course_id].get('course_update_time'))
+        current = parse_update_time(course.get('updateTime'))
+        return stored is None or current is None or current > stored
+
+    def can_skip_course(self, course: Dict[str, Any]) -> bool:
+        """Archived courses that haven't changed since the last sync don't need their relations fetched"""
+        return (
+            course.get('courseState') == 'ARCHIVED'
+            and not self.course_changed(course)
+            and bool(self.db_course_id(course.get('id')))
+        )
+
+    def db_course_id(self, course_id: str) -> Optional[str]:
+        return self._row(course_id).get('db_course_id')
+
+    def changed(self, course_id: str, relation: str, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Items of ``relation`` whose updateTime is past the course's watermark (all items on a full sync)"""
+        if self.is_full(course_id):
+            return list(items)
+        watermark = parse_update_time(self._rows[course_id].get(WATERMARK_COLUMNS[relation]))
+        if watermark is None:
+            return list(items)
+        changed = []
+        for item in items:
+            ts = parse_update_time(item.get('updateTime'))
+            if ts is None or ts > watermark:
+                changed.append(item)
+        return changed
+
+    def roster_changed(self, course_id: str, fingerprint: str) -> bool:
+        return self.is_full(course_id) or self._rows[course_id].get('roster_hash') != fingerprint
+
+    # ---- Advancing -----------------------------------------------------------
+
+    def advance(self, course_id: str, **fields: Any) -> None:
+        self._updates.setdefault(course_id, {}).update(
+            {k: (v.isoformat() if isinstance(v, datetime) else v) for k, v in fields.items()}
+        )
+
+    def advance_watermark(self, course_id: str, relation: str, items: List[Dict[str, Any]]) -> None:
+        column = WATERMARK_COLUMNS[relation]
+        current = None if self.is_full(course_id) else parse_update_time(self._row(course_id).get(column))
+        latest = latest_update_time(items, current)
+        if latest is not None:
+            self.advance(course_id, **{column: latest})
+
+    def finish_course(self, course: Dict[str, Any], db_course_id: str) -> None:
+        """Record the course itself once all of its rows were written"""
+        course_id = course.get('id')
+        fields = {"db_course_id": db_course_id, "course_update_time": parse_update_time(course.get('updateTime'))}
+        if self.is_full(course_id):
+            fields["last_full_sync_at"] = self.started_at
+        self.advance(course_id, **fields)
+
+    def discard(self) -> None:
+        """Forget advanced watermarks (a write failed, so the next sync must look at these rows again)"""
+        self._updates = {}
+
+
+def load_coursework_ids(client, db_course_ids: Iterable[str], chunk_size: int = 100) -> Dict[tuple, Any]:
+    """(db course id, Google coursework id) -> coursework row id, for coursework this sync didn't rewrite"""
+    db_course_ids = [cid for cid in dict.fromkeys(db_course_ids) if cid]
+    ids: Dict[tuple, Any] = {}
+    for start in range(0, len(db_course_ids), chunk_size):
+        chunk = db_course_ids[start:start + chunk_size]
+        try:
+            result = client.table('google_classroom_coursework').select('id,course_id,coursework_id') \
+                .in_('course_id', chunk).execute()
+        except Exception as e:
+            print(f"⚠️ DWD: Could not load coursework ids: {e}")
+            continue
+        for row in result.data or []:
+            ids[(str(row.get('course_id')), str(row.get('coursework_id')))] = row.get('id')
+    return ids
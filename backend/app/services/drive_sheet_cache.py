@@ -0,0 +1,243 @@
+"""
+Read-through cache for the Google Drive / Sheets reads behind DriveChatbotIntegrator.
+
+Every exam, timetable or teacher question used to re-read the active ``gcdr`` token, re-list
+the Drive spreadsheets and re-fetch whole ``A1:ZZ1000`` ranges. The integrator is created per
+request, so the cache lives at module level and is shared by all requests in the process:
+
+- the active token is kept until shortly before it expires (at most ``token_ttl``);
+- the spreadsheet listing (which now includes ``modifiedTime``) is kept for ``list_ttl``;
+- sheet values and tab titles are keyed by (file_id, range) and remember the file's Drive
+  ``modifiedTime`` at fetch time. Within ``revalidate_after`` an entry is served from memory;
+  after that one cheap ``files.get?fields=modifiedTime`` call decides whether it is still
+  current. Entries older than ``max_age`` are always refetched.
+
+All Google calls go through one pooled ``requests.Session``.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DRIVE_FILES_URL = "https://www.googleapis.com/drive/v3/files"
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def get_drive_http_session() -> requests.Session:
+    """Process-wide keep-alive session for Drive / Sheets API calls"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def _token_expiry(token: Dict[str, Any]) -> Optional[float]:
+    """``token_expires_at`` as an epoch timestamp, or None if missing / unparsable"""
+    expires_at = token.get("token_expires_at")
+    if not expires_at:
+        return None
+    try:
+        if isinstance(expires_at, str):
+            expires_dt = datetime.fromisoformat(expires_at.replace("Z", "+00:00"))
+        else:
+            expires_dt = expires_at
+        if expires_dt.tzinfo is None:
+            expires_dt = expires_dt.replace(tzinfo=timezone.utc)
+        return expires_dt.timestamp()
+    except (TypeError, ValueError):
+        return None
+
+
+class DriveSheetCache:
+    """Token, spreadsheet listing and per-tab values, revalidated against Drive modifiedTime"""
+
+    def __init__(self, max_entries: int = 256, token_ttl: float = 300.0, list_ttl: float = 300.0,
+                 revalidate_after: float = 60.0, max_age: float = 3600.0,
+                 session: Optional[requests.Session] = None, clock: Callable[[], float] = time.time):
+        self.max_entries = max_entries
+        self.token_ttl = token_ttl
+        self.list_ttl = list_ttl
+        self.revalidate_after = revalidate_after
+        self.max_age = max_age
+        self._session = session
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._token: Optional[Tuple[Dict[str, Any], float]] = None
+        self._file_list: Optional[Tuple[List[dict], float]] = None
+        # file_id -> (modifiedTime, checked_at)
+        self._modified: Dict[str, Tuple[str, float]] = {}
+        # (file_id, range) -> {"value", "modified", "fetched_at", "checked_at"}
+        self._values: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.revalidations = 0
+
+    @property
+    def session(self) -> requests.Session:
+        return self._session or get_drive_http_session()
+
+    # ---- Token ---------------------------------------------------------------
+
+    def get_token(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._token and self._clock() < self._token[1]:
+                return self._token[0]
+            return None
+
+    def put_token(self, token: Dict[str, Any]) -> None:
+        until = self._clock() + self.token_ttl
+        expiry = _token_expiry(token)
+        if expiry is not None:
+            # Same 5 minute margin TokenRefreshService uses before refreshing
+            until = min(until, expiry - 300)
+        with self._lock:
+            self._token = (token, until)
+
+    # ---- Spreadsheet listing -------------------------------------------------
+
+    def get_file_list(self) -> Optional[List[dict]]:
+        with self._lock:
+            if self._file_list and self._clock() - self._file_list[1] < self.list_ttl:
+                return self._file_list[0]
+            return None
+
+    def put_file_list(self, files: List[dict]) -> None:
+        now = self._clock()
+        with self._lock:
+            self._file_list = (files, now)
+            # The listing doubles as a modifiedTime check for every file in it
+            for f in files:
+                if f.get("id") and f.get("modifiedTime"):
+                    self._modified[f["id"]] = (f["modifiedTime"], now)
+
+    # ---- Revalidation --------------------------------------------------------
+
+    def modified_time(self, file_id: str, token: Dict[str, Any]) -> Optional[str]:
+        """Drive ``modifiedTime`` for ``file_id`` (recent listing / check reused; None if unknown)"""
+        now = self._clock()
+        with self._lock:
+            known = self._modified.get(file_id)
+        if known and now - known[1] < self.revalidate_after:
+            return known[0]
+        try:
+            self.revalidations += 1
+            r = self.session.get(
+                f"{DRIVE_FILES_URL}/{file_id}",
+                headers={"Authorization": f"Bearer {token['access_token']}"},
+                params={"fields": "modifiedTime", "supportsAllDrives": "true"},
+                timeout=10,
+            )
+            if r.status_code != 200:
+                print(f"[DriveSheetCache] modifiedTime HTTP {r.status_code} for {file_id}")
+                return None
+            modified = r.json().get("modifiedTime")
+        except Exception as e:
+            print(f"[DriveSheetCache] Error checking modifiedTime for {file_id}: {e}")
+            return None
+        if modified:
+            with self._lock:
+                self._modified[file_id] = (modified, self._clock())
+        return modified
+
+    # ---- Values --------------------------------------------------------------
+
+    def read_through(self, file_id: str, key: str, token: Dict[str, Any],
+                     loader: Callable[[], Any]) -> Any:
+        """Cached ``loader()`` result for (file_id, key) while the file is unchanged; None results are not cached"""
+        cache_key = (file_id, key)
+        now = self._clock()
+        with self._lock:
+            entry = self._values.get(cache_key)
+        if entry is not None and now - entry["fetched_at"] < self.max_age:
+            if now - entry["checked_at"] < self.revalidate_after:
+                return self._hit(cache_key)
+            modified = self.modified_time(file_id, token)
+            # Drive unreachable: the entry is still within max_age, keep serving it
+            if modified is None or modified == entry["modified"]:
+                with self._lock:
+                    entry["checked_at"] = self._clock()
+                return self._hit(cache_key)
+            print(f"[DriveSheetCache] {file_id} changed ({entry['modified']} -> {modified}), refetching '{key}'")
+
+        with self._lock:
+            self.misses += 1
+        modified = self.modified_time(file_id, token)
+        value = loader()
+        if value is None:
+            return None
+        now = self._clock()
+        with self._lock:
+            self._values[cache_key] = {"value": value, "modified": modified, "fetched_at": now, "checked_at": now}
+            self._values.move_to_end(cache_key)
+            while len(self._values) > self.max_entries:
+                self._values.popitem(last=False)
+        return value
+
+    def _hit(self, cache_key: Tuple[str, str]) -> Any:
+        with self._lock:
+            self.hits += 1
+            self._values.move_to_end(cache_key)
+            return self._values[cache_key]["value"]
+
+    # ---- Maintenance ---------------------------------------------------------
+
+    def invalidate(self, file_id: Optional[str] = None) -> None:
+        """Drop one file's entries, or everything (listing and token included) when ``file_id`` is None"""
+        with self._lock:
+            if file_id is None:
+                self._values.clear()
+                self._modified.clear()
+                self._file_list = None
+                self._token = None
+                return
+            for cache_key in [k for k in self._values if k[0] == file_id]:
+                del self._values[cache_key]
+            self._modified.pop(file_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._values),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "revalidations": self.revalidations,
+                "file_list_cached": self._file_list is not None,
+            }
+
+
+_drive_sheet_cache: Optional[DriveSheetCache] = None
+
+
+def get_drive_sheet_cache() -> DriveSheetCache:
+    global _drive_sheet_cache
+    if _drive_sheet_cache is None:
+        _drive_sheet_cache = DriveSheetCache(
+            max_entries=int(_env_float("DRIVE_SHEET_CACHE_MAX_ENTRIES", 256)),
+            token_ttl=_env_float("DRIVE_TOKEN_CACHE_SECONDS", 300),
+            list_ttl=_env_float("DRIVE_LIST_CACHE_SECONDS", 300),
+            revalidate_after=_env_float("DRIVE_SHEET_REVALIDATE_SECONDS", 60),
+            max_age=_env_float("DRIVE_SHEET_MAX_AGE_SECONDS", 3600),
+        )
+    return _drive_sheet_cache
@@ -3,7 +3,7 @@ Embedding Generator Service
 Automatically generates embeddings for new records in vectorized tables
 """
 from typing import Optional
-from app.services.vector_search_service import VectorSearchService
+from app.services.vector_search_service import get_vector_search_service
 from supabase_config import get_supabase_client
 
 
@@ -12,7 +12,8 @@ class EmbeddingGenerator:
     
     def __init__(self):
         """Initialize the embedding generator"""
-        self.vector_service = VectorSearchService()
+        # Reuse the process-wide service (and its shared encoder) instead of loading another model
+        self.vector_service = get_vector_search_service()
         self.supabase = get_supabase_client()
     
     def generate_for_web_crawler(self, record_id: str) -> bool:
@@ -553,65 +554,37 @@ class EmbeddingGenerator:
             print(f"[EmbeddingGenerator] ❌ Error generating embedding for user profile {record_id}: {e}")
             return False
 
-    def regenerate_all_embeddings(self) -> dict:
+    def refresh_changed(self, table: str, record_ids: list) -> dict:
+        """
+        Re-embed the given records only if their source text changed since they were last
+        embedded (compared via the stored embedding_source_hash)
+
+        Returns:
+            Pipeline stats for the table (scanned / embedded / skipped_unchanged / errors)
+        """
+        from app.services.embedding_pipeline import EmbeddingPipeline
+
+        pipeline = EmbeddingPipeline(supabase=self.supabase, checkpoint_path=None)
+        return pipeline.refresh_rows(table, record_ids)
+
+    def regenerate_all_embeddings(self, force: bool = False, resume: bool = True) -> dict:
         """
         Regenerate embeddings for all records across all tables that support embeddings
 
+        Runs the bulk EmbeddingPipeline: rows are paged, encoded in batches and written back in
+        bulk; unchanged rows (same source text hash) are skipped unless force=True, and an
+        interrupted run resumes from its per-table checkpoint.
+
         Returns:
             Dictionary with counts of processed records per table
         """
-        results = {
-            'web_crawler_data': 0,
-            'team_member_data': 0,
-            'google_classroom_courses': 0,
-            'google_classroom_teachers': 0,
-            'google_classroom_students': 0,
-            'google_classroom_coursework': 0,
-            'google_classroom_submissions': 0,
-            'google_classroom_announcements': 0,
-            'google_calendar_calendars': 0,
-            'google_calendar_events': 0,
-            'user_profiles': 0,
-            'errors': 0
-        }
-
-        tables_and_methods = [
-            ('web_crawler_data', self.generate_for_web_crawler),
-            ('team_member_data', self.generate_for_team_member),
-            ('google_classroom_courses', self.generate_for_course),
-            ('google_classroom_teachers', self.generate_for_teacher),
-            ('google_classroom_students', self.generate_for_student),
-            ('google_classroom_coursework', self.generate_for_coursework),
-            ('google_classroom_submissions', self.generate_for_submission),
-            ('google_classroom_announcements', self.generate_for_announcement),
-            ('google_calendar_calendars', self.generate_for_calendar),
-            ('google_calendar_events', self.generate_for_calendar_event),
-            ('user_profiles', self.generate_for_user_profile),
-        ]
-
-        for table_name, method in tables_and_methods:
-            try:
-                print(f"[EmbeddingGenerator] 🔄 Regenerating embeddings for {table_name}...")
-
-                # Get all records for this table
-                records = self.supabase.table(table_name).select('id').execute()
-
-                if records.data:
-                    for record in records.data:
-                        record_id = record['id']
-                        try:
-                            success = method(str(record_id))
-                            if success:
-                                results[table_name] += 1
-                        except Exception as e:
-                            print(f"[EmbeddingGenerator] ❌ Error regenerating embedding for {table_name} record {record_id}: {e}")
-                            results['errors'] += 1
-
-                print(f"[EmbeddingGenerator] ✅ Completed {table_name}: {results[table_name]} embeddings generated")
-
-            except Exception as e:
-                print(f"[EmbeddingGenerator] ❌ Error processing table {table_name}: {e}")
-                results['errors'] += 1
+        from app.services.embedding_pipeline import EmbeddingPipeline
+
+        pipeline = EmbeddingPipeline(supabase=self.supabase)
+        table_results = pipeline.run(force=force, resume=resume)
+
+        results = {table: stats.get('embedded', 0) for table, stats in table_results.items()}
+        results['errors'] = sum(stats.get('errors', 0) for stats in table_results.values())
 
         print(f"[EmbeddingGenerator] 🎉 Embedding regeneration complete!")
         print(f"[EmbeddingGenerator] 📊 Total embeddings generated: {sum(results.values()) - results['errors']}")
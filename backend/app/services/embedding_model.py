@@ -0,0 +1,222 @@
+"""
+Shared sentence-transformers encoder (all-MiniLM-L6-v2, 384 dimensions)
+
+One model instance per process, shared by VectorSearchService, EmbeddingGenerator, the
+response cache and the embedding scripts. Single-text encodes from concurrent requests are
+micro-batched (a short time window collects them into one forward pass), repeated query
+texts are served from an LRU cache, and bulk jobs call encode_batch() directly.
+"""
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import List, Optional, Sequence
+
+MODEL_NAME = 'sentence-transformers/all-MiniLM-L6-v2'
+EMBEDDING_DIMENSION = 384
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+class SharedEncoder:
+    """Thread-safe encoder with an LRU query cache and a time-window micro-batcher"""
+
+    def __init__(
+        self,
+        model_name: str = MODEL_NAME,
+        cache_size: int = 2048,
+        batch_window_ms: float = 5.0,
+        max_batch_size: int = 32,
+        model=None,
+    ):
+        self.model_name = model_name
+        self.cache_size = cache_size
+        self.batch_window = max(0.0, batch_window_ms) / 1000.0
+        self.max_batch_size = max(1, max_batch_size)
+        self._model = model
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._queue: "queue.Queue[tuple]" = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.batches = 0
+        self.batched_texts = 0
+
+    @property
+    def model(self):
+        """The underlying SentenceTransformer (loaded once, on first use)"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    # Imported lazily so this module stays importable without torch
+                    from sentence_transformers import SentenceTransformer
+                    started = time.perf_counter()
+                    self._model = SentenceTransformer(self.model_name)
+                    print(f"[Embeddings] Loaded {self.model_name} in {time.perf_counter() - started:.1f}s")
+        return self._model
+
+    # ---- LRU cache -------------------------------------------------------
+
+    def _cache_get(self, text: str) -> Optional[List[float]]:
+        with self._cache_lock:
+            vector = self._cache.get(text)
+            if vector is None:
+                self.cache_misses += 1
+                return None
+            self._cache.move_to_end(text)
+            self.cache_hits += 1
+            return vector
+
+    def _cache_put(self, text: str, vector: List[float]) -> None:
+        if self.cache_size <= 0:
+            return
+        with self._cache_lock:
+            self._cache[text] = vector
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # ---- Encoding --------------------------------------------------------
+
+    def _forward(self, texts: Sequence[str], batch_size: int) -> List[List[float]]:
+        vectors = self.model.encode(list(texts), batch_size=batch_size, show_progress_bar=False)
+        return [v.tolist() if hasattr(v, 'tolist') else list(v) for v in vectors]
+
+    def encode(self, text: str) -> List[float]:
+        """
+        Encode one text. Cached texts skip the forward pass; misses are queued and encoded
+        together with any other misses that arrive within the batch window.
+        """
+        text = (text or '').strip()
+        if not text:
+            raise ValueError("Text cannot be empty")
+        cached = self._cache_get(text)
+        if cached is not None:
+            return list(cached)
+
+        future: Future = Future()
+        self._ensure_worker()
+        self._queue.put((text, future))
+        vector = future.result()
+        return list(vector)
+
+    def encode_batch(self, texts: Sequence[str], batch_size: int = 64, use_cache: bool = True) -> List[List[float]]:
+        """
+        Encode many texts in full CPU batches (order preserved). Bulk jobs that embed document
+        bodies should pass use_cache=False so they don't flush the query cache.
+        """
+        cleaned = [(t or '').strip() for t in texts]
+        results: List[Optional[List[float]]] = [None] * len(cleaned)
+        pending = {}
+        for i, text in enumerate(cleaned):
+            if not text:
+                raise ValueError("Text cannot be empty")
+            if use_cache:
+                cached = self._cache_get(text)
+                if cached is not None:
+                    results[i] = list(cached)
+                    continue
+            pending.setdefault(text, []).append(i)
+
+        if pending:
+            unique_texts = list(pending)
+            vectors = self._forward(unique_texts, batch_size)
+            for text, vector in zip(unique_texts, vectors):
+                if use_cache:
+                    self._cache_put(text, vector)
+                for i in pending[text]:
+                    results[i] = list(vector)
+        return results  # type: ignore[return-value]
+
+    # ---- Micro-batcher ---------------------------------------------------
+
+    def _ensure_worker(self) -> None:
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run_batcher, name="embedding-batcher", daemon=True)
+                self._worker.start()
+
+    def _run_batcher(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._encode_pending(batch)
+
+    def _encode_pending(self, batch: List[tuple]) -> None:
+        waiting = {}
+        for text, future in batch:
+            waiting.setdefault(text, []).append(future)
+        unique_texts = list(waiting)
+        try:
+            vectors = self._forward(unique_texts, batch_size=len(unique_texts))
+        except Exception as e:
+            for futures in waiting.values():
+                for future in futures:
+                    future.set_exception(e)
+            return
+        self.batches += 1
+        self.batched_texts += len(unique_texts)
+        for text, vector in zip(unique_texts, vectors):
+            self._cache_put(text, vector)
+            for future in waiting[text]:
+                future.set_result(vector)
+
+    def stats(self) -> dict:
+        with self._cache_lock:
+            lookups = self.cache_hits + self.cache_misses
+            return {
+                "model_loaded": self._model is not None,
+                "cache_entries": len(self._cache),
+                "cache_size": self.cache_size,
+                "cache_hits": self.cache_hits,
+                "cache_misses": self.cache_misses,
+                "cache_hit_rate": round(self.cache_hits / lookups, 4) if lookups else 0.0,
+                "batches": self.batches,
+                "avg_batch_size": round(self.batched_texts / self.batches, 2) if self.batches else 0.0,
+            }
+
+
+# Singleton instance
+_shared_encoder = None
+_shared_encoder_lock = threading.Lock()
+
+
+def get_shared_encoder() -> SharedEncoder:
+    """Get or create the process-wide SharedEncoder"""
+    global _shared_encoder
+    if _shared_encoder is None:
+        with _shared_encoder_lock:
+            if _shared_encoder is None:
+                _shared_encoder = SharedEncoder(
+                    cache_size=_env_int("EMBEDDING_CACHE_SIZE", 2048),
+                    batch_window_ms=_env_float("EMBEDDING_BATCH_WINDOW_MS", 5.0),
+                    max_batch_size=_env_int("EMBEDDING_MAX_BATCH_SIZE", 32),
+                )
+    return _shared_encoder
@@ -0,0 +1,528 @@
+"""
+Bulk embedding pipeline
+Streams rows out of the vectorized tables in keyset-paged chunks, encodes them in batches on
+the shared encoder and writes embeddings back in bulk. Progress is checkpointed per table so an
+interrupted run resumes where it stopped (rows that failed to encode or write are kept in the
+checkpoint and retried first), and rows whose source text hash is unchanged are skipped.
+Checkpoints expire after EMBEDDING_CHECKPOINT_TTL_HOURS.
+
+Bulk writes go through the bulk_update_embeddings() RPC
+(migrations/add_embedding_pipeline_state.sql). If that migration has not been applied, rows are
+updated individually on a small thread pool instead.
+
+After a sync, EmbeddingRefreshQueue collects the ids of touched rows and refresh_rows()
+re-embeds only those whose source text hash changed.
+"""
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from app.services.embedding_model import MODEL_NAME
+
+MAX_TEXT_CHARS = 8000
+HASH_COLUMN = 'embedding_source_hash'
+DEFAULT_CHECKPOINT_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    'embedding_pipeline_checkpoint.json'
+)
+try:
+    CHECKPOINT_TTL_SECONDS = float(os.getenv('EMBEDDING_CHECKPOINT_TTL_HOURS', '24')) * 3600
+except ValueError:
+    CHECKPOINT_TTL_SECONDS = 24 * 3600
+
+
+def _s(row: dict, key: str) -> str:
+    return row.get(key, '') or ''
+
+
+def _profile_text(row: dict) -> str:
+    profile = row.get('profile', {}) or {}
+    name = (profile.get('name', {}) or {}).get('fullName', '') or ''
+    email = profile.get('emailAddress', '') or ''
+    return f"{name} {email}".strip()
+
+
+def _submission_text(row: dict) -> str:
+    # Submissions have little text; state + type is what the per-record generator embeds
+    state = _s(row, 'state')
+    course_work_type = _s(row, 'course_work_type')
+    if not state and not course_work_type:
+        return ''
+    return f"Submission state: {state} Type: {course_work_type}".strip()
+
+
+@dataclass(frozen=True)
+class EmbeddingTableSpec:
+    """How to read and embed one vectorized table"""
+    table: str
+    columns: str
+    build_text: Callable[[dict], str]
+    active_column: Optional[str] = None
+
+
+# Text builders mirror EmbeddingGenerator.generate_for_* so bulk and per-record embeddings agree
+EMBEDDING_TABLE_SPECS: Dict[str, EmbeddingTableSpec] = {spec.table: spec for spec in (
+    EmbeddingTableSpec(
+        'web_crawler_data', 'id, title, description, main_content',
+        lambda r: f"{_s(r, 'title')} {_s(r, 'description')} {_s(r, 'main_content')[:MAX_TEXT_CHARS]}".strip(),
+        active_column='is_active',
+    ),
+    EmbeddingTableSpec(
+        'team_member_data', 'id, name, title, description, details, full_content',
+        lambda r: f"{_s(r, 'name')} {_s(r, 'title')} {_s(r, 'description')} {_s(r, 'details')} {_s(r, 'full_content')}".strip(),
+        active_column='is_active',
+    ),
+    EmbeddingTableSpec(
+        'google_classroom_courses', 'id, name, description, section, room',
+        lambda r: f"{_s(r, 'name')} {_s(r, 'description')} {_s(r, 'section')} {_s(r, 'room')}".strip(),
+    ),
+    EmbeddingTableSpec('google_classroom_teachers', 'id, profile', _profile_text),
+    EmbeddingTableSpec('google_classroom_students', 'id, profile', _profile_text),
+    EmbeddingTableSpec(
+        'google_classroom_coursework', 'id, title, description',
+        lambda r: f"{_s(r, 'title')} {_s(r, 'description')[:MAX_TEXT_CHARS]}".strip(),
+    ),
+    EmbeddingTableSpec('google_classroom_submissions', 'id, state, course_work_type', _submission_text),
+    EmbeddingTableSpec('google_classroom_announcements', 'id, text', lambda r: _s(r, 'text').strip()),
+    EmbeddingTableSpec(
+        'google_calendar_calendars', 'id, summary, description',
+        lambda r: f"{_s(r, 'summary')} {_s(r, 'description')}".strip(),
+    ),
+    EmbeddingTableSpec(
+        'google_calendar_events', 'id, summary, description, location',
+        lambda r: f"{_s(r, 'summary')} {_s(r, 'description')} {_s(r, 'location')}".strip(),
+    ),
+    EmbeddingTableSpec(
+        'user_profiles', 'id, first_name, last_name, email, bio, role, grade',
+        lambda r: f"{_s(r, 'first_name')} {_s(r, 'last_name')} {_s(r, 'email')} {_s(r, 'bio')} {_s(r, 'role')} {_s(r, 'grade')}".strip(),
+    ),
+)}
+
+
+def build_embedding_text(table: str, row: dict) -> str:
+    """Text that gets embedded for a row of ``table`` (empty string = nothing to embed)"""
+    return EMBEDDING_TABLE_SPECS[table].build_text(row)[:MAX_TEXT_CHARS]
+
+
+def source_hash(text: str) -> str:
+    """Content hash stored next to an embedding; includes the model so a model swap re-embeds"""
+    return hashlib.sha256(f"{MODEL_NAME}\n{text}".encode('utf-8')).hexdigest()
+
+
+class CheckpointStore:
+    """Per-table progress saved as JSON (last processed id, ids to retry, counters)"""
+
+    def __init__(self, path: str = DEFAULT_CHECKPOINT_PATH, ttl_seconds: float = CHECKPOINT_TTL_SECONDS):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.state = {}
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.state = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[EmbeddingPipeline] ⚠️ Ignoring unreadable checkpoint {path}: {e}")
+                self.state = {}
+
+    def get(self, key: str) -> dict:
+        """Saved progress for ``key``; {} when there is none or it is older than the TTL"""
+        value = self.state.get(key, {})
+        if value and time.time() - value.get('saved_at', 0) > self.ttl_seconds:
+            return {}
+        return dict(value)
+
+    def save(self, key: str, value: dict) -> None:
+        self.state[key] = {**value, 'saved_at': time.time()}
+        self._flush()
+
+    def clear(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self.state.pop(key, None)
+        self._flush()
+
+    def _flush(self) -> None:
+        if not self.path:
+            return
+        if not self.state:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def _rpc_missing(error: Exception) -> bool:
+    """PostgREST's "function not found" (PGRST202 / 404), as opposed to a transient failure"""
+    code = str(getattr(error, 'code', '') or '')
+    text = str(error)
+    return code in ('PGRST202', '404') or 'PGRST202' in text or 'Could not find the function' in text
+
+
+def checkpoint_key(table: str, embedding_column: str = 'embedding', *, force: bool = False,
+                   only_missing: bool = False, active_only: bool = False) -> str:
+    """Checkpoints are per table, column and mode: a resume must never continue another mode's scan"""
+    mode = '+'.join(name for name, on in (
+        ('force', force), ('only_missing', only_missing), ('active_only', active_only)) if on) or 'all'
+    return f"{table}:{embedding_column}:{mode}"
+
+
+class EmbeddingPipeline:
+    """Paged, batched, resumable embedding (re)generation for the vectorized tables"""
+
+    def __init__(
+        self,
+        supabase=None,
+        encode_batch: Optional[Callable[[List[str]], List[List[float]]]] = None,
+        batch_size: int = 64,
+        page_size: int = 500,
+        write_workers: int = 4,
+        checkpoint_path: Optional[str] = DEFAULT_CHECKPOINT_PATH,
+    ):
+        if supabase is None:
+            from supabase_config import get_supabase_client
+            supabase = get_supabase_client()
+        if encode_batch is None:
+            from app.services.embedding_model import get_shared_encoder
+            encoder = get_shared_encoder()
+            encode_batch = lambda texts: encoder.encode_batch(texts, batch_size=batch_size, use_cache=False)
+        self.supabase = supabase
+        self.encode_batch = encode_batch
+        self.batch_size = max(1, batch_size)
+        self.page_size = max(1, page_size)
+        self.write_workers = max(1, write_workers)
+        self.checkpoints = CheckpointStore(checkpoint_path)
+        self._bulk_rpc_available = True
+
+    # ---- Writes ----------------------------------------------------------
+
+    def _write_rows(self, table: str, rows: List[dict], embedding_column: str, track_hash: bool) -> List[str]:
+        """Write [{'id', 'embedding', 'source_hash'}] back; returns the ids that could not be written"""
+        if not rows:
+            return []
+        if self._bulk_rpc_available:
+            try:
+                self.supabase.rpc('bulk_update_embeddings', {
+                    'p_table': table,
+                    'p_rows': rows,
+                    'p_embedding_column': embedding_column,
+                    'p_write_hash': track_hash,
+                }).execute()
+                return []
+            except Exception as e:
+                # Only a missing function disables the RPC for good; a transient failure just
+                # sends this batch through the per-row path
+                if _rpc_missing(e):
+                    self._bulk_rpc_available = False
+                    print(f"[EmbeddingPipeline] ⚠️ bulk_update_embeddings RPC unavailable ({e}); "
+                          f"falling back to concurrent per-row updates")
+                else:
+                    print(f"[EmbeddingPipeline] ⚠️ bulk_update_embeddings failed ({e}); "
+                          f"writing this batch row by row")
+
+        def _update(row: dict) -> bool:
+            payload = {embedding_column: row['embedding']}
+            if track_hash:
+                payload[HASH_COLUMN] = row['source_hash']
+            self.supabase.table(table).update(payload).eq('id', row['id']).execute()
+            return True
+
+        failed = []
+        with ThreadPoolExecutor(max_workers=self.write_workers) as pool:
+            futures = [(row['id'], pool.submit(_update, row)) for row in rows]
+            for row_id, future in futures:
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"[EmbeddingPipeline] ❌ Error updating {table} row: {e}")
+                    failed.append(row_id)
+        return failed
+
+    # ---- Reads -----------------------------------------------------------
+
+    def _fetch_page(self, spec: EmbeddingTableSpec, after_id: Optional[str], embedding_column: str,
+                    track_hash: bool, only_missing: bool, active_only: bool) -> List[dict]:
+        columns = spec.columns + (f', {HASH_COLUMN}' if track_hash else '')
+        query = self.supabase.table(spec.table).select(columns)
+        if after_id is not None:
+            query = query.gt('id', after_id)
+        if only_missing:
+            query = query.is_(embedding_column, 'null')
+        if active_only and spec.active_column:
+            query = query.eq(spec.active_column, True)
+        result = query.order('id').limit(self.page_size).execute()
+        return result.data or []
+
+    def _fetch_ids(self, spec: EmbeddingTableSpec, ids: List[str], track_hash: bool) -> List[dict]:
+        from app.utils.classroom_batch_loader import fetch_rows_in
+
+        columns = spec.columns + (f', {HASH_COLUMN}' if track_hash else '')
+        return fetch_rows_in(self.supabase, spec.table, columns, 'id', ids)
+
+    # ---- Encode + write ---------------------------------------------------
+
+    def _embed_rows(self, table: str, rows: List[dict], embedding_column: str, track_hash: bool,
+                    force: bool, stats: dict, writer: ThreadPoolExecutor) -> List[str]:
+        """Hash-check ``rows``, encode the dirty ones in batches and write them (updates ``stats``)
+
+        Returns the ids of rows that failed to encode or write.
+        """
+        pending: List[dict] = []
+        for row in rows:
+            stats['scanned'] += 1
+            text = build_embedding_text(table, row)
+            if not text:
+                stats['skipped_empty'] += 1
+                continue
+            digest = source_hash(text)
+            if track_hash and not force and row.get(HASH_COLUMN) == digest:
+                stats['skipped_unchanged'] += 1
+                continue
+            pending.append({'id': str(row['id']), 'text': text, 'source_hash': digest})
+
+        # Encode batch N+1 while batch N is being written
+        failed: List[str] = []
+        write_futures = []
+        for i in range(0, len(pending), self.batch_size):
+            chunk = pending[i:i + self.batch_size]
+            try:
+                vectors = self.encode_batch([r['text'] for r in chunk])
+            except Exception as e:
+                print(f"[EmbeddingPipeline] ❌ Error encoding {len(chunk)} {table} rows: {e}")
+                stats['errors'] += len(chunk)
+                failed.extend(r['id'] for r in chunk)
+                continue
+            batch = [
+                {'id': r['id'], 'embedding': v, 'source_hash': r['source_hash']}
+                for r, v in zip(chunk, vectors)
+            ]
+            write_futures.append((batch, writer.submit(
+                self._write_rows, table, batch, embedding_column, track_hash)))
+        for batch, future in write_futures:
+            try:
+                batch_failed = future.result()
+            except Exception as e:
+                print(f"[EmbeddingPipeline] ❌ Error writing {table} embeddings: {e}")
+                batch_failed = [r['id'] for r in batch]
+            stats['embedded'] += len(batch) - len(batch_failed)
+            stats['errors'] += len(batch_failed)
+            failed.extend(batch_failed)
+        return failed
+
+    # ---- Run -------------------------------------------------------------
+
+    def run_table(
+        self,
+        table: str,
+        *,
+        embedding_column: str = 'embedding',
+        force: bool = False,
+        only_missing: bool = False,
+        active_only: bool = False,
+        limit: Optional[int] = None,
+        resume: bool = True,
+    ) -> dict:
+        """
+        Embed every row of ``table``. Rows whose stored source hash matches are skipped unless
+        ``force``; hash tracking only applies to the primary ``embedding`` column.
+        """
+        spec = EMBEDDING_TABLE_SPECS[table]
+        track_hash = embedding_column == 'embedding'
+        key = checkpoint_key(table, embedding_column, force=force, only_missing=only_missing, active_only=active_only)
+        # A capped (--limit) run is a sample, not a scan: it neither resumes nor saves a checkpoint
+        use_checkpoint = limit is None
+        checkpoint = self.checkpoints.get(key) if resume and use_checkpoint else {}
+        stats = {
+            'scanned': 0, 'embedded': 0, 'skipped_unchanged': 0, 'skipped_empty': 0, 'errors': 0,
+        }
+        if checkpoint.get('completed'):
+            print(f"[EmbeddingPipeline] ⏭️ {table}: already completed in checkpoint - skipping")
+            return {**stats, 'seconds': 0.0, 'rows_per_sec': 0.0, 'resumed': True}
+
+        # Counters describe this run only; the checkpoint says where to continue and what to retry
+        after_id = checkpoint.get('last_id')
+        failed_ids: List[str] = []
+        read_failed = False
+        if after_id:
+            print(f"[EmbeddingPipeline] ↩️ {table}: resuming after id {after_id}")
+
+        started = time.perf_counter()
+        processed_this_run = 0
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            retry_ids = checkpoint.get('failed_ids') or []
+            if retry_ids:
+                # Rows that failed last time sit before last_id; retry them before moving on
+                print(f"[EmbeddingPipeline] 🔁 {table}: retrying {len(retry_ids)} rows that failed last run")
+                try:
+                    rows = self._fetch_ids(spec, retry_ids, track_hash)
+                    failed_ids.extend(self._embed_rows(table, rows, embedding_column, track_hash, force, stats, writer))
+                except Exception as e:
+                    print(f"[EmbeddingPipeline] ❌ Error reading {len(retry_ids)} {table} rows to retry: {e}")
+                    stats['errors'] += len(retry_ids)
+                    failed_ids.extend(retry_ids)
+            while True:
+                try:
+                    page = self._fetch_page(spec, after_id, embedding_column, track_hash, only_missing, active_only)
+                except Exception as e:
+                    if track_hash and HASH_COLUMN in str(e):
+                        print(f"[EmbeddingPipeline] ⚠️ {table}.{HASH_COLUMN} missing - run "
+                              f"migrations/add_embedding_pipeline_state.sql; continuing without hash skip")
+                        track_hash = False
+                        continue
+                    print(f"[EmbeddingPipeline] ❌ Error reading {table} after id {after_id}: {e}")
+                    stats['errors'] += 1
+                    read_failed = True
+                    break
+                if not page:
+                    break
+                if limit is not None:
+                    page = page[:max(0, limit - processed_this_run)]
+                    if not page:
+                        break
+
+                failed_ids.extend(self._embed_rows(table, page, embedding_column, track_hash, force, stats, writer))
+                processed_this_run += len(page)
+                after_id = str(page[-1]['id'])
+                if use_checkpoint:
+                    self.checkpoints.save(key, {**stats, 'last_id': after_id, 'failed_ids': failed_ids, 'completed': False})
+
+                elapsed = time.perf_counter() - started
+                print(f"[EmbeddingPipeline] {table}: scanned={stats['scanned']} embedded={stats['embedded']} "
+                      f"unchanged={stats['skipped_unchanged']} ({processed_this_run / elapsed if elapsed else 0:.1f} rows/sec)")
+                if len(page) < self.page_size or (limit is not None and processed_this_run >= limit):
+                    break
+
+        seconds = time.perf_counter() - started
+        if use_checkpoint and not read_failed:
+            # Complete only once nothing is left to retry; otherwise the next run retries failed_ids
+            self.checkpoints.save(key, {**stats, 'last_id': after_id, 'failed_ids': failed_ids,
+                                        'completed': not failed_ids})
+        return {
+            **stats,
+            'resumed_after': checkpoint.get('last_id'),
+        'failed_ids': len(failed_ids),
+            'seconds': round(seconds, 2),
+            'rows_per_sec': round(processed_this_run / seconds, 1) if seconds else 0.0,
+        }
+
+    def refresh_rows(self, table: str, ids: Iterable, *, force: bool = False) -> dict:
+        """
+        Re-embed just the given rows of ``table`` if their source text changed since the last
+        embedding (stored hash differs or is missing). Used after syncs so only dirty rows cost
+        an encode; no checkpointing since the id list is already bounded.
+        """
+        spec = EMBEDDING_TABLE_SPECS[table]
+        ids = [str(i) for i in dict.fromkeys(ids) if i is not None]
+        stats = {
+            'scanned': 0, 'embedded': 0, 'skipped_unchanged': 0, 'skipped_empty': 0, 'errors': 0,
+        }
+        if not ids:
+            return stats
+
+        track_hash = True
+        try:
+            rows = self._fetch_ids(spec, ids, track_hash)
+        except Exception as e:
+            if HASH_COLUMN not in str(e):
+                print(f"[EmbeddingPipeline] ❌ Error reading {len(ids)} {table} rows for refresh: {e}")
+                stats['errors'] += len(ids)
+                return stats
+            # Pre-migration schema: every touched row counts as dirty
+            track_hash = False
+            rows = self._fetch_ids(spec, ids, track_hash)
+
+        with ThreadPoolExecutor(max_workers=1) as writer:
+            self._embed_rows(table, rows, 'embedding', track_hash, force, stats, writer)
+        return stats
+
+    def run(self, tables: Optional[Sequence[str]] = None, *, fresh: bool = False, **kwargs) -> Dict[str, dict]:
+        """
+        Run run_table() for each table (all vectorized tables by default). Checkpoints are cleared
+        once every table completes. A run resumes only while some table is still mid-scan (or has
+        rows to retry); otherwise it is a new run and old ``completed`` markers are cleared, as
+        they are with ``fresh``.
+        """
+        tables = list(tables or EMBEDDING_TABLE_SPECS)
+        embedding_column = kwargs.get('embedding_column', 'embedding')
+        keys = [
+            checkpoint_key(table, embedding_column, force=kwargs.get('force', False),
+                           only_missing=kwargs.get('only_missing', False), active_only=kwargs.get('active_only', False))
+            for table in tables
+        ]
+        states = [self.checkpoints.get(key) for key in keys]
+        in_progress = any(state and not state.get('completed') for state in states)
+        if fresh or not in_progress:
+            self.checkpoints.clear(keys)
+
+        started = time.perf_counter()
+        results = {}
+        for table in tables:
+            print(f"[EmbeddingPipeline] 🔄 Embedding {table}...")
+            try:
+                results[table] = self.run_table(table, **kwargs)
+            except Exception as e:
+                print(f"[EmbeddingPipeline] ❌ Error processing table {table}: {e}")
+                results[table] = {'embedded': 0, 'errors': 1}
+            print(f"[EmbeddingPipeline] ✅ {table}: {results[table]}")
+
+        total_rows = sum(r.get('scanned', 0) for r in results.values())
+        seconds = time.perf_counter() - started
+        if all(self.checkpoints.get(key).get('completed') for key in keys):
+            self.checkpoints.clear(keys)
+        print(f"[EmbeddingPipeline] 🎉 Done: {sum(r.get('embedded', 0) for r in results.values())} embedded, "
+              f"{total_rows} scanned in {seconds:.1f}s ({total_rows / seconds if seconds else 0:.1f} rows/sec)")
+        return results
+
+
+class EmbeddingRefreshQueue:
+    """
+    Collects the ids of rows a sync inserted or updated and re-embeds the dirty ones in one
+    batched pass at the end (instead of one fetch + encode + update per row mid-sync).
+    """
+
+    def __init__(self, pipeline: Optional[EmbeddingPipeline] = None):
+        self._pipeline = pipeline
+        self._dirty: Dict[str, Dict[str, None]] = {}
+
+    def mark(self, table: str, row_id) -> None:
+        """Record that ``row_id`` in ``table`` may have new source text"""
+        if row_id is None or table not in EMBEDDING_TABLE_SPECS:
+            return
+        self._dirty.setdefault(table, {})[str(row_id)] = None
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._dirty.values())
+
+    def flush(self, force: bool = False) -> Dict[str, dict]:
+        """Refresh every marked row; returns per-table stats. Never raises (syncs must not fail on embeddings)."""
+        results: Dict[str, dict] = {}
+        if not self._dirty:
+            return results
+        started = time.perf_counter()
+        dirty, self._dirty = self._dirty, {}
+        try:
+            if self._pipeline is None:
+                # Bounded id lists need no resume state
+                self._pipeline = EmbeddingPipeline(checkpoint_path=None)
+            for table, ids in dirty.items():
+                try:
+                    results[table] = self._pipeline.refresh_rows(table, list(ids), force=force)
+                except Exception as e:
+                    print(f"[EmbeddingPipeline] ❌ Error refreshing {table} embeddings: {e}")
+                    results[table] = {'embedded': 0, 'errors': len(ids)}
+                # Keep the in-process search index (if enabled) in step with the new embeddings
+                from app.services.local_vector_index import refresh_local_vector_index
+                refresh_local_vector_index(table, list(ids))
+        except Exception as e:
+            print(f"[EmbeddingPipeline] ❌ Embedding refresh unavailable: {e}")
+            return results
+        embedded = sum(r.get('embedded', 0) for r in results.values())
+        unchanged = sum(r.get('skipped_unchanged', 0) for r in results.values())
+        print(f"[EmbeddingPipeline] 🔁 Refreshed embeddings: {embedded} re-embedded, {unchanged} unchanged "
+              f"in {time.perf_counter() - started:.2f}s")
+        return results
@@ -0,0 +1,286 @@
+"""
+Two-tier cache for WebCrawlerAgent.get_enhanced_response results.
+
+L1 is an in-process TTL + LRU dict of formatted responses keyed by (intent, normalized query);
+L2 is the shared Supabase ``search_cache`` table, so a response computed by one worker (or
+before a restart) is reused by the others. An L2 hit is promoted into L1.
+
+Entries go stale when the website or team data they were built from changes, so the syncs call
+invalidate_enhanced_responses(): the website scope drops everything, the team scope only drops
+team / person answers. Invalidation clears L1 in the calling process and deactivates the L2 rows;
+other workers' L1 entries age out within the (short) L1 TTL.
+
+Calendar answers are relative to today ("this week", "upcoming"), so they get a short TTL in
+both tiers.
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from app.services.semantic_response_cache import normalize_query
+
+L2_KEY_PREFIX = "enhanced"
+TEAM_INTENT = "team"
+CALENDAR_INTENT = "calendar"
+NOT_AVAILABLE_PREFIX = "## Information Not Available"
+# Not-found / error answers: caching them would keep serving the miss after the next sync fixes it
+UNCACHEABLE_PREFIXES = (
+    NOT_AVAILABLE_PREFIX,
+    "[Web] No matching",  # roots_article_resolver.not_found_message_for_title
+    "CALENDAR_DATA: Could not load",  # calendar page failed to load
+)
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def is_cacheable_response(response: Any) -> bool:
+    """True for a non-empty answer that isn't a not-found / error message"""
+    return bool(response) and isinstance(response, str) and not response.lstrip().startswith(UNCACHEABLE_PREFIXES)
+
+
+def _label(intent: str) -> str:
+    return f"[{L2_KEY_PREFIX}:{intent}]"
+
+
+class SearchCacheStore:
+    """L2 tier: rows in the Supabase search_cache table, tagged in query_text with the intent"""
+
+    def __init__(self, client_factory: Optional[Callable[[], Any]] = None):
+        self._client_factory = client_factory
+
+    def _client(self):
+        if self._client_factory is not None:
+            return self._client_factory()
+        from supabase_config import get_supabase_client
+        return get_supabase_client()
+
+    @staticmethod
+    def _hash(intent: str, normalized: str) -> str:
+        return hashlib.md5(f"{L2_KEY_PREFIX}:{intent}:{normalized}".encode("utf-8")).hexdigest()
+
+    def get(self, intent: str, normalized: str) -> Optional[str]:
+        client = self._client()
+        if not client:
+            return None
+        result = (
+            client.table('search_cache').select('cached_results')
+            .eq('query_hash', self._hash(intent, normalized)).eq('is_active', True)
+            .gte('expires_at', datetime.utcnow().isoformat()).limit(1).execute()
+        )
+        if not result.data:
+            return None
+        cached = result.data[0].get('cached_results')
+        if isinstance(cached, dict):
+            cached = cached.get('response')
+        return cached if isinstance(cached, str) and cached else None
+
+    def put(self, intent: str, normalized: str, response: str, ttl_seconds: float) -> None:
+        client = self._client()
+        if not client:
+            return
+        client.table('search_cache').upsert({
+            'query_hash': self._hash(intent, normalized),
+            'query_text': f"{_label(intent)} {normalized}",
+            'cached_results': {'kind': 'enhanced_response', 'intent': intent, 'response': response},
+            'result_count': len(response),
+            'expires_at': (datetime.utcnow() + timedelta(seconds=ttl_seconds)).isoformat(),
+            'is_active': True,
+        }, on_conflict='query_hash').execute()
+
+    def deactivate(self, intent: Optional[str] = None) -> None:
+        client = self._client()
+        if not client:
+            return
+        pattern = f"{_label(intent)}%" if intent else f"[{L2_KEY_PREFIX}:%"
+        client.table('search_cache').update({'is_active': False}).eq('is_active', True).like('query_text', pattern).execute()
+
+
+class EnhancedResponseCache:
+    """Thread-safe L1 (TTL + LRU) in front of a shared L2 store, with per-tier hit counters"""
+
+    def __init__(
+        self,
+        l2: Optional[SearchCacheStore] = None,
+        l1_max_entries: int = 256,
+        l1_ttl_seconds: float = 600,
+        l2_ttl_seconds: float = 6 * 3600,
+        calendar_ttl_seconds: float = 900,
+    ):
+        self.l2 = l2
+        self.l1_max_entries = l1_max_entries
+        self.l1_ttl_seconds = l1_ttl_seconds
+        self.l2_ttl_seconds = l2_ttl_seconds
+        self.calendar_ttl_seconds = calendar_ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+        self.l1_hits = 0
+        self.l1_misses = 0
+        self.l2_hits = 0
+        self.l2_misses = 0
+        self.l2_errors = 0
+        self.computes = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _ttls(self, intent: str) -> Tuple[float, float]:
+        if intent == CALENDAR_INTENT:
+            return min(self.l1_ttl_seconds, self.calendar_ttl_seconds), self.calendar_ttl_seconds
+        return self.l1_ttl_seconds, self.l2_ttl_seconds
+
+    def _l1_get(self, key: Tuple[str, str]) -> Optional[str]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.l1_misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.l1_hits += 1
+            return entry[1]
+
+    def _l1_put(self, key: Tuple[str, str], response: str) -> None:
+        expires_at = time.monotonic() + self._ttls(key[0])[0]
+        with self._lock:
+            self._entries[key] = (expires_at, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.l1_max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get(self, intent: str, query: str) -> Optional[str]:
+        """Cached response from L1, else L2 (promoted into L1); None on a miss in both tiers"""
+        key = (intent, normalize_query(query))
+        response = self._l1_get(key)
+        if response is not None or self.l2 is None:
+            return response
+        try:
+            response = self.l2.get(*key)
+        except Exception as e:
+            self.l2_errors += 1
+            print(f"[EnhancedCache] L2 lookup failed: {e}")
+            response = None
+        with self._lock:
+            if response is None:
+                self.l2_misses += 1
+            else:
+                self.l2_hits += 1
+        if response is not None:
+            self._l1_put(key, response)
+        return response
+
+    def put(self, intent: str, query: str, response: str) -> None:
+        key = (intent, normalize_query(query))
+        self._l1_put(key, response)
+        if self.l2 is not None:
+            try:
+                self.l2.put(*key, response, self._ttls(intent)[1])
+            except Exception as e:
+                self.l2_errors += 1
+                print(f"[EnhancedCache] L2 write failed: {e}")
+
+    def get_or_compute(self, intent: str, query: str, compute: Callable[[], str]) -> str:
+        """Return the cached response or call ``compute()`` and cache a usable result"""
+        cached = self.get(intent, query)
+        if cached is not None:
+            return cached
+        with self._lock:
+            self.computes += 1
+        response = compute()
+        # Not-found answers should pick up content from the next sync, so don't pin them
+        if is_cacheable_response(response):
+            self.put(intent, query, response)
+        return response
+
+    def invalidate(self, intent: Optional[str] = None) -> int:
+        """Drop entries for ``intent`` (all intents when None) from L1 and deactivate them in L2"""
+        with self._lock:
+            if intent is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                stale = [key for key in self._entries if key[0] == intent]
+                for key in stale:
+                    del self._entries[key]
+                dropped = len(stale)
+            self.invalidations += 1
+        if self.l2 is not None:
+            try:
+                self.l2.deactivate(intent)
+            except Exception as e:
+                self.l2_errors += 1
+                print(f"[EnhancedCache] L2 invalidation failed: {e}")
+        return dropped
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            l1_lookups = self.l1_hits + self.l1_misses
+            l2_lookups = self.l2_hits + self.l2_misses
+            return {
+                "l1": {
+                    "entries": len(self._entries),
+                    "max_entries": self.l1_max_entries,
+                    "ttl_seconds": self.l1_ttl_seconds,
+                    "hits": self.l1_hits,
+                    "misses": self.l1_misses,
+                    "hit_rate": round(self.l1_hits / l1_lookups, 4) if l1_lookups else 0.0,
+                    "evictions": self.evictions,
+                    "expirations": self.expirations,
+                },
+                "l2": {
+                    "enabled": self.l2 is not None,
+                    "ttl_seconds": self.l2_ttl_seconds,
+                    "hits": self.l2_hits,
+                    "misses": self.l2_misses,
+                    # Share of L1 misses that L2 answered
+                    "hit_rate": round(self.l2_hits / l2_lookups, 4) if l2_lookups else 0.0,
+                    "errors": self.l2_errors,
+                },
+                "computes": self.computes,
+                "hit_rate": round((self.l1_hits + self.l2_hits) / l1_lookups, 4) if l1_lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+# Singleton instance
+_enhanced_cache = None
+_enhanced_cache_lock = threading.Lock()
+
+
+def get_enhanced_response_cache() -> EnhancedResponseCache:
+    """Get or create the process-wide enhanced response cache (L2 off with ENHANCED_CACHE_L2=0)"""
+    global _enhanced_cache
+    if _enhanced_cache is None:
+        with _enhanced_cache_lock:
+            if _enhanced_cache is None:
+                use_l2 = os.getenv("ENHANCED_CACHE_L2", "1").lower() not in ("0", "false", "no")
+                _enhanced_cache = EnhancedResponseCache(
+                    l2=SearchCacheStore() if use_l2 else None,
+                    l1_max_entries=_env_int("ENHANCED_CACHE_L1_MAX_ENTRIES", 256),
+                    l1_ttl_seconds=_env_int("ENHANCED_CACHE_L1_TTL_SECONDS", 600),
+                    l2_ttl_seconds=_env_int("ENHANCED_CACHE_L2_TTL_SECONDS", 6 * 3600),
+                    calendar_ttl_seconds=_env_int("ENHANCED_CACHE_CALENDAR_TTL_SECONDS", 900),
+                )
+    return _enhanced_cache
+
+
+def invalidate_enhanced_responses(scope: str = "website") -> None:
+    """Sync hook: 'website' drops every cached response, 'team' only team / person answers"""
+    try:
+        dropped = get_enhanced_response_cache().invalidate(TEAM_INTENT if scope == "team" else None)
+        print(f"[EnhancedCache] Invalidated {scope} responses ({dropped} in-process entries)")
+    except Exception as e:
+        print(f"[EnhancedCache] Invalidation failed: {e}")
@@ -0,0 +1,284 @@
+"""
+Essential Page Crawler
+Concurrent, revalidating crawl of the essential Prakriti pages for daily_crawl_essential.
+
+- Pages are fetched on a small thread pool. Each host gets a bounded number of in-flight requests
+  and a minimum gap between request starts (politeness budget).
+- Requests carry If-None-Match / If-Modified-Since from the last crawl, so an unchanged page costs
+  a 304 and nothing else.
+- Pages that do return 200 are parsed and compared (content hash) with the stored row; unchanged
+  content skips the write and the re-embedding.
+- Changed rows are flushed together: one upsert for existing rows, one insert for new URLs, then a
+  single embedding refresh. Revalidated pages get one batched crawled_at bump so the 24h freshness
+  checks in WebCrawlerAgent keep treating them as current.
+
+Validators live in web_crawler_data.http_etag / http_last_modified
+(migrations/add_web_crawler_validators.sql); without them the crawl still works, just without
+conditional requests.
+"""
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+VALIDATOR_COLUMNS = ('http_etag', 'http_last_modified')
+STORED_COLUMNS = 'id, url, title, description, main_content, headings, links, content_type, crawled_at'
+MAX_MAIN_CONTENT = 50000
+MAX_LINKS = 50
+
+
+class HostPoliteness:
+    """Per-host concurrency cap plus a minimum interval between request starts"""
+
+    def __init__(self, max_per_host: int = 2, min_interval: float = 0.25):
+        self.max_per_host = max(1, max_per_host)
+        self.min_interval = max(0.0, min_interval)
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            if host not in self._semaphores:
+                self._semaphores[host] = threading.BoundedSemaphore(self.max_per_host)
+            return self._semaphores[host]
+
+    def acquire(self, host: str) -> None:
+        self._semaphore(host).acquire()
+        with self._lock:
+            now = time.monotonic()
+            start_at = max(now, self._next_start.get(host, 0.0))
+            self._next_start[host] = start_at + self.min_interval
+        if start_at > now:
+            time.sleep(start_at - now)
+
+    def release(self, host: str) -> None:
+        self._semaphore(host).release()
+
+
+def build_page_row(url: str, content: dict, content_type: str) -> dict:
+    """The web_crawler_data fields daily_crawl_essential writes for a parsed page"""
+    keywords = []
+    if content.get('title'):
+        keywords.extend(content['title'].lower().split()[:5])
+    if content.get('description'):
+        keywords.extend(content['description'].lower().split()[:5])
+    keywords = sorted(set(keywords))[:10]
+    return {
+        'url': url,
+        'title': content.get('title', ''),
+        'description': content.get('description', ''),
+        'main_content': (content.get('main_content', '') or '')[:MAX_MAIN_CONTENT],
+        'headings': content.get('headings', []) or [],
+        'links': (content.get('links', []) or [])[:MAX_LINKS],
+        'content_type': content_type,
+        'query_keywords': keywords,
+        'relevance_score': len(keywords),
+        'is_active': True,
+    }
+
+
+def page_content_hash(row: dict) -> str:
+    """Hash of the stored page content (what the chatbot and the embeddings see)"""
+    payload = {
+        key: row.get(key) or ('' if key in ('title', 'description', 'main_content', 'content_type') else [])
+        for key in ('title', 'description', 'main_content', 'headings', 'links', 'content_type')
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+class EssentialPageCrawler:
+    """Crawl a fixed list of pages, writing only what changed"""
+
+    def __init__(
+        self,
+        agent=None,
+        supabase=None,
+        max_workers: int = 4,
+        max_per_host: int = 2,
+        min_interval: float = 0.25,
+        timeout: float = 30,
+        session: Optional[requests.Session] = None,
+        embedding_pipeline=None,
+    ):
+        if agent is None:
+            from app.agents.web_crawler_agent import WebCrawlerAgent
+            agent = WebCrawlerAgent()
+        if supabase is None:
+            from supabase_config import get_supabase_client
+            supabase = get_supabase_client()
+        self.agent = agent
+        self.supabase = supabase
+        self.max_workers = max(1, max_workers)
+        self.politeness = HostPoliteness(max_per_host, min_interval)
+        self.timeout = timeout
+        if session is None:
+            session = requests.Session()
+            session.headers.update(agent.session.headers)
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        self.session = session
+        self.embedding_pipeline = embedding_pipeline
+        self.validators_available = True
+
+    # ---- Stored state ----------------------------------------------------
+
+    def _load_existing(self, urls: List[str]) -> Dict[str, dict]:
+        """Most recent active row per URL (one query)"""
+        columns = STORED_COLUMNS + ', ' + ', '.join(VALIDATOR_COLUMNS)
+        try:
+            result = (self.supabase.table('web_crawler_data').select(columns)
+                      .in_('url', urls).eq('is_active', True).order('crawled_at', desc=True).execute())
+        except Exception as e:
+            if not any(col in str(e) for col in VALIDATOR_COLUMNS):
+                raise
+            print("[EssentialCrawler] ⚠️ http_etag/http_last_modified missing - run "
+                  "migrations/add_web_crawler_validators.sql; crawling without conditional requests")
+            self.validators_available = False
+            result = (self.supabase.table('web_crawler_data').select(STORED_COLUMNS)
+                      .in_('url', urls).eq('is_active', True).order('crawled_at', desc=True).execute())
+        existing: Dict[str, dict] = {}
+        for row in result.data or []:
+            existing.setdefault(row.get('url'), row)
+        return existing
+
+    # ---- Fetch -----------------------------------------------------------
+
+    def _fetch(self, url: str, stored: Optional[dict], content_type: str) -> dict:
+        """Fetch + parse one page; returns {'url', 'status', ...}"""
+        headers = {}
+        if stored and self.validators_available:
+            if stored.get('http_etag'):
+                headers['If-None-Match'] = stored['http_etag']
+            if stored.get('http_last_modified'):
+                headers['If-Modified-Since'] = stored['http_last_modified']
+
+        host = urlparse(url).netloc
+        started = time.perf_counter()
+        self.politeness.acquire(host)
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        finally:
+            self.politeness.release(host)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if response.status_code == 304 and stored:
+            return {'url': url, 'status': 'not_modified', 'ms': elapsed_ms}
+        response.raise_for_status()
+
+        content = self.agent.parse_page_html(url, response.content, "", skip_link_following=True)
+        row = build_page_row(url, content, content_type)
+        validators = {
+            'http_etag': response.headers.get('ETag'),
+            'http_last_modified': response.headers.get('Last-Modified'),
+        }
+        if stored and page_content_hash(row) == page_content_hash(stored):
+            status = 'unchanged'
+        else:
+            status = 'changed' if stored else 'new'
+        return {'url': url, 'status': status, 'row': row, 'validators': validators, 'ms': elapsed_ms}
+
+    # ---- Writes ----------------------------------------------------------
+
+    def _validators_changed(self, stored: dict, validators: dict) -> bool:
+        return self.validators_available and any(
+            validators.get(col) and validators.get(col) != stored.get(col) for col in VALIDATOR_COLUMNS
+        )
+
+    def _flush(self, results: List[dict], existing: Dict[str, dict], embedding_queue) -> None:
+        now = datetime.now().isoformat()
+        updates, inserts, revalidated_ids, new_validators = [], [], [], []
+        for result in results:
+            stored = existing.get(result['url'])
+            status = result['status']
+            if status in ('changed', 'new'):
+                row = dict(result['row'])
+                if self.validators_available:
+                    row.update(result['validators'])
+                row['crawled_at'] = now
+                row['updated_at'] = now
+                if stored:
+                    row['id'] = stored['id']
+                    updates.append(row)
+                else:
+                    inserts.append(row)
+            elif stored:
+                # 304 / same hash: only record that the page was revalidated
+                if status == 'unchanged' and self._validators_changed(stored, result['validators']):
+                    new_validators.append((stored['id'], result['validators']))
+                else:
+                    revalidated_ids.append(stored['id'])
+
+        table = self.supabase.table
+        if updates:
+            # One round-trip for every changed page (conflict on the primary key keeps ids / crawled_date)
+            table('web_crawler_data').upsert(updates, on_conflict='id').execute()
+            for row in updates:
+                embedding_queue.mark('web_crawler_data', row['id'])
+        if inserts:
+            inserted = table('web_crawler_data').insert(inserts).execute()
+            for row in inserted.data or []:
+                embedding_queue.mark('web_crawler_data', row.get('id'))
+        if revalidated_ids:
+            table('web_crawler_data').update({'crawled_at': now}).in_('id', revalidated_ids).execute()
+        # Same content, new validators (first crawl after the migration, or server-side ETag churn)
+        for row_id, validators in new_validators:
+            table('web_crawler_data').update({**validators, 'crawled_at': now}).eq('id', row_id).execute()
+
+    # ---- Run -------------------------------------------------------------
+
+    def crawl(self, urls: Iterable[str], content_types: Optional[Dict[str, str]] = None) -> dict:
+        """Crawl ``urls`` concurrently; returns counts per outcome plus per-page timings"""
+        from app.services.embedding_pipeline import EmbeddingRefreshQueue
+
+        urls = list(dict.fromkeys(urls))
+        content_types = content_types or {}
+        started = time.perf_counter()
+        existing = self._load_existing(urls)
+
+        results: List[dict] = []
+        errors: Dict[str, str] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='essential-crawl') as pool:
+            futures = {
+                url: pool.submit(self._fetch, url, existing.get(url), content_types.get(url, 'general'))
+                for url in urls
+            }
+            for url, future in futures.items():
+                try:
+                    result = future.result()
+                    results.append(result)
+                    print(f"[EssentialCrawler] {result['status']:<12} {result['ms']:7.0f}ms  {url}")
+                except Exception as e:
+                    errors[url] = str(e)
+                    print(f"[EssentialCrawler] ❌ {url}: {e}")
+
+        embedding_queue = EmbeddingRefreshQueue(self.embedding_pipeline)
+        try:
+            self._flush(results, existing, embedding_queue)
+        except Exception as e:
+            print(f"[EssentialCrawler] ❌ Error writing crawl results: {e}")
+            errors['_write'] = str(e)
+        embeddings = embedding_queue.flush().get('web_crawler_data', {})
+        # Content / crawled_at changed: let the in-process page index rebuild on next search
+        from app.services.page_search_index import invalidate_page_search_index
+        invalidate_page_search_index()
+        from app.services.enhanced_response_cache import invalidate_enhanced_responses
+        invalidate_enhanced_responses('website')
+
+        stats = {status: sum(1 for r in results if r['status'] == status)
+                 for status in ('not_modified', 'unchanged', 'changed', 'new')}
+        stats.update({
+            'errors': len(errors),
+            'error_details': errors,
+            'embedded': embeddings.get('embedded', 0),
+            'seconds': round(time.perf_counter() - started, 2),
+        })
+        return stats
@@ -7,8 +7,11 @@ import json
 import base64
 import jwt
 import threading
+from collections import OrderedDict
+import google.auth.transport.requests
 from google.oauth2 import service_account
-from googleapiclient.discovery import build
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.discovery_cache import get_static_doc
 from typing import Dict, List, Optional
 from datetime import datetime, timezone
 
@@ -17,6 +20,9 @@ _thread_local = threading.local()
 
 class GoogleDWDService:
     """Service for Google Domain-Wide Delegation (DWD) authentication"""
+
+    # (api, version) -> parsed discovery document, shared by every instance
+    _discovery_documents: Dict = {}
     
     def __init__(self):
         # Get service account path from env var or use default
@@ -31,6 +37,14 @@ class GoogleDWDService:
         self._base_credentials = None
         self._load_credentials()
 
+        # (user_email, api) -> delegated credentials with a live token; services per thread
+        self.service_cache_size = int(os.getenv('DWD_SERVICE_CACHE_SIZE', '512'))
+        self.token_refresh_margin = int(os.getenv('DWD_TOKEN_REFRESH_MARGIN_SECONDS', '300'))
+        self._credentials_cache = OrderedDict()
+        self._credentials_lock = threading.RLock()
+        self._thread_services = threading.local()
+        self.tokens_minted = 0
+
     def _build_service_account_candidates(self) -> List[str]:
         """Return prioritized absolute paths to try for the service account key."""
         base_dir = os.path.normpath(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
@@ -977,11 +991,15 @@ class GoogleDWDService:
             return True  # Assume OK if we can't check
     
     def get_classroom_service(self, user_email: str):
-        """Get Google Classroom service for a specific user"""
+        """Get Google Classroom service for a specific user (cached, see _cached_service)"""
         # CRITICAL: Set API type in thread-local BEFORE getting credentials
         # This ensures the JWT creation can detect which API is being used
+        # (also on cache hits: a later token refresh reads it)
         _thread_local.dwd_api_type = 'classroom'
-        
+        return self._cached_service(user_email, 'classroom', 'v1', self._classroom_credentials)
+
+    def _classroom_credentials(self, user_email: str):
+        """Delegated credentials prepared for the Classroom API"""
         # EXPERIMENTAL: For Classroom, try setting scopes on credentials BEFORE JWT creation
         # This might allow Google's library to create the JWT naturally with correct scopes
         credentials = self._get_delegated_credentials(user_email)
@@ -1040,22 +1058,17 @@ class GoogleDWDService:
                     print(f"⚠️  WARNING: Credentials have _scopes before building: {credentials._scopes}")
                     credentials._scopes = None
         
-        # Build service - explicitly don't pass any scopes
-        # The credentials object should have no scopes, so build() shouldn't add any
-        service = build('classroom', 'v1', credentials=credentials)
-        # After build, verify credentials still have no scopes
-        if hasattr(credentials, '_scopes'):
-            if credentials._scopes:
-                print(f"❌ ERROR: build() added _scopes: {credentials._scopes}")
-                credentials._scopes = None
-        return service
+        return credentials
     
     def get_calendar_service(self, user_email: str):
-        """Get Google Calendar service for a specific user"""
+        """Get Google Calendar service for a specific user (cached, see _cached_service)"""
         # CRITICAL: Set API type in thread-local BEFORE getting credentials
         # This ensures the JWT creation can detect which API is being used
         _thread_local.dwd_api_type = 'calendar'
-        
+        return self._cached_service(user_email, 'calendar', 'v3', self._calendar_credentials)
+
+    def _calendar_credentials(self, user_email: str):
+        """Delegated credentials prepared for the Calendar API"""
         credentials = self._get_delegated_credentials(user_email)
         # Mark API type in credentials object as well
         if hasattr(credentials, '_dwd_api_type'):
@@ -1077,14 +1090,103 @@ class GoogleDWDService:
                 print(f"⚠️  WARNING: Credentials have _scopes before building: {credentials._scopes}")
                 credentials._scopes = None
         
-        # Build service
-        service = build('calendar', 'v3', credentials=credentials)
+        return credentials
+
+    # ---- Credential / service cache -------------------------------------------
+    # Syncing one user touches every course × relation (teachers, students, coursework,
+    # submissions, announcements). Delegated credentials are created and their token minted
+    # once per (user, API) and reused until shortly before expiry; service objects are built
+    # from a discovery document parsed once per API. Services wrap an httplib2 connection,
+    # which is not thread-safe, so each thread keeps its own service over the shared credentials.
+
+    def _cached_service(self, user_email: str, api: str, version: str, make_credentials):
+        key = (user_email.strip().lower(), api)
+        credentials = self._cached_credentials(key, user_email, make_credentials)
+        services = getattr(self._thread_services, 'services', None)
+        if services is None:
+            services = self._thread_services.services = OrderedDict()
+        cached = services.get(key)
+        if cached is not None and cached[1] is credentials:
+            services.move_to_end(key)
+            return cached[0]
+        service = self._build_service(api, version, credentials)
+        services[key] = (service, credentials)
+        while len(services) > self.service_cache_size:
+            services.popitem(last=False)
+        return service
+
+    def _cached_credentials(self, key, user_email: str, make_credentials):
+        with self._credentials_lock:
+            credentials = self._credentials_cache.get(key)
+            if credentials is None:
+                credentials = make_credentials(user_email)
+                self._credentials_cache[key] = credentials
+                while len(self._credentials_cache) > self.service_cache_size:
+                    self._credentials_cache.popitem(last=False)
+            self._credentials_cache.move_to_end(key)
+            if self._token_needs_refresh(credentials):
+                try:
+                    credentials.refresh(google.auth.transport.requests.Request())
+                except Exception:
+                    # Don't keep credentials that cannot mint a token; the caller's error handling applies
+                    self._credentials_cache.pop(key, None)
+                    raise
+                self.tokens_minted += 1
+                print(f"✅ DWD: Minted {key[1]} token for {user_email} (valid until {credentials.expiry})")
+            return credentials
+
+    def _token_needs_refresh(self, credentials) -> bool:
+        if not getattr(credentials, 'token', None):
+            return True
+        expiry = getattr(credentials, 'expiry', None)
+        if expiry is None:
+            return False
+        # google-auth stores expiry as naive UTC
+        remaining = expiry - datetime.now(timezone.utc).replace(tzinfo=None)
+        return remaining.total_seconds() < self.token_refresh_margin
+
+    def _build_service(self, api: str, version: str, credentials):
+        # Build service - explicitly don't pass any scopes
+        # The credentials object should have no scopes, so build() shouldn't add any
+        document = self._discovery_document(api, version)
+        if document is not None:
+            service = build_from_document(document, credentials=credentials)
+        else:
+            service = build(api, version, credentials=credentials)
         # After build, verify credentials still have no scopes
         if hasattr(credentials, '_scopes'):
             if credentials._scopes:
                 print(f"❌ ERROR: build() added _scopes: {credentials._scopes}")
                 credentials._scopes = None
         return service
+
+    @classmethod
+    def _discovery_document(cls, api: str, version: str):
+        """Parsed discovery document for api/version, loaded once per process (None: let build() fetch it)"""
+        key = (api, version)
+        if key not in cls._discovery_documents:
+            try:
+                raw = get_static_doc(api, version)
+                cls._discovery_documents[key] = json.loads(raw) if raw else None
+            except Exception as e:
+                print(f"⚠️  DWD: Could not load static discovery document for {api} {version}: {e}")
+                cls._discovery_documents[key] = None
+        return cls._discovery_documents[key]
+
+    def invalidate_service_cache(self, user_email: Optional[str] = None, api: Optional[str] = None):
+        """Drop cached credentials (and so the services built on them) for a user / API, or all of them"""
+        with self._credentials_lock:
+            for key in list(self._credentials_cache):
+                if (user_email is None or key[0] == user_email.strip().lower()) and (api is None or key[1] == api):
+                    del self._credentials_cache[key]
+
+    def service_cache_stats(self) -> Dict:
+        with self._credentials_lock:
+            return {
+                'credentials_cached': len(self._credentials_cache),
+                'tokens_minted': self.tokens_minted,
+                'discovery_documents': sorted(f"{a}/{v}" for a, v in self._discovery_documents),
+            }
     
     def fetch_user_courses(self, user_email: str) -> List[Dict]:
         """Fetch all courses for a user"""
@@ -1255,6 +1357,31 @@ class GoogleDWDService:
             print(f"❌ DWD: Failed to fetch announcements for course {course_id}: {str(e)}")
             return []
     
+    def classroom_batch_fetcher(self, user_email: str):
+        """ClassroomBatchFetcher over this user's (cached) Classroom service"""
+        from app.services.classroom_batch_fetcher import ClassroomBatchFetcher
+        return ClassroomBatchFetcher(lambda: self.get_classroom_service(user_email))
+
+    def fetch_courses_relations(self, user_email: str, course_ids: List[str],
+                                relations: Optional[List[str]] = None) -> Dict[str, Dict[str, List[Dict]]]:
+        """Teachers, students, coursework and announcements (or ``relations``) for many courses via batch requests"""
+        fetcher = self.classroom_batch_fetcher(user_email)
+        if relations:
+            relations = fetcher.fetch_course_relations(course_ids, relations)
+        else:
+            relations = fetcher.fetch_course_relations(course_ids)
+        print(f"✅ DWD: Batched {fetcher.stats['sub_requests']} course relation reads into {fetcher.stats['batches']} requests "
+              f"({fetcher.stats['retried']} retried, {fetcher.stats['failed']} failed)")
+        return relations
+
+    def fetch_coursework_submissions(self, user_email: str, coursework: List[tuple]) -> Dict[tuple, List[Dict]]:
+        """Student submissions for many (course_id, coursework_id) pairs via batch requests"""
+        fetcher = self.classroom_batch_fetcher(user_email)
+        submissions = fetcher.fetch_submissions(coursework)
+        print(f"✅ DWD: Batched {fetcher.stats['sub_requests']} submission reads into {fetcher.stats['batches']} requests "
+              f"({fetcher.stats['retried']} retried, {fetcher.stats['failed']} failed)")
+        return submissions
+
     def fetch_user_calendars(self, user_email: str) -> List[Dict]:
         """Fetch all calendars for a user"""
         try:
@@ -1266,28 +1393,30 @@ class GoogleDWDService:
             print(f"❌ DWD: Failed to fetch calendars for {user_email}: {str(e)}")
             return []
     
+    def calendar_event_sync(self, user_email: str, calendar_id: str = 'primary',
+                            time_min: Optional[str] = None):
+        """CalendarEventSync over this user's (cached) Calendar service for one calendar"""
+        from app.services.calendar_event_sync import CalendarEventSync
+
+        def list_page(params):
+            return self.get_calendar_service(user_email).events().list(calendarId=calendar_id, **params).execute()
+
+        # Full listings start now (as before) unless an earlier time_min is given
+        return CalendarEventSync(list_page, full_sync_params={
+            'timeMin': time_min or datetime.now(timezone.utc).isoformat()
+        })
+
+    def sync_calendar_events(self, user_email: str, calendar_id: str = 'primary',
+                             sync_token: Optional[str] = None, time_min: Optional[str] = None):
+        """Events changed / deleted since ``sync_token`` (all events if None); raises on API errors"""
+        return self.calendar_event_sync(user_email, calendar_id, time_min).sync(sync_token)
+
     def fetch_calendar_events(self, user_email: str, calendar_id: str = 'primary', 
                              time_min: Optional[str] = None) -> List[Dict]:
-        """Fetch events from a calendar"""
+        """Fetch events from a calendar (all pages)"""
         try:
-            calendar_service = self.get_calendar_service(user_email)
-            
-            params = {
-                'calendarId': calendar_id,
-                'maxResults': 2500,
-                'singleEvents': True,
-                'orderBy': 'startTime'
-            }
-            
-            if time_min:
-                params['timeMin'] = time_min
-            else:
-                # Default to current time
-                params['timeMin'] = datetime.now(timezone.utc).isoformat()
-            
-            results = calendar_service.events().list(**params).execute()
-            events = results.get('items', [])
-            return events
+            result = self.sync_calendar_events(user_email, calendar_id, time_min=time_min)
+            return sorted(result.changed, key=lambda e: (e.get('start') or {}).get('dateTime') or (e.get('start') or {}).get('date') or '')
         except Exception as e:
             print(f"❌ DWD: Failed to fetch events for calendar {calendar_id}: {str(e)}")
             return []
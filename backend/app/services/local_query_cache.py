@@ -0,0 +1,246 @@
+"""
+SQLite storage for WebCrawlerCacheManager's local query cache.
+
+Each thread keeps one long-lived connection, and the database runs in WAL mode, so lookups
+don't reconnect and readers don't queue behind writers. A lookup is a single SELECT. The
+access_count / last_accessed bumps from hits are collected in memory and written in one
+transaction by a background flusher. ``max_entries`` is enforced after every store: expired
+rows go first, then the least recently accessed. Lookup/store latencies are sampled for
+percentiles in stats().
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+SCHEMA = (
+    '''
+    CREATE TABLE IF NOT EXISTS web_crawler_cache (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        query_hash TEXT UNIQUE NOT NULL,
+        query_text TEXT NOT NULL,
+        content_type TEXT,
+        results TEXT NOT NULL, -- JSON string
+        cached_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        expires_at TIMESTAMP NOT NULL,
+        access_count INTEGER DEFAULT 0,
+        last_accessed TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    'CREATE INDEX IF NOT EXISTS idx_query_hash ON web_crawler_cache(query_hash)',
+    'CREATE INDEX IF NOT EXISTS idx_expires_at ON web_crawler_cache(expires_at)',
+    'CREATE INDEX IF NOT EXISTS idx_last_accessed ON web_crawler_cache(last_accessed)',
+)
+
+
+def _timestamp(moment: Optional[datetime] = None) -> str:
+    """UTC in SQLite's CURRENT_TIMESTAMP format, so stored times compare correctly as text"""
+    return (moment or datetime.now(timezone.utc)).strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+class LocalQueryCache:
+    """Per-thread WAL connections, batched access bumps and LRU-bounded size"""
+
+    def __init__(self, db_path, max_entries: int = 1000, ttl_hours: float = 24,
+                 flush_interval: float = 2.0, max_pending: int = 256, latency_samples: int = 1000):
+        self.db_path = str(db_path)
+        self.max_entries = max_entries
+        self.ttl_hours = ttl_hours
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        # query_hash -> (hits since last flush, last access timestamp)
+        self._pending: Dict[str, Tuple[int, str]] = {}
+        self._pending_lock = threading.Lock()
+        self._latency_lock = threading.Lock()
+        self._latency_ms = {'get': deque(maxlen=latency_samples), 'put': deque(maxlen=latency_samples)}
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self.flushes = 0
+        self._wake = threading.Event()
+        self._closed = False
+        self._flusher: Optional[threading.Thread] = None
+
+        conn = self._conn()
+        with conn:
+            for statement in SCHEMA:
+                conn.execute(statement)
+
+    # ---- Connections ---------------------------------------------------------
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self) -> None:
+        """Flush pending bumps, stop the flusher and close every thread's connection"""
+        self._closed = True
+        self._wake.set()
+        if self._flusher is not None:
+            self._flusher.join(timeout=5)
+        self.flush()
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._local = threading.local()
+
+    # ---- Reads / writes ------------------------------------------------------
+
+    def _record_latency(self, op: str, started: float) -> None:
+        with self._latency_lock:
+            self._latency_ms[op].append((time.perf_counter() - started) * 1000.0)
+
+    def get(self, query_hash: str) -> Optional[Any]:
+        """Cached results for ``query_hash`` if present and unexpired (no write on the hit path)"""
+        started = time.perf_counter()
+        row = self._conn().execute(
+            'SELECT results FROM web_crawler_cache WHERE query_hash = ? AND expires_at > ?',
+            (query_hash, _timestamp()),
+        ).fetchone()
+        self._record_latency('get', started)
+        if row is None:
+            with self._pending_lock:
+                self.misses += 1
+            return None
+        with self._pending_lock:
+            self.hits += 1
+            count = self._pending.get(query_hash, (0, ''))[0]
+            self._pending[query_hash] = (count + 1, _timestamp())
+            backlog = len(self._pending)
+        if backlog >= self.max_pending:
+            self._wake.set()
+        self._ensure_flusher()
+        return json.loads(row[0])
+
+    def put(self, query_hash: str, query_text: str, results: Any, content_type: Optional[str] = None) -> None:
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        conn = self._conn()
+        with conn:
+            conn.execute('''
+                INSERT OR REPLACE INTO web_crawler_cache
+                (query_hash, query_text, content_type, results, cached_at, expires_at, access_count, last_accessed)
+                VALUES (?, ?, ?, ?, ?, ?, 0, ?)
+            ''', (query_hash, query_text, content_type, json.dumps(results), _timestamp(now),
+                  _timestamp(now + timedelta(hours=self.ttl_hours)), _timestamp(now)))
+        with self._pending_lock:
+            self._pending.pop(query_hash, None)
+        self.evict()
+        self._record_latency('put', started)
+
+    # ---- Access bumps --------------------------------------------------------
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is not None or self._closed:
+            return
+        with self._pending_lock:
+            if self._flusher is None:
+                self._flusher = threading.Thread(target=self._flush_loop, name='local-cache-flusher', daemon=True)
+                self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[CacheManager] Error flushing access counts: {e}")
+
+    def flush(self) -> int:
+        """Write the pending access_count / last_accessed bumps in one transaction"""
+        with self._pending_lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+        conn = self._conn()
+        with conn:
+            conn.executemany(
+                'UPDATE web_crawler_cache SET access_count = access_count + ?, last_accessed = ? WHERE query_hash = ?',
+                [(count, accessed, query_hash) for query_hash, (count, accessed) in pending.items()],
+            )
+        self.flushes += 1
+        return len(pending)
+
+    # ---- Eviction ------------------------------------------------------------
+
+    def evict(self) -> int:
+        """Delete expired rows, then least recently accessed rows beyond ``max_entries``"""
+        # Recent hits must count towards recency before choosing victims
+        self.flush()
+        conn = self._conn()
+        with conn:
+            deleted = conn.execute('DELETE FROM web_crawler_cache WHERE expires_at <= ?', (_timestamp(),)).rowcount
+            count = conn.execute('SELECT COUNT(*) FROM web_crawler_cache').fetchone()[0]
+            if count > self.max_entries:
+                deleted += conn.execute('''
+                    DELETE FROM web_crawler_cache WHERE id IN (
+                        SELECT id FROM web_crawler_cache ORDER BY last_accessed ASC, id ASC LIMIT ?
+                    )
+                ''', (count - self.max_entries,)).rowcount
+        self.evicted += deleted
+        return deleted
+
+    # ---- Stats ---------------------------------------------------------------
+
+    def latency_percentiles(self) -> Dict[str, Dict[str, float]]:
+        with self._latency_lock:
+            samples = {op: sorted(values) for op, values in self._latency_ms.items()}
+
+        def _pct(values: List[float], p: float) -> float:
+            if not values:
+                return 0.0
+            idx = min(len(values) - 1, int(round(p * (len(values) - 1))))
+            return round(values[idx], 3)
+
+        return {
+            op: {
+                'p50_ms': _pct(values, 0.50),
+                'p95_ms': _pct(values, 0.95),
+                'p99_ms': _pct(values, 0.99),
+                'max_ms': round(values[-1], 3) if values else 0.0,
+                'samples': len(values),
+            }
+            for op, values in samples.items()
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        self.flush()
+        now = _timestamp()
+        conn = self._conn()
+        total_entries = conn.execute('SELECT COUNT(*) FROM web_crawler_cache').fetchone()[0]
+        valid_entries = conn.execute('SELECT COUNT(*) FROM web_crawler_cache WHERE expires_at > ?', (now,)).fetchone()[0]
+        top_queries = conn.execute(
+            'SELECT query_text, access_count FROM web_crawler_cache ORDER BY access_count DESC LIMIT 5'
+        ).fetchall()
+        lookups = self.hits + self.misses
+        return {
+            'total_entries': total_entries,
+            'valid_entries': valid_entries,
+            'expired_entries': total_entries - valid_entries,
+            'max_entries': self.max_entries,
+            'top_queries': top_queries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evicted': self.evicted,
+            'journal_mode': conn.execute('PRAGMA journal_mode').fetchone()[0],
+            'latency': self.latency_percentiles(),
+        }
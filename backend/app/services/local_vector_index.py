@@ -0,0 +1,251 @@
+"""
+Local Vector Index
+In-process copy of the small vectorized tables (tens of pages, hundreds of team/coursework rows)
+held as normalized NumPy matrices, so top-k cosine search is one matrix-vector product instead of
+a pgvector RPC round-trip.
+
+Results have the same shape as the match_* RPCs (migrations/add_vector_columns.sql): the RPC's
+columns plus ``similarity`` (1 - cosine distance), filtered by ``similarity > threshold`` and
+sorted best-first. The index is snapshotted once (load()) and kept current by refresh() after
+syncs; VectorSearchService uses it according to VECTOR_SEARCH_LOCAL_INDEX:
+
+    off       never (default)
+    fallback  only when the RPC fails or misses its deadline
+    prefer    answer locally once the table is loaded, RPC otherwise
+"""
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+LOCAL_INDEX_MODES = ('off', 'fallback', 'prefer')
+LOCAL_INDEX_MODE = os.getenv('VECTOR_SEARCH_LOCAL_INDEX', 'off').strip().lower()
+if LOCAL_INDEX_MODE not in LOCAL_INDEX_MODES:
+    print(f"[LocalVectorIndex] ⚠️ Unknown VECTOR_SEARCH_LOCAL_INDEX={LOCAL_INDEX_MODE!r} - using 'off'")
+    LOCAL_INDEX_MODE = 'off'
+
+
+@dataclass(frozen=True)
+class LocalIndexSpec:
+    """One match_* RPC mirrored locally"""
+    rpc_name: str
+    table: str
+    columns: Sequence[str]
+    active_column: Optional[str] = None
+
+
+LOCAL_INDEX_SPECS: Dict[str, LocalIndexSpec] = {spec.rpc_name: spec for spec in (
+    LocalIndexSpec('match_web_content', 'web_crawler_data',
+                   ('id', 'url', 'title', 'description', 'main_content', 'content_type'), 'is_active'),
+    LocalIndexSpec('match_team_members', 'team_member_data',
+                   ('id', 'name', 'title', 'description', 'details', 'full_content'), 'is_active'),
+    LocalIndexSpec('match_coursework', 'google_classroom_coursework', ('id', 'course_id', 'title', 'description')),
+    LocalIndexSpec('match_announcements', 'google_classroom_announcements', ('id', 'course_id', 'text')),
+)}
+TABLE_TO_RPC = {spec.table: spec.rpc_name for spec in LOCAL_INDEX_SPECS.values()}
+
+
+def _parse_vector(value) -> Optional[List[float]]:
+    """PostgREST returns pgvector columns as '[0.1,0.2,...]' strings"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return None
+    return value if isinstance(value, (list, tuple)) and value else None
+
+
+class _TableIndex:
+    """Rows + a lazily rebuilt normalized float32 matrix for one table"""
+
+    def __init__(self):
+        self.rows: Dict[str, dict] = {}
+        self.vectors: Dict[str, np.ndarray] = {}
+        self.matrix: Optional[np.ndarray] = None
+        self.ordered_rows: List[dict] = []
+        self.dirty = True
+        self.loaded_at: Optional[float] = None
+
+    def upsert(self, row_id: str, row: dict, vector: Sequence[float]) -> None:
+        vec = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(vec))
+        if not norm:
+            self.remove(row_id)
+            return
+        self.rows[row_id] = row
+        self.vectors[row_id] = vec / norm
+        self.dirty = True
+
+    def remove(self, row_id: str) -> None:
+        if self.rows.pop(row_id, None) is not None:
+            self.vectors.pop(row_id, None)
+            self.dirty = True
+
+    def snapshot(self):
+        """(rows, matrix) aligned by position; rebuilt as new objects so readers never see a partial update"""
+        if self.dirty:
+            order = list(self.rows)
+            self.ordered_rows = [self.rows[i] for i in order]
+            self.matrix = np.vstack([self.vectors[i] for i in order]) if order else None
+            self.dirty = False
+        return self.ordered_rows, self.matrix
+
+
+class LocalVectorIndex:
+    """Top-k cosine search over in-memory snapshots of the match_* tables"""
+
+    def __init__(self, supabase=None, page_size: int = 1000):
+        self._supabase = supabase
+        self.page_size = page_size
+        self._tables: Dict[str, _TableIndex] = {}
+        self._lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def supabase(self):
+        if self._supabase is None:
+            from supabase_config import get_supabase_client
+            self._supabase = get_supabase_client()
+        return self._supabase
+
+    def _select(self, spec: LocalIndexSpec) -> str:
+        return ', '.join(list(spec.columns) + ['embedding'])
+
+    def _add_rows(self, index: _TableIndex, spec: LocalIndexSpec, rows: Iterable[dict]) -> None:
+        for row in rows:
+            row_id = str(row.get('id'))
+            vector = _parse_vector(row.get('embedding'))
+            if vector is None or (spec.active_column and row.get(spec.active_column) is False):
+                index.remove(row_id)
+                continue
+            index.upsert(row_id, {col: row.get(col) for col in spec.columns}, vector)
+
+    def load(self, rpc_names: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Snapshot the tables (all by default); returns rows indexed per RPC"""
+        counts = {}
+        for rpc_name in rpc_names or LOCAL_INDEX_SPECS:
+            spec = LOCAL_INDEX_SPECS[rpc_name]
+            started = time.perf_counter()
+            index = _TableIndex()
+            try:
+                offset = 0
+                while True:
+                    query = self.supabase.table(spec.table).select(self._select(spec))
+                    if spec.active_column:
+                        query = query.eq(spec.active_column, True)
+                    page = query.order('id').range(offset, offset + self.page_size - 1).execute().data or []
+                    self._add_rows(index, spec, page)
+                    if len(page) < self.page_size:
+                        break
+                    offset += self.page_size
+            except Exception as e:
+                print(f"[LocalVectorIndex] ❌ Error loading {spec.table}: {e}")
+                continue
+            index.snapshot()
+            index.loaded_at = time.time()
+            with self._lock:
+                self._tables[rpc_name] = index
+            counts[rpc_name] = len(index.rows)
+            print(f"[LocalVectorIndex] ✅ {spec.table}: {len(index.rows)} rows in "
+                  f"{(time.perf_counter() - started) * 1000:.0f}ms")
+        return counts
+
+    def refresh(self, table: str, ids: Iterable) -> int:
+        """Re-read just ``ids`` of ``table`` (after a sync); no-op unless that table is loaded"""
+        rpc_name = TABLE_TO_RPC.get(table)
+        if rpc_name is None or not self.is_ready(rpc_name):
+            return 0
+        spec = LOCAL_INDEX_SPECS[rpc_name]
+        ids = [str(i) for i in dict.fromkeys(ids) if i is not None]
+        if not ids:
+            return 0
+        from app.utils.classroom_batch_loader import fetch_rows_in
+
+        columns = self._select(spec) + (f', {spec.active_column}' if spec.active_column else '')
+        rows = fetch_rows_in(self.supabase, spec.table, columns, 'id', ids)
+        with self._lock:
+            index = self._tables[rpc_name]
+            found = {str(r.get('id')) for r in rows}
+            self._add_rows(index, spec, rows)
+            for row_id in ids:
+                if row_id not in found:
+                    index.remove(row_id)
+        return len(rows)
+
+    def is_ready(self, rpc_name: str) -> bool:
+        return rpc_name in self._tables
+
+    def search(self, rpc_name: str, query_embedding: Sequence[float], limit: int, threshold: float) -> Optional[List[Dict]]:
+        """
+        Same contract as the match_* RPC; returns None (not []) when the table is not loaded so
+        callers can tell "no matches" from "cannot answer"
+        """
+        with self._lock:
+            index = self._tables.get(rpc_name)
+            if index is None:
+                self.misses += 1
+                return None
+            rows, matrix = index.snapshot()
+        self.hits += 1
+        if matrix is None or limit <= 0:
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        norm = float(np.linalg.norm(query))
+        if not norm or query.shape[0] != matrix.shape[1]:
+            return []
+        scores = matrix @ (query / norm)
+        candidates = np.flatnonzero(scores > threshold)
+        if candidates.size > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind='stable')]
+        return [{**rows[i], 'similarity': float(scores[i])} for i in candidates]
+
+    def stats(self) -> dict:
+        with self._lock:
+            tables = {
+                rpc_name: {'rows': len(index.rows), 'loaded_at': index.loaded_at}
+                for rpc_name, index in self._tables.items()
+            }
+        return {'mode': LOCAL_INDEX_MODE, 'tables': tables, 'hits': self.hits, 'misses': self.misses}
+
+
+# Singleton instance
+_local_vector_index = None
+_local_vector_index_lock = threading.Lock()
+
+
+def get_local_vector_index() -> LocalVectorIndex:
+    """Get or create singleton instance of LocalVectorIndex (not loaded until load() is called)"""
+    global _local_vector_index
+    if _local_vector_index is None:
+        with _local_vector_index_lock:
+            if _local_vector_index is None:
+                _local_vector_index = LocalVectorIndex()
+    return _local_vector_index
+
+
+def start_local_vector_index() -> Optional[threading.Thread]:
+    """Snapshot all tables on a background thread (app startup); no-op when the mode is 'off'"""
+    if LOCAL_INDEX_MODE == 'off':
+        return None
+    thread = threading.Thread(target=get_local_vector_index().load, name='local-vector-index-load', daemon=True)
+    thread.start()
+    return thread
+
+
+def refresh_local_vector_index(table: str, ids: Iterable) -> None:
+    """Push changed rows into the local index if it is in use; never raises"""
+    if LOCAL_INDEX_MODE == 'off' or _local_vector_index is None:
+        return
+    try:
+        _local_vector_index.refresh(table, ids)
+    except Exception as e:
+        print(f"[LocalVectorIndex] ⚠️ Error refreshing {table}: {e}")
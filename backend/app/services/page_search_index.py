@@ -0,0 +1,298 @@
+"""
+Page Search Index
+Process-local BM25F inverted index over active web_crawler_data pages, used by
+WebCrawlerAgent.search_prakriti_content to rank pages without fetching every page per query.
+
+Fields carry the same relative weights the old substring scoring used (title 5, description 3,
+query_keywords 2, content 1). Only pages crawled within PAGE_INDEX_WINDOW_HOURS are loaded (filtered,
+ordered and paged on the server; the newest row per URL wins), so old per-day rows that are still
+flagged active don't inflate the index. It is loaded on first use and rebuilt when the table changes:
+writers in this process call invalidate(), and at most every PAGE_INDEX_REFRESH_SECONDS a cheap
+probe (ids + timestamps, no content) detects changes made by other processes.
+"""
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+FIELD_WEIGHTS = {'title': 5.0, 'description': 3.0, 'query_keywords': 2.0, 'main_content': 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+SELECT_COLUMNS = 'id, url, title, description, main_content, content_type, query_keywords, crawled_at, updated_at'
+
+try:
+    PAGE_INDEX_REFRESH_SECONDS = float(os.getenv('PAGE_INDEX_REFRESH_SECONDS', '300'))
+except ValueError:
+    PAGE_INDEX_REFRESH_SECONDS = 300.0
+
+try:
+    PAGE_INDEX_WINDOW_HOURS = float(os.getenv('PAGE_INDEX_WINDOW_HOURS', '24'))
+except ValueError:
+    PAGE_INDEX_WINDOW_HOURS = 24.0
+
+# PostgREST caps responses at max-rows (1000 by default)
+PAGE_SIZE = 1000
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    'the and for are was were with about what who how when where which this that from you your our '
+    'can does did has have will into its not but all any'.split()
+)
+
+
+def _stem(token: str) -> str:
+    """Tiny plural folding so 'admissions'/'admission', 'fees'/'fee' share a term"""
+    if len(token) > 4 and token.endswith('ies'):
+        return token[:-3] + 'y'
+    if len(token) > 3 and token.endswith('s') and not token.endswith('ss'):
+        return token[:-1]
+    return token
+
+
+def tokenize(text) -> List[str]:
+    if not text:
+        return []
+    if isinstance(text, (list, tuple)):
+        text = ' '.join(str(t) for t in text if t)
+    return [_stem(t) for t in _TOKEN_RE.findall(str(text).lower()) if len(t) > 2 and t not in _STOPWORDS]
+
+
+def _parse_ts(value) -> Optional[datetime]:
+    if not value:
+        return None
+    try:
+        ts = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return ts if ts.tzinfo else ts.replace(tzinfo=timezone.utc)
+
+
+class PageSearchIndex:
+    """BM25F over title / description / query_keywords / main_content"""
+
+    def __init__(self, supabase=None, refresh_seconds: float = PAGE_INDEX_REFRESH_SECONDS,
+                 window: timedelta = timedelta(hours=PAGE_INDEX_WINDOW_HOURS), page_size: int = PAGE_SIZE):
+        self._supabase = supabase
+        self.refresh_seconds = refresh_seconds
+        self.window = window
+        self.page_size = max(1, page_size)
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._pages: List[dict] = []
+        self._postings: Dict[str, List[Tuple[int, Dict[str, int]]]] = {}
+        self._field_lengths: List[Dict[str, int]] = []
+        self._avg_lengths: Dict[str, float] = {}
+        self._signature: Optional[str] = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        self._stale = True
+        self.builds = 0
+
+    @property
+    def supabase(self):
+        if self._supabase is None:
+            from supabase_config import get_supabase_client
+            self._supabase = get_supabase_client()
+        return self._supabase
+
+    # ---- Build -----------------------------------------------------------
+
+    def build(self, pages: Iterable[dict]) -> None:
+        """(Re)build the index from page rows"""
+        pages = list(pages)
+        postings: Dict[str, List[Tuple[int, Dict[str, int]]]] = defaultdict(list)
+        field_lengths: List[Dict[str, int]] = []
+        totals = Counter()
+        for doc_id, page in enumerate(pages):
+            per_term: Dict[str, Dict[str, int]] = defaultdict(dict)
+            lengths = {}
+            for field in FIELD_WEIGHTS:
+                tokens = tokenize(page.get(field))
+                lengths[field] = len(tokens)
+                totals[field] += len(tokens)
+                for term, tf in Counter(tokens).items():
+                    per_term[term][field] = tf
+            for term, tfs in per_term.items():
+                postings[term].append((doc_id, tfs))
+            field_lengths.append(lengths)
+            page['_crawled_at'] = _parse_ts(page.get('crawled_at'))
+
+        with self._lock:
+            self._pages = pages
+            self._postings = dict(postings)
+            self._field_lengths = field_lengths
+            self._avg_lengths = {f: (totals[f] / len(pages) if pages else 0.0) or 1.0 for f in FIELD_WEIGHTS}
+            self._loaded_at = time.time()
+            self._stale = False
+            self.builds += 1
+
+    def _signature_of(self, rows: Sequence[dict]) -> str:
+        digest = hashlib.sha1()
+        for row in sorted(rows, key=lambda r: str(r.get('id'))):
+            digest.update(f"{row.get('id')}|{row.get('updated_at')}|{row.get('crawled_at')};".encode('utf-8'))
+        return digest.hexdigest()
+
+    def _fetch_recent(self, columns: str) -> List[dict]:
+        """Active rows crawled within the window, newest first, one row per URL"""
+        cutoff = (datetime.now(timezone.utc) - self.window).isoformat()
+        rows: List[dict] = []
+        offset = 0
+        while True:
+            result = self.supabase.table('web_crawler_data').select(columns).eq('is_active', True) \
+                .gte('crawled_at', cutoff).order('crawled_at', desc=True).order('id') \
+                .range(offset, offset + self.page_size - 1).execute()
+            page = result.data or []
+            rows.extend(page)
+            if len(page) < self.page_size:
+                break
+            offset += self.page_size
+        latest: Dict[str, dict] = {}
+        for row in rows:
+            latest.setdefault(row.get('url') or str(row.get('id')), row)
+        return list(latest.values())
+
+    def load(self) -> bool:
+        """Fetch recent active pages and rebuild; returns False (keeping the old index) on failure"""
+        try:
+            rows = self._fetch_recent(SELECT_COLUMNS)
+        except Exception as e:
+            print(f"[PageSearchIndex] ❌ Error loading web_crawler_data: {e}")
+            return False
+        started = time.perf_counter()
+        self.build(rows)
+        self._signature = self._signature_of(rows)
+        self._checked_at = time.time()
+        print(f"[PageSearchIndex] ✅ Indexed {len(rows)} pages, {len(self._postings)} terms in "
+              f"{(time.perf_counter() - started) * 1000:.1f}ms")
+        return True
+
+    def invalidate(self) -> None:
+        """Mark the index stale (call after writing web_crawler_data); rebuilt on next search"""
+        self._stale = True
+
+    def _ensure_fresh(self) -> bool:
+        if self._stale or not self._loaded_at:
+            with self._load_lock:
+                # Another thread may have rebuilt while we waited
+                if self._stale or not self._loaded_at:
+                    return self.load()
+            return True
+        if time.time() - self._checked_at < self.refresh_seconds:
+            return True
+        self._checked_at = time.time()
+        try:
+            probe = self._fetch_recent('id, url, updated_at, crawled_at')
+            if self._signature_of(probe) != self._signature:
+                print("[PageSearchIndex] web_crawler_data changed - rebuilding")
+                return self.load()
+        except Exception as e:
+            print(f"[PageSearchIndex] ⚠️ Change probe failed, keeping current index: {e}")
+        return True
+
+    # ---- Query -----------------------------------------------------------
+
+    def rank(
+        self,
+        query: str,
+        content_types: Optional[Sequence[str]] = None,
+        max_age: Optional[timedelta] = timedelta(hours=24),
+        limit: int = 3,
+    ) -> List[Tuple[dict, float]]:
+        """Top ``limit`` (page, score) pairs from the in-memory index (no freshness check)"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        with self._lock:
+            pages, postings = self._pages, self._postings
+            field_lengths, avg_lengths = self._field_lengths, self._avg_lengths
+        if not terms or not pages:
+            return []
+
+        allowed_types = set(content_types) if content_types else None
+        cutoff = datetime.now(timezone.utc) - max_age if max_age is not None else None
+        n_docs = len(pages)
+        scores: Dict[int, float] = defaultdict(float)
+        for term in terms:
+            plist = postings.get(term)
+            if not plist:
+                continue
+            idf = math.log(1 + (n_docs - len(plist) + 0.5) / (len(plist) + 0.5))
+            for doc_id, tfs in plist:
+                lengths = field_lengths[doc_id]
+                weighted_tf = 0.0
+                for field, tf in tfs.items():
+                    norm = 1 - BM25_B + BM25_B * lengths[field] / avg_lengths[field]
+                    weighted_tf += FIELD_WEIGHTS[field] * tf / norm
+                scores[doc_id] += idf * weighted_tf / (BM25_K1 + weighted_tf)
+
+        ranked = []
+        for doc_id, score in sorted(scores.items(), key=lambda item: item[1], reverse=True):
+            page = pages[doc_id]
+            if allowed_types is not None and page.get('content_type') not in allowed_types:
+                continue
+            if cutoff is not None and (page['_crawled_at'] is None or page['_crawled_at'] < cutoff):
+                continue
+            ranked.append((page, score))
+            if len(ranked) >= limit:
+                break
+        return ranked
+
+    def search(
+        self,
+        query: str,
+        content_types: Optional[Sequence[str]] = None,
+        max_age: Optional[timedelta] = timedelta(hours=24),
+        limit: int = 3,
+    ) -> Optional[List[Tuple[dict, float]]]:
+        """rank() after making sure the index is current; None if it could never be loaded"""
+        if not self._ensure_fresh() and not self._loaded_at:
+            return None
+        return self.rank(query, content_types, max_age, limit)
+
+    def has_pages(
+        self,
+        content_types: Optional[Sequence[str]] = None,
+        max_age: Optional[timedelta] = timedelta(hours=24),
+    ) -> bool:
+        """Whether any indexed page passes the type / freshness filters (no match != no pages)"""
+        allowed_types = set(content_types) if content_types else None
+        cutoff = datetime.now(timezone.utc) - max_age if max_age is not None else None
+        with self._lock:
+            pages = self._pages
+        return any(
+            (allowed_types is None or page.get('content_type') in allowed_types)
+            and (cutoff is None or (page['_crawled_at'] is not None and page['_crawled_at'] >= cutoff))
+            for page in pages
+        )
+
+    def stats(self) -> dict:
+        return {
+            'pages': len(self._pages),
+            'terms': len(self._postings),
+            'builds': self.builds,
+            'loaded_at': self._loaded_at or None,
+        }
+
+
+# Singleton instance
+_page_search_index = None
+_page_search_index_lock = threading.Lock()
+
+
+def get_page_search_index() -> PageSearchIndex:
+    """Get or create singleton instance of PageSearchIndex"""
+    global _page_search_index
+    if _page_search_index is None:
+        with _page_search_index_lock:
+            if _page_search_index is None:
+                _page_search_index = PageSearchIndex()
+    return _page_search_index
+
+
+def invalidate_page_search_index() -> None:
+    """Writers of web_crawler_data call this so the next search sees the new content"""
+    if _page_search_index is not None:
+        _page_search_index.invalidate()
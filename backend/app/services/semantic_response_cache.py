@@ -0,0 +1,204 @@
+"""
+Semantic response cache for canonical chatbot intents.
+
+Canonical FAQ intents (school type, fees, location, ...) answer from a fixed official text
+that is only rephrased by the LLM. Those rephrasings are cached under
+(intent id, query embedding bucket, user role) so repeat and near-duplicate questions are
+served without another chat.completions call.
+
+The bucket is a random-hyperplane (SimHash) signature of the normalized all-MiniLM-L6-v2
+query embedding; a hit additionally requires cosine similarity above a threshold against the
+query that populated the entry. If the embedding model is unavailable, the bucket falls back
+to the normalized query text (exact-duplicate caching only).
+"""
+import copy
+import hashlib
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+EMBEDDING_DIMENSION = 384  # all-MiniLM-L6-v2
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def normalize_query(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = re.sub(r"[^\w\s]", " ", (text or "").lower())
+    return " ".join(text.split())
+
+
+def _unit(vector: Sequence[float]) -> List[float]:
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _dot(a: Sequence[float], b: Sequence[float]) -> float:
+    return sum(x * y for x, y in zip(a, b))
+
+
+class SemanticResponseCache:
+    """Thread-safe TTL + LRU cache keyed by (intent id, embedding bucket, role)."""
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        ttl_seconds: float = 6 * 3600,
+        similarity_threshold: float = 0.9,
+        bucket_bits: int = 12,
+        embed_fn: Optional[Callable[[str], Optional[Sequence[float]]]] = None,
+        seed: int = 1337,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._embed_fn = embed_fn
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str, str], Tuple[float, Optional[List[float]], Any]]" = OrderedDict()
+        # Fixed hyperplanes so bucket ids are stable for the life of the process
+        rng = random.Random(seed)
+        self._hyperplanes = [
+            [rng.gauss(0.0, 1.0) for _ in range(EMBEDDING_DIMENSION)] for _ in range(bucket_bits)
+        ]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _bucket(self, query: str) -> Tuple[str, Optional[List[float]]]:
+        embedding = None
+        if self._embed_fn is not None:
+            try:
+                raw = self._embed_fn(query)
+                if raw is not None:
+                    embedding = _unit([float(v) for v in raw])
+            except Exception as e:
+                print(f"[ResponseCache] Embedding failed, using text bucket: {e}")
+                embedding = None
+        if embedding is None or len(embedding) != EMBEDDING_DIMENSION:
+            digest = hashlib.sha1(normalize_query(query).encode("utf-8")).hexdigest()[:16]
+            return f"t:{digest}", None
+        bits = "".join("1" if _dot(plane, embedding) >= 0 else "0" for plane in self._hyperplanes)
+        return f"e:{bits}", embedding
+
+    def _key(self, intent_id: str, bucket: str, role: Optional[str]) -> Tuple[str, str, str]:
+        return (intent_id, bucket, (role or "guest").lower())
+
+    def get(self, intent_id: str, query: str, role: Optional[str] = None) -> Optional[Any]:
+        return self._lookup(intent_id, role, *self._bucket(query))
+
+    def _lookup(self, intent_id: str, role: Optional[str], bucket: str, embedding: Optional[List[float]]) -> Optional[Any]:
+        key = self._key(intent_id, bucket, role)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is not None and embedding is not None and entry[1] is not None:
+                if _dot(embedding, entry[1]) < self.similarity_threshold:
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[2]
+        return copy.deepcopy(value)
+
+    def put(self, intent_id: str, query: str, role: Optional[str], response: Any) -> None:
+        self._store(intent_id, role, *self._bucket(query), response)
+
+    def _store(self, intent_id: str, role: Optional[str], bucket: str, embedding: Optional[List[float]], response: Any) -> None:
+        key = self._key(intent_id, bucket, role)
+        expires_at = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            self._entries[key] = (expires_at, embedding, copy.deepcopy(response))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, intent_id: str, query: str, role: Optional[str], compute: Callable[[], Any]) -> Any:
+        """Return a cached response or call ``compute()`` and cache its result (embeds once)."""
+        bucket, embedding = self._bucket(query)
+        cached = self._lookup(intent_id, role, bucket, embedding)
+        if cached is not None:
+            return cached
+        response = compute()
+        if response:
+            self._store(intent_id, role, bucket, embedding, response)
+        return response
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+            }
+
+
+_embedding_unavailable = False
+
+
+def _embed_query(text: str) -> Optional[List[float]]:
+    """Embed with the shared all-MiniLM-L6-v2 model; None when it can't be loaded."""
+    global _embedding_unavailable
+    if _embedding_unavailable:
+        return None
+    try:
+        from app.services.embedding_model import get_shared_encoder
+        return get_shared_encoder().encode(normalize_query(text) or text)
+    except ImportError as e:
+        _embedding_unavailable = True
+        print(f"[ResponseCache] Embedding model unavailable, caching exact queries only: {e}")
+        return None
+
+
+# Singleton instance
+_response_cache = None
+_response_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> SemanticResponseCache:
+    """Get or create the process-wide canonical-intent response cache"""
+    global _response_cache
+    if _response_cache is None:
+        with _response_cache_lock:
+            if _response_cache is None:
+                _response_cache = SemanticResponseCache(
+                    max_entries=_env_int("RESPONSE_CACHE_MAX_ENTRIES", 512),
+                    ttl_seconds=_env_float("RESPONSE_CACHE_TTL_SECONDS", 6 * 3600),
+                    similarity_threshold=_env_float("RESPONSE_CACHE_SIMILARITY", 0.9),
+                    embed_fn=_embed_query,
+                )
+    return _response_cache
@@ -234,7 +234,11 @@ class SupabaseAdminService:
             time_min = datetime.utcnow().isoformat()
             time_max = (datetime.utcnow() + timedelta(days=90)).isoformat()
             
-            result = self.supabase.table('google_calendar_events').select('*').eq('user_id', user_id).gte('start_time', time_min).lte('start_time', time_max).order('start_time', desc=False).limit(100).execute()
+            # Events deleted in Google are kept as soft-deleted (cancelled) rows by the sync; filter them
+            # out before the limit so they can't crowd out upcoming events
+            result = self.supabase.table('google_calendar_events').select('*').eq('user_id', user_id) \
+                .or_('status.is.null,status.neq.cancelled') \
+                .gte('start_time', time_min).lte('start_time', time_max).order('start_time', desc=False).limit(100).execute()
             
             # Transform to match expected format
             events = []
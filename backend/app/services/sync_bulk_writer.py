@@ -0,0 +1,159 @@
+"""
+Bulk upsert writer for the Google sync routes.
+
+The DWD sync wrote every course / teacher / student / coursework / submission / announcement
+with a ``select('id')`` existence check followed by a single-row ``update`` or ``insert``.
+BulkUpsertWriter buffers rows per table and writes them with one
+``upsert(rows, on_conflict=<natural key>)`` per chunk (the UNIQUE constraints from
+google_integrations_schema.sql / update_google_tables_schema.sql). The upsert response gives
+back the rows, so database ids are collected per natural key in bulk for child rows (e.g.
+coursework ids for submissions) and for the embedding refresh queue.
+
+created / updated stats come from the returned ``created_at``: a row created at or after the
+writer started was inserted by this sync. If a chunk's upsert fails (e.g. a deployment without
+the constraint), that chunk falls back to the old per-row select + update / insert.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+# table -> natural key columns (must match a UNIQUE constraint for on_conflict)
+TABLE_KEYS: Dict[str, Tuple[str, ...]] = {
+    'google_classroom_courses': ('user_id', 'course_id'),
+    'google_classroom_teachers': ('course_id', 'course_user_id'),
+    'google_classroom_students': ('course_id', 'course_user_id'),
+    'google_classroom_coursework': ('course_id', 'coursework_id'),
+    'google_classroom_submissions': ('coursework_id', 'submission_id'),
+    'google_classroom_announcements': ('course_id', 'announcement_id'),
+    'google_calendar_calendars': ('user_id', 'calendar_id'),
+    'google_calendar_events': ('user_id', 'event_id'),
+}
+
+# table -> key in the sync routes' stats dict
+TABLE_STATS: Dict[str, str] = {
+    'google_classroom_courses': 'courses',
+    'google_classroom_teachers': 'teachers',
+    'google_classroom_students': 'students',
+    'google_classroom_coursework': 'coursework',
+    'google_classroom_submissions': 'submissions',
+    'google_classroom_announcements': 'announcements',
+    'google_calendar_calendars': 'calendars',
+    'google_calendar_events': 'events',
+}
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def _parse_ts(value: Any) -> Optional[datetime]:
+    if not value or not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+class BulkUpsertWriter:
+    """Buffers rows per table and writes them with chunked upserts on their natural keys"""
+
+    def __init__(self, client, batch_size: int = DEFAULT_BATCH_SIZE, embedding_queue=None,
+                 stats: Optional[Dict[str, Dict[str, int]]] = None):
+        self.client = client
+        self.batch_size = max(1, batch_size)
+        self.embedding_queue = embedding_queue
+        self.stats = stats if stats is not None else {}
+        # Small allowance for clock skew between this process and Postgres now()
+        self.started_at = datetime.now(timezone.utc) - timedelta(seconds=5)
+        self._buffers: Dict[str, Dict[Tuple, Dict[str, Any]]] = {}
+        self._ids: Dict[str, Dict[Tuple, Any]] = {}
+        self.round_trips = 0
+        self.fallback_rows = 0
+        self.failed_rows = 0
+
+    # ---- Buffering -----------------------------------------------------------
+
+    @staticmethod
+    def key_for(table: str, row: Dict[str, Any]) -> Tuple:
+        return tuple(str(row.get(column)) for column in TABLE_KEYS[table])
+
+    def add(self, table: str, row: Dict[str, Any]) -> None:
+        """Buffer ``row``; a later row with the same natural key replaces it (one upsert can't touch a row twice)"""
+        self._buffers.setdefault(table, {})[self.key_for(table, row)] = row
+        if len(self._buffers[table]) >= self.batch_size:
+            self.flush(table)
+
+    def pending(self, table: Optional[str] = None) -> int:
+        if table is not None:
+            return len(self._buffers.get(table, {}))
+        return sum(len(rows) for rows in self._buffers.values())
+
+    # ---- Writing -------------------------------------------------------------
+
+    def flush(self, table: Optional[str] = None) -> None:
+        """Write buffered rows (of one table, or all tables in insertion order)"""
+        tables = [table] if table is not None else list(self._buffers)
+        for name in tables:
+            rows = list(self._buffers.pop(name, {}).values())
+            for start in range(0, len(rows), self.batch_size):
+                self._write_chunk(name, rows[start:start + self.batch_size])
+
+    def _write_chunk(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        if not rows:
+            return
+        try:
+            self.round_trips += 1
+            result = self.client.table(table).upsert(rows, on_conflict=','.join(TABLE_KEYS[table])).execute()
+            written = result.data or []
+        except Exception as e:
+            print(f"⚠️ BulkWriter: upsert of {len(rows)} {table} rows failed ({e}); writing row by row")
+            written = self._write_rows_individually(table, rows)
+        for row in written:
+            self._record(table, row)
+
+    def _write_rows_individually(self, table: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Old per-row path: existence check, then update or insert"""
+        written = []
+        for row in rows:
+            try:
+                query = self.client.table(table).select('id')
+                for column in TABLE_KEYS[table]:
+                    query = query.eq(column, row.get(column))
+                existing = query.limit(1).execute()
+                if existing.data:
+                    self.client.table(table).update(row).eq('id', existing.data[0]['id']).execute()
+                    written.append({**row, 'id': existing.data[0]['id'], '_created': False})
+                else:
+                    result = self.client.table(table).insert(row).execute()
+                    if result.data:
+                        written.append({**result.data[0], '_created': True})
+                self.round_trips += 2
+                self.fallback_rows += 1
+            except Exception as e:
+                self.failed_rows += 1
+                print(f"⚠️ BulkWriter: could not write {table} row {self.key_for(table, row)}: {e}")
+        return written
+
+    def _record(self, table: str, row: Dict[str, Any]) -> None:
+        row_id = row.get('id')
+        if row_id is None:
+            return
+        self._ids.setdefault(table, {})[self.key_for(table, row)] = row_id
+        created = row.get('_created')
+        if created is None:
+            created_at = _parse_ts(row.get('created_at'))
+            created = bool(created_at and created_at >= self.started_at)
+        stats_key = TABLE_STATS.get(table)
+        if stats_key is not None:
+            counts = self.stats.setdefault(stats_key, {"created": 0, "updated": 0})
+            counts["created" if created else "updated"] += 1
+        if self.embedding_queue is not None:
+            self.embedding_queue.mark(table, row_id)
+
+    # ---- Results -------------------------------------------------------------
+
+    def ids(self, table: str) -> Dict[Tuple, Any]:
+        """natural key tuple (as strings) -> database id for rows written so far"""
+        return dict(self._ids.get(table, {}))
+
+    def id_for(self, table: str, *key: Any) -> Any:
+        return self._ids.get(table, {}).get(tuple(str(k) for k in key))
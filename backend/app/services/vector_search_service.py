@@ -2,13 +2,53 @@
 Vector Search Service for semantic similarity search using sentence-transformers embeddings and pgvector
 """
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import List, Dict, Optional
-from sentence_transformers import SentenceTransformer
-from supabase_config import get_supabase_client
+import sentence_transformers  # noqa: F401 — fail at import (callers fall back) when the model stack is missing
+from app.services.embedding_model import EMBEDDING_DIMENSION, get_shared_encoder
+from app.services.local_vector_index import LOCAL_INDEX_MODE, get_local_vector_index
+from supabase_config import get_supabase_client, get_supabase_client_with_timeout
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# search_all() result key -> pgvector RPC
+SEARCH_ALL_TABLES = {
+    'web_content': 'match_web_content',
+    'team_members': 'match_team_members',
+    'coursework': 'match_coursework',
+    'announcements': 'match_announcements',
+}
+
+try:
+    VECTOR_SEARCH_TABLE_TIMEOUT = float(os.getenv("VECTOR_SEARCH_TABLE_TIMEOUT", "3.0"))
+except ValueError:
+    VECTOR_SEARCH_TABLE_TIMEOUT = 3.0
+
+# HTTP timeout for the match_* RPCs. future.cancel() can't stop an RPC that is already running,
+# so an abandoned call would otherwise hold its vector-search worker for the client's 120s read
+# timeout; with this it gives the worker back shortly after the table deadline.
+try:
+    VECTOR_SEARCH_RPC_TIMEOUT = float(os.getenv("VECTOR_SEARCH_RPC_TIMEOUT", VECTOR_SEARCH_TABLE_TIMEOUT + 1.0))
+except ValueError:
+    VECTOR_SEARCH_RPC_TIMEOUT = VECTOR_SEARCH_TABLE_TIMEOUT + 1.0
+
+# Dedicated pool for RPC fan-out: search_all() is often already running on the chat
+# blocking pool, so submitting back into that pool could starve it.
+_search_executor = None
+_search_executor_lock = threading.Lock()
+
+
+def _get_search_executor() -> ThreadPoolExecutor:
+    global _search_executor
+    if _search_executor is None:
+        with _search_executor_lock:
+            if _search_executor is None:
+                _search_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vector-search")
+    return _search_executor
+
 
 class VectorSearchService:
     """Service for generating embeddings and performing semantic similarity search"""
@@ -16,9 +56,16 @@ class VectorSearchService:
     def __init__(self):
         """Initialize the vector search service"""
         self.supabase = get_supabase_client()
-        # Use sentence-transformers/all-MiniLM-L6-v2 for 384 dimensions (matches database schema)
-        self.embedding_model = SentenceTransformer('sentence-transformers/all-MiniLM-L6-v2')
-        self.embedding_dimension = 384
+        self.rpc_client = get_supabase_client_with_timeout(VECTOR_SEARCH_RPC_TIMEOUT)
+        # Shared sentence-transformers/all-MiniLM-L6-v2 encoder (384 dimensions, matches database schema);
+        # one model per process no matter how many services are constructed
+        self.encoder = get_shared_encoder()
+        self.embedding_dimension = EMBEDDING_DIMENSION
+
+    @property
+    def embedding_model(self):
+        """The underlying SentenceTransformer (shared, loaded on first use)"""
+        return self.encoder.model
     
     def generate_embedding(self, text: str) -> List[float]:
         """
@@ -34,18 +81,104 @@ class VectorSearchService:
             raise ValueError("Text cannot be empty")
 
         try:
-            # Generate embedding using sentence-transformers
-            embedding = self.embedding_model.encode(text.strip())
-            return embedding.tolist()  # Convert numpy array to list
+            # Cached / micro-batched encode on the shared model
+            return self.encoder.encode(text.strip())
         except Exception as e:
             print(f"[VectorSearch] Error generating embedding: {e}")
             raise
     
+    def generate_embeddings(self, texts: List[str], batch_size: int = 64) -> List[List[float]]:
+        """
+        Generate embeddings for many texts in batched forward passes (order preserved)
+
+        Args:
+            texts: Non-empty texts to embed
+            batch_size: Texts per forward pass
+        """
+        return self.encoder.encode_batch(texts, batch_size=batch_size, use_cache=False)
+
+    def _rpc_match(
+        self,
+        rpc_name: str,
+        query_embedding: List[float],
+        limit: int,
+        threshold: float
+    ) -> List[Dict]:
+        """Run one pgvector match_* RPC with a precomputed query embedding (times out after VECTOR_SEARCH_RPC_TIMEOUT)"""
+        result = self.rpc_client.rpc(
+            rpc_name,
+            {
+                'query_embedding': query_embedding,
+                'match_threshold': threshold,
+                'match_count': limit
+            }
+        ).execute()
+        return result.data if result.data else []
+
+    def _local_match(
+        self,
+        rpc_name: str,
+        query_embedding: List[float],
+        limit: int,
+        threshold: float
+    ) -> Optional[List[Dict]]:
+        """Answer from the in-process index (None when disabled or the table is not loaded)"""
+        if LOCAL_INDEX_MODE == 'off':
+            return None
+        try:
+            return get_local_vector_index().search(rpc_name, query_embedding, limit, threshold)
+        except Exception as e:
+            print(f"[VectorSearch] Local index error for {rpc_name}: {e}")
+            return None
+
+    def _match(
+        self,
+        rpc_name: str,
+        query_embedding: List[float],
+        limit: int,
+        threshold: float
+    ) -> List[Dict]:
+        """
+        Top-k matches for one match_* RPC. With VECTOR_SEARCH_LOCAL_INDEX=prefer the local index
+        answers when loaded; with fallback/prefer it also covers RPC failures.
+        """
+        if LOCAL_INDEX_MODE == 'prefer':
+            rows = self._local_match(rpc_name, query_embedding, limit, threshold)
+            if rows is not None:
+                return rows
+        try:
+            return self._rpc_match(rpc_name, query_embedding, limit, threshold)
+        except Exception as e:
+            rows = self._local_match(rpc_name, query_embedding, limit, threshold)
+            if rows is None:
+                raise
+            print(f"[VectorSearch] ⚠️ {rpc_name} RPC failed ({e}) - answered from local index")
+            return rows
+
+    def _match_with_deadline(
+        self,
+        rpc_name: str,
+        query_embedding: List[float],
+        limit: int,
+        threshold: float
+    ) -> List[Dict]:
+        """_match(), but in fallback mode a slow RPC is abandoned after VECTOR_SEARCH_TABLE_TIMEOUT"""
+        if LOCAL_INDEX_MODE != 'fallback' or not get_local_vector_index().is_ready(rpc_name):
+            return self._match(rpc_name, query_embedding, limit, threshold)
+        future = _get_search_executor().submit(self._match, rpc_name, query_embedding, limit, threshold)
+        try:
+            return future.result(timeout=VECTOR_SEARCH_TABLE_TIMEOUT)
+        except FutureTimeoutError:
+            future.cancel()
+            print(f"[VectorSearch] ⏱️ {rpc_name} exceeded {VECTOR_SEARCH_TABLE_TIMEOUT:.1f}s - answered from local index")
+            return self._local_match(rpc_name, query_embedding, limit, threshold) or []
+
     def search_web_content(
         self, 
         query: str, 
         limit: int = 5, 
-        threshold: float = 0.7
+        threshold: float = 0.7,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict]:
         """
         Semantic search in web_crawler_data table
@@ -54,23 +187,15 @@ class VectorSearchService:
             query: Search query text
             limit: Maximum number of results to return
             threshold: Minimum similarity score (0-1)
+            query_embedding: Precomputed embedding of query (skips encoding)
             
         Returns:
             List of matching web content records with similarity scores
         """
         try:
-            query_embedding = self.generate_embedding(query)
-            
-            result = self.supabase.rpc(
-                'match_web_content',
-                {
-                    'query_embedding': query_embedding,
-                    'match_threshold': threshold,
-                    'match_count': limit
-                }
-            ).execute()
-            
-            return result.data if result.data else []
+            if query_embedding is None:
+                query_embedding = self.generate_embedding(query)
+            return self._match_with_deadline('match_web_content', query_embedding, limit, threshold)
         except Exception as e:
             print(f"[VectorSearch] Error searching web content: {e}")
             return []
@@ -79,7 +204,8 @@ class VectorSearchService:
         self, 
         query: str, 
         limit: int = 5, 
-        threshold: float = 0.7
+        threshold: float = 0.7,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict]:
         """
         Semantic search in team_member_data table
@@ -88,23 +214,15 @@ class VectorSearchService:
             query: Search query text
             limit: Maximum number of results to return
             threshold: Minimum similarity score (0-1)
+            query_embedding: Precomputed embedding of query (skips encoding)
             
         Returns:
             List of matching team member records with similarity scores
         """
         try:
-            query_embedding = self.generate_embedding(query)
-            
-            result = self.supabase.rpc(
-                'match_team_members',
-                {
-                    'query_embedding': query_embedding,
-                    'match_threshold': threshold,
-                    'match_count': limit
-                }
-            ).execute()
-            
-            return result.data if result.data else []
+            if query_embedding is None:
+                query_embedding = self.generate_embedding(query)
+            return self._match_with_deadline('match_team_members', query_embedding, limit, threshold)
         except Exception as e:
             print(f"[VectorSearch] Error searching team members: {e}")
             return []
@@ -113,7 +231,8 @@ class VectorSearchService:
         self, 
         query: str, 
         limit: int = 5, 
-        threshold: float = 0.7
+        threshold: float = 0.7,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict]:
         """
         Semantic search in google_classroom_coursework table
@@ -122,23 +241,15 @@ class VectorSearchService:
             query: Search query text
             limit: Maximum number of results to return
             threshold: Minimum similarity score (0-1)
+            query_embedding: Precomputed embedding of query (skips encoding)
             
         Returns:
             List of matching coursework records with similarity scores
         """
         try:
-            query_embedding = self.generate_embedding(query)
-            
-            result = self.supabase.rpc(
-                'match_coursework',
-                {
-                    'query_embedding': query_embedding,
-                    'match_threshold': threshold,
-                    'match_count': limit
-                }
-            ).execute()
-            
-            return result.data if result.data else []
+            if query_embedding is None:
+                query_embedding = self.generate_embedding(query)
+            return self._match_with_deadline('match_coursework', query_embedding, limit, threshold)
         except Exception as e:
             print(f"[VectorSearch] Error searching coursework: {e}")
             return []
@@ -147,7 +258,8 @@ class VectorSearchService:
         self, 
         query: str, 
         limit: int = 5, 
-        threshold: float = 0.7
+        threshold: float = 0.7,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict]:
         """
         Semantic search in google_classroom_announcements table
@@ -156,23 +268,15 @@ class VectorSearchService:
             query: Search query text
             limit: Maximum number of results to return
             threshold: Minimum similarity score (0-1)
+            query_embedding: Precomputed embedding of query (skips encoding)
             
         Returns:
             List of matching announcement records with similarity scores
         """
         try:
-            query_embedding = self.generate_embedding(query)
-            
-            result = self.supabase.rpc(
-                'match_announcements',
-                {
-                    'query_embedding': query_embedding,
-                    'match_threshold': threshold,
-                    'match_count': limit
-                }
-            ).execute()
-            
-            return result.data if result.data else []
+            if query_embedding is None:
+                query_embedding = self.generate_embedding(query)
+            return self._match_with_deadline('match_announcements', query_embedding, limit, threshold)
         except Exception as e:
             print(f"[VectorSearch] Error searching announcements: {e}")
             return []
@@ -181,15 +285,24 @@ class VectorSearchService:
         self, 
         query: str, 
         limit_per_table: int = 3,
-        threshold: float = 0.7
+        threshold: float = 0.7,
+        timeout_per_table: Optional[float] = None,
+        table_timeouts: Optional[Dict[str, float]] = None
     ) -> Dict[str, List[Dict]]:
         """
         Search across all vectorized tables
         
+        The query is embedded once and the four match_* RPCs run concurrently. Each table
+        has its own deadline (measured from dispatch); a table that misses it is answered
+        from the local index when one is enabled, otherwise it contributes an empty list
+        instead of holding up the others.
+        
         Args:
             query: Search query text
             limit_per_table: Maximum results per table
             threshold: Minimum similarity score (0-1)
+            timeout_per_table: Seconds to wait for each table (default VECTOR_SEARCH_TABLE_TIMEOUT)
+            table_timeouts: Per-table overrides, e.g. {'web_content': 5.0}
             
         Returns:
             Dictionary with results from each table:
@@ -200,13 +313,43 @@ class VectorSearchService:
                 'announcements': [...]
             }
         """
-        return {
-            'web_content': self.search_web_content(query, limit_per_table, threshold),
-            'team_members': self.search_team_members(query, limit_per_table, threshold),
-            'coursework': self.search_coursework(query, limit_per_table, threshold),
-            'announcements': self.search_announcements(query, limit_per_table, threshold)
+        results = {table: [] for table in SEARCH_ALL_TABLES}
+        try:
+            query_embedding = self.generate_embedding(query)
+        except Exception as e:
+            print(f"[VectorSearch] Error embedding query for search_all: {e}")
+            return results
+
+        default_timeout = timeout_per_table if timeout_per_table is not None else VECTOR_SEARCH_TABLE_TIMEOUT
+        started = time.monotonic()
+        executor = _get_search_executor()
+        futures = {
+            table: executor.submit(self._match, rpc_name, query_embedding, limit_per_table, threshold)
+            for table, rpc_name in SEARCH_ALL_TABLES.items()
         }
 
+        for table, future in futures.items():
+            timeout = (table_timeouts or {}).get(table, default_timeout)
+            remaining = max(0.0, started + timeout - time.monotonic())
+            try:
+                results[table] = future.result(timeout=remaining)
+            except FutureTimeoutError:
+                future.cancel()
+                local_rows = self._local_match(SEARCH_ALL_TABLES[table], query_embedding, limit_per_table, threshold)
+                if local_rows is not None:
+                    results[table] = local_rows
+                    print(f"[VectorSearch] ⏱️ {table} search exceeded {timeout:.1f}s - answered from local index")
+                else:
+                    print(f"[VectorSearch] ⏱️ {table} search exceeded {timeout:.1f}s - returning without it")
+            except Exception as e:
+                print(f"[VectorSearch] Error searching {table}: {e}")
+
+        print(
+            f"[VectorSearch] search_all in {(time.monotonic() - started) * 1000:.0f}ms: "
+            + ", ".join(f"{table}={len(rows)}" for table, rows in results.items())
+        )
+        return results
+
 
 # Singleton instance
 _vector_search_service = None
@@ -0,0 +1,150 @@
+"""
+Batched Supabase reads for Google Classroom context.
+
+The chatbot used to issue one query per course per relation (teachers, students,
+coursework, announcements, submissions). These helpers fetch a relation for *all*
+courses with a single ``in_()`` filter and group the rows in memory, so loading
+context for 30 courses costs a handful of round-trips instead of 120+.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+# Keep ``in.(...)`` lists short enough for PostgREST URL limits (UUIDs are ~36 chars).
+IN_FILTER_CHUNK_SIZE = 150
+# PostgREST caps responses at max-rows (1000 by default); page with .range() past that.
+PAGE_SIZE = 1000
+
+
+def _chunks(values: Sequence[Any], size: int) -> Iterable[Sequence[Any]]:
+    for i in range(0, len(values), size):
+        yield values[i : i + size]
+
+
+def _sort_rows(rows: List[dict], order: str, desc: bool) -> List[dict]:
+    """Re-sort merged chunk results the way Postgres would (NULLS LAST asc / NULLS FIRST desc)."""
+    present = [r for r in rows if r.get(order) is not None]
+    missing = [r for r in rows if r.get(order) is None]
+    present.sort(key=lambda r: r.get(order), reverse=desc)
+    return missing + present if desc else present + missing
+
+
+def _ordered(query, order: Optional[str], desc: bool, tiebreak: Optional[str]):
+    """Apply ``order`` plus a unique tiebreak column so range() pages never skip or repeat rows."""
+    if order:
+        query = query.order(order, desc=desc)
+    if tiebreak and tiebreak != order:
+        query = query.order(tiebreak)
+    return query
+
+
+def fetch_rows_in(
+    supabase,
+    table: str,
+    columns: str,
+    column: str,
+    values: Iterable[Any],
+    *,
+    order: Optional[str] = None,
+    desc: bool = False,
+    limit: Optional[int] = None,
+    limit_per_value: Optional[int] = None,
+    configure: Optional[Callable[[Any], Any]] = None,
+    chunk_size: int = IN_FILTER_CHUNK_SIZE,
+    page_size: int = PAGE_SIZE,
+    tiebreak: Optional[str] = "id",
+) -> List[dict]:
+    """
+    ``SELECT columns FROM table WHERE column IN (values)`` in as few round-trips as possible.
+
+    Args:
+        configure: Optional callback adding extra filters to the query builder
+                   (e.g. ``lambda q: q.gte('update_time', start)``).
+        limit: Overall row cap (applied in SQL per chunk and again after merging).
+        limit_per_value: Keep at most this many rows per value of ``column`` (the first ones in
+                   ``order``), bounded in SQL rather than trimmed after loading everything.
+        tiebreak: Unique column appended to the ordering so paging is stable.
+
+    Returns rows in ``order`` (when given), across all chunks and pages.
+    """
+    unique_values = list(dict.fromkeys(v for v in values if v is not None))
+    if not unique_values:
+        return []
+
+    def base_query(filter_values):
+        query = supabase.table(table).select(columns)
+        query = query.in_(column, list(filter_values)) if len(filter_values) != 1 else query.eq(column, filter_values[0])
+        if configure is not None:
+            query = configure(query)
+        return _ordered(query, order, desc, tiebreak)
+
+    rows: List[dict] = []
+    for chunk in _chunks(unique_values, chunk_size):
+        if limit_per_value:
+            rows.extend(_fetch_chunk_per_value(base_query, chunk, column, limit_per_value))
+            continue
+        offset = 0
+        while True:
+            query = base_query(chunk)
+            if limit is not None:
+                # A single bounded page is enough when an overall limit is requested
+                query = query.limit(limit)
+            else:
+                query = query.range(offset, offset + page_size - 1)
+            result = query.execute()
+            page = result.data or []
+            rows.extend(page)
+            if limit is not None or len(page) < page_size:
+                break
+            offset += page_size
+
+    chunk_count = (len(unique_values) + chunk_size - 1) // chunk_size
+    if order and (chunk_count > 1 or limit_per_value):
+        rows = _sort_rows(rows, order, desc)
+    if limit is not None:
+        rows = rows[:limit]
+    return rows
+
+
+def _fetch_chunk_per_value(base_query, chunk: Sequence[Any], column: str, per_value: int) -> List[dict]:
+    """
+    Top ``per_value`` rows for each value in ``chunk``.
+
+    One query capped at ``per_value * len(chunk)`` rows covers the common case. If that cap is
+    hit, the result is still a prefix of the ordering, so every value with ``per_value`` rows in
+    it already has its top rows; only the values with fewer are re-read with their own bounded query.
+    """
+    bound = per_value * len(chunk)
+    page = base_query(list(chunk)).limit(bound).execute().data or []
+    by_value: Dict[str, List[dict]] = {}
+    for row in page:
+        bucket = by_value.setdefault(str(row.get(column)), [])
+        if len(bucket) < per_value:
+            bucket.append(row)
+    if len(page) < bound:
+        return [row for bucket in by_value.values() for row in bucket]
+
+    rows: List[dict] = []
+    for value in chunk:
+        bucket = by_value.get(str(value), [])
+        if len(bucket) < per_value:
+            bucket = base_query([value]).limit(per_value).execute().data or []
+        rows.extend(bucket)
+    return rows
+
+
+def group_rows(
+    rows: Iterable[dict],
+    key: str,
+    limit_per_key: Optional[int] = None,
+    key_fn: Callable[[Any], Any] = lambda v: v,
+) -> Dict[Any, List[dict]]:
+    """Group rows by ``row[key]`` preserving query order, keeping at most ``limit_per_key`` each."""
+    grouped: Dict[Any, List[dict]] = {}
+    for row in rows:
+        k = key_fn(row.get(key))
+        bucket = grouped.setdefault(k, [])
+        if limit_per_key is None or len(bucket) < limit_per_key:
+            bucket.append(row)
+    return grouped
@@ -0,0 +1,167 @@
+"""
+Concurrent context assembly for generate_chatbot_response.
+
+The pipeline decides which sources a query needs (web crawler, Drive exam/timetable lookup,
+Classroom/Calendar reference data, today's holidays) and starts each one on a small dedicated pool as soon as that
+decision is made, instead of fetching them one after another. When the pipeline needs a source
+it waits at most until that source's deadline (measured from when the source started); a source
+that misses its deadline contributes its default (empty) value and the answer is built from
+whatever did arrive. Late results are dropped, the worker finishes in the background.
+
+Web crawls (Selenium for team pages) can keep running long after their deadline, so they get a
+pool of their own: abandoned crawls only queue behind each other and never hold the workers the
+Drive / Classroom / holiday sources of other requests need.
+
+End-to-end latency for a query that needs several sources becomes roughly the slowest source
+(capped by its deadline) rather than the sum.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, Optional, Tuple
+
+CONTEXT_POOL = "context"
+CRAWL_POOL = "crawl"
+
+# Pool name -> (size env var, default size)
+POOL_SIZES: Dict[str, Tuple[str, int]] = {
+    CONTEXT_POOL: ("CHAT_CONTEXT_POOL_SIZE", 8),
+    CRAWL_POOL: ("CHAT_CRAWL_POOL_SIZE", 4),
+}
+
+# Sources that run on a pool other than CONTEXT_POOL
+SOURCE_POOLS: Dict[str, str] = {
+    "web": CRAWL_POOL,
+}
+
+# Seconds; override per source with CHAT_CONTEXT_DEADLINE_<NAME> (e.g. CHAT_CONTEXT_DEADLINE_WEB=5)
+DEFAULT_DEADLINES: Dict[str, float] = {
+    "web": 8.0,
+    "drive": 12.0,
+    "admin": 10.0,
+    "holidays": 2.0,
+}
+FALLBACK_DEADLINE = 8.0
+
+_executors: Dict[str, ThreadPoolExecutor] = {}
+_executor_lock = threading.Lock()
+
+
+def _pool_size_from_env(pool: str) -> int:
+    env_name, default = POOL_SIZES[pool]
+    try:
+        size = int(os.getenv(env_name, ""))
+    except ValueError:
+        return default
+    return size if size > 0 else default
+
+
+def get_context_executor(pool: str = CONTEXT_POOL) -> ThreadPoolExecutor:
+    """Dedicated pools: the chat pipeline itself runs on the blocking pool, so sources must not
+    queue behind it there (a saturated blocking pool would deadlock waiting on its own work)."""
+    executor = _executors.get(pool)
+    if executor is None:
+        with _executor_lock:
+            executor = _executors.get(pool)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=_pool_size_from_env(pool), thread_name_prefix=f"chat-{pool}")
+                _executors[pool] = executor
+    return executor
+
+
+def source_deadline(name: str) -> float:
+    raw = os.getenv(f"CHAT_CONTEXT_DEADLINE_{name.upper()}", "")
+    try:
+        value = float(raw)
+        if value > 0:
+            return value
+    except ValueError:
+        pass
+    return DEFAULT_DEADLINES.get(name, FALLBACK_DEADLINE)
+
+
+class ContextGatherer:
+    """Per-request set of in-flight context sources, each with its own deadline"""
+
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None, label: str = "Context"):
+        self._executor = executor
+        self.label = label
+        self._sources: Dict[str, Dict[str, Any]] = {}
+
+    def start(self, name: str, fn: Callable[..., Any], *args: Any, deadline: Optional[float] = None, **kwargs: Any) -> None:
+        """Begin fetching ``name`` in the background (a second start of the same name is ignored)"""
+        if name in self._sources:
+            return
+        executor = self._executor or get_context_executor(SOURCE_POOLS.get(name, CONTEXT_POOL))
+        started = time.monotonic()
+        source = {
+            "future": None,
+            "started": started,
+            "deadline": started + (deadline if deadline is not None else source_deadline(name)),
+            "status": "pending",
+            "ms": None,
+        }
+
+        def run():
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                source["ms"] = round((time.monotonic() - started) * 1000)
+
+        source["future"] = executor.submit(run)
+        self._sources[name] = source
+
+    def started(self, name: str) -> bool:
+        return name in self._sources
+
+    def result(self, name: str, default: Any = None, reraise: bool = False) -> Any:
+        """The source's value, waiting no later than its deadline; ``default`` on timeout or error
+
+        With ``reraise`` the source's own exception propagates (timeouts still give ``default``).
+        """
+        source = self._sources.get(name)
+        if source is None:
+            return default
+        future: Future = source["future"]
+        try:
+            value = future.result(timeout=max(0.0, source["deadline"] - time.monotonic()))
+            source["status"] = "ok"
+            return value
+        except FutureTimeoutError:
+            source["status"] = "timeout"
+            print(f"[{self.label}] ⏱️ '{name}' missed its {source['deadline'] - source['started']:.1f}s deadline - answering without it")
+        except Exception as e:
+            source["status"] = "error"
+            print(f"[{self.label}] ❌ '{name}' failed: {e}")
+            if reraise:
+                raise
+        return default
+
+    def fetch(self, name: str, fn: Callable[..., Any], *args: Any, default: Any = None,
+              reraise: bool = False, **kwargs: Any) -> Any:
+        """start() + result() for a source the pipeline needs right away (deadline still applies)"""
+        self.start(name, fn, *args, **kwargs)
+        return self.result(name, default, reraise=reraise)
+
+    def timed_out(self, name: str) -> bool:
+        source = self._sources.get(name)
+        return bool(source and source["status"] == "timeout")
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"status": source["status"], "ms": source["ms"]}
+            for name, source in self._sources.items()
+        }
+
+    def log_summary(self) -> None:
+        if self._sources:
+            parts = ", ".join(
+                f"{name}={info['status']}" + (f" {info['ms']}ms" if info["ms"] is not None else "")
+                for name, info in self.summary().items()
+            )
+            print(f"[{self.label}] Sources: {parts}")
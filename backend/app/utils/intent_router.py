@@ -0,0 +1,276 @@
+"""
+Declarative intent registry for the early routing steps of generate_chatbot_response.
+
+Each intent is a list of lowercase phrases (plain substring matches, same semantics as the
+old ``any(kw in query_lower for kw in [...])`` checks) plus optional regex patterns. All
+phrases from every intent are compiled once at import into a single trie-shaped regex, so a
+query is classified in one scan instead of hundreds of substring checks per request.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Optional, Sequence, Tuple
+
+
+@dataclass(frozen=True)
+class Intent:
+    id: str
+    phrases: Tuple[str, ...] = ()
+    patterns: Tuple[str, ...] = ()
+
+
+# Order only matters for dispatch helpers like first_intent(); classification returns a set.
+INTENTS: Tuple[Intent, ...] = (
+    Intent(
+        "coursework_early",
+        phrases=(
+            'assignment', 'homework', 'coursework', 'task', 'due', 'submit',
+            'my assignments', 'my coursework', 'my classes', 'my courses', 'my homework',
+            'help with homework', 'help with assignment', 'help with coursework',
+            'need help with homework', 'need help with assignment',
+            'homework help', 'assignment help', 'coursework help',
+        ),
+    ),
+    Intent(
+        "classroom_early",
+        phrases=(
+            'assignment', 'homework', 'coursework', 'task', 'due', 'submit',
+            'announcement', 'announce', 'notice', 'update',
+            'student', 'classmate', 'roster',
+            'teacher', 'instructor', 'faculty',
+            'course', 'class', 'subject',
+            'calendar', 'calender', 'schedule', 'planning', 'school events', 'upcoming event',
+            'my assignments', 'my coursework', 'my classes', 'my courses', 'my homework',
+            'help with homework', 'help with assignment', 'help with coursework',
+            'need help with homework', 'need help with assignment',
+            'homework help', 'assignment help', 'coursework help',
+            'calendar page', 'calender page',
+        ),
+    ),
+    Intent(
+        "home_early",
+        phrases=(
+            'home', 'homework', 'my assignments', 'my coursework', 'my classes', 'my courses',
+            'help with homework', 'help with assignment',
+        ),
+    ),
+    # Faculty / teacher directory — sourced from Google Classroom; guests must sign in first
+    Intent(
+        "faculty_directory",
+        phrases=(
+            'faculty list', 'list of faculty', 'list of teachers', 'teacher list', 'teachers list',
+            'all teachers', 'all faculty', 'school faculty', 'faculty members', 'faculty directory',
+        ),
+    ),
+    Intent(
+        "greeting",
+        patterns=(
+            r'\bhi\b', r'\bhello\b', r'\bhey\b',
+            r'\bgood morning\b', r'\bgood afternoon\b', r'\bgood evening\b',
+            r'\bgreetings\b',
+        ),
+    ),
+    Intent(
+        "how_are_you",
+        phrases=('how are you', 'how are you doing', 'how do you do', "how's it going", "how's everything"),
+    ),
+    # Google holiday-calendar embed (narrow — do NOT use "school calendar" or generic "holidays")
+    Intent(
+        "holiday_embed",
+        phrases=(
+            'holiday calendar', 'school holidays', 'vacation calendar', 'show holidays',
+            'holiday list', 'calendar of holidays',
+        ),
+        # Whole-word "holidays" only (avoid matching random substrings)
+        patterns=(r'\bholidays\b',),
+    ),
+    # Step 0.5: "What kind of school is Prakriti?"
+    Intent(
+        "school_type",
+        phrases=(
+            'what kind of school is prakriti', 'what type of school is prakriti', 'what is prakriti school',
+            'describe prakriti school', 'tell me about prakriti', 'prakriti school description',
+            'is prakriti a progressive school', 'is prakriti an alternative school',
+            'what grades does prakriti have', 'what makes prakriti different',
+            'what is special about prakriti school', 'prakriti school overview', 'prakriti k12 school',
+            'what does prakriti focus on', 'what is the philosophy of prakriti school',
+        ),
+    ),
+    # Step 0.6: "What's the teaching philosophy at Prakriti?"
+    Intent(
+        "teaching_philosophy",
+        phrases=(
+            "what's the teaching philosophy at prakriti", "what is prakriti's teaching philosophy",
+            "how does prakriti teach", "what is the teaching style at prakriti",
+            "prakriti school teaching approach", "prakriti education philosophy",
+            "how are students taught at prakriti", "what is the learning model at prakriti",
+            "what is prakriti's approach to education", "what is the classroom environment at prakriti",
+            "prakriti's learning philosophy", "what is the focus of teaching at prakriti",
+            "prakriti school philosophy",
+        ),
+    ),
+    # Step 0.7: "Which subjects are available for IGCSE and AS/A Level?"
+    Intent(
+        "igcse_subjects",
+        phrases=(
+            "which subjects are available for igcse and as/a level", "igcse subjects", "as level subjects",
+            "a level subjects", "subjects offered igcse", "subjects offered as level",
+            "subjects offered a level", "prakriti igcse subjects", "prakriti as level subjects",
+            "prakriti a level subjects", "what can i study at prakriti", "what are the options for igcse",
+            "what are the options for a level", "what are the options for as level",
+            "prakriti subject list", "prakriti subject options", "subjects for grade 9",
+            "subjects for grade 10", "subjects for grade 11", "subjects for grade 12",
+        ),
+    ),
+    # Step 0.8: "How are learners with special needs supported?"
+    Intent(
+        "special_needs",
+        phrases=(
+            "how are learners with special needs supported", "special needs support",
+            "prakriti special needs", "bridge programme", "support for special needs",
+            "inclusive education prakriti", "special educators prakriti", "therapists prakriti",
+            "parent support prakriti", "how does prakriti help special needs", "prakriti inclusion",
+            "prakriti support for disabilities", "prakriti learning support", "prakriti therapy",
+            "prakriti special education",
+        ),
+    ),
+    # Step 0.9: "What sports, arts, and enrichment activities are available?"
+    Intent(
+        "enrichment_activities",
+        phrases=(
+            "what sports, arts, and enrichment activities are available", "sports at prakriti",
+            "arts at prakriti", "enrichment activities prakriti", "prakriti sports", "prakriti arts",
+            "prakriti enrichment", "activities at prakriti", "prakriti extracurricular",
+            "prakriti co-curricular", "prakriti after school", "prakriti clubs", "prakriti music",
+            "prakriti theater", "prakriti stem", "prakriti design lab", "prakriti mindfulness",
+            "prakriti meditation", "prakriti maker projects", "prakriti farm outings",
+            "prakriti field trips",
+        ),
+    ),
+    # Step 0.10: "What are the fees for different grades?"
+    Intent(
+        "fees",
+        phrases=(
+            "what are the fees for different grades", "prakriti fee structure", "school fees",
+            "what is the school fees", "prakriti fees", "grade wise fees", "admission charges",
+            "fee for nursery", "fee for grade 1", "fee for grade 12", "prakriti admission fee",
+            "prakriti tuition", "prakriti security deposit", "prakriti monthly fee",
+            "prakriti one time charges", "prakriti payment", "prakriti fee breakdown",
+            "prakriti fee details", "prakriti fee for 2024", "prakriti fee for 2025",
+        ),
+    ),
+    # Step 0.11: "Where is Prakriti School located?" (answered with a Google Map embed)
+    Intent(
+        "location",
+        phrases=(
+            "where is prakriti school located", "prakriti school location", "prakriti address",
+            "prakriti location", "school address", "prakriti map", "how to reach prakriti",
+            "prakriti school directions", "prakriti school google map", "prakriti school route",
+            "prakriti school navigation", "prakriti school in greater noida",
+            "prakriti school on expressway", "prakriti school ncr",
+        ),
+    ),
+)
+
+# Canonical FAQ intents (Steps 0.5–0.11), in the order the pipeline used to check them
+CANONICAL_INTENT_IDS: Tuple[str, ...] = (
+    "school_type",
+    "teaching_philosophy",
+    "igcse_subjects",
+    "special_needs",
+    "enrichment_activities",
+    "fees",
+    "location",
+)
+
+
+def _trie_pattern(phrases: Iterable[str]) -> str:
+    """
+    Build a regex equivalent to ``phrase1|phrase2|...`` but shaped like a trie, so the
+    engine never re-tests a shared prefix. At a given start position it matches the
+    longest phrase beginning there.
+    """
+    trie: dict = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        is_end = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if is_end:
+            return "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+
+class IntentRouter:
+    """Classifies a query against every registered intent in a single pass."""
+
+    def __init__(self, intents: Sequence[Intent]):
+        self.intents = tuple(intents)
+        self.order = tuple(intent.id for intent in self.intents)
+
+        owners: Dict[str, set] = {}
+        for intent in self.intents:
+            for phrase in intent.phrases:
+                owners.setdefault(phrase.lower(), set()).add(intent.id)
+
+        # The scan reports only the longest phrase at each start position, so fold every
+        # shorter phrase that is a prefix of it into its intent set (e.g. "homework" inside
+        # "homework help").
+        self._intents_by_phrase: Dict[str, FrozenSet[str]] = {}
+        for phrase in owners:
+            ids = set()
+            for end in range(1, len(phrase) + 1):
+                ids |= owners.get(phrase[:end], set())
+            self._intents_by_phrase[phrase] = frozenset(ids)
+
+        # Zero-width lookahead lets overlapping phrases at every position be reported
+        self._phrase_scan = re.compile("(?=(" + _trie_pattern(owners) + "))") if owners else None
+        self._pattern_checks = tuple(
+            (intent.id, re.compile("|".join(f"(?:{p})" for p in intent.patterns)))
+            for intent in self.intents
+            if intent.patterns
+        )
+
+    def classify(self, query: str) -> FrozenSet[str]:
+        """Return the ids of every intent whose phrases or patterns occur in ``query``."""
+        query_lower = (query or "").lower()
+        matched = set()
+        if self._phrase_scan is not None:
+            lookup = self._intents_by_phrase
+            for m in self._phrase_scan.finditer(query_lower):
+                matched |= lookup[m.group(1)]
+        for intent_id, pattern in self._pattern_checks:
+            if intent_id not in matched and pattern.search(query_lower):
+                matched.add(intent_id)
+        return frozenset(matched)
+
+    def first_intent(self, matched: Iterable[str], candidates: Sequence[str]) -> Optional[str]:
+        """First id in ``candidates`` (priority order) that was matched, else None."""
+        matched = set(matched)
+        for intent_id in candidates:
+            if intent_id in matched:
+                return intent_id
+        return None
+
+
+_router = IntentRouter(INTENTS)
+
+
+def get_intent_router() -> IntentRouter:
+    return _router
+
+
+def classify_query(query: str) -> FrozenSet[str]:
+    """Single-pass intent classification using the module-level compiled registry."""
+    return _router.classify(query)
@@ -0,0 +1,262 @@
+"""
+Token budget for the main chatbot prompt.
+
+generate_chatbot_response used to cap individual sources by hand (web excerpt caps per query
+type, history tail lengths, coursework limits), but nothing bounded the prompt as a whole. A
+PromptBudget collects the prompt's blocks, counts their tokens and fits them into one
+per-request budget:
+
+- required blocks (system prompt, the question and its instructions) are always kept;
+- the per-source sections of the user turn (web excerpt, Classroom data, calendar events) are
+  optional blocks carved out of it with ``require_with_blocks`` and put back by ``assemble``;
+- history keeps a minimum share of the budget (HISTORY_FLOOR_SHARE) even when the required
+  blocks take the rest, so a large prompt condenses the conversation instead of dropping it;
+- the remaining budget goes to the optional blocks in the intent's priority order
+  (e.g. the web excerpt first for article / person questions, Classroom data first for
+  coursework questions, calendar events first for calendar questions);
+- a block that does not fit is compacted (text is cut at a line / sentence boundary, older
+  conversation turns are condensed into one short note) or dropped when nothing useful fits.
+
+Token counts use tiktoken when it is installed and ~4 characters per token otherwise.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import tiktoken  # type: ignore
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+DEFAULT_PROMPT_BUDGET = 8000  # input tokens; override with CHAT_PROMPT_TOKEN_BUDGET
+MESSAGE_OVERHEAD_TOKENS = 4  # role / separators per chat message
+CONDENSED_TURN_CHARS = 160
+HISTORY_FLOOR_SHARE = 0.1  # of the total budget, reserved for (condensed) history
+
+# Optional blocks in the order they receive the budget left after the required blocks
+INTENT_PRIORITIES: Dict[str, Sequence[str]] = {
+    # person / Roots post / event write-ups: the excerpt is the answer
+    "article": ("web", "history", "calendar_data", "classroom_data"),
+    # "translate the previous response" needs the prior turns
+    "translation": ("history", "web", "classroom_data", "calendar_data"),
+    # Classroom questions are answered from the Data rows; follow-ups need context
+    "data": ("classroom_data", "calendar_data", "history", "web"),
+    "calendar": ("calendar_data", "history", "classroom_data", "web"),
+    "general": ("history", "web", "classroom_data", "calendar_data"),
+}
+
+
+def prompt_token_budget() -> int:
+    try:
+        value = int(os.getenv("CHAT_PROMPT_TOKEN_BUDGET", ""))
+    except ValueError:
+        return DEFAULT_PROMPT_BUDGET
+    return value if value > 0 else DEFAULT_PROMPT_BUDGET
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: Optional[str], model: str = "gpt-4o-mini") -> int:
+    if not text:
+        return 0
+    if TIKTOKEN_AVAILABLE:
+        try:
+            return len(_encoding(model).encode(text))
+        except Exception:
+            pass
+    return math.ceil(len(text) / 4)
+
+
+def message_tokens(messages: Sequence[Dict[str, Any]], model: str = "gpt-4o-mini") -> int:
+    return sum(count_tokens(str(m.get("content") or ""), model) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-4o-mini", marker: str = "...") -> str:
+    """``text`` cut to at most ``max_tokens``, preferring a line or sentence boundary"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    budget = max(1, max_tokens - count_tokens(marker, model))
+    if TIKTOKEN_AVAILABLE:
+        try:
+            encoding = _encoding(model)
+            cut = encoding.decode(encoding.encode(text)[:budget])
+        except Exception:
+            cut = text[:budget * 4]
+    else:
+        cut = text[:budget * 4]
+    # Back up to a natural break if one is close to the end
+    for sep in ("\n", ". "):
+        pos = cut.rfind(sep)
+        if pos >= len(cut) * 0.8:
+            cut = cut[:pos + len(sep)]
+            break
+    return cut.rstrip() + marker
+
+
+def condense_turns(turns: Sequence[Dict[str, Any]], clip_chars: int = CONDENSED_TURN_CHARS) -> str:
+    """One short note standing in for older conversation turns"""
+    lines = []
+    for turn in turns:
+        content = " ".join(str(turn.get("content") or "").split())
+        if not content:
+            continue
+        if len(content) > clip_chars:
+            content = content[:clip_chars].rstrip() + "..."
+        speaker = "User" if turn.get("role") == "user" else "Assistant"
+        lines.append(f"- {speaker}: {content}")
+    if not lines:
+        return ""
+    return "Earlier in this conversation (condensed):\n" + "\n".join(lines)
+
+
+def compact_history(turns: Sequence[Dict[str, Any]], max_tokens: int,
+                    model: str = "gpt-4o-mini") -> List[Dict[str, str]]:
+    """Newest turns verbatim while they fit; older turns condensed into one note, oldest dropped first"""
+    turns = list(turns)
+    recent: List[Dict[str, Any]] = []
+    used = 0
+    for turn in reversed(turns):
+        cost = count_tokens(str(turn.get("content") or ""), model) + MESSAGE_OVERHEAD_TOKENS
+        if used + cost > max_tokens:
+            break
+        recent.insert(0, turn)
+        used += cost
+    older = turns[:len(turns) - len(recent)]
+    while older:
+        note = condense_turns(older)
+        cost = count_tokens(note, model) + MESSAGE_OVERHEAD_TOKENS
+        if note and used + cost <= max_tokens:
+            return [{"role": "system", "content": note}] + recent
+        older = older[1:]
+    return recent
+
+
+@dataclass
+class PromptBlock:
+    name: str
+    content: Any  # str, or a list of chat messages for history
+    required: bool = False
+    tokens: int = 0
+    final_tokens: int = 0
+    action: str = "kept"
+    final: Any = field(default=None)
+
+
+class PromptBudget:
+    """Fits one request's prompt blocks into a token budget"""
+
+    def __init__(self, total_tokens: Optional[int] = None, model: str = "gpt-4o-mini", label: str = "Chatbot",
+                 history_floor: Optional[int] = None):
+        self.total_tokens = total_tokens if total_tokens is not None else prompt_token_budget()
+        self.history_floor = history_floor if history_floor is not None else int(self.total_tokens * HISTORY_FLOOR_SHARE)
+        self.model = model
+        self.label = label
+        self._blocks: Dict[str, PromptBlock] = {}
+        self._templates: Dict[str, Tuple[str, List[Tuple[str, int, int]]]] = {}
+
+    def require(self, name: str, text: str) -> None:
+        self._add(PromptBlock(name, text or "", required=True))
+
+    def require_with_blocks(self, name: str, text: str, spans: Dict[str, Tuple[int, int]]) -> None:
+        """``text`` as a required block, except ``spans`` ({block name: (start, end)}) which become
+        optional blocks; ``assemble(name)`` rebuilds the text from their allocated content"""
+        ordered = sorted(((block, start, end) for block, (start, end) in spans.items()), key=lambda span: span[1])
+        required, last = [], 0
+        for block, start, end in ordered:
+            required.append(text[last:start])
+            self.add_text(block, text[start:end])
+            last = end
+        required.append(text[last:])
+        self.require(name, "".join(required))
+        self._templates[name] = (text, ordered)
+
+    def add_text(self, name: str, text: str) -> None:
+        self._add(PromptBlock(name, text or ""))
+
+    def add_history(self, name: str, turns: Sequence[Dict[str, Any]]) -> None:
+        self._add(PromptBlock(name, list(turns)))
+
+    def _add(self, block: PromptBlock) -> None:
+        block.tokens = self._measure(block.content)
+        self._blocks[block.name] = block
+
+    def _measure(self, content: Any) -> int:
+        if isinstance(content, list):
+            return message_tokens(content, self.model)
+        return count_tokens(content, self.model)
+
+    def allocate(self, priorities: Sequence[str]) -> Dict[str, Any]:
+        """Final content per block (history as a message list); optional blocks fitted in ``priorities`` order"""
+        remaining = self.total_tokens - sum(b.tokens for b in self._blocks.values() if b.required)
+        ordered = [self._blocks[n] for n in priorities if n in self._blocks]
+        ordered += [b for b in self._blocks.values() if not b.required and b not in ordered]
+        # History's floor is set aside first, so neither a large Data block nor a higher-priority
+        # excerpt can leave it with nothing
+        floors = {b.name: min(self.history_floor, b.tokens) for b in ordered if isinstance(b.content, list)}
+        remaining -= sum(floors.values())
+        for block in self._blocks.values():
+            if block.required:
+                block.final, block.final_tokens, block.action = block.content, block.tokens, "kept"
+        for block in ordered:
+            floor = floors.get(block.name, 0)
+            allowance = max(0, remaining) + floor
+            if block.tokens <= allowance:
+                block.final, block.action = block.content, "kept"
+            elif isinstance(block.content, list):
+                block.final = compact_history(block.content, allowance, self.model)
+            else:
+                block.final = truncate_to_tokens(block.content, allowance, self.model)
+            block.final_tokens = self._measure(block.final)
+            if block.final_tokens < block.tokens:
+                block.action = "compacted" if block.final_tokens else "dropped"
+            remaining += floor - block.final_tokens
+        return {name: block.final for name, block in self._blocks.items()}
+
+    def assemble(self, name: str) -> str:
+        """The text given to ``require_with_blocks`` with each span replaced by its allocated content"""
+        if name not in self._templates:
+            return self._blocks[name].final
+        text, spans = self._templates[name]
+        parts, last = [], 0
+        for block, start, end in spans:
+            parts.append(text[last:start])
+            parts.append(self._blocks[block].final or "")
+            last = end
+        parts.append(text[last:])
+        return "".join(parts)
+
+    @property
+    def used_tokens(self) -> int:
+        return sum(b.final_tokens for b in self._blocks.values())
+
+    def composition(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            name: {"tokens": block.tokens, "final_tokens": block.final_tokens, "action": block.action}
+            for name, block in self._blocks.items()
+        }
+
+    def log_composition(self) -> None:
+        parts = []
+        for name, info in self.composition().items():
+            if info["action"] == "kept":
+                parts.append(f"{name}={info['final_tokens']}")
+            else:
+                parts.append(f"{name}={info['final_tokens']}/{info['tokens']} ({info['action']})")
+        print(f"[{self.label}] 📊 Prompt budget: ~{self.used_tokens}/{self.total_tokens} tokens | {', '.join(parts)}")
+        if self.used_tokens > self.total_tokens:
+            print(f"[{self.label}] ⚠️ Required blocks alone exceed the prompt budget")
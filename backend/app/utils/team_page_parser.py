@@ -0,0 +1,179 @@
+"""
+Static (no browser) extraction of team-member bios from the team page HTML.
+
+The team page opens each bio in a popup, but the popup markup (or a JSON blob with the same data)
+is usually already in the initial HTML. This module finds it with BeautifulSoup so one GET covers
+every member; WebCrawlerAgent.extract_team_members only sends members it could not resolve here
+to the Selenium click-through path.
+
+Output is the text a browser would show for the member's popup (block elements on their own
+lines, inline formatting joined), so the same text-to-record code serves both paths.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from typing import Dict, Iterable, List
+
+from bs4 import BeautifulSoup, Tag
+
+# Minimum bio text (beyond the name) for a block to count as the member's profile
+MIN_BIO_CHARS = 50
+
+POPUP_CLASS_HINTS = ('popup', 'modal', 'dialog', 'lightbox')
+CARD_CLASS_HINTS = ('card', 'member', 'team', 'person', 'profile', 'staff', 'bio')
+BIO_KEYS = ('description', 'bio', 'biography', 'about', 'content', 'details')
+TITLE_KEYS = ('jobTitle', 'title', 'role', 'designation', 'position')
+MENU_INDICATORS = (
+    'home', 'prakriti way of learning', 'our programmes', 'green school', 'roots of all beings',
+    'calendar', 'admissions', 'contact', 'meet our team', 'careers @ prakriti',
+)
+BLOCK_TAGS = (
+    'address', 'article', 'aside', 'blockquote', 'dd', 'div', 'dl', 'dt', 'figcaption', 'figure',
+    'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'li', 'main', 'ol', 'p', 'pre',
+    'section', 'table', 'td', 'th', 'tr', 'ul',
+)
+_WS_RE = re.compile(r'[ \t\r\f\v\xa0]+')
+
+
+def _class_text(tag: Tag) -> str:
+    classes = tag.get('class') or []
+    return ' '.join(classes).lower() if isinstance(classes, list) else str(classes).lower()
+
+
+def _mark_blocks(soup: BeautifulSoup) -> None:
+    """Put newlines around block elements so get_text() splits lines like innerText does"""
+    for br in soup.find_all('br'):
+        br.replace_with('\n')
+    for tag in soup.find_all(BLOCK_TAGS):
+        tag.insert_before('\n')
+        tag.insert_after('\n')
+
+
+def rendered_text(element: Tag) -> str:
+    """Approximate the element's innerText: one line per block, inline runs joined"""
+    lines = []
+    for line in element.get_text('').split('\n'):
+        line = _WS_RE.sub(' ', line).strip()
+        if line:
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def _is_menu(text: str) -> bool:
+    lower = text.lower()
+    return sum(1 for item in MENU_INDICATORS if item in lower) >= 3
+
+
+def _bio_chars(text: str, name: str) -> int:
+    return len(text.lower().replace(name.lower(), '').strip())
+
+
+# ---- Embedded JSON ----------------------------------------------------------
+
+def _walk_json(node):
+    if isinstance(node, dict):
+        yield node
+        for value in node.values():
+            yield from _walk_json(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _walk_json(item)
+
+
+def _plain(value) -> str:
+    if not isinstance(value, str):
+        return ''
+    if '<' in value and '>' in value:
+        fragment = BeautifulSoup(value, 'html.parser')
+        _mark_blocks(fragment)
+        return rendered_text(fragment)
+    return value.strip()
+
+
+def member_texts_from_json(soup: BeautifulSoup, known_names: Iterable[str]) -> Dict[str, str]:
+    """Bios from JSON-LD Person entries or JSON data blobs (<script type="application/json">)"""
+    known = {name.lower(): name for name in known_names}
+    texts: Dict[str, str] = {}
+    for script in soup.find_all('script', type=lambda t: t and 'json' in t.lower()):
+        try:
+            data = json.loads(script.string or script.get_text() or '')
+        except (TypeError, ValueError):
+            continue
+        for obj in _walk_json(data):
+            raw_name = obj.get('name')
+            if not isinstance(raw_name, str):
+                continue
+            obj_type = obj.get('@type')
+            is_person = obj_type == 'Person' or (isinstance(obj_type, list) and 'Person' in obj_type)
+            name = known.get(raw_name.strip().lower()) or (raw_name.strip() if is_person else None)
+            if not name or name in texts:
+                continue
+            title = next((_plain(obj[k]) for k in TITLE_KEYS if k in obj and _plain(obj[k])), '')
+            bio = next((_plain(obj[k]) for k in BIO_KEYS if k in obj and _plain(obj[k])), '')
+            text = '\n'.join(part for part in (name, title, bio) if part)
+            if _bio_chars(text, name) >= MIN_BIO_CHARS:
+                texts[name] = text
+    return texts
+
+
+# ---- Markup (hidden popups / inline bios) -------------------------------------
+
+def _candidates(soup: BeautifulSoup, hints) -> List[Tag]:
+    found = []
+    for tag in soup.find_all(True):
+        classes = _class_text(tag)
+        if any(hint in classes for hint in hints):
+            found.append(tag)
+        elif hints is POPUP_CLASS_HINTS and (
+            tag.get('role') in ('dialog', 'alertdialog') or tag.get('data-elementor-type') == 'popup'
+        ):
+            found.append(tag)
+    return found
+
+
+def _smallest_blocks(blocks: List[Tag], names: Iterable[str], all_names: List[str]) -> Dict[str, str]:
+    """For each name, the shortest block that is about that member alone and carries a real bio"""
+    texts = sorted({rendered_text(block) for block in blocks}, key=len)
+    texts = [text for text in texts if text and not _is_menu(text)]
+    best: Dict[str, str] = {}
+    for name in names:
+        name_lower = name.lower()
+        for text in texts:
+            lower = text.lower()
+            if name_lower not in lower or _bio_chars(text, name) < MIN_BIO_CHARS:
+                continue
+            # A grid / wrapper mentioning other members is not this member's profile
+            if any(other.lower() in lower for other in all_names if other.lower() != name_lower):
+                continue
+            best[name] = text
+            break
+    return best
+
+
+def member_texts_from_markup(soup: BeautifulSoup, known_names: Iterable[str],
+                             all_names: Iterable[str] = ()) -> Dict[str, str]:
+    """Bios from popup / modal markup shipped in the page, then from cards with inline bios"""
+    names = list(known_names)
+    all_names = list(all_names) or names
+    texts = _smallest_blocks(_candidates(soup, POPUP_CLASS_HINTS), names, all_names)
+    remaining = [name for name in names if name not in texts]
+    if remaining:
+        texts.update(_smallest_blocks(_candidates(soup, CARD_CLASS_HINTS), remaining, all_names))
+    return texts
+
+
+def extract_member_texts(html, known_names: Iterable[str]) -> Dict[str, str]:
+    """Map member name -> profile text for every member whose bio is present in ``html``"""
+    soup = BeautifulSoup(html, 'html.parser')
+    names = list(known_names)
+    texts = member_texts_from_json(soup, names)
+    for tag in soup(['script', 'style', 'noscript', 'nav']):
+        tag.decompose()
+    _mark_blocks(soup)
+    remaining = [name for name in names if name not in texts]
+    if remaining:
+        texts.update(member_texts_from_markup(soup, remaining, names))
+    return texts
+
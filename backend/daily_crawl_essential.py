@@ -1,29 +1,39 @@
 """
 Daily crawl script - Only crawls essential pages (10 pages instead of 100+)
 Run this daily to keep essential pages fresh in the database
+
+Pages are fetched concurrently with conditional requests (ETag / Last-Modified); unchanged pages
+cost a 304 and no database or embedding work. See app/services/essential_page_crawler.py.
 """
 
 import os
 import sys
-import time
+import argparse
 from datetime import datetime
 from dotenv import load_dotenv
 
 # Add app directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
-from app.agents.web_crawler_agent import WebCrawlerAgent
 from app.config.essential_pages import (
     ESSENTIAL_PRAKRITI_PAGES_FOR_AUTO_CRAWL,
     PAGE_CONTENT_TYPES,
 )
 from supabase_config import get_supabase_client
-from app.services.embedding_generator import get_embedding_generator
 
 load_dotenv()
 
-def crawl_essential_pages():
-    """Crawl only essential pages and store in database"""
+def crawl_essential_pages(max_workers: int = 4, max_per_host: int = 2, min_interval: float = 0.25):
+    """Crawl only essential pages and store in database
+    
+    Args:
+        max_workers: Pages fetched in parallel
+        max_per_host: In-flight requests allowed per host
+        min_interval: Minimum seconds between request starts to the same host
+    
+    Returns:
+        Crawl stats (not_modified / unchanged / changed / new / errors / embedded / seconds)
+    """
     print("=" * 60)
     print("Starting Essential Pages Crawl")
     print(f"Date: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
@@ -33,113 +43,39 @@ def crawl_essential_pages():
     )
     print("=" * 60)
     
-    crawler = WebCrawlerAgent()
     supabase = get_supabase_client()
     
     if not supabase:
         print("[ERROR] Error: Supabase client not available")
-        return
+        return {}
     
-    crawled_count = 0
-    error_count = 0
+    from app.services.essential_page_crawler import EssentialPageCrawler
     
-    for url in ESSENTIAL_PRAKRITI_PAGES_FOR_AUTO_CRAWL:
-        try:
-            print(f"\nCrawling: {url}")
-            # Extract content - SKIP link following to only crawl essential pages
-            content = crawler.extract_content_from_url(url, query="", skip_link_following=True)
-            
-            if 'error' in content:
-                print(f"[ERROR] Error crawling {url}: {content['error']}")
-                error_count += 1
-                continue
-            
-            # Get content type
-            content_type = PAGE_CONTENT_TYPES.get(url, 'general')
-            
-            # Extract keywords from content
-            keywords = []
-            if content.get('title'):
-                keywords.extend(content['title'].lower().split()[:5])
-            if content.get('description'):
-                keywords.extend(content['description'].lower().split()[:5])
-            
-            # Prepare data for database
-            cache_data = {
-                'url': url,
-                'title': content.get('title', ''),
-                'description': content.get('description', ''),
-                'main_content': content.get('main_content', '')[:50000],  # Limit size
-                'headings': content.get('headings', []),
-                'links': content.get('links', [])[:50],  # Limit links
-                'content_type': content_type,
-                'query_keywords': list(set(keywords))[:10],  # Limit to 10 keywords
-                'relevance_score': len(keywords),
-                'is_active': True
-            }
-            
-            # Store in database
-            # First, check if record exists for this URL (most recent active record)
-            existing = supabase.table('web_crawler_data').select('id').eq('url', url).eq('is_active', True).order('crawled_at', desc=True).limit(1).execute()
-            
-            if existing.data and len(existing.data) > 0:
-                # Update existing record (keep same ID and crawled_date, but update content and crawled_at)
-                record_id = existing.data[0]['id']
-                # Don't update crawled_date - keep the original date
-                # Only update the content and timestamps
-                update_data = {
-                    'title': cache_data['title'],
-                    'description': cache_data['description'],
-                    'main_content': cache_data['main_content'],
-                    'headings': cache_data['headings'],
-                    'links': cache_data['links'],
-                    'content_type': cache_data['content_type'],
-                    'query_keywords': cache_data['query_keywords'],
-                    'relevance_score': cache_data['relevance_score'],
-                    'crawled_at': datetime.now().isoformat(),  # Update timestamp
-                    'updated_at': datetime.now().isoformat()
-                }
-                result = supabase.table('web_crawler_data').update(update_data).eq('id', record_id).execute()
-                # Get the updated record
-                updated_record = supabase.table('web_crawler_data').select('*').eq('id', record_id).single().execute()
-                result.data = [updated_record.data] if updated_record.data else []
-                print(f"[UPDATE] Updated existing record for: {url}")
-            else:
-                # Insert new record (only if no existing record found)
-                result = supabase.table('web_crawler_data').insert(cache_data).select('id').execute()
-                print(f"[INSERT] Created new record for: {url}")
-            
-            # Generate embedding for the new/updated record
-            if result.data and len(result.data) > 0:
-                record_id = result.data[0].get('id')
-                if record_id:
-                    try:
-                        embedding_gen = get_embedding_generator()
-                        embedding_gen.generate_for_web_crawler(record_id)
-                    except Exception as e:
-                        print(f"[WARNING] Failed to generate embedding: {e}")
-            
-            crawled_count += 1
-            print(f"[OK] Successfully crawled and stored: {url}")
-            print(f"   Content type: {content_type}")
-            print(f"   Keywords: {len(cache_data['query_keywords'])}")
-            
-            # Small delay to avoid overwhelming server
-            time.sleep(1)
-            
-        except Exception as e:
-            print(f"[ERROR] Error processing {url}: {str(e)}")
-            error_count += 1
-            continue
+    crawler = EssentialPageCrawler(
+        supabase=supabase,
+        max_workers=max_workers,
+        max_per_host=max_per_host,
+        min_interval=min_interval,
+    )
+    stats = crawler.crawl(ESSENTIAL_PRAKRITI_PAGES_FOR_AUTO_CRAWL, PAGE_CONTENT_TYPES)
     
     print("\n" + "=" * 60)
     print("Crawl Summary")
     print("=" * 60)
-    print(f"[OK] Successfully crawled: {crawled_count} pages")
-    print(f"[ERROR] Errors: {error_count} pages")
-    print(f"Total pages: {len(ESSENTIAL_PRAKRITI_PAGES_FOR_AUTO_CRAWL)}")
+    print(f"[OK] Not modified (304): {stats['not_modified']} pages")
+    print(f"[OK] Unchanged content: {stats['unchanged']} pages")
+    print(f"[OK] Updated: {stats['changed']} pages, new: {stats['new']} pages")
+    print(f"[ERROR] Errors: {stats['errors']} pages")
+    print(f"Embeddings refreshed: {stats['embedded']}")
+    print(f"Total pages: {len(ESSENTIAL_PRAKRITI_PAGES_FOR_AUTO_CRAWL)} in {stats['seconds']}s")
     print("=" * 60)
+    return stats
 
 if __name__ == "__main__":
-    crawl_essential_pages()
-
+    parser = argparse.ArgumentParser(description='Crawl the essential Prakriti pages')
+    parser.add_argument('--workers', type=int, default=4, help='Pages fetched in parallel (default: 4)')
+    parser.add_argument('--per-host', type=int, default=2, help='In-flight requests per host (default: 2)')
+    parser.add_argument('--min-interval', type=float, default=0.25,
+                        help='Seconds between request starts to one host (default: 0.25)')
+    args = parser.parse_args()
+    crawl_essential_pages(args.workers, args.per_host, args.min_interval)
@@ -3,7 +3,6 @@
 import sys
 import os
 import re
-import requests
 import json
 from typing import Optional, Dict, Any, List, Tuple, Set
 
@@ -13,6 +12,7 @@ sys.path.append(os.path.dirname(__file__))
 from grade_exam_detector import GradeExamDetector, _now_in_timezone
 from supabase_config import get_supabase_client
 from token_refresh_service import TokenRefreshService
+from app.services.drive_sheet_cache import get_drive_http_session, get_drive_sheet_cache
 
 class DriveChatbotIntegrator:
     """Integrates Google Drive data with chatbot responses"""
@@ -50,6 +50,9 @@ class DriveChatbotIntegrator:
     def __init__(self):
         self.detector = GradeExamDetector()
         self.supabase = get_supabase_client()
+        # Shared across integrator instances (one is created per chat request)
+        self.sheet_cache = get_drive_sheet_cache()
+        self.http = get_drive_http_session()
 
     @staticmethod
     def _a1_range_for_sheet_tab(sheet_name: str) -> str:
@@ -311,6 +314,12 @@ class DriveChatbotIntegrator:
 
     def _list_spreadsheet_sheet_titles(self, file_id: str, token: Dict[str, Any]) -> List[str]:
         """Return tab titles in order from the spreadsheet metadata."""
+        titles = self.sheet_cache.read_through(
+            file_id, "__tabs__", token, lambda: self._fetch_spreadsheet_sheet_titles(file_id, token)
+        )
+        return titles or []
+
+    def _fetch_spreadsheet_sheet_titles(self, file_id: str, token: Dict[str, Any]) -> Optional[List[str]]:
         try:
             access_token = token["access_token"]
             headers = {"Authorization": f"Bearer {access_token}"}
@@ -318,16 +327,16 @@ class DriveChatbotIntegrator:
                 f"https://sheets.googleapis.com/v4/spreadsheets/{file_id}"
                 "?fields=sheets.properties(title)"
             )
-            r = requests.get(url, headers=headers)
+            r = self.http.get(url, headers=headers)
             if r.status_code != 200:
                 print(f"[DriveChatbot] list sheets HTTP {r.status_code}: {r.text[:500]}")
-                return []
+                return None
             payload = r.json()
             sheets = payload.get("sheets") or []
             return [s["properties"]["title"] for s in sheets if s.get("properties", {}).get("title")]
         except Exception as e:
             print(f"[DriveChatbot] Error listing spreadsheet tabs: {e}")
-            return []
+            return None
 
     @staticmethod
     def preschool_color_from_profile_grade(profile_grade: str) -> Optional[str]:
@@ -458,6 +467,9 @@ class DriveChatbotIntegrator:
 
     def get_active_drive_token(self) -> Optional[Dict[str, Any]]:
         """Get the active Google Drive token, refreshing if necessary"""
+        cached = self.sheet_cache.get_token()
+        if cached:
+            return cached
         try:
             print("[DriveChatbot] Retrieving active token from database...")
             result = self.supabase.table('gcdr').select('*').eq('is_active', True).order('created_at', desc=True).limit(1).execute()
@@ -473,6 +485,7 @@ class DriveChatbotIntegrator:
 
                 if valid_token:
                     print("[DriveChatbot] Token is valid (refreshed if needed)")
+                    self.sheet_cache.put_token(valid_token)
                     return valid_token
                 else:
                     print("[DriveChatbot] Token refresh failed")
@@ -486,24 +499,29 @@ class DriveChatbotIntegrator:
 
     def _list_drive_spreadsheet_files(self, token: Dict[str, Any]) -> Optional[List[dict]]:
         """List accessible Google Sheets on Drive (same query as grade infosheet lookup)."""
+        cached = self.sheet_cache.get_file_list()
+        if cached is not None:
+            print(f"[DriveChatbot] Using cached Drive listing ({len(cached)} Google Sheets)")
+            return cached
         try:
             access_token = token["access_token"]
             headers = {"Authorization": f"Bearer {access_token}"}
             search_url = "https://www.googleapis.com/drive/v3/files"
             search_params = {
                 "q": "mimeType = 'application/vnd.google-apps.spreadsheet' and trashed = false",
-                "fields": "files(id,name)",
+                "fields": "files(id,name,modifiedTime)",
                 "pageSize": 100,
                 "orderBy": "modifiedTime desc",
             }
             print(f"[DriveChatbot] Making request to: {search_url}")
-            response = requests.get(search_url, headers=headers, params=search_params)
+            response = self.http.get(search_url, headers=headers, params=search_params)
             print(f"[DriveChatbot] Response status: {response.status_code}")
             if response.status_code == 200:
                 all_sheets = response.json().get("files", [])
                 print(f"[DriveChatbot] Found {len(all_sheets)} total Google Sheets:")
                 for sheet in all_sheets:
                     print(f"  - {sheet['name']} (ID: {sheet['id']})")
+                self.sheet_cache.put_file_list(all_sheets)
                 return all_sheets
             print(f"[DriveChatbot] Error listing files: {response.status_code} - {response.text}")
             return None
@@ -705,7 +723,12 @@ class DriveChatbotIntegrator:
             return None
 
     def extract_sheet_data(self, file_id: str, sheet_name: str, token: Dict[str, Any]) -> Optional[List[List[str]]]:
-        """Extract data from a specific sheet tab"""
+        """Extract data from a specific sheet tab (cached while the spreadsheet's modifiedTime is unchanged)"""
+        return self.sheet_cache.read_through(
+            file_id, sheet_name or "", token, lambda: self._fetch_sheet_data(file_id, sheet_name, token)
+        )
+
+    def _fetch_sheet_data(self, file_id: str, sheet_name: str, token: Dict[str, Any]) -> Optional[List[List[str]]]:
         try:
             access_token = token['access_token']
             headers = {'Authorization': f'Bearer {access_token}'}
@@ -720,7 +743,7 @@ class DriveChatbotIntegrator:
             range_url = f"https://sheets.googleapis.com/v4/spreadsheets/{file_id}/values/{encoded_range}"
 
             print(f"[DriveChatbot] Requesting data from: {range_url}")
-            response = requests.get(range_url, headers=headers)
+            response = self.http.get(range_url, headers=headers)
 
             if response.status_code == 200:
                 try:
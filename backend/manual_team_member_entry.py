@@ -13,10 +13,12 @@ sys.path.append(os.path.join(os.path.dirname(__file__), 'app'))
 
 from supabase_config import get_supabase_client
 from app.services.embedding_generator import get_embedding_generator
+from app.services.embedding_pipeline import EmbeddingRefreshQueue
+from app.services.enhanced_response_cache import invalidate_enhanced_responses
 
 load_dotenv()
 
-def add_team_member_manually(name, title="", description="", details="", full_content=""):
+def add_team_member_manually(name, title="", description="", details="", full_content="", embedding_queue=None):
     """
     Manually add a team member to the database
     
@@ -26,6 +28,7 @@ def add_team_member_manually(name, title="", description="", details="", full_co
         description: Short description (first paragraph)
         details: Additional details
         full_content: Complete popup content
+        embedding_queue: Optional EmbeddingRefreshQueue to defer the embedding refresh to
     """
     supabase = get_supabase_client()
     
@@ -60,16 +63,22 @@ def add_team_member_manually(name, title="", description="", details="", full_co
             on_conflict='name'
         ).execute()
         
-        # Generate embedding for the new/updated record
+        # Re-embed the new/updated record only if its text changed
         if result.data and len(result.data) > 0:
             record_id = result.data[0].get('id')
-            if record_id:
+            if record_id and embedding_queue is not None:
+                embedding_queue.mark('team_member_data', record_id)
+            elif record_id:
                 try:
                     embedding_gen = get_embedding_generator()
-                    embedding_gen.generate_for_team_member(record_id)
+                    embedding_gen.refresh_changed('team_member_data', [record_id])
                 except Exception as e:
                     print(f"[WARNING] Failed to generate embedding: {e}")
         
+        # Batched callers invalidate once after the whole batch
+        if embedding_queue is None:
+            invalidate_enhanced_responses('team')
+        
         print(f"[OK] Successfully stored team member: {name}")
         return True
     except Exception as e:
@@ -97,6 +106,7 @@ def add_multiple_team_members(members_data):
     
     success_count = 0
     error_count = 0
+    embedding_queue = EmbeddingRefreshQueue()
     
     for member in members_data:
         name = member.get('name', '')
@@ -111,7 +121,8 @@ def add_multiple_team_members(members_data):
             title=member.get('title', ''),
             description=member.get('description', ''),
             details=member.get('details', ''),
-            full_content=member.get('full_content', '')
+            full_content=member.get('full_content', ''),
+            embedding_queue=embedding_queue
         )
         
         if success:
@@ -119,6 +130,12 @@ def add_multiple_team_members(members_data):
         else:
             error_count += 1
     
+    # Re-embed only members whose text changed, in one batch
+    embedding_queue.flush()
+    # Cached chatbot answers about the team are stale now
+    if success_count:
+        invalidate_enhanced_responses('team')
+    
     print("\n" + "=" * 60)
     print("Entry Summary")
     print("=" * 60)
@@ -0,0 +1,46 @@
+-- Migration: per-calendar sync tokens for the incremental Google Calendar sync
+-- (app/services/calendar_event_sync.py). The nextSyncToken from the last events.list is stored per
+-- (user, calendar, source) so the next sync only fetches events changed or deleted since then.
+-- source is the sync path that owns the token: 'dwd' (admin DWD sync, listings from now on) or
+-- 'oauth' (scheduled sync, 90-day window). A token keeps the timeMin/timeMax of the full listing
+-- it came from, so the two paths must not share one.
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+CREATE TABLE IF NOT EXISTS google_calendar_sync_state (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE,
+  calendar_id VARCHAR(255) NOT NULL, -- Google's calendar ID
+  source VARCHAR(20) NOT NULL DEFAULT 'dwd', -- 'dwd' or 'oauth'
+  sync_token TEXT,
+  last_full_sync_at TIMESTAMP WITH TIME ZONE,
+  last_synced_at TIMESTAMP WITH TIME ZONE,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  UNIQUE(user_id, calendar_id, source)
+);
+
+-- Tables created before the source column: add it and widen the unique key
+ALTER TABLE google_calendar_sync_state ADD COLUMN IF NOT EXISTS source VARCHAR(20) NOT NULL DEFAULT 'dwd';
+ALTER TABLE google_calendar_sync_state DROP CONSTRAINT IF EXISTS google_calendar_sync_state_user_id_calendar_id_key;
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_constraint WHERE conname = 'google_calendar_sync_state_user_id_calendar_id_source_key'
+  ) THEN
+    ALTER TABLE google_calendar_sync_state
+      ADD CONSTRAINT google_calendar_sync_state_user_id_calendar_id_source_key UNIQUE (user_id, calendar_id, source);
+  END IF;
+END $$;
+
+CREATE INDEX IF NOT EXISTS idx_google_calendar_sync_state_user_id ON google_calendar_sync_state(user_id);
+
+-- Soft-deleted (cancelled) events are looked up per calendar after a full resync
+CREATE INDEX IF NOT EXISTS idx_google_calendar_events_user_calendar ON google_calendar_events(user_id, calendar_id);
+
+ALTER TABLE google_calendar_sync_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can access calendar sync state" ON google_calendar_sync_state;
+CREATE POLICY "Service role can access calendar sync state"
+    ON google_calendar_sync_state
+    FOR ALL
+    USING (auth.role() = 'service_role');
@@ -0,0 +1,32 @@
+-- Migration: per-user, per-course watermarks for the DWD Classroom delta sync
+-- (app/services/classroom_sync_state.py). Each row records the newest updateTime written for a
+-- course's coursework / announcements / submissions, a fingerprint of its roster and the
+-- course's own updateTime, so the next sync only writes (and re-embeds) rows that changed.
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+CREATE TABLE IF NOT EXISTS google_classroom_sync_state (
+  id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
+  user_id UUID REFERENCES auth.users(id) ON DELETE CASCADE,
+  course_id VARCHAR(255) NOT NULL, -- Google's course ID
+  db_course_id UUID REFERENCES google_classroom_courses(id) ON DELETE CASCADE,
+  course_update_time TIMESTAMP WITH TIME ZONE,
+  coursework_watermark TIMESTAMP WITH TIME ZONE,
+  announcements_watermark TIMESTAMP WITH TIME ZONE,
+  submissions_watermark TIMESTAMP WITH TIME ZONE,
+  roster_hash TEXT,
+  last_full_sync_at TIMESTAMP WITH TIME ZONE,
+  last_synced_at TIMESTAMP WITH TIME ZONE,
+  created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+  UNIQUE(user_id, course_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_google_classroom_sync_state_user_id ON google_classroom_sync_state(user_id);
+
+ALTER TABLE google_classroom_sync_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Service role can access classroom sync state" ON google_classroom_sync_state;
+CREATE POLICY "Service role can access classroom sync state"
+    ON google_classroom_sync_state
+    FOR ALL
+    USING (auth.role() = 'service_role');
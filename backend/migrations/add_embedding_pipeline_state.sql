@@ -0,0 +1,84 @@
+-- Migration: state for the bulk embedding pipeline (app/services/embedding_pipeline.py)
+-- 1. embedding_source_hash on every vectorized table, so unchanged rows are not re-embedded
+-- 2. bulk_update_embeddings(): write a batch of embeddings in one round-trip
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+-- =============================================
+-- 1. SOURCE TEXT HASH COLUMNS
+-- =============================================
+
+ALTER TABLE web_crawler_data ADD COLUMN IF NOT EXISTS embedding_source_hash text;
+ALTER TABLE team_member_data ADD COLUMN IF NOT EXISTS embedding_source_hash text;
+ALTER TABLE google_classroom_courses ADD COLUMN IF NOT EXISTS embedding_source_hash text;
+ALTER TABLE google_classroom_teachers ADD COLUMN IF NOT EXISTS embedding_source_hash text;
+ALTER TABLE google_classroom_students ADD COLUMN IF NOT EXISTS embedding_source_hash text;
+ALTER TABLE google_classroom_coursework ADD COLUMN IF NOT EXISTS embedding_source_hash text;
+ALTER TABLE google_classroom_submissions ADD COLUMN IF NOT EXISTS embedding_source_hash text;
+ALTER TABLE google_classroom_announcements ADD COLUMN IF NOT EXISTS embedding_source_hash text;
+ALTER TABLE google_calendar_calendars ADD COLUMN IF NOT EXISTS embedding_source_hash text;
+ALTER TABLE google_calendar_events ADD COLUMN IF NOT EXISTS embedding_source_hash text;
+ALTER TABLE user_profiles ADD COLUMN IF NOT EXISTS embedding_source_hash text;
+
+-- =============================================
+-- 2. BULK EMBEDDING WRITER
+-- =============================================
+-- p_rows: [{"id": "<uuid>", "embedding": [0.1, ...], "source_hash": "<sha256>"}, ...]
+
+CREATE OR REPLACE FUNCTION public.bulk_update_embeddings(
+    p_table text,
+    p_rows jsonb,
+    p_embedding_column text DEFAULT 'embedding',
+    p_write_hash boolean DEFAULT true
+)
+RETURNS integer
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+DECLARE
+    updated_count integer;
+    id_type text;
+BEGIN
+    IF p_table NOT IN (
+        'web_crawler_data', 'team_member_data',
+        'google_classroom_courses', 'google_classroom_teachers', 'google_classroom_students',
+        'google_classroom_coursework', 'google_classroom_submissions', 'google_classroom_announcements',
+        'google_calendar_calendars', 'google_calendar_events', 'user_profiles'
+    ) THEN
+        RAISE EXCEPTION 'bulk_update_embeddings: table % is not vectorized', p_table;
+    END IF;
+    IF p_embedding_column NOT IN ('embedding', 'embedding_384') THEN
+        RAISE EXCEPTION 'bulk_update_embeddings: unsupported column %', p_embedding_column;
+    END IF;
+
+    -- Cast incoming ids to the table's id type so the primary key index is used
+    SELECT format_type(a.atttypid, a.atttypmod) INTO id_type
+      FROM pg_attribute a
+     WHERE a.attrelid = format('public.%I', p_table)::regclass
+       AND a.attname = 'id';
+
+    IF p_write_hash THEN
+        EXECUTE format(
+            'UPDATE public.%I AS t
+                SET %I = (r.embedding)::vector, embedding_source_hash = r.source_hash
+               FROM jsonb_to_recordset($1) AS r(id text, embedding text, source_hash text)
+              WHERE t.id = (r.id)::%s',
+            p_table, p_embedding_column, id_type
+        ) USING p_rows;
+    ELSE
+        EXECUTE format(
+            'UPDATE public.%I AS t
+                SET %I = (r.embedding)::vector
+               FROM jsonb_to_recordset($1) AS r(id text, embedding text)
+              WHERE t.id = (r.id)::%s',
+            p_table, p_embedding_column, id_type
+        ) USING p_rows;
+    END IF;
+
+    GET DIAGNOSTICS updated_count = ROW_COUNT;
+    RETURN updated_count;
+END;
+$$;
+
+REVOKE ALL ON FUNCTION public.bulk_update_embeddings(text, jsonb, text, boolean) FROM PUBLIC;
+GRANT EXECUTE ON FUNCTION public.bulk_update_embeddings(text, jsonb, text, boolean) TO service_role;
@@ -0,0 +1,7 @@
+-- Migration: HTTP cache validators for the essential-page crawler (app/services/essential_page_crawler.py)
+-- Stores the ETag / Last-Modified returned for each crawled page so the next daily crawl can send
+-- If-None-Match / If-Modified-Since and skip unchanged pages on a 304.
+-- Run in Supabase SQL Editor. Safe to re-run.
+
+ALTER TABLE web_crawler_data ADD COLUMN IF NOT EXISTS http_etag text;
+ALTER TABLE web_crawler_data ADD COLUMN IF NOT EXISTS http_last_modified text;
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Selenium team / calendar extraction against the local HTML fixtures
+(tests/fixtures/browser), served on localhost so no network is needed.
+
+Runs each extraction --runs times through the shared browser pool and reports wall time per run;
+the first run includes starting Chrome, later runs reuse the warm browser. The fixtures render
+popups / month views after 100-200ms like the live site, so the numbers reflect DOM-condition
+waits rather than fixed sleeps (the old code slept ~3.5s before touching the team page and ~4s
+per member, and 3s + ~2.5s per month on the calendar).
+
+Requires Chrome; set CHROMEDRIVER_PATH to skip the webdriver-manager download.
+
+Usage (from backend/):
+  python3 scripts/bench_browser_pool.py [--runs 3] [--pool-size 1]
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import os
+import sys
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+# Allow running from backend/
+here = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(here)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+FIXTURES = os.path.join(backend_dir, 'tests', 'fixtures', 'browser')
+
+
+def serve_fixtures() -> tuple:
+    """Serve the fixture directory on an ephemeral localhost port; returns (server, base_url)"""
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=FIXTURES)
+    handler.log_message = lambda *args: None
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=3, help='Runs per extraction (default: 3)')
+    parser.add_argument('--pool-size', type=int, default=1, help='Browsers in the pool (default: 1)')
+    args = parser.parse_args()
+
+    os.environ['BROWSER_POOL_SIZE'] = str(args.pool_size)
+    import app.agents.web_crawler_agent as web_crawler_agent
+    from app.services.browser_pool import get_browser_pool
+
+    # Fixture events must never be upserted into calendar_event_data
+    web_crawler_agent.SUPABASE_AVAILABLE = False
+
+    server, base = serve_fixtures()
+    agent = web_crawler_agent.WebCrawlerAgent()
+    pool = get_browser_pool()
+    timings = {'team': [], 'calendar': []}
+    try:
+        for run in range(args.runs):
+            started = time.perf_counter()
+            members = agent.extract_team_members_with_selenium(f"{base}/team.html", process_all=True)
+            timings['team'].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            agent.extract_calendar_events_with_selenium(f"{base}/calendar.html")
+            timings['calendar'].append(time.perf_counter() - started)
+            print(f"run {run + 1}: team {timings['team'][-1]:.2f}s ({len(members)} members), "
+                  f"calendar {timings['calendar'][-1]:.2f}s")
+    finally:
+        server.shutdown()
+        pool.shutdown()
+
+    if not pool.stats()['created']:
+        print("No browser could be started (is Chrome installed?) - timings are meaningless")
+        return
+    print(f"\n{'extraction':<12}{'first (cold)':>14}{'warm avg':>12}")
+    for name, samples in timings.items():
+        warm = samples[1:] or samples
+        print(f"{name:<12}{samples[0]:>13.2f}s{sum(warm) / len(warm):>11.2f}s")
+    print(f"pool: {pool.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-query intent classification time, old linear keyword scans vs the
+compiled intent router (app/utils/intent_router.py). No network or Supabase needed.
+
+Usage (from backend/):
+  python3 scripts/bench_intent_router.py [iterations]
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import sys
+import time
+
+# Allow running from backend/
+here = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(here)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.utils.intent_router import INTENTS, classify_query
+
+SAMPLE_QUERIES = [
+    "hi",
+    "Hello, what kind of school is Prakriti?",
+    "Can you help me with my homework on photosynthesis?",
+    "What are the fees for different grades?",
+    "Where is Prakriti school located and how to reach prakriti?",
+    "Show me the list of teachers for grade 6",
+    "What events are on the school calendar next month?",
+    "Explain Newton's third law of motion with examples",
+    "Which subjects are available for IGCSE and AS/A level at Prakriti?",
+    "how are you doing today",
+    "Tell me about the sports at prakriti and prakriti clubs",
+    "What is the capital of France?",
+]
+
+
+def classify_linear(query: str) -> set:
+    """The pre-router behaviour: rebuild phrase lists and scan them one by one per request."""
+    query_lower = query.lower()
+    matched = set()
+    for intent in INTENTS:
+        phrases = list(intent.phrases)
+        patterns = list(intent.patterns)
+        if any(kw in query_lower for kw in phrases) or any(re.search(p, query_lower) for p in patterns):
+            matched.add(intent.id)
+    return matched
+
+
+def _time_per_query_us(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for q in SAMPLE_QUERIES:
+            fn(q)
+    elapsed = time.perf_counter() - started
+    return elapsed / (iterations * len(SAMPLE_QUERIES)) * 1e6
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    for q in SAMPLE_QUERIES:
+        if classify_linear(q) != set(classify_query(q)):
+            print(f"MISMATCH for {q!r}: {sorted(classify_linear(q))} vs {sorted(classify_query(q))}")
+            sys.exit(1)
+
+    phrase_count = sum(len(i.phrases) for i in INTENTS)
+    pattern_count = sum(len(i.patterns) for i in INTENTS)
+    print(f"{len(INTENTS)} intents, {phrase_count} phrases, {pattern_count} patterns, {len(SAMPLE_QUERIES)} sample queries")
+
+    linear_us = _time_per_query_us(classify_linear, iterations)
+    router_us = _time_per_query_us(classify_query, iterations)
+    print(f"linear scans : {linear_us:8.2f} us/query")
+    print(f"intent router: {router_us:8.2f} us/query  ({linear_us / router_us:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
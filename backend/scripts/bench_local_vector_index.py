@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark: top-k latency (p50/p99) of the in-process vector index (app/services/local_vector_index.py)
+versus the pgvector match_* RPCs.
+
+Without --live the index is filled with random unit vectors at roughly production table sizes and
+only the local path is timed (no network). With --live the index is snapshotted from Supabase and
+each query (a perturbed stored embedding, so no model is needed) is run through both paths; the
+overlap of returned ids is reported as a sanity check.
+
+Usage (from backend/):
+  python3 scripts/bench_local_vector_index.py [--queries 200] [--limit 5] [--threshold 0.3] [--live]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+# Allow running from backend/
+here = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(here)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.embedding_model import EMBEDDING_DIMENSION
+from app.services.local_vector_index import LOCAL_INDEX_SPECS, LocalVectorIndex, _TableIndex
+
+# Rough production sizes (tens of pages, hundreds of team / coursework rows)
+SYNTHETIC_ROWS = {
+    'match_web_content': 60,
+    'match_team_members': 400,
+    'match_coursework': 2000,
+    'match_announcements': 1000,
+}
+
+
+def _percentiles(samples_ms):
+    arr = np.asarray(samples_ms)
+    return float(np.percentile(arr, 50)), float(np.percentile(arr, 99))
+
+
+def _synthetic_index(rng: np.random.Generator) -> LocalVectorIndex:
+    index = LocalVectorIndex(supabase=object())
+    for rpc_name, count in SYNTHETIC_ROWS.items():
+        table = _TableIndex()
+        for i in range(count):
+            table.upsert(str(i), {'id': str(i)}, rng.standard_normal(EMBEDDING_DIMENSION))
+        table.snapshot()
+        index._tables[rpc_name] = table
+    return index
+
+
+def _queries_from_index(index: LocalVectorIndex, rpc_name: str, n: int, rng: np.random.Generator):
+    """Perturbed copies of stored vectors, so searches return realistic match counts"""
+    _, matrix = index._tables[rpc_name].snapshot()
+    if matrix is None:
+        return []
+    picks = matrix[rng.integers(0, matrix.shape[0], size=n)]
+    noisy = picks + 0.05 * rng.standard_normal(picks.shape).astype(np.float32)
+    return [q.tolist() for q in noisy]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--queries', type=int, default=200, help='Queries per table (default: 200)')
+    parser.add_argument('--limit', type=int, default=5, help='Top-k (default: 5)')
+    parser.add_argument('--threshold', type=float, default=0.3, help='Similarity threshold (default: 0.3)')
+    parser.add_argument('--live', action='store_true', help='Snapshot from Supabase and compare with the RPCs')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(7)
+    supabase = None
+    if args.live:
+        from supabase_config import get_supabase_client
+        supabase = get_supabase_client()
+        index = LocalVectorIndex(supabase=supabase)
+        started = time.perf_counter()
+        counts = index.load()
+        print(f"Snapshot: {counts} in {(time.perf_counter() - started):.2f}s")
+    else:
+        index = _synthetic_index(rng)
+        print(f"Synthetic index: {SYNTHETIC_ROWS} x {EMBEDDING_DIMENSION} dims")
+
+    print(f"{'table':<22}{'rows':>7}{'local p50':>12}{'local p99':>12}{'rpc p50':>12}{'rpc p99':>12}{'overlap':>9}")
+    for rpc_name in LOCAL_INDEX_SPECS:
+        if not index.is_ready(rpc_name):
+            print(f"{rpc_name:<22} not loaded")
+            continue
+        queries = _queries_from_index(index, rpc_name, args.queries, rng)
+        if not queries:
+            print(f"{rpc_name:<22}{0:>7}  (no embedded rows)")
+            continue
+
+        local_ms, rpc_ms, overlaps = [], [], []
+        for q in queries:
+            started = time.perf_counter()
+            local_rows = index.search(rpc_name, q, args.limit, args.threshold)
+            local_ms.append((time.perf_counter() - started) * 1000)
+            if supabase is None:
+                continue
+            started = time.perf_counter()
+            rpc_rows = supabase.rpc(rpc_name, {
+                'query_embedding': q,
+                'match_threshold': args.threshold,
+                'match_count': args.limit,
+            }).execute().data or []
+            rpc_ms.append((time.perf_counter() - started) * 1000)
+            local_ids = {str(r['id']) for r in local_rows}
+            rpc_ids = {str(r['id']) for r in rpc_rows}
+            if local_ids or rpc_ids:
+                overlaps.append(len(local_ids & rpc_ids) / max(len(local_ids), len(rpc_ids)))
+
+        rows = len(index._tables[rpc_name].rows)
+        l50, l99 = _percentiles(local_ms)
+        line = f"{rpc_name:<22}{rows:>7}{l50:>10.3f}ms{l99:>10.3f}ms"
+        if rpc_ms:
+            r50, r99 = _percentiles(rpc_ms)
+            overlap = f"{np.mean(overlaps) * 100:.0f}%" if overlaps else "n/a"
+            line += f"{r50:>10.1f}ms{r99:>10.1f}ms{overlap:>9}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
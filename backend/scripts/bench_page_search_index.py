@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ranking quality and per-query latency of the BM25 page index
+(app/services/page_search_index.py) versus the old substring scoring
+(WebCrawlerAgent.score_pages_by_keywords) used by search_prakriti_content.
+
+The corpus is crawler_cache/web_data.json (a snapshot of web_crawler_data), so no network or
+Supabase is needed. Each labelled query lists the page(s) a parent asking it expects; we report
+hit@1 / hit@3 / MRR over the top 3 and p50/p99 scoring latency. Note the old path also fetched every
+candidate page from Supabase per query, which is not counted here (the index avoids it entirely).
+
+Usage (from backend/):
+  python3 scripts/bench_page_search_index.py [--repeat 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Allow running from backend/
+here = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(here)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.page_search_index import PageSearchIndex
+
+SITE = 'https://prakriti.edu.in'
+LABELLED_QUERIES = {
+    'what are the school fees': ['/school-fees/'],
+    'how does the admission process work': ['/admissions/'],
+    'contact phone number and address': ['/contact/'],
+    'who are the teachers on the team': ['/team/'],
+    'igcse grade x results': ['/igcse-cambridge-grade-x-results-2022-25/', '/cambridge-results-2022-october-series/'],
+    'child protection policy': ['/cpp/'],
+    'roots of all beings article': ['/roots-of-all-beings/'],
+    'summer jamboree workshops': ['/summer-jamboree/', '/filmoscope-summer-jamboree21/'],
+    'does the school use solar energy': ['/prakriti-goes-solar/'],
+    'privacy policy': ['/privacy-policy/'],
+    'parent society': ['/parent-society/'],
+    'what do parents say about the school': ['/what-our-parents-say-about-us/'],
+    'soft robotics workshop': ['/soft-robotics-workshop-feb-2021/'],
+    'design and technology course': ['/launching-igcse-design-technology-course/',
+                                     '/applying-design-f-technology-to-solve-real-life-problems/'],
+    'upcoming events calendar': ['/calendar/'],
+    'model united nations': ['/prakriti-at-model-united-nations/'],
+    'virtual science fair': ['/virtual-science-fair/'],
+    'which programmes are offered': ['/our-programmes/'],
+    'cycling and skateboarding': ['/cycling-and-skateboarding/'],
+    'frequently asked questions': ['/faqs/'],
+}
+
+
+def _load_corpus() -> list:
+    with open(os.path.join(backend_dir, 'crawler_cache', 'web_data.json'), encoding='utf-8') as f:
+        pages = json.load(f)
+    now = datetime.now(timezone.utc).isoformat()
+    for page in pages:
+        page['crawled_at'] = now  # everything counts as fresh
+    return pages
+
+
+def _legacy_rank(pages: list, query: str) -> list:
+    from app.agents.web_crawler_agent import WebCrawlerAgent
+    query_words = [w for w in query.lower().split() if len(w) > 2]
+    scored = WebCrawlerAgent.score_pages_by_keywords(pages, query_words)
+    scored.sort(key=lambda x: x['relevance_score'], reverse=True)
+    return [p['url'] for p in scored[:3]]
+
+
+def _quality(rankings: dict) -> dict:
+    hit1 = hit3 = rr = 0.0
+    for query, urls in rankings.items():
+        expected = {SITE + path for path in LABELLED_QUERIES[query]}
+        if urls[:1] and urls[0] in expected:
+            hit1 += 1
+        for rank, url in enumerate(urls[:3], start=1):
+            if url in expected:
+                hit3 += 1
+                rr += 1 / rank
+                break
+    n = len(rankings)
+    return {'hit@1': hit1 / n, 'hit@3': hit3 / n, 'mrr@3': rr / n}
+
+
+def _time(fn, repeat: int) -> tuple:
+    samples = []
+    for _ in range(repeat):
+        for query in LABELLED_QUERIES:
+            started = time.perf_counter()
+            fn(query)
+            samples.append((time.perf_counter() - started) * 1000)
+    return float(np.percentile(samples, 50)), float(np.percentile(samples, 99))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=50, help='Timing passes over the query set (default: 50)')
+    parser.add_argument('--show', action='store_true', help='Print the top 3 of each method per query')
+    args = parser.parse_args()
+
+    pages = _load_corpus()
+    index = PageSearchIndex(supabase=object())
+    started = time.perf_counter()
+    index.build(pages)
+    build_ms = (time.perf_counter() - started) * 1000
+    print(f"Corpus: {len(pages)} pages, {index.stats()['terms']} terms, index build {build_ms:.1f}ms")
+
+    def bm25(query):
+        return [page['url'] for page, _ in index.rank(query, limit=3)]
+
+    def legacy(query):
+        return _legacy_rank(pages, query)
+
+    print(f"{'method':<10}{'hit@1':>8}{'hit@3':>8}{'mrr@3':>8}{'p50':>11}{'p99':>11}")
+    results = {}
+    for name, fn in (('legacy', legacy), ('bm25', bm25)):
+        results[name] = {query: fn(query) for query in LABELLED_QUERIES}
+        quality = _quality(results[name])
+        p50, p99 = _time(fn, args.repeat)
+        print(f"{name:<10}{quality['hit@1']:>8.2f}{quality['hit@3']:>8.2f}{quality['mrr@3']:>8.2f}"
+              f"{p50:>9.3f}ms{p99:>9.3f}ms")
+
+    if args.show:
+        for query in LABELLED_QUERIES:
+            print(f"\n{query}")
+            for name in results:
+                print(f"  {name:<7} " + ', '.join(u.replace(SITE, '') for u in results[name][query]))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,258 +1,28 @@
 """
 Batch embedding generation script
-Generates embeddings for all existing records in vectorized tables
+Generates embeddings for existing records in vectorized tables that don't have one yet.
+Thin wrapper over app/services/embedding_pipeline.py (paged reads, batched encodes, bulk
+writes, resumable per-table checkpoints).
 """
 import os
 import sys
 import argparse
-from typing import Optional
 from dotenv import load_dotenv
 
 # Add parent directory to path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from app.services.vector_search_service import VectorSearchService
-from supabase_config import get_supabase_client
+from app.services.embedding_pipeline import EMBEDDING_TABLE_SPECS, EmbeddingPipeline
 
 load_dotenv()
 
 
-def generate_team_member_embeddings(service: VectorSearchService, supabase, limit: Optional[int] = None):
-    """Generate embeddings for team_member_data records"""
-    print("\n" + "=" * 60)
-    print("Processing team_member_data")
-    print("=" * 60)
-    
-    # Query records without embeddings
-    query = supabase.table('team_member_data').select('*').eq('is_active', True).is_('embedding', 'null')
-    if limit:
-        query = query.limit(limit)
-    
-    result = query.execute()
-    
-    if not result.data:
-        print("No records found without embeddings")
-        return 0
-    
-    total = len(result.data)
-    print(f"Found {total} records to process")
-    
-    success_count = 0
-    error_count = 0
-    
-    for idx, row in enumerate(result.data, 1):
-        try:
-            # Combine relevant text fields
-            name = row.get('name', '') or ''
-            title = row.get('title', '') or ''
-            description = row.get('description', '') or ''
-            details = row.get('details', '') or ''
-            full_content = row.get('full_content', '') or ''
-            
-            # Combine all text fields
-            text = f"{name} {title} {description} {details} {full_content}".strip()
-            
-            if not text:
-                print(f"[{idx}/{total}] Skipping {name}: No text content")
-                continue
-            
-            # Generate embedding
-            embedding = service.generate_embedding(text)
-            
-            # Update record
-            supabase.table('team_member_data').update({
-                'embedding': embedding
-            }).eq('id', row['id']).execute()
-            
-            success_count += 1
-            print(f"[{idx}/{total}] ✅ Generated embedding for: {name}")
-            
-        except Exception as e:
-            error_count += 1
-            print(f"[{idx}/{total}] ❌ Error processing {row.get('name', 'Unknown')}: {e}")
-            continue
-    
-    print(f"\n✅ Success: {success_count}, ❌ Errors: {error_count}")
-    return success_count
-
-
-def generate_web_content_embeddings(service: VectorSearchService, supabase, limit: Optional[int] = None):
-    """Generate embeddings for web_crawler_data records"""
-    print("\n" + "=" * 60)
-    print("Processing web_crawler_data")
-    print("=" * 60)
-    
-    # Query records without embeddings
-    query = supabase.table('web_crawler_data').select('*').eq('is_active', True).is_('embedding', 'null')
-    if limit:
-        query = query.limit(limit)
-    
-    result = query.execute()
-    
-    if not result.data:
-        print("No records found without embeddings")
-        return 0
-    
-    total = len(result.data)
-    print(f"Found {total} records to process")
-    
-    success_count = 0
-    error_count = 0
-    
-    for idx, row in enumerate(result.data, 1):
-        try:
-            # Combine relevant text fields
-            title = row.get('title', '') or ''
-            description = row.get('description', '') or ''
-            main_content = (row.get('main_content', '') or '')[:8000]  # Limit to 8000 chars
-            
-            # Combine all text fields
-            text = f"{title} {description} {main_content}".strip()
-            
-            if not text:
-                print(f"[{idx}/{total}] Skipping {row.get('url', 'Unknown')}: No text content")
-                continue
-            
-            # Generate embedding
-            embedding = service.generate_embedding(text)
-            
-            # Update record
-            supabase.table('web_crawler_data').update({
-                'embedding': embedding
-            }).eq('id', row['id']).execute()
-            
-            success_count += 1
-            url = row.get('url', 'Unknown')
-            print(f"[{idx}/{total}] ✅ Generated embedding for: {url[:60]}...")
-            
-        except Exception as e:
-            error_count += 1
-            print(f"[{idx}/{total}] ❌ Error processing {row.get('url', 'Unknown')}: {e}")
-            continue
-    
-    print(f"\n✅ Success: {success_count}, ❌ Errors: {error_count}")
-    return success_count
-
-
-def generate_coursework_embeddings(service: VectorSearchService, supabase, limit: Optional[int] = None):
-    """Generate embeddings for google_classroom_coursework records"""
-    print("\n" + "=" * 60)
-    print("Processing google_classroom_coursework")
-    print("=" * 60)
-    
-    # Query records without embeddings
-    query = supabase.table('google_classroom_coursework').select('*').is_('embedding', 'null')
-    if limit:
-        query = query.limit(limit)
-    
-    result = query.execute()
-    
-    if not result.data:
-        print("No records found without embeddings")
-        return 0
-    
-    total = len(result.data)
-    print(f"Found {total} records to process")
-    
-    success_count = 0
-    error_count = 0
-    
-    for idx, row in enumerate(result.data, 1):
-        try:
-            # Combine relevant text fields
-            title = row.get('title', '') or ''
-            description = (row.get('description', '') or '')[:8000]  # Limit to 8000 chars
-            
-            # Combine all text fields
-            text = f"{title} {description}".strip()
-            
-            if not text:
-                print(f"[{idx}/{total}] Skipping {title}: No text content")
-                continue
-            
-            # Generate embedding
-            embedding = service.generate_embedding(text)
-            
-            # Update record
-            supabase.table('google_classroom_coursework').update({
-                'embedding': embedding
-            }).eq('id', row['id']).execute()
-            
-            success_count += 1
-            print(f"[{idx}/{total}] ✅ Generated embedding for: {title[:60]}...")
-            
-        except Exception as e:
-            error_count += 1
-            print(f"[{idx}/{total}] ❌ Error processing {row.get('title', 'Unknown')}: {e}")
-            continue
-    
-    print(f"\n✅ Success: {success_count}, ❌ Errors: {error_count}")
-    return success_count
-
-
-def generate_announcement_embeddings(service: VectorSearchService, supabase, limit: Optional[int] = None):
-    """Generate embeddings for google_classroom_announcements records"""
-    print("\n" + "=" * 60)
-    print("Processing google_classroom_announcements")
-    print("=" * 60)
-    
-    # Query records without embeddings
-    query = supabase.table('google_classroom_announcements').select('*').is_('embedding', 'null')
-    if limit:
-        query = query.limit(limit)
-    
-    result = query.execute()
-    
-    if not result.data:
-        print("No records found without embeddings")
-        return 0
-    
-    total = len(result.data)
-    print(f"Found {total} records to process")
-    
-    success_count = 0
-    error_count = 0
-    
-    for idx, row in enumerate(result.data, 1):
-        try:
-            # Get announcement text
-            text = (row.get('text', '') or '').strip()
-            
-            if not text:
-                print(f"[{idx}/{total}] Skipping announcement {row.get('id', 'Unknown')}: No text content")
-                continue
-            
-            # Limit text length
-            text = text[:8000]
-            
-            # Generate embedding
-            embedding = service.generate_embedding(text)
-            
-            # Update record
-            supabase.table('google_classroom_announcements').update({
-                'embedding': embedding
-            }).eq('id', row['id']).execute()
-            
-            success_count += 1
-            preview = text[:60].replace('\n', ' ')
-            print(f"[{idx}/{total}] ✅ Generated embedding for: {preview}...")
-            
-        except Exception as e:
-            error_count += 1
-            print(f"[{idx}/{total}] ❌ Error processing announcement: {e}")
-            continue
-    
-    print(f"\n✅ Success: {success_count}, ❌ Errors: {error_count}")
-    return success_count
-
-
 def main():
     """Main function to generate embeddings for all tables"""
     parser = argparse.ArgumentParser(description='Generate embeddings for vectorized tables')
     parser.add_argument(
         '--table',
-        choices=['team_member_data', 'web_crawler_data', 'google_classroom_coursework', 
-                 'google_classroom_announcements', 'all'],
+        choices=sorted(EMBEDDING_TABLE_SPECS) + ['all'],
         default='all',
         help='Table to process (default: all)'
     )
@@ -260,37 +30,36 @@ def main():
         '--limit',
         type=int,
         default=None,
-        help='Limit number of records to process (for testing)'
+        help='Limit number of records to process per table (for testing)'
     )
-    
+    parser.add_argument('--batch-size', type=int, default=64, help='Texts per encode batch (default: 64)')
+    parser.add_argument('--page-size', type=int, default=500, help='Rows fetched per page (default: 500)')
+    parser.add_argument('--fresh', action='store_true', help='Ignore any saved checkpoint and start over')
+
     args = parser.parse_args()
-    
+
     print("=" * 60)
     print("Batch Embedding Generation Script")
     print("=" * 60)
-    
+
     try:
-        service = VectorSearchService()
-        supabase = get_supabase_client()
-        
-        total_success = 0
-        
-        if args.table == 'all' or args.table == 'team_member_data':
-            total_success += generate_team_member_embeddings(service, supabase, args.limit)
-        
-        if args.table == 'all' or args.table == 'web_crawler_data':
-            total_success += generate_web_content_embeddings(service, supabase, args.limit)
-        
-        if args.table == 'all' or args.table == 'google_classroom_coursework':
-            total_success += generate_coursework_embeddings(service, supabase, args.limit)
-        
-        if args.table == 'all' or args.table == 'google_classroom_announcements':
-            total_success += generate_announcement_embeddings(service, supabase, args.limit)
-        
+        pipeline = EmbeddingPipeline(batch_size=args.batch_size, page_size=args.page_size)
+        tables = None if args.table == 'all' else [args.table]
+
+        # Only rows without embeddings; crawled pages / team members only while active
+        results = pipeline.run(
+            tables,
+            fresh=args.fresh,
+            only_missing=True,
+            active_only=True,
+            limit=args.limit,
+        )
+        total_success = sum(r.get('embedded', 0) for r in results.values())
+
         print("\n" + "=" * 60)
         print(f"✅ Total embeddings generated: {total_success}")
         print("=" * 60)
-        
+
     except Exception as e:
         print(f"\n❌ Fatal error: {e}")
         import traceback
@@ -300,24 +69,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
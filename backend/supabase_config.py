@@ -1,7 +1,17 @@
 """
 Supabase configuration for admin integrations
+
+Clients are created once per process and share a pooled httpx transport, so every
+PostgREST call reuses warm keep-alive connections instead of paying for a new
+TCP+TLS handshake. Pool limits are configurable through environment variables and
+pool usage is reported by get_supabase_pool_metrics().
 """
 import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
 import httpx
 from supabase import create_client, Client
 from supabase.lib.client_options import SyncClientOptions
@@ -15,30 +25,293 @@ SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 SUPABASE_ANON_KEY = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
 
 
-def _sync_client_options() -> SyncClientOptions:
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except (TypeError, ValueError):
+        return default
+
+
+# Connection pool sizing (per process, shared by all threads)
+SUPABASE_MAX_CONNECTIONS = _env_int("SUPABASE_MAX_CONNECTIONS", 20)
+SUPABASE_MAX_KEEPALIVE_CONNECTIONS = _env_int("SUPABASE_MAX_KEEPALIVE_CONNECTIONS", 10)
+SUPABASE_KEEPALIVE_EXPIRY = _env_float("SUPABASE_KEEPALIVE_EXPIRY", 30.0)
+SUPABASE_POOL_TIMEOUT = _env_float("SUPABASE_POOL_TIMEOUT", 30.0)
+
+
+class _PoolMetrics:
+    """Thread-safe counters for pool sizing: in-flight requests and connection wait time."""
+
+    def __init__(self, max_samples: int = 1000):
+        self._lock = threading.Lock()
+        self._wait_samples_ms = deque(maxlen=max_samples)
+        self.requests_total = 0
+        self.in_flight = 0
+
+    def request_started(self) -> None:
+        with self._lock:
+            self.requests_total += 1
+            self.in_flight += 1
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def record_wait(self, wait_ms: float) -> None:
+        with self._lock:
+            self._wait_samples_ms.append(wait_ms)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            samples = sorted(self._wait_samples_ms)
+            requests_total = self.requests_total
+            in_flight = self.in_flight
+
+        def _pct(p: float) -> float:
+            if not samples:
+                return 0.0
+            idx = min(len(samples) - 1, int(round(p * (len(samples) - 1))))
+            return round(samples[idx], 2)
+
+        return {
+            "requests_total": requests_total,
+            "in_flight": in_flight,
+            "wait_ms_p50": _pct(0.50),
+            "wait_ms_p95": _pct(0.95),
+            "wait_ms_max": round(samples[-1], 2) if samples else 0.0,
+            "wait_samples": len(samples),
+        }
+
+
+def _connection_counts(pool) -> dict:
+    """Active/idle connection counts from an httpcore connection pool."""
+    try:
+        connections = list(pool.connections)
+    except Exception:
+        return {"connections_total": 0, "connections_active": 0, "connections_idle": 0}
+    idle = sum(1 for c in connections if c.is_idle())
+    return {
+        "connections_total": len(connections),
+        "connections_active": len(connections) - idle,
+        "connections_idle": idle,
+    }
+
+
+class _MeteredTransport(httpx.HTTPTransport):
+    """
+    HTTP/1.1 transport that records how long each request waited for a pooled connection.
+
+    httpcore emits its first trace event once the request has been assigned a connection
+    (either opening a new one or writing headers on a reused one), so the gap between
+    handle_request() and that event is the pool wait time.
+    """
+
+    def __init__(self, metrics: _PoolMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        recorded = False
+        previous_trace = request.extensions.get("trace")
+
+        def _trace(event_name, info):
+            nonlocal recorded
+            if not recorded:
+                recorded = True
+                self.metrics.record_wait((time.perf_counter() - started) * 1000.0)
+            if previous_trace is not None:
+                previous_trace(event_name, info)
+
+        request.extensions["trace"] = _trace
+        self.metrics.request_started()
+        try:
+            return super().handle_request(request)
+        finally:
+            self.metrics.request_finished()
+
+
+class _MeteredAsyncTransport(httpx.AsyncHTTPTransport):
+    """Async twin of _MeteredTransport (httpcore expects an async trace callback here)."""
+
+    def __init__(self, metrics: _PoolMetrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        started = time.perf_counter()
+        recorded = False
+        previous_trace = request.extensions.get("trace")
+
+        async def _trace(event_name, info):
+            nonlocal recorded
+            if not recorded:
+                recorded = True
+                self.metrics.record_wait((time.perf_counter() - started) * 1000.0)
+            if previous_trace is not None:
+                await previous_trace(event_name, info)
+
+        request.extensions["trace"] = _trace
+        self.metrics.request_started()
+        try:
+            return await super().handle_async_request(request)
+        finally:
+            self.metrics.request_finished()
+
+
+def _pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=SUPABASE_MAX_CONNECTIONS,
+        max_keepalive_connections=SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+    )
+
+
+def _pool_timeout() -> httpx.Timeout:
+    return httpx.Timeout(120.0, connect=30.0, pool=SUPABASE_POOL_TIMEOUT)
+
+
+_sync_metrics = _PoolMetrics()
+_async_metrics = _PoolMetrics()
+
+_client_lock = threading.Lock()
+_sync_transport: Optional[_MeteredTransport] = None
+_sync_httpx_client: Optional[httpx.Client] = None
+_service_client: Optional[Client] = None
+_timed_service_clients: dict = {}
+_anon_client: Optional[Client] = None
+
+_async_transport: Optional[_MeteredAsyncTransport] = None
+_async_service_client = None
+
+
+def _shared_httpx_client() -> httpx.Client:
     """
     PostgREST uses httpx; HTTP/2 can trigger intermittent RemoteProtocolError
     ("Server disconnected") against Supabase. HTTP/1.1 is stable for API calls.
+
+    Caller must hold _client_lock.
     """
-    httpx_client = httpx.Client(
-        http2=False,
-        timeout=httpx.Timeout(120.0, connect=30.0),
-    )
-    return SyncClientOptions(httpx_client=httpx_client)
+    global _sync_transport, _sync_httpx_client
+    if _sync_httpx_client is None:
+        _sync_transport = _MeteredTransport(_sync_metrics, http2=False, limits=_pool_limits())
+        _sync_httpx_client = httpx.Client(
+            transport=_sync_transport,
+            timeout=_pool_timeout(),
+        )
+    return _sync_httpx_client
+
+
+def _sync_client_options() -> SyncClientOptions:
+    return SyncClientOptions(httpx_client=_shared_httpx_client())
 
 
 def get_supabase_client() -> Client:
-    """Get Supabase client with service role key"""
+    """Get the process-wide Supabase client with service role key (thread-safe)"""
+    global _service_client
+    if not SUPABASE_SERVICE_KEY:
+        raise ValueError("SUPABASE_SERVICE_ROLE_KEY environment variable is required")
+
+    if _service_client is None:
+        with _client_lock:
+            if _service_client is None:
+                _service_client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY, _sync_client_options())
+    return _service_client
+
+
+def get_supabase_client_with_timeout(read_timeout: float) -> Client:
+    """
+    Service-role client whose requests give up after ``read_timeout`` seconds.
+
+    For calls that callers abandon after a deadline (e.g. vector search RPCs): the worker thread
+    is freed when the request times out instead of waiting out the default 120s read timeout.
+    Shares the pooled transport (and its connections) with get_supabase_client().
+    """
     if not SUPABASE_SERVICE_KEY:
         raise ValueError("SUPABASE_SERVICE_ROLE_KEY environment variable is required")
 
-    return create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY, _sync_client_options())
+    key = round(float(read_timeout), 3)
+    client = _timed_service_clients.get(key)
+    if client is None:
+        with _client_lock:
+            client = _timed_service_clients.get(key)
+            if client is None:
+                _shared_httpx_client()
+                httpx_client = httpx.Client(
+                    transport=_sync_transport,
+                    timeout=httpx.Timeout(key, connect=min(key, 30.0), pool=SUPABASE_POOL_TIMEOUT),
+                )
+                client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY, SyncClientOptions(httpx_client=httpx_client))
+                _timed_service_clients[key] = client
+    return client
 
 
 def get_supabase_anon_client() -> Client:
     """Get Supabase client with anon key (for frontend)"""
+    global _anon_client
     anon_key = os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
     if not anon_key:
         raise ValueError("NEXT_PUBLIC_SUPABASE_ANON_KEY environment variable is required")
 
-    return create_client(SUPABASE_URL, anon_key, _sync_client_options())
+    if _anon_client is None:
+        with _client_lock:
+            if _anon_client is None:
+                _anon_client = create_client(SUPABASE_URL, anon_key, _sync_client_options())
+    return _anon_client
+
+
+async def get_async_supabase_client():
+    """
+    Get the process-wide async Supabase client (service role) for use on the event loop.
+
+    Shares the same pool limits as the sync client but keeps its own connections, since
+    httpx.AsyncClient connections are bound to the running loop.
+    """
+    global _async_transport, _async_service_client
+    if not SUPABASE_SERVICE_KEY:
+        raise ValueError("SUPABASE_SERVICE_ROLE_KEY environment variable is required")
+
+    if _async_service_client is None:
+        from supabase import acreate_client
+        from supabase.lib.client_options import AsyncClientOptions
+
+        _async_transport = _MeteredAsyncTransport(_async_metrics, http2=False, limits=_pool_limits())
+        httpx_client = httpx.AsyncClient(transport=_async_transport, timeout=_pool_timeout())
+        client = await acreate_client(
+            SUPABASE_URL,
+            SUPABASE_SERVICE_KEY,
+            AsyncClientOptions(httpx_client=httpx_client),
+        )
+        # Another coroutine may have finished first while we awaited; keep the first one.
+        if _async_service_client is None:
+            _async_service_client = client
+        else:
+            await httpx_client.aclose()
+    return _async_service_client
+
+
+def get_supabase_pool_metrics() -> dict:
+    """Connection pool usage for sizing SUPABASE_MAX_* under load."""
+    sync_stats = _sync_metrics.snapshot()
+    if _sync_transport is not None:
+        sync_stats.update(_connection_counts(_sync_transport._pool))
+    async_stats = _async_metrics.snapshot()
+    if _async_transport is not None:
+        async_stats.update(_connection_counts(_async_transport._pool))
+    return {
+        "limits": {
+            "max_connections": SUPABASE_MAX_CONNECTIONS,
+            "max_keepalive_connections": SUPABASE_MAX_KEEPALIVE_CONNECTIONS,
+            "keepalive_expiry_s": SUPABASE_KEEPALIVE_EXPIRY,
+            "pool_timeout_s": SUPABASE_POOL_TIMEOUT,
+        },
+        "sync": sync_stats,
+        "async": async_stats,
+    }
@@ -0,0 +1,221 @@
+"""In-memory stand-in for the Supabase / PostgREST client used across the tests (no database).
+
+FakeSupabase keeps ``tables`` as {name: [row dicts]} and supports the query builder calls the app
+uses: select / insert / update / upsert / delete, the eq / neq / gt / gte / lt / lte / in_ / is_
+filters, order (several keys), range and limit. Every executed query is kept in ``queries`` so
+tests can assert on what was sent. Tests needing failures or special behaviour subclass it and
+override ``on_execute`` (called before each query runs) or ``handle_rpc``.
+"""
+import itertools
+import threading
+
+
+class FakeResult:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _comparable(cell, value):
+    # PostgREST compares as text when the filter value is a string (e.g. ids passed as str)
+    if isinstance(value, str) and cell is not None and not isinstance(cell, str):
+        return str(cell)
+    return cell
+
+
+def _sort_key(cell):
+    return (cell is None, '' if cell is None else cell)
+
+
+class FakeQuery:
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.action = 'select'
+        self.columns = None
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.orders = []
+        self.range_ = None
+        self.limit_ = None
+
+    # ---- Actions ---------------------------------------------------------
+
+    def select(self, columns='*', count=None):
+        self.columns = columns
+        return self
+
+    def insert(self, rows):
+        self.action, self.payload = 'insert', rows
+        return self
+
+    def update(self, payload):
+        self.action, self.payload = 'update', payload
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.action, self.payload, self.on_conflict = 'upsert', rows, on_conflict
+        return self
+
+    def delete(self):
+        self.action = 'delete'
+        return self
+
+    # ---- Filters ---------------------------------------------------------
+
+    def _filter(self, op, column, value, check):
+        self.filters.append((op, column, value, check))
+        return self
+
+    def eq(self, column, value):
+        return self._filter('eq', column, value, lambda cell: _comparable(cell, value) == value)
+
+    def neq(self, column, value):
+        return self._filter('neq', column, value, lambda cell: _comparable(cell, value) != value)
+
+    def gt(self, column, value):
+        return self._filter('gt', column, value, lambda cell: cell is not None and _comparable(cell, value) > value)
+
+    def gte(self, column, value):
+        return self._filter('gte', column, value, lambda cell: cell is not None and _comparable(cell, value) >= value)
+
+    def lt(self, column, value):
+        return self._filter('lt', column, value, lambda cell: cell is not None and _comparable(cell, value) < value)
+
+    def lte(self, column, value):
+        return self._filter('lte', column, value, lambda cell: cell is not None and _comparable(cell, value) <= value)
+
+    def in_(self, column, values):
+        values = list(values)
+        as_text = {str(v) for v in values}
+        return self._filter('in', column, values, lambda cell: cell in values or str(cell) in as_text)
+
+    def is_(self, column, value):
+        if str(value).lower() == 'null':
+            return self._filter('is', column, value, lambda cell: cell is None)
+        return self._filter('is', column, value, lambda cell: cell is value)
+
+    def filter_value(self, column, op='eq'):
+        """Value of the first ``op`` filter on ``column`` (None when there is none)"""
+        for f_op, f_column, value, _ in self.filters:
+            if f_op == op and f_column == column:
+                return value
+        return None
+
+    # ---- Shaping ---------------------------------------------------------
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.range_ = (start, end)
+        return self
+
+    def limit(self, n):
+        self.limit_ = n
+        return self
+
+    # ---- Execution -------------------------------------------------------
+
+    def matches(self, row):
+        return all(check(row.get(column)) for _, column, _, check in self.filters)
+
+    def execute(self):
+        self.client.record(self)
+        self.client.on_execute(self)
+        rows = self.client.tables.setdefault(self.table, [])
+        if self.action == 'select':
+            return FakeResult(self._shape([dict(r) for r in rows if self.matches(r)]))
+        if self.action == 'update':
+            matched = [r for r in rows if self.matches(r)]
+            for row in matched:
+                row.update(self.payload)
+            return FakeResult([dict(r) for r in matched])
+        if self.action == 'delete':
+            matched = [r for r in rows if self.matches(r)]
+            rows[:] = [r for r in rows if not self.matches(r)]
+            return FakeResult(matched)
+        payload = self.payload if isinstance(self.payload, list) else [self.payload]
+        if self.action == 'insert':
+            return FakeResult([dict(self.client.insert_row(self.table, row)) for row in payload])
+        keys = [c.strip() for c in (self.on_conflict or 'id').split(',')]
+        return FakeResult([dict(self.client.upsert_row(self.table, row, keys)) for row in payload])
+
+    def _shape(self, rows):
+        for column, desc in reversed(self.orders):
+            try:
+                rows.sort(key=lambda r: _sort_key(r.get(column)), reverse=desc)
+            except TypeError:
+                rows.sort(key=lambda r: _sort_key(None if r.get(column) is None else str(r.get(column))), reverse=desc)
+        if self.range_ is not None:
+            rows = rows[self.range_[0]:self.range_[1] + 1]
+        if self.limit_ is not None:
+            rows = rows[:self.limit_]
+        return rows
+
+
+class FakeRpc:
+    def __init__(self, client, name, params):
+        self.client = client
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        self.client.rpc_calls.append((self.name, self.params))
+        return FakeResult(self.client.handle_rpc(self.name, self.params))
+
+
+class FakeSupabase:
+    """``tables``: {table name: [row dicts]}; ``fail``: an exception (or message) raised by every query"""
+
+    def __init__(self, tables=None, fail=None):
+        self.tables = tables if tables is not None else {}
+        self.fail = fail
+        self.queries = []
+        self.rpc_calls = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params=None):
+        return FakeRpc(self, name, params or {})
+
+    # ---- Hooks -----------------------------------------------------------
+
+    def on_execute(self, query):
+        if self.fail:
+            raise self.fail if isinstance(self.fail, Exception) else RuntimeError(self.fail)
+
+    def handle_rpc(self, name, params):
+        raise RuntimeError(f"Could not find the function public.{name}")
+
+    def new_id(self, table):
+        return next(self._ids)
+
+    # ---- Storage ---------------------------------------------------------
+
+    def record(self, query):
+        with self._lock:
+            self.queries.append(query)
+
+    def queries_for(self, table=None, action=None):
+        return [q for q in self.queries if (table is None or q.table == table) and (action is None or q.action == action)]
+
+    def insert_row(self, table, row):
+        stored = dict(row)
+        stored.setdefault('id', self.new_id(table))
+        self.tables.setdefault(table, []).append(stored)
+        return stored
+
+    def upsert_row(self, table, row, keys):
+        rows = self.tables.setdefault(table, [])
+        key = [row.get(c) for c in keys]
+        for existing in rows:
+            if [existing.get(c) for c in keys] == key:
+                existing.update(row)
+                return existing
+        return self.insert_row(table, row)
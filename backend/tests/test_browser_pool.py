@@ -0,0 +1,254 @@
+"""Tests for the browser pool (fake drivers) plus a Chrome run against the local HTML fixtures."""
+import functools
+import os
+import shutil
+import sys
+import threading
+import time
+import unittest
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.browser_pool import BrowserPool, open_in_tabs, wait_until  # noqa: E402
+
+FIXTURES = os.path.join(BACKEND, 'tests', 'fixtures', 'browser')
+
+
+class _SwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current_window_handle = handle
+
+    def new_window(self, kind):
+        self.driver._next += 1
+        handle = f"tab-{self.driver._next}"
+        self.driver.window_handles.append(handle)
+        self.driver.pages[handle] = 'about:blank'
+        self.driver.current_window_handle = handle
+
+
+class _FakeDriver:
+    def __init__(self):
+        self._next = 0
+        self.window_handles = ['tab-0']
+        self.current_window_handle = 'tab-0'
+        self.pages = {'tab-0': 'about:blank'}
+        self.switch_to = _SwitchTo(self)
+        self.cookies_cleared = 0
+        self.quit_called = False
+
+    def get(self, url):
+        self.pages[self.current_window_handle] = url
+
+    def execute_script(self, script, *args):
+        if script.startswith('window.location.href'):
+            self.pages[self.current_window_handle] = args[0]
+            return None
+        if 'location.href' in script:
+            return self.pages[self.current_window_handle]
+        if 'readyState' in script:
+            return 'complete'
+        return None
+
+    def close(self):
+        handle = self.current_window_handle
+        self.window_handles.remove(handle)
+        self.pages.pop(handle, None)
+
+    def delete_all_cookies(self):
+        self.cookies_cleared += 1
+
+    def quit(self):
+        self.quit_called = True
+
+
+class TestBrowserPool(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+        def factory():
+            driver = _FakeDriver()
+            self.created.append(driver)
+            return driver
+
+        self.pool = BrowserPool(size=2, factory=factory, max_uses=3)
+
+    def test_browsers_are_reused_and_reset(self):
+        with self.pool.lease() as driver:
+            driver.get('http://example/team')
+            driver.switch_to.new_window('tab')
+        with self.pool.lease() as again:
+            self.assertIs(again, driver)
+            self.assertEqual(again.window_handles, ['tab-0'])
+            self.assertEqual(again.pages['tab-0'], 'about:blank')
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(driver.cookies_cleared, 2)
+
+    def test_failed_lease_replaces_browser(self):
+        with self.assertRaises(ValueError):
+            with self.pool.lease() as driver:
+                raise ValueError('page broke')
+        self.assertTrue(driver.quit_called)
+        with self.pool.lease() as fresh:
+            self.assertIsNot(fresh, driver)
+        self.assertEqual(self.pool.stats()['discarded'], 1)
+
+    def test_browser_retired_after_max_uses(self):
+        for _ in range(3):
+            with self.pool.lease():
+                pass
+        self.assertTrue(self.created[0].quit_called)
+        self.assertEqual(self.pool.stats()['live'], 0)
+
+    def test_pool_size_bounds_concurrent_browsers(self):
+        leased = threading.Event()
+        release = threading.Event()
+
+        def hold():
+            with self.pool.lease():
+                leased.set()
+                release.wait(2)
+
+        holders = [threading.Thread(target=hold) for _ in range(2)]
+        for t in holders:
+            t.start()
+        leased.wait(1)
+        time.sleep(0.05)
+        with self.assertRaises(TimeoutError):
+            with self.pool.lease(timeout=0.1):
+                pass
+        release.set()
+        for t in holders:
+            t.join()
+        self.assertEqual(len(self.created), 2)
+
+    def test_warm_starts_browsers_ahead_of_time(self):
+        self.assertEqual(self.pool.warm(), 2)
+        self.assertEqual(self.pool.stats()['idle'], 2)
+        self.pool.shutdown()
+        self.assertTrue(all(d.quit_called for d in self.created))
+
+    def test_open_in_tabs_extracts_each_page_and_closes_tabs(self):
+        driver = _FakeDriver()
+        seen = open_in_tabs(driver, ['http://x/a', 'http://x/b', 'http://x/a'],
+                            lambda d, url: d.execute_script('return location.href'))
+        self.assertEqual(seen, {'http://x/a': 'http://x/a', 'http://x/b': 'http://x/b'})
+        self.assertEqual(driver.window_handles, ['tab-0'])
+        self.assertEqual(driver.current_window_handle, 'tab-0')
+
+    def test_wait_until_returns_as_soon_as_condition_holds(self):
+        ready_at = time.monotonic() + 0.15
+        started = time.monotonic()
+        self.assertTrue(wait_until(object(), lambda d: time.monotonic() >= ready_at, timeout=2))
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertFalse(wait_until(object(), lambda d: False, timeout=0.2))
+
+
+class _Link:
+    def __init__(self, href, tag_name='a'):
+        self.href = href
+        self.tag_name = tag_name
+
+    def get_attribute(self, name):
+        return self.href
+
+
+class _Card:
+    tag_name = 'div'
+
+    def __init__(self, *hrefs):
+        self.links = [_Link(h) for h in hrefs]
+
+    def find_elements(self, by, css):
+        return self.links
+
+
+class TestTeamProfileLink(unittest.TestCase):
+    def test_only_same_site_profile_pages_are_followed(self):
+        from app.agents.web_crawler_agent import WebCrawlerAgent
+        link = WebCrawlerAgent()._team_profile_link
+        page = 'https://prakriti.edu.in/meet-our-team/'
+        self.assertEqual(link(_Card('https://prakriti.edu.in/team/shilpa/'), page), 'https://prakriti.edu.in/team/shilpa/')
+        self.assertEqual(link(_Link('https://prakriti.edu.in/team/ritu/'), page), 'https://prakriti.edu.in/team/ritu/')
+        self.assertIsNone(link(_Card('https://prakriti.edu.in/meet-our-team/#', 'javascript:void(0)'), page))
+        self.assertIsNone(link(_Card('https://www.linkedin.com/in/someone'), page))
+        self.assertIsNone(link(_Card(), page))
+
+
+def _chrome_available():
+    return bool(os.getenv('CHROME_BIN') or any(shutil.which(b) for b in ('google-chrome', 'chromium', 'chromium-browser')))
+
+
+@unittest.skipUnless(_chrome_available(), "Chrome is not installed")
+class TestSeleniumAgainstFixtures(unittest.TestCase):
+    """End-to-end: team popups, profile links and calendar months against tests/fixtures/browser on localhost"""
+
+    @classmethod
+    def setUpClass(cls):
+        handler = functools.partial(SimpleHTTPRequestHandler, directory=FIXTURES)
+        handler.log_message = lambda *args: None
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        # Fixture events must never be upserted into calendar_event_data
+        import app.agents.web_crawler_agent as web_crawler_agent
+        cls.supabase_available = web_crawler_agent.SUPABASE_AVAILABLE
+        web_crawler_agent.SUPABASE_AVAILABLE = False
+
+    @classmethod
+    def tearDownClass(cls):
+        import app.agents.web_crawler_agent as web_crawler_agent
+        web_crawler_agent.SUPABASE_AVAILABLE = cls.supabase_available
+        cls.server.shutdown()
+        from app.services.browser_pool import get_browser_pool
+        get_browser_pool().shutdown()
+
+    def test_team_members_from_modals_lazy_cards_and_profile_tabs(self):
+        from app.agents.web_crawler_agent import WebCrawlerAgent
+        agent = WebCrawlerAgent()
+        started = time.monotonic()
+        members = agent.extract_team_members_with_selenium(f"{self.base}/team.html", process_all=True)
+        elapsed = time.monotonic() - started
+
+        self.assertEqual(set(members), {'Vinita Krishna', 'Bharti Batra', 'Shilpa Tayal', 'Mridul Batra'})
+        self.assertIn('Principal', members['Bharti Batra']['title'])
+        self.assertIn('Early Years', members['Shilpa Tayal']['full_content'])
+        # The fixed sleeps alone used to add ~3.5s of page settling plus ~4s per member
+        self.assertLess(elapsed, 15)
+
+    def test_popup_wait_reads_each_member_from_its_own_modal(self):
+        from app.agents.web_crawler_agent import WebCrawlerAgent
+        members = WebCrawlerAgent().extract_team_members_with_selenium(f"{self.base}/team.html", process_all=True)
+        # The modal re-renders 200ms after each click; a stale read would repeat the previous bio
+        self.assertIn('thirty years', members['Vinita Krishna']['full_content'])
+        self.assertIn('two decades', members['Bharti Batra']['full_content'])
+        self.assertNotIn('thirty years', members['Bharti Batra']['full_content'])
+        self.assertIn('athletes', members['Mridul Batra']['full_content'])
+
+    def test_team_profile_link_on_rendered_cards(self):
+        from selenium.webdriver.common.by import By
+        from app.agents.web_crawler_agent import WebCrawlerAgent
+        from app.services.browser_pool import get_browser_pool, wait_for_document_ready
+        agent = WebCrawlerAgent()
+        page = f"{self.base}/team.html"
+        with get_browser_pool().lease() as driver:
+            driver.get(page)
+            wait_for_document_ready(driver)
+            links = [agent._team_profile_link(card, page) for card in driver.find_elements(By.CSS_SELECTOR, '.team-member')]
+        self.assertEqual(links, [None, None, f"{self.base}/profile-shilpa.html"])
+
+    def test_calendar_month_views_without_fixed_sleeps(self):
+        from app.agents.web_crawler_agent import WebCrawlerAgent
+        started = time.monotonic()
+        content = WebCrawlerAgent().extract_calendar_events_with_selenium(f"{self.base}/calendar.html")
+        self.assertIn('Sports Meet', content)
+        self.assertLess(time.monotonic() - started, 30)
+
+
+if __name__ == '__main__':
+    unittest.main()
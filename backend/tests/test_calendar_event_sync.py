@@ -0,0 +1,151 @@
+"""Tests for the incremental Calendar event sync (fake events.list and Supabase, no Google calls)."""
+import os
+import sys
+import unittest
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.calendar_event_sync import (  # noqa: E402
+    SOURCE_DWD,
+    SOURCE_OAUTH,
+    CalendarEventSync,
+    CalendarSyncResult,
+    CalendarSyncTokens,
+    soft_delete_missing_events,
+)
+from tests.fakes import FakeSupabase  # noqa: E402
+
+
+class _EventsList:
+    """events.list with two pages for a full listing and a delta page for a sync token"""
+
+    def __init__(self, expired_tokens=()):
+        self.calls = []
+        self.expired_tokens = set(expired_tokens)
+
+    def __call__(self, params):
+        self.calls.append(params)
+        token = params.get('syncToken')
+        if token in self.expired_tokens:
+            raise HttpError(httplib2.Response({'status': 410}), b'{"error": {"code": 410}}')
+        if token:
+            return {
+                'items': [{'id': 'e2', 'summary': 'Moved'}, {'id': 'e3', 'status': 'cancelled'}],
+                'nextSyncToken': 'token-2',
+            }
+        if params.get('pageToken') == 'p2':
+            return {'items': [{'id': 'e3'}], 'nextSyncToken': 'token-1'}
+        return {'items': [{'id': 'e1'}, {'id': 'e2'}], 'nextPageToken': 'p2'}
+
+
+def _event(event_id, status='confirmed', **fields):
+    return {'user_id': 'u1', 'calendar_id': 'primary', 'event_id': event_id, 'status': status, **fields}
+
+
+class TestCalendarEventSync(unittest.TestCase):
+    def test_first_sync_pages_through_a_full_listing(self):
+        events = _EventsList()
+        result = CalendarEventSync(events, full_sync_params={'timeMin': '2026-10-16T00:00:00Z'}).sync()
+        self.assertTrue(result.full)
+        self.assertEqual([e['id'] for e in result.changed], ['e1', 'e2', 'e3'])
+        self.assertEqual(result.next_sync_token, 'token-1')
+        self.assertEqual(result.pages, 2)
+        self.assertEqual(events.calls[1]['pageToken'], 'p2')
+        self.assertEqual(events.calls[0]['timeMin'], '2026-10-16T00:00:00Z')
+
+    def test_sync_token_returns_only_changes_and_deletions(self):
+        events = _EventsList()
+        result = CalendarEventSync(events, full_sync_params={'timeMin': 'x'}).sync('token-1')
+        self.assertFalse(result.full)
+        self.assertEqual([e['id'] for e in result.changed], ['e2'])
+        self.assertEqual(result.deleted, ['e3'])
+        self.assertEqual(result.next_sync_token, 'token-2')
+        self.assertNotIn('timeMin', events.calls[0])  # not allowed together with syncToken
+
+    def test_expired_token_falls_back_to_a_full_resync(self):
+        events = _EventsList(expired_tokens={'stale'})
+        result = CalendarEventSync(events).sync('stale')
+        self.assertTrue(result.full)
+        self.assertEqual(result.next_sync_token, 'token-1')
+        self.assertEqual(len(events.calls), 3)
+
+    def test_other_errors_are_raised(self):
+        def failing(params):
+            raise HttpError(httplib2.Response({'status': 403}), b'{}')
+        with self.assertRaises(HttpError):
+            CalendarEventSync(failing).sync('token-1')
+
+    def test_tokens_round_trip_and_fail_open(self):
+        db = FakeSupabase()
+        tokens = CalendarSyncTokens(db, 'u1')
+        tokens.load()
+        self.assertIsNone(tokens.get('primary'))
+        tokens.set('primary', CalendarSyncResult(next_sync_token='token-1', full=True))
+        self.assertEqual(tokens.save(), 1)
+        saved = db.tables['google_calendar_sync_state'][0]
+        self.assertEqual((saved['calendar_id'], saved['source'], saved['sync_token']), ('primary', 'dwd', 'token-1'))
+        self.assertIn('last_full_sync_at', saved)
+
+        reloaded = CalendarSyncTokens(db, 'u1')
+        reloaded.load()
+        self.assertEqual(reloaded.get('primary'), 'token-1')
+        self.assertIsNone(CalendarSyncTokens(db, 'u1', full_sync=True).get('primary'))
+
+        broken = CalendarSyncTokens(FakeSupabase(fail='relation does not exist'), 'u1')
+        broken.load()
+        self.assertIsNone(broken.get('primary'))
+        broken.set('primary', CalendarSyncResult(next_sync_token='t'))
+        self.assertEqual(broken.save(), 0)
+
+    def test_dwd_and_scheduler_tokens_are_kept_apart(self):
+        # The two paths list different windows, and a token keeps the window it was created with
+        db = FakeSupabase()
+        dwd = CalendarSyncTokens(db, 'u1', source=SOURCE_DWD)
+        dwd.set('primary', CalendarSyncResult(next_sync_token='dwd-token', full=True))
+        dwd.save()
+        oauth = CalendarSyncTokens(db, 'u1', source=SOURCE_OAUTH)
+        oauth.load()
+        self.assertIsNone(oauth.get('primary'))
+        oauth.set('primary', CalendarSyncResult(next_sync_token='oauth-token', full=True))
+        oauth.save()
+        self.assertEqual(len(db.tables['google_calendar_sync_state']), 2)
+
+        dwd = CalendarSyncTokens(db, 'u1', source=SOURCE_DWD)
+        dwd.load()
+        self.assertEqual(dwd.get('primary'), 'dwd-token')
+        oauth = CalendarSyncTokens(db, 'u1', source=SOURCE_OAUTH)
+        oauth.load()
+        self.assertEqual(oauth.get('primary'), 'oauth-token')
+
+    def test_events_missing_from_a_full_listing_are_soft_deleted(self):
+        db = FakeSupabase()
+        db.tables['google_calendar_events'] = [
+            _event('e1'),
+            _event('gone'),
+            _event('old', 'cancelled'),
+        ]
+        self.assertEqual(soft_delete_missing_events(db, 'u1', 'primary', {'e1'}), 1)
+        statuses = {r['event_id']: r['status'] for r in db.tables['google_calendar_events']}
+        self.assertEqual(statuses, {'e1': 'confirmed', 'gone': 'cancelled', 'old': 'cancelled'})
+
+    def test_only_events_inside_the_listing_window_are_soft_deleted(self):
+        db = FakeSupabase()
+        db.tables['google_calendar_events'] = [
+            _event('past', start_time='2026-09-01T00:00:00+00:00'),
+            _event('gone', start_time='2026-11-01T00:00:00+00:00'),
+            _event('later', start_time='2027-03-01T00:00:00+00:00'),
+        ]
+        deleted = soft_delete_missing_events(db, 'u1', 'primary', set(), '2026-10-16T00:00:00+00:00',
+                                             '2027-01-14T00:00:00+00:00')
+        self.assertEqual(deleted, 1)
+        statuses = {r['event_id']: r['status'] for r in db.tables['google_calendar_events']}
+        self.assertEqual(statuses, {'past': 'confirmed', 'gone': 'cancelled', 'later': 'confirmed'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,184 @@
+"""Tests for streaming chat completions and the /chatbot/stream route (fake OpenAI clients)."""
+import asyncio
+import json
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.core.chat_stream import (  # noqa: E402
+    acreate_chat_completion,
+    create_chat_completion,
+    stream_async,
+    stream_blocking,
+)
+
+
+def _chunk(text=None, finish_reason=None):
+    delta = SimpleNamespace(content=text)
+    return SimpleNamespace(model='gpt-4o-mini', choices=[SimpleNamespace(delta=delta, finish_reason=finish_reason)])
+
+
+class _FakeCompletions:
+    def __init__(self, pieces):
+        self.pieces = pieces
+        self.calls = []
+
+    def create(self, stream=False, **kwargs):
+        self.calls.append({'stream': stream, **kwargs})
+        if not stream:
+            message = SimpleNamespace(content=''.join(self.pieces))
+            return SimpleNamespace(model='gpt-4o-mini', choices=[SimpleNamespace(message=message, finish_reason='stop')])
+        return iter([_chunk(piece) for piece in self.pieces] + [_chunk(finish_reason='stop')])
+
+
+class _FakeClient:
+    def __init__(self, pieces):
+        self.chat = SimpleNamespace(completions=_FakeCompletions(pieces))
+
+
+class _FakeAsyncCompletions(_FakeCompletions):
+    async def create(self, stream=False, **kwargs):
+        result = super().create(stream=stream, **kwargs)
+        if not stream:
+            return result
+
+        async def chunks():
+            for chunk in result:
+                await asyncio.sleep(0)
+                yield chunk
+        return chunks()
+
+
+class _FakeAsyncClient:
+    def __init__(self, pieces):
+        self.chat = SimpleNamespace(completions=_FakeAsyncCompletions(pieces))
+
+
+def _collect(func, *args, streamer=stream_blocking):
+    async def run():
+        return [event async for event in streamer(func, *args)]
+    return asyncio.run(run())
+
+
+class TestCreateChatCompletion(unittest.TestCase):
+    def test_plain_call_without_a_bound_stream(self):
+        client = _FakeClient(['Hello', ' there'])
+        response = create_chat_completion(client, model='m', messages=[])
+        self.assertEqual(response.choices[0].message.content, 'Hello there')
+        self.assertFalse(client.chat.completions.calls[0]['stream'])
+
+    def test_deltas_are_forwarded_in_order_before_the_result(self):
+        client = _FakeClient(['| Day |', ' Time |', '\n| Mon | 9am |'])
+
+        def pipeline():
+            response = create_chat_completion(client, model='m', messages=[])
+            return response.choices[0].message.content.upper(), response.choices[0].finish_reason
+
+        events = _collect(pipeline)
+        self.assertEqual([e for e, _ in events], ['delta', 'delta', 'delta', 'result'])
+        self.assertEqual(''.join(d['text'] for e, d in events if e == 'delta'), '| Day | Time |\n| Mon | 9am |')
+        self.assertEqual(events[-1][1], ('| DAY | TIME |\n| MON | 9AM |', 'stop'))
+        self.assertTrue(client.chat.completions.calls[0]['stream'])
+
+    def test_retry_emits_reset(self):
+        client = _FakeClient(['partial'])
+
+        def pipeline():
+            create_chat_completion(client, model='m', messages=[])
+            return create_chat_completion(client, model='m', messages=[]).choices[0].message.content
+
+        events = [e for e, _ in _collect(pipeline)]
+        self.assertEqual(events, ['delta', 'reset', 'delta', 'result'])
+
+    def test_pipeline_errors_propagate(self):
+        def pipeline():
+            raise RuntimeError('OPENAI_API_KEY not set in environment.')
+
+        with self.assertRaises(RuntimeError):
+            _collect(pipeline)
+
+
+class TestAsyncChatCompletion(unittest.TestCase):
+    def test_plain_call_without_a_bound_stream(self):
+        client = _FakeAsyncClient(['Hello', ' there'])
+        response = asyncio.run(acreate_chat_completion(client, model='m', messages=[]))
+        self.assertEqual(response.choices[0].message.content, 'Hello there')
+        self.assertFalse(client.chat.completions.calls[0]['stream'])
+
+    def test_deltas_and_reset_from_a_coroutine_pipeline(self):
+        client = _FakeAsyncClient(['| Day |', ' Time |'])
+
+        async def pipeline():
+            await acreate_chat_completion(client, model='m', messages=[])
+            response = await acreate_chat_completion(client, model='m', messages=[])
+            return response.choices[0].message.content, response.choices[0].finish_reason
+
+        events = _collect(pipeline, streamer=stream_async)
+        self.assertEqual([e for e, _ in events], ['delta', 'delta', 'reset', 'delta', 'delta', 'result'])
+        self.assertEqual(events[-1][1], ('| Day | Time |', 'stop'))
+        self.assertTrue(all(call['stream'] for call in client.chat.completions.calls))
+
+
+class TestStreamRoute(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        import app.routes.chatbot as chatbot_routes
+
+        cls.routes = chatbot_routes
+        cls.original = chatbot_routes.generate_chatbot_response_async
+        api = FastAPI()
+        api.include_router(chatbot_routes.router, prefix='/chatbot')
+        cls.client = TestClient(api)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.routes.generate_chatbot_response_async = cls.original
+
+    def setUp(self):
+        openai = _FakeAsyncClient(['Prakriti is ', 'in Greater Noida.'])
+
+        async def fake_pipeline(request):
+            response = await acreate_chat_completion(openai, model='m', messages=[])
+            return [response.choices[0].message.content, {'type': 'map', 'url': 'https://maps.example/embed'}]
+
+        self.routes.generate_chatbot_response_async = fake_pipeline
+
+    def test_sse_events(self):
+        response = self.client.post('/chatbot/stream', json={'message': 'where is the school'})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers['content-type'].startswith('text/event-stream'))
+        events = []
+        for block in response.text.strip().split('\n\n'):
+            name, data = block.split('\n')
+            events.append((name[len('event: '):], json.loads(data[len('data: '):])))
+        self.assertEqual([e for e, _ in events], ['delta', 'delta', 'text', 'map', 'done'])
+        self.assertEqual(events[3][1]['url'], 'https://maps.example/embed')
+        self.assertEqual(events[-1][1]['type'], 'mixed')
+        self.assertEqual(events[-1][1]['response'][0], 'Prakriti is in Greater Noida.')
+
+    def test_ndjson_events(self):
+        response = self.client.post('/chatbot/stream?format=ndjson', json={'message': 'where is the school'})
+        self.assertTrue(response.headers['content-type'].startswith('application/x-ndjson'))
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertEqual(lines[0], {'event': 'delta', 'data': {'text': 'Prakriti is '}})
+        self.assertEqual(lines[-1]['event'], 'done')
+
+    def test_errors_are_sent_as_events(self):
+        async def failing(request):
+            raise RuntimeError('boom')
+
+        self.routes.generate_chatbot_response_async = failing
+        response = self.client.post('/chatbot/stream?format=ndjson', json={'message': 'hi'})
+        self.assertEqual([json.loads(line) for line in response.text.splitlines()],
+                         [{'event': 'error', 'data': {'detail': 'boom'}}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+"""Tests for batched Classroom reads (fake discovery service and batch, no Google calls)."""
+import json
+import os
+import sys
+import unittest
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.classroom_batch_fetcher import ClassroomBatchFetcher  # noqa: E402
+
+
+def _http_error(status, reason=None, retry_after=None):
+    headers = {'status': status}
+    if retry_after is not None:
+        headers['retry-after'] = str(retry_after)
+    content = json.dumps({'error': {'errors': [{'reason': reason}] if reason else []}}).encode()
+    return HttpError(httplib2.Response(headers), content)
+
+
+class _Request:
+    def __init__(self, relation, params):
+        self.relation = relation
+        self.params = params
+
+
+class _Collection:
+    def __init__(self, relation):
+        self.relation = relation
+
+    def list(self, **params):
+        return _Request(self.relation, params)
+
+    def studentSubmissions(self):
+        return _Collection('studentSubmissions')
+
+
+class _Courses:
+    def teachers(self):
+        return _Collection('teachers')
+
+    def students(self):
+        return _Collection('students')
+
+    def courseWork(self):
+        return _Collection('courseWork')
+
+    def announcements(self):
+        return _Collection('announcements')
+
+
+class _Batch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.batches.append(len(self.requests))
+        if self.service.fail_next_batch:
+            self.service.fail_next_batch = False
+            raise ConnectionError('connection reset')
+        for request_id, request in self.requests:
+            response, error = self.service.respond(request)
+            self.callback(request_id, response, error)
+
+
+class _FakeClassroom:
+    def __init__(self, respond):
+        self.respond = respond
+        self.batches = []
+        self.fail_next_batch = False
+
+    def courses(self):
+        return _Courses()
+
+    def new_batch_http_request(self, callback=None):
+        return _Batch(self, callback)
+
+
+def _items(request):
+    course_id = request.params['courseId']
+    return {request.relation: [{'id': f"{course_id}-{request.relation}"}]}, None
+
+
+class TestClassroomBatchFetcher(unittest.TestCase):
+    def _fetcher(self, service, **kwargs):
+        self.sleeps = []
+        return ClassroomBatchFetcher(lambda: service, sleep=self.sleeps.append, base_delay=0.01, **kwargs)
+
+    def test_relations_for_many_courses_are_batched(self):
+        service = _FakeClassroom(_items)
+        fetcher = self._fetcher(service)
+        result = fetcher.fetch_course_relations([f"c{i}" for i in range(40)])
+        # 40 courses x 4 relations = 160 sub-requests -> 2 batch calls
+        self.assertEqual(service.batches, [100, 60])
+        self.assertEqual(result['c7']['coursework'], [{'id': 'c7-courseWork'}])
+        self.assertEqual(result['c39']['teachers'], [{'id': 'c39-teachers'}])
+        self.assertEqual(fetcher.errors, {})
+
+    def test_course_submissions_are_listed_per_course(self):
+        service = _FakeClassroom(_items)
+        requests = []
+        original = service.respond
+        service.respond = lambda request: (requests.append(request), original(request))[1]
+        result = self._fetcher(service).fetch_course_relations(['c1', 'c2'], ['submissions'])
+        self.assertEqual(result['c1']['submissions'], [{'id': 'c1-studentSubmissions'}])
+        self.assertEqual({r.params['courseWorkId'] for r in requests}, {'-'})
+        self.assertEqual(service.batches, [2])
+
+    def test_pages_are_followed(self):
+        def respond(request):
+            if request.params.get('pageToken') == 'p2':
+                return {'studentSubmissions': [{'id': 's2'}]}, None
+            return {'studentSubmissions': [{'id': 's1'}], 'nextPageToken': 'p2'}, None
+
+        fetcher = self._fetcher(_FakeClassroom(respond))
+        result = fetcher.fetch_submissions([('c1', 'cw1')])
+        self.assertEqual(result[('c1', 'cw1')], [{'id': 's1'}, {'id': 's2'}])
+
+    def test_rate_limited_sub_requests_are_retried_with_backoff(self):
+        throttled = {'c1': 2}
+
+        def respond(request):
+            course_id = request.params['courseId']
+            if throttled.get(course_id):
+                throttled[course_id] -= 1
+                return None, _http_error(403, 'userRateLimitExceeded', retry_after=3)
+            return _items(request)
+
+        service = _FakeClassroom(respond)
+        fetcher = self._fetcher(service)
+        result = fetcher.fetch_course_relations(['c1', 'c2'], ['teachers'])
+        self.assertEqual(result['c1']['teachers'], [{'id': 'c1-teachers'}])
+        self.assertEqual(service.batches, [2, 1, 1])
+        self.assertEqual(len(self.sleeps), 2)
+        self.assertGreaterEqual(min(self.sleeps), 3)  # Retry-After honoured
+        self.assertEqual(fetcher.stats['retried'], 2)
+
+    def test_permanent_errors_are_isolated(self):
+        def respond(request):
+            if request.params['courseId'] == 'gone':
+                return None, _http_error(404)
+            return _items(request)
+
+        fetcher = self._fetcher(_FakeClassroom(respond))
+        result = fetcher.fetch_course_relations(['gone', 'ok'], ['students'])
+        self.assertEqual(result['gone'], {})
+        self.assertEqual(result['ok']['students'], [{'id': 'ok-students'}])
+        self.assertIn(('gone', 'students'), fetcher.errors)
+        self.assertEqual(self.sleeps, [])
+
+    def test_failed_batch_is_retried_and_retries_are_bounded(self):
+        service = _FakeClassroom(_items)
+        service.fail_next_batch = True
+        fetcher = self._fetcher(service)
+        result = fetcher.fetch_course_relations(['c1'], ['announcements'])
+        self.assertEqual(result['c1']['announcements'], [{'id': 'c1-announcements'}])
+
+        always_busy = self._fetcher(_FakeClassroom(lambda r: (None, _http_error(503))), max_retries=2)
+        self.assertEqual(always_busy.fetch_submissions([('c1', 'cw1')]), {})
+        self.assertEqual(always_busy.stats['failed'], 1)
+        self.assertEqual(len(self.sleeps), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
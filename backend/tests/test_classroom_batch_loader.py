@@ -0,0 +1,83 @@
+"""Tests for batched Classroom relation loads (in-memory fake PostgREST builder, no Supabase)."""
+import os
+import sys
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.utils.classroom_batch_loader import fetch_rows_in, group_rows  # noqa: E402
+from tests.fakes import FakeSupabase  # noqa: E402
+
+
+class TestFetchRowsIn(unittest.TestCase):
+    def setUp(self):
+        rows = [{"id": i, "course_id": f"c{i % 5}", "due": 100 - i} for i in range(50)]
+        self.supabase = FakeSupabase({"coursework": rows})
+
+    def test_single_query_for_all_courses(self):
+        rows = fetch_rows_in(self.supabase, "coursework", "*", "course_id", ["c0", "c1", "c1", None])
+        self.assertEqual(len(self.supabase.queries), 1)
+        self.assertEqual(len(rows), 20)
+
+    def test_chunks_and_pages_merge_in_order(self):
+        course_ids = [f"c{i}" for i in range(5)]
+        rows = fetch_rows_in(
+            self.supabase, "coursework", "*", "course_id", course_ids,
+            order="due", chunk_size=2, page_size=4,
+        )
+        self.assertEqual(len(rows), 50)
+        self.assertEqual([r["due"] for r in rows], sorted(r["due"] for r in rows))
+        # 3 chunks, each paged in 4-row pages until a short page
+        self.assertGreater(len(self.supabase.queries), 3)
+
+    def test_limit_and_configure(self):
+        rows = fetch_rows_in(
+            self.supabase, "coursework", "*", "course_id", ["c0", "c1", "c2"],
+            order="due", desc=True, limit=3, chunk_size=1,
+            configure=lambda q: q.gte("due", 60),
+        )
+        self.assertEqual([r["due"] for r in rows], [100, 99, 98])
+
+    def test_pages_are_ordered_by_a_unique_tiebreak(self):
+        fetch_rows_in(self.supabase, "coursework", "*", "course_id", ["c0"], order="due", page_size=4)
+        self.assertEqual(self.supabase.queries[0].orders, [("due", False), ("id", False)])
+
+    def test_limit_per_value_is_bounded_in_sql(self):
+        rows = fetch_rows_in(
+            self.supabase, "coursework", "*", "course_id", ["c0", "c1", "c2"],
+            order="due", desc=True, limit_per_value=2,
+        )
+        # One query capped at 2 x 3 rows, most recent first per course
+        self.assertEqual(len(self.supabase.queries), 1)
+        grouped = group_rows(rows, "course_id")
+        self.assertEqual({k: [r["due"] for r in v] for k, v in grouped.items()},
+                         {"c0": [100, 95], "c1": [99, 94], "c2": [98, 93]})
+
+    def test_limit_per_value_rereads_courses_crowded_out_of_the_cap(self):
+        rows = [{"id": i, "course_id": "busy", "due": 1000 - i} for i in range(10)]
+        rows += [{"id": 100 + i, "course_id": "quiet", "due": i} for i in range(3)]
+        supabase = FakeSupabase({"announcements": rows})
+        result = fetch_rows_in(supabase, "announcements", "*", "course_id", ["busy", "quiet"],
+                               order="due", desc=True, limit_per_value=3)
+        grouped = group_rows(result, "course_id")
+        self.assertEqual(len(grouped["busy"]), 3)
+        self.assertEqual([r["due"] for r in grouped["quiet"]], [2, 1, 0])
+        self.assertEqual(len(supabase.queries), 2)  # capped batch + one bounded re-read
+
+    def test_empty_values_skip_query(self):
+        self.assertEqual(fetch_rows_in(self.supabase, "coursework", "*", "course_id", []), [])
+        self.assertEqual(len(self.supabase.queries), 0)
+
+
+class TestGroupRows(unittest.TestCase):
+    def test_groups_with_per_key_limit(self):
+        rows = [{"course_id": 1, "n": i} for i in range(4)] + [{"course_id": 2, "n": 9}]
+        grouped = group_rows(rows, "course_id", limit_per_key=2, key_fn=str)
+        self.assertEqual([r["n"] for r in grouped["1"]], [0, 1])
+        self.assertEqual(len(grouped["2"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
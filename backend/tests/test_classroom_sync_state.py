@@ -0,0 +1,98 @@
+"""Tests for the Classroom delta-sync watermarks (fake Supabase client, no database)."""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.classroom_sync_state import SYNC_STATE_TABLE, ClassroomSyncState, roster_fingerprint  # noqa: E402
+from tests.fakes import FakeSupabase  # noqa: E402
+
+RECENT = (datetime.now(timezone.utc) - timedelta(days=1)).isoformat()
+LONG_AGO = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+
+
+def _state_row(**fields):
+    row = {
+        'user_id': 'u1', 'course_id': 'c1', 'db_course_id': 'db-c1', 'last_full_sync_at': RECENT,
+        'course_update_time': '2026-10-01T08:00:00+00:00',
+        'coursework_watermark': '2026-10-05T08:00:00+00:00',
+    }
+    row.update(fields)
+    return row
+
+
+def _load(rows, **kwargs):
+    state = ClassroomSyncState(FakeSupabase({SYNC_STATE_TABLE: rows}), 'u1', **kwargs)
+    state.load()
+    return state
+
+
+class TestClassroomSyncState(unittest.TestCase):
+    def test_only_items_past_the_watermark_are_changed(self):
+        state = _load([_state_row()])
+        items = [
+            {'id': 'old', 'updateTime': '2026-10-04T00:00:00Z'},
+            {'id': 'same', 'updateTime': '2026-10-05T08:00:00Z'},
+            {'id': 'new', 'updateTime': '2026-10-06T00:00:00Z'},
+            {'id': 'no-time'},
+        ]
+        self.assertEqual([i['id'] for i in state.changed('c1', 'coursework', items)], ['new', 'no-time'])
+        # No announcements watermark yet: everything is written
+        self.assertEqual(len(state.changed('c1', 'announcements', items)), 4)
+
+    def test_new_stale_or_forced_courses_are_full(self):
+        self.assertFalse(_load([_state_row()]).is_full('c1'))
+        self.assertTrue(_load([_state_row()]).is_full('c2'))
+        self.assertTrue(_load([_state_row(last_full_sync_at=LONG_AGO)]).is_full('c1'))
+        forced = _load([_state_row()], full_sync=True)
+        self.assertTrue(forced.is_full('c1'))
+        self.assertEqual(len(forced.changed('c1', 'coursework', [{'updateTime': '2020-01-01T00:00:00Z'}])), 1)
+
+    def test_unchanged_archived_courses_are_skipped(self):
+        state = _load([_state_row()])
+        archived = {'id': 'c1', 'courseState': 'ARCHIVED', 'updateTime': '2026-10-01T08:00:00Z'}
+        self.assertFalse(state.course_changed(archived))
+        self.assertTrue(state.can_skip_course(archived))
+        self.assertFalse(state.can_skip_course({**archived, 'courseState': 'ACTIVE'}))
+        self.assertFalse(state.can_skip_course({**archived, 'updateTime': '2026-10-02T00:00:00Z'}))
+
+    def test_roster_fingerprint_detects_changes(self):
+        teachers = [{'userId': 't1', 'profile': {'name': {'fullName': 'A'}}}]
+        students = [{'userId': 's1'}, {'userId': 's2'}]
+        fingerprint = roster_fingerprint(teachers, students)
+        self.assertEqual(fingerprint, roster_fingerprint(teachers, list(reversed(students))))
+        state = _load([_state_row(roster_hash=fingerprint)])
+        self.assertFalse(state.roster_changed('c1', fingerprint))
+        self.assertTrue(state.roster_changed('c1', roster_fingerprint(teachers, students[:1])))
+
+    def test_watermarks_advance_and_save(self):
+        db = FakeSupabase({SYNC_STATE_TABLE: [_state_row()]})
+        state = ClassroomSyncState(db, 'u1')
+        state.load()
+        state.advance_watermark('c1', 'coursework', [{'updateTime': '2026-10-07T00:00:00Z'}])
+        state.finish_course({'id': 'c1', 'updateTime': '2026-10-07T00:00:00Z'}, 'db-c1')
+        self.assertEqual(state.save(), 1)
+        saved = db.queries_for(action='upsert')[0].payload[0]
+        self.assertEqual(saved['coursework_watermark'], '2026-10-07T00:00:00+00:00')
+        self.assertNotIn('last_full_sync_at', saved)  # delta sync keeps the last full sync time
+        state.advance_watermark('c1', 'coursework', [{'updateTime': '2026-10-01T00:00:00Z'}])
+        self.assertEqual(state.changed('c1', 'coursework', [{'updateTime': '2026-10-06T00:00:00Z'}]), [])
+
+    def test_discard_and_unreadable_state(self):
+        state = _load([_state_row()])
+        state.advance('c1', roster_hash='x')
+        state.discard()
+        self.assertEqual(state.save(), 0)
+        broken = ClassroomSyncState(FakeSupabase(fail='relation "google_classroom_sync_state" does not exist'), 'u1')
+        broken.load()
+        self.assertTrue(broken.is_full('c1'))
+        broken.advance('c1', roster_hash='x')
+        self.assertEqual(broken.save(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""Tests for concurrent context gathering (sleeping fake sources, no network)."""
+import os
+import sys
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.utils.context_gatherer import ContextGatherer, source_deadline  # noqa: E402
+
+
+def _slow(value, seconds):
+    time.sleep(seconds)
+    return value
+
+
+def _boom():
+    raise RuntimeError('drive unavailable')
+
+
+class TestContextGatherer(unittest.TestCase):
+    def setUp(self):
+        self.executor = ThreadPoolExecutor(max_workers=4)
+        self.context = ContextGatherer(executor=self.executor, label='Test')
+
+    def tearDown(self):
+        self.executor.shutdown(wait=True)
+
+    def test_sources_overlap(self):
+        started = time.monotonic()
+        self.context.start('web', _slow, 'team page', 0.3)
+        drive = self.context.fetch('drive', _slow, 'exam schedule', 0.3)
+        web = self.context.result('web')
+        elapsed = time.monotonic() - started
+        self.assertEqual((web, drive), ('team page', 'exam schedule'))
+        # Roughly the slowest source, not the sum
+        self.assertLess(elapsed, 0.55)
+        self.assertEqual({name: info['status'] for name, info in self.context.summary().items()},
+                         {'web': 'ok', 'drive': 'ok'})
+
+    def test_missed_deadline_returns_default(self):
+        self.context.start('web', _slow, 'late', 1.0, deadline=0.1)
+        started = time.monotonic()
+        self.assertEqual(self.context.result('web', default=''), '')
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertTrue(self.context.timed_out('web'))
+
+    def test_errors_give_default_or_reraise(self):
+        self.assertIsNone(self.context.fetch('admin', _boom))
+        self.assertEqual(self.context.summary()['admin']['status'], 'error')
+        with self.assertRaises(RuntimeError):
+            self.context.fetch('drive', _boom, reraise=True)
+
+    def test_unstarted_source_and_duplicate_start(self):
+        self.assertFalse(self.context.started('web'))
+        self.assertEqual(self.context.result('web', default='none'), 'none')
+        self.context.start('web', _slow, 'first', 0)
+        self.context.start('web', _slow, 'second', 0)
+        self.assertEqual(self.context.result('web'), 'first')
+
+    def test_abandoned_crawls_do_not_hold_other_sources(self):
+        # Earlier requests gave up on their crawls, which still fill the crawl pool
+        for _ in range(10):
+            abandoned = ContextGatherer(label='Test')
+            abandoned.start('web', _slow, 'crawl', 0.5, deadline=0.01)
+            abandoned.result('web')
+        context = ContextGatherer(label='Test')
+        context.start('web', lambda: threading.current_thread().name)
+        started = time.monotonic()
+        holidays = context.fetch('holidays', lambda: threading.current_thread().name)
+        self.assertLess(time.monotonic() - started, 0.3)
+        self.assertTrue(holidays.startswith('chat-context'))
+        self.assertTrue(context.result('web', default='').startswith('chat-crawl'))
+
+    def test_deadline_env_override(self):
+        os.environ['CHAT_CONTEXT_DEADLINE_WEB'] = '2.5'
+        try:
+            self.assertEqual(source_deadline('web'), 2.5)
+        finally:
+            del os.environ['CHAT_CONTEXT_DEADLINE_WEB']
+        self.assertEqual(source_deadline('unknown'), 8.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+"""Tests for the Drive / Sheets read-through cache (fake session and clock, no Google calls)."""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.drive_sheet_cache import DriveSheetCache  # noqa: E402
+
+TOKEN = {"access_token": "t", "user_email": "admin@prakriti.org.in"}
+
+
+class _Response:
+    def __init__(self, status_code, payload):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class _FakeDrive:
+    """files.get?fields=modifiedTime"""
+
+    def __init__(self):
+        self.modified = {"g7": "2026-10-01T10:00:00.000Z"}
+        self.calls = 0
+        self.fail = False
+
+    def get(self, url, headers=None, params=None, timeout=None):
+        self.calls += 1
+        if self.fail:
+            raise ConnectionError("drive unreachable")
+        file_id = url.rsplit("/", 1)[-1]
+        return _Response(200, {"modifiedTime": self.modified[file_id]})
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestDriveSheetCache(unittest.TestCase):
+    def setUp(self):
+        self.drive = _FakeDrive()
+        self.clock = _Clock()
+        self.cache = DriveSheetCache(session=self.drive, clock=self.clock, revalidate_after=60, max_age=3600)
+        self.loads = 0
+
+    def _load(self):
+        self.loads += 1
+        return [["Day", "Period 1"], ["Mon", f"Maths v{self.loads}"]]
+
+    def _read(self, tab="TT"):
+        return self.cache.read_through("g7", tab, TOKEN, self._load)
+
+    def test_repeated_reads_hit_memory(self):
+        first = self._read()
+        self.assertEqual(self._read(), first)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.drive.calls, 1)  # modifiedTime recorded on the first fetch only
+        self.assertEqual(self.cache.stats()["hits"], 1)
+
+    def test_revalidation_keeps_unchanged_entries(self):
+        self._read()
+        self.clock.now += 120
+        self._read()
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.drive.calls, 2)
+
+    def test_modified_file_is_refetched(self):
+        self._read()
+        self.drive.modified["g7"] = "2026-10-02T08:00:00.000Z"
+        self.clock.now += 120
+        self.assertEqual(self._read()[1][1], "Maths v2")
+        self.assertEqual(self.loads, 2)
+
+    def test_listing_supplies_modified_times(self):
+        self.cache.put_file_list([{"id": "g7", "name": "G7 InfoSheet", "modifiedTime": "2026-10-01T10:00:00.000Z"}])
+        self._read()
+        self.assertEqual(self.drive.calls, 0)
+        self.assertEqual(self.cache.get_file_list()[0]["id"], "g7")
+        self.clock.now += 301
+        self.assertIsNone(self.cache.get_file_list())
+
+    def test_drive_unreachable_serves_entry_until_max_age(self):
+        self._read()
+        self.drive.fail = True
+        self.clock.now += 120
+        self._read()
+        self.assertEqual(self.loads, 1)
+        self.clock.now += 3600
+        self._read()
+        self.assertEqual(self.loads, 2)
+
+    def test_failed_loads_are_not_cached_and_lru_is_bounded(self):
+        self.assertIsNone(self.cache.read_through("g7", "Missing", TOKEN, lambda: None))
+        cache = DriveSheetCache(max_entries=2, session=self.drive, clock=self.clock)
+        for tab in ("TT", "Diyas", "Exams"):
+            cache.read_through("g7", tab, TOKEN, self._load)
+        self.assertEqual(cache.stats()["entries"], 2)
+
+    def test_token_is_cached_until_shortly_before_expiry(self):
+        expires = datetime.fromtimestamp(self.clock.now, tz=timezone.utc) + timedelta(seconds=400)
+        self.cache.put_token({**TOKEN, "token_expires_at": expires.isoformat()})
+        self.assertIsNotNone(self.cache.get_token())
+        self.clock.now += 101
+        self.assertIsNone(self.cache.get_token())
+
+    def test_invalidate(self):
+        self._read()
+        self.cache.invalidate("g7")
+        self._read()
+        self.assertEqual(self.loads, 2)
+        self.cache.put_token(TOKEN)
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.get_token())
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Tests for GoogleDWDService's credential / service cache (fake credentials, no token endpoint)."""
+import os
+import sys
+import threading
+import unittest
+from datetime import datetime, timedelta, timezone
+
+import google.auth.credentials
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.google_dwd_service import GoogleDWDService  # noqa: E402
+
+
+class _FakeCredentials(google.auth.credentials.Credentials):
+    def __init__(self, lifetime=timedelta(hours=1), fail=False):
+        super().__init__()
+        self.lifetime = lifetime
+        self.fail = fail
+        self.refreshes = 0
+
+    def refresh(self, request):
+        if self.fail:
+            raise RuntimeError('unauthorized_client')
+        self.refreshes += 1
+        self.token = f'token-{self.refreshes}'
+        self.expiry = datetime.now(timezone.utc).replace(tzinfo=None) + self.lifetime
+
+
+class TestDWDServiceCache(unittest.TestCase):
+    def setUp(self):
+        self.dwd = GoogleDWDService()
+        self.created = []
+
+    def _make(self, lifetime=timedelta(hours=1), fail=False):
+        def make(user_email):
+            credentials = _FakeCredentials(lifetime, fail)
+            self.created.append(credentials)
+            return credentials
+        return make
+
+    def test_one_token_for_many_course_calls(self):
+        make = self._make()
+        first = self.dwd._cached_service('Teacher@prakriti.org.in', 'classroom', 'v1', make)
+        for _ in range(200):
+            service = self.dwd._cached_service('teacher@prakriti.org.in', 'classroom', 'v1', make)
+        self.assertIs(service, first)
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(self.created[0].refreshes, 1)
+        self.assertEqual(self.dwd.service_cache_stats()['tokens_minted'], 1)
+        self.assertIn('classroom/v1', self.dwd.service_cache_stats()['discovery_documents'])
+
+    def test_apis_and_users_are_cached_separately(self):
+        make = self._make()
+        self.dwd._cached_service('a@prakriti.org.in', 'classroom', 'v1', make)
+        self.dwd._cached_service('a@prakriti.org.in', 'calendar', 'v3', make)
+        self.dwd._cached_service('b@prakriti.org.in', 'classroom', 'v1', make)
+        self.assertEqual(len(self.created), 3)
+
+    def test_token_refreshed_near_expiry(self):
+        make = self._make(lifetime=timedelta(minutes=2))
+        self.dwd._cached_service('a@prakriti.org.in', 'calendar', 'v3', make)
+        self.dwd._cached_service('a@prakriti.org.in', 'calendar', 'v3', make)
+        # Inside the 5 minute margin: same credentials, refreshed again
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(self.created[0].refreshes, 2)
+
+    def test_threads_share_credentials_but_not_services(self):
+        make = self._make()
+        services = []
+
+        def worker():
+            services.append(self.dwd._cached_service('a@prakriti.org.in', 'classroom', 'v1', make))
+
+        threads = [threading.Thread(target=worker) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(len(self.created), 1)
+        self.assertEqual(self.created[0].refreshes, 1)
+        self.assertEqual(len({id(s) for s in services}), 4)
+
+    def test_failed_mint_is_not_cached_and_invalidate(self):
+        with self.assertRaises(RuntimeError):
+            self.dwd._cached_service('a@prakriti.org.in', 'classroom', 'v1', self._make(fail=True))
+        self.assertEqual(self.dwd.service_cache_stats()['credentials_cached'], 0)
+        make = self._make()
+        self.dwd._cached_service('a@prakriti.org.in', 'classroom', 'v1', make)
+        self.dwd.invalidate_service_cache('A@prakriti.org.in')
+        self.dwd._cached_service('a@prakriti.org.in', 'classroom', 'v1', make)
+        self.assertEqual(len(self.created), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Tests for the shared encoder's LRU cache and micro-batcher (fake model, no torch needed)."""
+import os
+import sys
+import threading
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.embedding_model import SharedEncoder  # noqa: E402
+
+
+class _FakeModel:
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        with self._lock:
+            self.calls.append(list(texts))
+        return [[float(len(t)), float(sum(map(ord, t)))] for t in texts]
+
+
+class TestSharedEncoder(unittest.TestCase):
+    def test_cache_skips_forward_pass(self):
+        model = _FakeModel()
+        encoder = SharedEncoder(model=model, batch_window_ms=0)
+        first = encoder.encode("  hello  ")
+        second = encoder.encode("hello")
+        self.assertEqual(first, second)
+        self.assertEqual(len(model.calls), 1)
+        self.assertEqual(encoder.stats()["cache_hits"], 1)
+
+    def test_concurrent_encodes_are_micro_batched(self):
+        model = _FakeModel()
+        encoder = SharedEncoder(model=model, batch_window_ms=200, max_batch_size=8)
+        barrier = threading.Barrier(8)
+        results = {}
+
+        def worker(i):
+            barrier.wait()
+            results[i] = encoder.encode(f"query {i}")
+
+        threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(sorted(results), list(range(8)))
+        self.assertLess(len(model.calls), 8)
+        self.assertEqual(sum(len(c) for c in model.calls), 8)
+        self.assertEqual(results[3], encoder.encode("query 3"))
+
+    def test_encode_batch_dedupes_and_preserves_order(self):
+        model = _FakeModel()
+        encoder = SharedEncoder(model=model)
+        vectors = encoder.encode_batch(["b", "a", "b"], use_cache=False)
+        self.assertEqual(vectors[0], vectors[2])
+        self.assertEqual(model.calls, [["b", "a"]])
+        self.assertEqual(encoder.stats()["cache_entries"], 0)
+
+    def test_lru_bound(self):
+        encoder = SharedEncoder(model=_FakeModel(), cache_size=2)
+        encoder.encode_batch(["a", "b", "c"])
+        self.assertEqual(encoder.stats()["cache_entries"], 2)
+
+    def test_errors_reach_the_caller(self):
+        class _Broken:
+            def encode(self, *args, **kwargs):
+                raise RuntimeError("boom")
+
+        encoder = SharedEncoder(model=_Broken(), batch_window_ms=0)
+        with self.assertRaises(RuntimeError):
+            encoder.encode("x")
+        with self.assertRaises(ValueError):
+            encoder.encode("   ")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,225 @@
+"""Tests for the bulk embedding pipeline (in-memory fake Supabase, stub encoder)."""
+import os
+import sys
+import tempfile
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.embedding_pipeline import (  # noqa: E402
+    HASH_COLUMN,
+    CheckpointStore,
+    EmbeddingPipeline,
+    EmbeddingRefreshQueue,
+    build_embedding_text,
+    source_hash,
+)
+from tests.fakes import FakeSupabase  # noqa: E402
+
+
+class _FakeSupabase(FakeSupabase):
+    def __init__(self, rows, has_rpc=True, has_hash_column=True):
+        super().__init__({'google_classroom_announcements': rows})
+        self.has_rpc = has_rpc
+        self.has_hash_column = has_hash_column
+        self.pages = 0
+        self.bulk_calls = 0
+        self.single_updates = 0
+        self.fail_after_pages = None
+        self.rpc_failures = 0
+        self.fail_update_ids = set()
+
+    def on_execute(self, query):
+        if query.action == 'update':
+            self.single_updates += 1
+            failing = {str(r['id']) for r in self.tables[query.table] if query.matches(r)} & self.fail_update_ids
+            if failing:
+                self.fail_update_ids -= failing
+                raise RuntimeError("statement timeout")
+            return
+        if not self.has_hash_column and HASH_COLUMN in [c.strip() for c in query.columns.split(',')]:
+            raise Exception(f"column {query.table}.{HASH_COLUMN} does not exist")
+        self.pages += 1
+        if self.fail_after_pages is not None and self.pages > self.fail_after_pages:
+            raise RuntimeError("connection dropped")
+
+    def handle_rpc(self, name, params):
+        if not self.has_rpc:
+            return super().handle_rpc(name, params)
+        if self.rpc_failures:
+            self.rpc_failures -= 1
+            raise Exception("canceling statement due to statement timeout")
+        self.bulk_calls += 1
+        by_id = {str(r['id']): r for r in self.tables[params['p_table']]}
+        for item in params['p_rows']:
+            by_id[item['id']][params['p_embedding_column']] = item['embedding']
+            if params['p_write_hash']:
+                by_id[item['id']][HASH_COLUMN] = item['source_hash']
+        return len(params['p_rows'])
+
+
+def _rows(n):
+    return [{'id': f"{i:04d}", 'text': f"announcement {i}" if i % 10 else '', 'embedding': None} for i in range(n)]
+
+
+class TestEmbeddingPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.checkpoint = os.path.join(self.tmp.name, 'checkpoint.json')
+        self.encoded = []
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _encode(self, texts):
+        self.encoded.append(len(texts))
+        return [[float(len(t))] for t in texts]
+
+    def _pipeline(self, db, **kwargs):
+        return EmbeddingPipeline(supabase=db, encode_batch=self._encode, batch_size=8, page_size=20,
+                                 checkpoint_path=self.checkpoint, **kwargs)
+
+    def test_pages_batches_and_bulk_writes(self):
+        db = _FakeSupabase(_rows(45))
+        stats = self._pipeline(db).run(['google_classroom_announcements'])['google_classroom_announcements']
+        self.assertEqual(stats['scanned'], 45)
+        self.assertEqual(stats['skipped_empty'], 5)
+        self.assertEqual(stats['embedded'], 40)
+        self.assertTrue(all(n <= 8 for n in self.encoded))
+        self.assertEqual(db.single_updates, 0)
+        self.assertFalse(os.path.exists(self.checkpoint))
+        row = db.tables['google_classroom_announcements'][1]
+        self.assertEqual(row[HASH_COLUMN], source_hash(build_embedding_text('google_classroom_announcements', row)))
+
+    def test_unchanged_rows_are_skipped(self):
+        db = _FakeSupabase(_rows(30))
+        self._pipeline(db).run(['google_classroom_announcements'])
+        db.tables['google_classroom_announcements'][3]['text'] = 'edited'
+        self.encoded.clear()
+        stats = self._pipeline(db).run(['google_classroom_announcements'])['google_classroom_announcements']
+        self.assertEqual(stats['embedded'], 1)
+        self.assertEqual(stats['skipped_unchanged'], 26)
+        self.assertEqual(sum(self.encoded), 1)
+
+    def test_interrupted_run_resumes_from_checkpoint(self):
+        db = _FakeSupabase(_rows(50))
+        db.fail_after_pages = 1
+        first = self._pipeline(db).run_table('google_classroom_announcements')
+        self.assertEqual(first['scanned'], 20)
+        self.assertTrue(os.path.exists(self.checkpoint))
+
+        db.fail_after_pages = None
+        db.pages = 0
+        self.encoded.clear()
+        second = self._pipeline(db).run_table('google_classroom_announcements')
+        self.assertEqual(second['resumed_after'], '0019')
+        self.assertEqual(second['scanned'], 30)  # counters cover this run only
+        self.assertEqual(sum(self.encoded), 27)  # rows 20..49 minus 3 empty
+
+    def test_checkpoints_are_per_mode_and_not_written_by_capped_runs(self):
+        db = _FakeSupabase(_rows(50))
+        db.fail_after_pages = 1
+        self._pipeline(db).run_table('google_classroom_announcements', only_missing=True)
+        db.fail_after_pages = None
+        # A full run must not continue the only_missing scan
+        full = self._pipeline(db).run_table('google_classroom_announcements')
+        self.assertIsNone(full['resumed_after'])
+        self.assertEqual(full['scanned'], 50)
+
+        os.remove(self.checkpoint)
+        capped = self._pipeline(db).run_table('google_classroom_announcements', force=True, limit=10)
+        self.assertEqual(capped['scanned'], 10)
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_failed_rows_are_retried_before_the_run_completes(self):
+        db = _FakeSupabase(_rows(50), has_rpc=False)
+        db.fail_update_ids = {'0003', '0031'}
+        first = self._pipeline(db).run_table('google_classroom_announcements')
+        self.assertEqual((first['errors'], first['failed_ids']), (2, 2))
+        self.assertIsNone(db.tables['google_classroom_announcements'][3]['embedding'])
+        self.assertFalse(CheckpointStore(self.checkpoint).get(
+            'google_classroom_announcements:embedding:all')['completed'])
+
+        self.encoded.clear()
+        second = self._pipeline(db).run_table('google_classroom_announcements')
+        self.assertEqual(second['resumed_after'], '0049')
+        self.assertEqual(second['embedded'], 2)
+        self.assertEqual(sum(self.encoded), 2)
+        self.assertIsNotNone(db.tables['google_classroom_announcements'][3]['embedding'])
+        self.assertTrue(CheckpointStore(self.checkpoint).get(
+            'google_classroom_announcements:embedding:all')['completed'])
+
+    def test_completed_markers_do_not_outlive_their_run(self):
+        key = 'google_classroom_announcements:embedding:all'
+        CheckpointStore(self.checkpoint).save(key, {'last_id': '0049', 'completed': True})
+        # No table is mid-scan, so this is a new run rather than a resume
+        stats = self._pipeline(_FakeSupabase(_rows(30))).run(['google_classroom_announcements'])
+        self.assertEqual(stats['google_classroom_announcements']['scanned'], 30)
+
+        CheckpointStore(self.checkpoint).save(key, {'last_id': '0019', 'completed': False})
+        self.assertEqual(CheckpointStore(self.checkpoint, ttl_seconds=-1).get(key), {})
+
+    def test_transient_rpc_error_keeps_bulk_writes_enabled(self):
+        db = _FakeSupabase(_rows(30))
+        db.rpc_failures = 1
+        pipeline = self._pipeline(db)
+        stats = pipeline.run(['google_classroom_announcements'])['google_classroom_announcements']
+        self.assertEqual(stats['embedded'], 27)
+        self.assertTrue(pipeline._bulk_rpc_available)
+        self.assertGreater(db.bulk_calls, 0)
+        self.assertEqual(db.single_updates, 8)  # only the failed batch went row by row
+
+    def test_falls_back_without_rpc_or_hash_column(self):
+        db = _FakeSupabase(_rows(12), has_rpc=False, has_hash_column=False)
+        stats = self._pipeline(db).run(['google_classroom_announcements'])['google_classroom_announcements']
+        self.assertEqual(stats['embedded'], 10)
+        self.assertEqual(db.single_updates, 10)
+        self.assertNotIn(HASH_COLUMN, db.tables['google_classroom_announcements'][1])
+
+
+class TestEmbeddingRefresh(unittest.TestCase):
+    def setUp(self):
+        self.encoded = []
+
+    def _encode(self, texts):
+        self.encoded.extend(texts)
+        return [[float(len(t))] for t in texts]
+
+    def _queue(self, db):
+        return EmbeddingRefreshQueue(EmbeddingPipeline(supabase=db, encode_batch=self._encode, checkpoint_path=None))
+
+    def test_only_changed_rows_are_reembedded(self):
+        db = _FakeSupabase(_rows(20))
+        queue = self._queue(db)
+        for i in range(1, 6):
+            queue.mark('google_classroom_announcements', f"{i:04d}")
+        first = queue.flush()['google_classroom_announcements']
+        self.assertEqual(first['embedded'], 5)
+        self.assertEqual(len(queue), 0)
+
+        # A later sync touches the same rows; only the edited one is re-encoded
+        db.tables['google_classroom_announcements'][2]['text'] = 'rescheduled'
+        self.encoded.clear()
+        for i in range(1, 6):
+            queue.mark('google_classroom_announcements', f"{i:04d}")
+        queue.mark('google_classroom_announcements', '0002')
+        second = queue.flush()['google_classroom_announcements']
+        self.assertEqual(self.encoded, ['rescheduled'])
+        self.assertEqual(second['skipped_unchanged'], 4)
+
+    def test_unknown_tables_and_flush_errors_are_ignored(self):
+        db = _FakeSupabase(_rows(3))
+        db.fail_after_pages = 0
+        queue = self._queue(db)
+        queue.mark('search_cache', 'x')
+        queue.mark('google_classroom_announcements', '0001')
+        self.assertEqual(len(queue), 1)
+        results = queue.flush()
+        self.assertEqual(results['google_classroom_announcements']['errors'], 1)
+        self.assertEqual(self.encoded, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+"""Tests for the two-tier (in-process + search_cache) enhanced response cache."""
+import os
+import sys
+import time
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+import app.services.enhanced_response_cache as enhanced_response_cache  # noqa: E402
+from app.services.enhanced_response_cache import EnhancedResponseCache  # noqa: E402
+
+
+class _MemoryStore:
+    """Stands in for the shared search_cache tier (another worker's view of the same rows)"""
+
+    def __init__(self):
+        self.rows = {}
+        self.deactivated = []
+
+    def get(self, intent, normalized):
+        return self.rows.get((intent, normalized))
+
+    def put(self, intent, normalized, response, ttl_seconds):
+        self.rows[(intent, normalized)] = response
+
+    def deactivate(self, intent=None):
+        self.deactivated.append(intent)
+        for key in [k for k in self.rows if intent is None or k[0] == intent]:
+            del self.rows[key]
+
+
+class _BrokenStore:
+    def get(self, *args):
+        raise ConnectionError('supabase down')
+
+    def put(self, *args):
+        raise ConnectionError('supabase down')
+
+    def deactivate(self, *args):
+        raise ConnectionError('supabase down')
+
+
+class TestEnhancedResponseCache(unittest.TestCase):
+    def setUp(self):
+        self.store = _MemoryStore()
+        self.cache = EnhancedResponseCache(l2=self.store, l1_max_entries=2, l1_ttl_seconds=60)
+        self.calls = 0
+
+    def _compute(self, text='Fees are listed on the admissions page.'):
+        def compute():
+            self.calls += 1
+            return text
+        return compute
+
+    def test_normalized_query_hits_l1(self):
+        self.cache.get_or_compute('general', 'What are the fees?', self._compute())
+        again = self.cache.get_or_compute('general', '  what are the FEES ', self._compute())
+        self.assertEqual(again, 'Fees are listed on the admissions page.')
+        self.assertEqual(self.calls, 1)
+        stats = self.cache.stats()
+        self.assertEqual((stats['l1']['hits'], stats['l1']['misses']), (1, 1))
+        self.assertEqual(stats['l1']['hit_rate'], 0.5)
+
+    def test_intent_is_part_of_the_key(self):
+        self.cache.get_or_compute('general', 'bharti batra', self._compute('a'))
+        self.assertEqual(self.cache.get_or_compute('team', 'bharti batra', self._compute('b')), 'b')
+
+    def test_l2_hit_from_another_worker_is_promoted(self):
+        self.cache.get_or_compute('general', 'what are the fees', self._compute())
+        other_worker = EnhancedResponseCache(l2=self.store)
+        self.assertEqual(other_worker.get('general', 'what are the fees'), 'Fees are listed on the admissions page.')
+        self.assertEqual(other_worker.get('general', 'what are the fees'), 'Fees are listed on the admissions page.')
+        stats = other_worker.stats()
+        self.assertEqual((stats['l1']['hits'], stats['l2']['hits'], stats['l2']['misses']), (1, 1, 0))
+        self.assertEqual(stats['hit_rate'], 1.0)
+
+    def test_lru_eviction_and_ttl_expiry(self):
+        cache = EnhancedResponseCache(l1_max_entries=2, l1_ttl_seconds=0.05)
+        for query in ('a', 'b', 'c'):
+            cache.put('general', query, query.upper())
+        self.assertIsNone(cache.get('general', 'a'))
+        self.assertEqual(cache.stats()['l1']['evictions'], 1)
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('general', 'c'))
+        self.assertEqual(cache.stats()['l1']['expirations'], 1)
+
+    def test_calendar_entries_use_the_short_ttl(self):
+        cache = EnhancedResponseCache(l1_ttl_seconds=600, calendar_ttl_seconds=0.05)
+        cache.put('calendar', 'events this week', 'Sports day on Friday')
+        cache.put('general', 'fees', 'See admissions')
+        time.sleep(0.06)
+        self.assertIsNone(cache.get('calendar', 'events this week'))
+        self.assertEqual(cache.get('general', 'fees'), 'See admissions')
+
+    def test_not_available_answers_are_not_cached(self):
+        not_available = enhanced_response_cache.NOT_AVAILABLE_PREFIX + "\n\nPlease check back later."
+        self.cache.get_or_compute('general', 'bus timings', self._compute(not_available))
+        self.cache.get_or_compute('general', 'bus timings', self._compute(not_available))
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.store.rows, {})
+
+    def test_article_not_found_and_error_answers_are_not_cached(self):
+        from app.utils.roots_article_resolver import not_found_message_for_title
+        for answer in (not_found_message_for_title('Seeds of Change'),
+                       "CALENDAR_DATA: Could not load the school calendar (timeout).", ""):
+            self.calls = 0
+            self.cache.get_or_compute('article', 'seeds of change', self._compute(answer))
+            self.cache.get_or_compute('article', 'seeds of change', self._compute(answer))
+            self.assertEqual(self.calls, 2)
+        self.assertEqual(self.store.rows, {})
+
+    def test_team_invalidation_only_drops_team_answers(self):
+        self.cache.put('team', 'who is the principal', 'Bharti Batra')
+        self.cache.put('general', 'fees', 'See admissions')
+        self.assertEqual(self.cache.invalidate('team'), 1)
+        self.assertIsNone(self.cache.get('team', 'who is the principal'))
+        self.assertEqual(self.cache.get('general', 'fees'), 'See admissions')
+        self.assertEqual(self.store.deactivated, ['team'])
+
+    def test_website_invalidation_drops_everything(self):
+        self.cache.put('team', 'who is the principal', 'Bharti Batra')
+        self.cache.put('general', 'fees', 'See admissions')
+        self.cache.invalidate()
+        self.assertIsNone(self.cache.get('general', 'fees'))
+        self.assertEqual(self.store.rows, {})
+        self.assertEqual(self.cache.stats()['invalidations'], 1)
+
+    def test_l2_failures_fall_back_to_l1_only(self):
+        cache = EnhancedResponseCache(l2=_BrokenStore())
+        self.assertEqual(cache.get_or_compute('general', 'fees', self._compute()), 'Fees are listed on the admissions page.')
+        self.assertEqual(cache.get_or_compute('general', 'fees', self._compute()), 'Fees are listed on the admissions page.')
+        cache.invalidate()
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(cache.stats()['l2']['errors'], 3)
+
+
+class TestAgentUsesCache(unittest.TestCase):
+    def setUp(self):
+        from app.agents.web_crawler_agent import WebCrawlerAgent
+        self.previous = enhanced_response_cache._enhanced_cache
+        self.store = _MemoryStore()
+        enhanced_response_cache._enhanced_cache = EnhancedResponseCache(l2=self.store)
+        self.agent = WebCrawlerAgent()
+        self.computed = []
+
+        def compute(query):
+            self.computed.append(query)
+            return f"answer for {query}"
+
+        self.agent._compute_enhanced_response = compute
+
+    def tearDown(self):
+        enhanced_response_cache._enhanced_cache = self.previous
+
+    def test_repeat_queries_skip_the_lookup_chain(self):
+        self.agent.get_enhanced_response('Who is the principal?')
+        self.agent.get_enhanced_response('who is the principal')
+        self.assertEqual(self.computed, ['Who is the principal?'])
+        self.assertEqual(self.agent.get_response_cache_stats()['l1']['hits'], 1)
+        self.assertIn(('team', 'who is the principal'), self.store.rows)
+
+    def test_team_sync_hook_forces_recompute(self):
+        self.agent.get_enhanced_response('who is the principal')
+        enhanced_response_cache.invalidate_enhanced_responses('team')
+        self.agent.get_enhanced_response('who is the principal')
+        self.assertEqual(len(self.computed), 2)
+
+    def test_intents(self):
+        self.assertEqual(self.agent._response_intent('holidays this month'), 'calendar')
+        self.assertEqual(self.agent._response_intent('tell me about the teachers'), 'team')
+        self.assertEqual(self.agent._response_intent('what is the school philosophy'), 'article')
+        self.assertEqual(self.agent._response_intent('what are the fees'), 'general')
+
+
+if __name__ == '__main__':
+    unittest.main()
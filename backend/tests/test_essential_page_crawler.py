@@ -0,0 +1,147 @@
+"""Tests for the conditional essential-page crawler (fake HTTP session, fake Supabase, no network)."""
+import os
+import sys
+import threading
+import time
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.essential_page_crawler import (  # noqa: E402
+    EssentialPageCrawler,
+    HostPoliteness,
+    build_page_row,
+)
+from tests.fakes import FakeSupabase  # noqa: E402
+
+
+class _Response:
+    def __init__(self, status_code, body=b'', headers=None):
+        self.status_code = status_code
+        self.content = body
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class _FakeSession:
+    """Serves pages[url] = (etag, body); honours If-None-Match"""
+
+    def __init__(self, pages, delay=0.0):
+        self.pages = pages
+        self.delay = delay
+        self.requests = []
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def get(self, url, headers=None, timeout=None):
+        with self._lock:
+            self.requests.append((url, dict(headers or {})))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            etag, body = self.pages[url]
+            if (headers or {}).get('If-None-Match') == etag:
+                return _Response(304)
+            return _Response(200, body, {'ETag': etag})
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class _FakeAgent:
+    def parse_page_html(self, url, html, query="", skip_link_following=False):
+        text = html.decode('utf-8')
+        return {'title': text.split('|')[0], 'description': '', 'main_content': text, 'headings': [], 'links': [], 'url': url}
+
+
+class _RecordingPipeline:
+    def __init__(self):
+        self.refreshed = []
+
+    def refresh_rows(self, table, ids, force=False):
+        self.refreshed.extend(ids)
+        return {'embedded': len(ids)}
+
+
+URLS = [f"https://prakriti.edu.in/page-{i}/" for i in range(6)]
+
+
+class TestEssentialPageCrawler(unittest.TestCase):
+    def setUp(self):
+        self.pages = {url: (f'"v1-{i}"', f"Page {i}|body {i}".encode()) for i, url in enumerate(URLS)}
+        self.session = _FakeSession(self.pages)
+        self.supabase = FakeSupabase({'web_crawler_data': []})
+        self.rows = self.supabase.tables['web_crawler_data']
+        self.pipeline = _RecordingPipeline()
+
+    def _crawler(self, **kwargs):
+        return EssentialPageCrawler(agent=_FakeAgent(), supabase=self.supabase, session=self.session,
+                                    embedding_pipeline=self.pipeline, min_interval=0.0, **kwargs)
+
+    def test_first_crawl_inserts_in_one_batch(self):
+        stats = self._crawler().crawl(URLS)
+        self.assertEqual(stats['new'], 6)
+        self.assertEqual(len(self.supabase.queries_for(action='insert')), 1)
+        self.assertEqual(len(self.pipeline.refreshed), 6)
+        self.assertEqual(self.rows[0]['http_etag'], '"v1-0"')
+
+    def test_unchanged_pages_cost_a_304_and_no_writes(self):
+        self._crawler().crawl(URLS)
+        self.supabase.queries.clear()
+        self.pipeline.refreshed.clear()
+        self.session.requests.clear()
+
+        # One page changes on the server
+        self.pages[URLS[2]] = ('"v2-2"', b"Page 2|new body")
+        stats = self._crawler().crawl(URLS)
+
+        self.assertEqual(stats['not_modified'], 5)
+        self.assertEqual(stats['changed'], 1)
+        self.assertTrue(all(h.get('If-None-Match') for _, h in self.session.requests))
+        self.assertEqual([q.action for q in self.supabase.queries], ['select', 'upsert', 'update'])
+        self.assertEqual(len(self.pipeline.refreshed), 1)
+        row = next(r for r in self.rows if r['url'] == URLS[2])
+        self.assertEqual(row['main_content'], 'Page 2|new body')
+
+    def test_same_content_with_new_etag_skips_content_write(self):
+        self._crawler().crawl(URLS[:1])
+        self.supabase.queries.clear()
+        self.pages[URLS[0]] = ('"rotated"', self.pages[URLS[0]][1])
+        stats = self._crawler().crawl(URLS[:1])
+        self.assertEqual(stats['unchanged'], 1)
+        self.assertEqual([q.action for q in self.supabase.queries], ['select', 'update'])
+        self.assertEqual(self.rows[0]['http_etag'], '"rotated"')
+        self.assertEqual(len(self.pipeline.refreshed), 1)  # only from the first crawl
+
+    def test_per_host_concurrency_is_bounded(self):
+        self.session.delay = 0.05
+        self._crawler(max_workers=6, max_per_host=2).crawl(URLS)
+        self.assertLessEqual(self.session.max_in_flight, 2)
+        self.assertEqual(self.session.max_in_flight, 2)
+
+    def test_politeness_interval_spaces_request_starts(self):
+        politeness = HostPoliteness(max_per_host=4, min_interval=0.05)
+        starts = []
+        for _ in range(3):
+            politeness.acquire('example.com')
+            starts.append(time.monotonic())
+            politeness.release('example.com')
+        self.assertGreaterEqual(starts[2] - starts[0], 0.09)
+
+    def test_build_page_row_is_deterministic(self):
+        content = {'title': 'B A', 'description': 'c', 'main_content': 'x' * 60000, 'links': [{}] * 80}
+        row = build_page_row('u', content, 'general')
+        self.assertEqual(row['query_keywords'], ['a', 'b', 'c'])
+        self.assertEqual(len(row['main_content']), 50000)
+        self.assertEqual(len(row['links']), 50)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""Tests for the compiled intent registry used by the early chatbot routing steps."""
+import os
+import random
+import re
+import sys
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.utils.intent_router import (  # noqa: E402
+    CANONICAL_INTENT_IDS,
+    INTENTS,
+    Intent,
+    IntentRouter,
+    classify_query,
+    get_intent_router,
+)
+
+
+def _linear(query):
+    q = query.lower()
+    return {
+        i.id for i in INTENTS
+        if any(p.lower() in q for p in i.phrases) or any(re.search(p, q) for p in i.patterns)
+    }
+
+
+class TestIntentRouter(unittest.TestCase):
+    def test_matches_linear_substring_scan(self):
+        words = [w for i in INTENTS for p in i.phrases for w in p.split()]
+        rng = random.Random(7)
+        for _ in range(500):
+            query = " ".join(rng.choice(words) for _ in range(rng.randint(1, 10)))
+            self.assertEqual(set(classify_query(query)), _linear(query), query)
+
+    def test_overlapping_prefix_phrases(self):
+        router = IntentRouter([Intent("a", phrases=("home",)), Intent("b", phrases=("homework help",))])
+        self.assertEqual(router.classify("Homework help please"), {"a", "b"})
+        self.assertEqual(router.classify("homework"), {"a"})
+
+    def test_patterns_use_word_boundaries(self):
+        self.assertIn("greeting", classify_query("Hi there"))
+        self.assertNotIn("greeting", classify_query("this is a thing"))
+        self.assertIn("holiday_embed", classify_query("When are the holidays?"))
+
+    def test_canonical_dispatch_order(self):
+        matched = classify_query("Tell me about Prakriti fees and the prakriti address")
+        self.assertEqual(get_intent_router().first_intent(matched, CANONICAL_INTENT_IDS), "school_type")
+        self.assertIsNone(get_intent_router().first_intent(classify_query("what is gravity"), CANONICAL_INTENT_IDS))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""Tests for step-generator pipelines on the sync and async paths (fake steps, no network)."""
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.core.chat_stream import ChatStream, bind_stream, current_stream  # noqa: E402
+from app.core.executor import shutdown_blocking_executor  # noqa: E402
+from app.core.io_steps import IoStep, SupabaseQuery, adrive_steps, drive_steps  # noqa: E402
+from tests.fakes import FakeSupabase  # noqa: E402
+
+
+class _Step(IoStep):
+    """Returns ``value`` (or raises it) after ``seconds``; records which thread ran it"""
+
+    def __init__(self, value, seconds=0.0):
+        self.value = value
+        self.seconds = seconds
+        self.thread = None
+
+    def _finish(self):
+        self.thread = threading.current_thread().name
+        if isinstance(self.value, Exception):
+            raise self.value
+        return self.value
+
+    def run(self):
+        time.sleep(self.seconds)
+        return self._finish()
+
+    async def arun(self):
+        await asyncio.sleep(self.seconds)
+        return self._finish()
+
+
+def _pipeline(log, first, second):
+    log.append(('start', threading.current_thread().name))
+    a = yield first
+    try:
+        b = yield second
+    except RuntimeError as e:
+        b = f'recovered: {e}'
+    log.append(('end', threading.current_thread().name))
+    return a, b
+
+
+class TestDriveSteps(unittest.TestCase):
+    def test_sync_driver_runs_steps_inline(self):
+        log = []
+        result = drive_steps(_pipeline(log, _Step('courses'), _Step(RuntimeError('timeout'))))
+        self.assertEqual(result, ('courses', 'recovered: timeout'))
+        self.assertEqual({thread for _, thread in log}, {threading.current_thread().name})
+
+    def test_unhandled_step_errors_propagate(self):
+        def pipeline():
+            yield _Step(ValueError('bad request'))
+            return 'unreachable'
+
+        with self.assertRaises(ValueError):
+            drive_steps(pipeline())
+        with self.assertRaises(ValueError):
+            asyncio.run(adrive_steps(pipeline()))
+
+    def test_supabase_query_runs_the_built_query(self):
+        supabase = FakeSupabase({'google_classroom_courses': [{'id': 1, 'user_id': 'u1'}, {'id': 2, 'user_id': 'u2'}]})
+        step = SupabaseQuery(lambda db: db.table('google_classroom_courses').select('id').eq('user_id', 'u2').limit(1))
+        self.assertEqual(step.build(supabase).execute().data, [{'id': 2, 'user_id': 'u2'}])
+
+
+class TestAsyncDriveSteps(unittest.TestCase):
+    def setUp(self):
+        shutdown_blocking_executor(wait=True)
+
+    def tearDown(self):
+        os.environ.pop('CHAT_BLOCKING_POOL_SIZE', None)
+        shutdown_blocking_executor(wait=True)
+
+    def test_code_runs_on_the_pool_and_steps_on_the_loop(self):
+        log = []
+        first, second = _Step('courses'), _Step(RuntimeError('timeout'))
+        result = asyncio.run(adrive_steps(_pipeline(log, first, second)))
+        self.assertEqual(result, ('courses', 'recovered: timeout'))
+        self.assertTrue(all(thread.startswith('chat-blocking') for _, thread in log))
+        self.assertEqual({first.thread, second.thread}, {threading.current_thread().name})
+
+    def test_waiting_steps_do_not_hold_pool_workers(self):
+        os.environ['CHAT_BLOCKING_POOL_SIZE'] = '1'
+
+        def pipeline(i):
+            answer = yield _Step(f'answer {i}', seconds=0.2)
+            return answer
+
+        async def chats():
+            return await asyncio.gather(*(adrive_steps(pipeline(i)) for i in range(5)))
+
+        started = time.monotonic()
+        self.assertEqual(asyncio.run(chats()), [f'answer {i}' for i in range(5)])
+        # One worker, five model waits: overlapped on the loop, not queued behind each other
+        self.assertLess(time.monotonic() - started, 0.6)
+
+    def test_contextvars_reach_the_pool(self):
+        def pipeline():
+            yield _Step(None)
+            return current_stream()
+
+        async def run():
+            stream = ChatStream(asyncio.get_running_loop(), asyncio.Queue())
+            with bind_stream(stream):
+                task = asyncio.ensure_future(adrive_steps(pipeline()))
+            return stream, await task
+
+        stream, seen = asyncio.run(run())
+        self.assertIs(seen, stream)
+
+
+if __name__ == '__main__':
+    unittest.main()
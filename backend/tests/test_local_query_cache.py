@@ -0,0 +1,116 @@
+"""Tests for the WAL-backed local query cache (temporary SQLite files, no Supabase)."""
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.local_query_cache import LocalQueryCache  # noqa: E402
+
+
+class TestLocalQueryCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'cache.db')
+        self.cache = LocalQueryCache(self.path, max_entries=3, flush_interval=60)
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp.cleanup()
+
+    def _row(self, query_hash):
+        conn = sqlite3.connect(self.path)
+        try:
+            return conn.execute('SELECT access_count FROM web_crawler_cache WHERE query_hash = ?',
+                                (query_hash,)).fetchone()
+        finally:
+            conn.close()
+
+    def test_round_trip_in_wal_mode(self):
+        self.cache.put('h1', 'fees', [{'title': 'Fees'}], 'admission')
+        self.assertEqual(self.cache.get('h1'), [{'title': 'Fees'}])
+        self.assertIsNone(self.cache.get('missing'))
+        stats = self.cache.stats()
+        self.assertEqual(stats['journal_mode'], 'wal')
+        self.assertEqual((stats['hits'], stats['misses']), (1, 1))
+
+    def test_hits_are_bumped_in_one_batch(self):
+        self.cache.put('h1', 'fees', [])
+        for _ in range(5):
+            self.cache.get('h1')
+        # Nothing written on the hit path yet
+        self.assertEqual(self._row('h1')[0], 0)
+        self.assertEqual(self.cache.flush(), 1)
+        self.assertEqual(self._row('h1')[0], 5)
+
+    def test_background_flusher_writes_bumps(self):
+        cache = LocalQueryCache(self.path, flush_interval=0.05)
+        try:
+            cache.put('h2', 'calendar', [])
+            cache.get('h2')
+            deadline = time.monotonic() + 2
+            while self._row('h2')[0] == 0 and time.monotonic() < deadline:
+                time.sleep(0.02)
+            self.assertEqual(self._row('h2')[0], 1)
+        finally:
+            cache.close()
+
+    def test_lru_eviction_keeps_recently_read_entries(self):
+        for i in range(3):
+            self.cache.put(f'h{i}', f'q{i}', [i])
+            time.sleep(0.002)
+        self.cache.get('h0')  # h0 becomes most recently used (pending bump)
+        self.cache.put('h3', 'q3', [3])
+        self.assertEqual(self.cache.stats()['total_entries'], 3)
+        self.assertIsNotNone(self.cache.get('h0'))
+        self.assertIsNone(self.cache.get('h1'))
+        self.assertEqual(self.cache.evicted, 1)
+
+    def test_expired_entries_are_misses_and_evicted(self):
+        cache = LocalQueryCache(self.path, ttl_hours=-1)
+        try:
+            cache.put('old', 'stale query', [1])
+            self.assertIsNone(cache.get('old'))
+            self.assertEqual(cache.stats()['total_entries'], 0)
+        finally:
+            cache.close()
+
+    def test_threads_get_their_own_connection(self):
+        self.cache.put('h1', 'fees', ['x'])
+        errors = []
+
+        def read():
+            try:
+                for _ in range(20):
+                    self.assertEqual(self.cache.get('h1'), ['x'])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(len(self.cache._connections), 5)
+        self.cache.flush()
+        self.assertEqual(self._row('h1')[0], 80)
+
+    def test_stats_report_latency_percentiles(self):
+        self.cache.put('h1', 'fees', [])
+        for _ in range(10):
+            self.cache.get('h1')
+        latency = self.cache.stats()['latency']
+        self.assertEqual(latency['get']['samples'], 10)
+        self.assertEqual(latency['put']['samples'], 1)
+        self.assertLessEqual(latency['get']['p50_ms'], latency['get']['p99_ms'])
+
+
+if __name__ == '__main__':
+    unittest.main()
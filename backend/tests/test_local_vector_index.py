@@ -0,0 +1,84 @@
+"""Tests for the in-process vector index (fake Supabase returning pgvector-style strings)."""
+import json
+import os
+import sys
+import unittest
+
+import numpy as np
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.local_vector_index import LocalVectorIndex  # noqa: E402
+from tests.fakes import FakeSupabase  # noqa: E402
+
+
+def _vec(*head):
+    v = np.zeros(384, dtype=np.float32)
+    v[:len(head)] = head
+    return v
+
+
+def _pg(v):
+    return json.dumps([float(x) for x in v])
+
+
+class TestLocalVectorIndex(unittest.TestCase):
+    def setUp(self):
+        self.pages = [
+            {'id': 'a', 'url': '/a', 'title': 'A', 'description': '', 'main_content': 'x', 'content_type': 'general',
+             'is_active': True, 'embedding': _pg(_vec(1, 0))},
+            {'id': 'b', 'url': '/b', 'title': 'B', 'description': '', 'main_content': 'y', 'content_type': 'general',
+             'is_active': True, 'embedding': _pg(_vec(1, 1))},
+            {'id': 'c', 'url': '/c', 'title': 'C', 'description': '', 'main_content': 'z', 'content_type': 'general',
+             'is_active': True, 'embedding': _pg(_vec(0, 1))},
+            {'id': 'd', 'url': '/d', 'title': 'D', 'description': '', 'main_content': '', 'content_type': 'general',
+             'is_active': False, 'embedding': _pg(_vec(1, 0))},
+            {'id': 'e', 'url': '/e', 'title': 'E', 'description': '', 'main_content': '', 'content_type': 'general',
+             'is_active': True, 'embedding': None},
+        ]
+        self.supabase = FakeSupabase({'web_crawler_data': self.pages})
+        self.index = LocalVectorIndex(supabase=self.supabase, page_size=2)
+        self.index.load(['match_web_content'])
+
+    def test_results_match_rpc_shape_and_order(self):
+        rows = self.index.search('match_web_content', _vec(1, 0.2).tolist(), limit=5, threshold=0.5)
+        self.assertEqual([r['id'] for r in rows], ['a', 'b'])
+        self.assertEqual(set(rows[0]), {'id', 'url', 'title', 'description', 'main_content', 'content_type', 'similarity'})
+        self.assertAlmostEqual(rows[0]['similarity'], 1 / np.sqrt(1.04), places=5)
+        self.assertGreater(rows[0]['similarity'], rows[1]['similarity'])
+
+    def test_limit_and_threshold_agree_with_brute_force(self):
+        rng = np.random.default_rng(0)
+        rows = [{'id': str(i), 'course_id': 'c', 'text': str(i), 'embedding': rng.standard_normal(384).tolist()}
+                for i in range(50)]
+        index = LocalVectorIndex(supabase=FakeSupabase({'google_classroom_announcements': rows}))
+        index.load(['match_announcements'])
+        query = rng.standard_normal(384)
+        result = index.search('match_announcements', query.tolist(), limit=4, threshold=0.0)
+
+        q = query / np.linalg.norm(query)
+        scored = sorted(((float(np.dot(r['embedding'], q) / np.linalg.norm(r['embedding'])), r['id']) for r in rows),
+                        reverse=True)
+        expected = [rid for score, rid in scored if score > 0.0][:4]
+        self.assertEqual([r['id'] for r in result], expected)
+
+    def test_unloaded_table_returns_none(self):
+        self.assertIsNone(self.index.search('match_team_members', _vec(1).tolist(), 5, 0.1))
+        self.assertEqual(self.index.search('match_web_content', _vec(1).tolist(), 5, 0.99)[0]['id'], 'a')
+
+    def test_refresh_updates_and_drops_rows(self):
+        self.pages[0]['embedding'] = _pg(_vec(0, 0, 1))
+        self.pages[1]['is_active'] = False
+        self.pages[4]['embedding'] = _pg(_vec(1, 0))
+        del self.pages[2]
+        self.index.refresh('web_crawler_data', ['a', 'b', 'c', 'e'])
+
+        rows = self.index.search('match_web_content', _vec(1, 0).tolist(), limit=5, threshold=0.1)
+        self.assertEqual([r['id'] for r in rows], ['e'])
+        self.assertEqual(self.index.stats()['tables']['match_web_content']['rows'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+"""Tests for the BM25 page index behind search_prakriti_content (fake Supabase, no network)."""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.page_search_index import PageSearchIndex, tokenize  # noqa: E402
+from tests.fakes import FakeSupabase  # noqa: E402
+
+
+def _ago(hours=0):
+    return (datetime.now(timezone.utc) - timedelta(hours=hours)).isoformat()
+
+
+def _page(pid, title='', description='', content='', content_type='general', crawled_hours_ago=1, keywords=None):
+    return {'id': pid, 'url': f'/{pid}/', 'title': title, 'description': description, 'main_content': content,
+            'content_type': content_type, 'query_keywords': keywords or [], 'is_active': True,
+            'crawled_at': _ago(crawled_hours_ago), 'updated_at': _ago(crawled_hours_ago)}
+
+
+class TestPageSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.rows = [
+            _page('fees', title='Fees', content='Annual tuition and transport charges.', content_type='admission'),
+            _page('blog', title='Blog', content='Our fees workshop covered many things. ' * 5),
+            _page('admissions', title='Admissions', description='Admission process and forms',
+                  content_type='admission'),
+            _page('old', title='Fees archive', crawled_hours_ago=48, content_type='admission'),
+        ]
+        self.supabase = FakeSupabase({'web_crawler_data': self.rows})
+        self.index = PageSearchIndex(supabase=self.supabase, refresh_seconds=3600)
+
+    def _urls(self, ranked):
+        return [page['url'] for page, _ in ranked]
+
+    def test_tokenize_folds_plurals_and_drops_stopwords(self):
+        self.assertEqual(tokenize('What are the school fees? Admissions & activities'),
+                         ['school', 'fee', 'admission', 'activity'])
+        self.assertEqual(tokenize(['Class', 'Fees']), ['class', 'fee'])
+
+    def test_title_match_outranks_body_repetition(self):
+        ranked = self.index.search('school fees')
+        self.assertEqual(self._urls(ranked)[:2], ['/fees/', '/blog/'])
+        self.assertGreater(ranked[0][1], ranked[1][1])
+
+    def test_content_type_and_age_filters(self):
+        self.assertEqual(self._urls(self.index.search('fees', content_types=['admission'])), ['/fees/'])
+        # Rows older than the index window are never loaded
+        self.assertNotIn('/old/', self._urls(self.index.search('fees', max_age=None)))
+        self.assertTrue(self.index.has_pages(['admission']))
+        self.assertFalse(self.index.has_pages(['calendar']))
+
+    def test_invalidate_rebuilds_on_next_search(self):
+        self.index.search('fees')
+        self.rows.append(_page('bus', title='Bus timings'))
+        self.assertEqual(self.index.search('bus timings'), [])
+
+        self.index.invalidate()
+        self.assertEqual(self._urls(self.index.search('bus timings')), ['/bus/'])
+        self.assertEqual(self.index.builds, 2)
+
+    def test_change_probe_only_rebuilds_when_rows_change(self):
+        self.index.refresh_seconds = 0
+        self.index.search('fees')
+        self.index.search('fees')
+        self.assertEqual(self.index.builds, 1)
+        self.assertEqual(self.supabase.queries[-1].columns, 'id, url, updated_at, crawled_at')
+
+        self.rows[0]['updated_at'] = _ago()
+        self.index.search('fees')
+        self.assertEqual(self.index.builds, 2)
+
+    def test_load_is_paged_and_keeps_the_newest_row_per_url(self):
+        self.rows.append(dict(_page('fees-yesterday', title='Fees old copy', crawled_hours_ago=20), url='/fees/'))
+        index = PageSearchIndex(supabase=self.supabase, refresh_seconds=3600, page_size=2)
+        index.search('fees')
+        self.assertEqual(index.stats()['pages'], 3)  # 48h-old page and the older /fees/ copy are dropped
+        self.assertEqual([q.range_ for q in self.supabase.queries][:3], [(0, 1), (2, 3), (4, 5)])
+        self.assertEqual(index.search('copy'), [])
+
+    def test_unloadable_index_returns_none(self):
+        class _Broken:
+            def table(self, name):
+                raise RuntimeError('down')
+
+        self.assertIsNone(PageSearchIndex(supabase=_Broken()).search('fees'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,148 @@
+"""Tests for the chatbot prompt token budget (no OpenAI calls)."""
+import os
+import sys
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.utils.prompt_budget import (  # noqa: E402
+    INTENT_PRIORITIES,
+    PromptBudget,
+    compact_history,
+    count_tokens,
+    message_tokens,
+    truncate_to_tokens,
+)
+
+
+def _turns(n, size=400):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"turn {i} " + "x" * size}
+        for i in range(n)
+    ]
+
+
+class TestTokenHelpers(unittest.TestCase):
+    def test_truncate_respects_limit_and_prefers_line_breaks(self):
+        text = "\n".join(f"Line {i}: " + "word " * 20 for i in range(40))
+        cut = truncate_to_tokens(text, 100)
+        self.assertLessEqual(count_tokens(cut), 100)
+        self.assertTrue(cut.endswith("..."))
+        self.assertTrue(cut[:-3].endswith("\n") or cut[:-3].rstrip().endswith("word"))
+        self.assertEqual(truncate_to_tokens("short", 100), "short")
+        self.assertEqual(truncate_to_tokens("anything", 0), "")
+
+    def test_compact_history_keeps_newest_and_condenses_older(self):
+        turns = _turns(10)
+        compacted = compact_history(turns, 500)
+        self.assertLessEqual(message_tokens(compacted), 500)
+        self.assertEqual(compacted[-1], turns[-1])
+        self.assertEqual(compacted[0]["role"], "system")
+        self.assertIn("Earlier in this conversation", compacted[0]["content"])
+
+    def test_compact_history_drops_everything_without_budget(self):
+        self.assertEqual(compact_history(_turns(4), 0), [])
+
+
+class TestPromptBudget(unittest.TestCase):
+    def test_everything_fits(self):
+        budget = PromptBudget(total_tokens=5000)
+        budget.require("system", "You are the school assistant.")
+        budget.add_text("web", "Web:\nThe school is in Greater Noida.\n")
+        budget.add_history("history", _turns(2, size=40))
+        result = budget.allocate(INTENT_PRIORITIES["general"])
+        self.assertEqual(len(result["history"]), 2)
+        self.assertEqual({info["action"] for info in budget.composition().values()}, {"kept"})
+
+    def test_priority_order_decides_who_is_compacted(self):
+        web = "Web:\n" + "The article says something useful. " * 200
+        history = _turns(8)
+
+        article = PromptBudget(total_tokens=2200)
+        article.require("system", "sys")
+        article.add_text("web", web)
+        article.add_history("history", history)
+        article.allocate(INTENT_PRIORITIES["article"])
+        self.assertEqual(article.composition()["web"]["action"], "kept")
+        self.assertNotEqual(article.composition()["history"]["action"], "kept")
+
+        data = PromptBudget(total_tokens=2200)
+        data.require("system", "sys")
+        data.add_text("web", web)
+        data.add_history("history", history)
+        data.allocate(INTENT_PRIORITIES["data"])
+        self.assertEqual(data.composition()["history"]["action"], "kept")
+        self.assertNotEqual(data.composition()["web"]["action"], "kept")
+        self.assertLessEqual(data.used_tokens, 2200)
+
+    def test_required_blocks_are_never_compacted(self):
+        data = '{"courses":[' + ",".join('{"title":"CE-%d"}' % i for i in range(500)) + "]}"
+        budget = PromptBudget(total_tokens=100)
+        budget.require("question+data", data)
+        budget.add_history("history", _turns(2))
+        result = budget.allocate(INTENT_PRIORITIES["data"])
+        self.assertEqual(result["question+data"], data)
+        self.assertEqual(result["history"], [])
+        self.assertEqual(budget.composition()["history"]["action"], "dropped")
+        budget.log_composition()
+
+    def test_history_is_condensed_not_dropped_when_data_fills_the_budget(self):
+        data = "Question: what about CE-4?\n\nData:\n" + "x" * 12000  # ~3000 tokens
+        for priorities in (INTENT_PRIORITIES["data"], INTENT_PRIORITIES["article"]):
+            budget = PromptBudget(total_tokens=2000)
+            budget.require("question+data", data)
+            budget.add_text("web", "Web:\n" + "The article says something useful. " * 100)
+            budget.add_history("history", _turns(8))
+            result = budget.allocate(priorities)
+            self.assertEqual(result["question+data"], data)
+            self.assertTrue(result["history"])
+            self.assertEqual(result["history"][-1], _turns(8)[-1])
+            self.assertLessEqual(message_tokens(result["history"]), budget.history_floor)
+            self.assertEqual(result["web"], "")
+
+    def test_source_sections_are_compacted_by_intent(self):
+        question = "Which CE-4 assignments are due?\n**Use only the Data rows below.**\n"
+        courses = "[" + ",\n".join('{"name":"Course %d","coursework":"%s"}' % (i, "x" * 200) for i in range(60)) + "]\n"
+        events = "".join(f"- **Event {i}**: October {i % 28 + 1}, 2026\n" for i in range(120))
+        text = question + "Data:\n" + courses + "\nEvents:\n" + events + "Provide a complete, helpful answer."
+        start = text.index("[")
+        spans = {
+            "classroom_data": (start, start + len(courses)),
+            "calendar_data": (text.index("- **Event 0"), text.index("Provide")),
+        }
+        for intent, kept, cut in (("data", "classroom_data", "calendar_data"),
+                                  ("calendar", "calendar_data", "classroom_data")):
+            budget = PromptBudget(total_tokens=4200)
+            budget.require_with_blocks("question", text, spans)
+            budget.add_history("history", _turns(2, size=40))
+            budget.allocate(INTENT_PRIORITIES[intent])
+            composition = budget.composition()
+            self.assertEqual(composition[kept]["action"], "kept")
+            self.assertNotEqual(composition[cut]["action"], "kept")
+            self.assertEqual(composition["history"]["action"], "kept")
+            self.assertLessEqual(budget.used_tokens, 4200)
+            assembled = budget.assemble("question")
+            self.assertTrue(assembled.startswith(question + "Data:\n["))
+            self.assertTrue(assembled.endswith("Provide a complete, helpful answer."))
+            self.assertIn("\nEvents:\n", assembled)
+
+    def test_assemble_without_cuts_returns_the_original_text(self):
+        text = "Question\nWeb:\nThe school is in Greater Noida.\nAnswer briefly."
+        budget = PromptBudget(total_tokens=5000)
+        budget.require_with_blocks("question", text, {"web": (9, text.index("Answer"))})
+        budget.allocate(INTENT_PRIORITIES["general"])
+        self.assertEqual(budget.assemble("question"), text)
+        self.assertEqual(budget.composition()["question"]["tokens"], count_tokens("Question\nAnswer briefly."))
+
+    def test_budget_from_env(self):
+        os.environ["CHAT_PROMPT_TOKEN_BUDGET"] = "1234"
+        try:
+            self.assertEqual(PromptBudget().total_tokens, 1234)
+        finally:
+            del os.environ["CHAT_PROMPT_TOKEN_BUDGET"]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+"""Tests for the canonical-intent semantic response cache (stub embeddings, no model download)."""
+import os
+import sys
+import time
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.semantic_response_cache import (  # noqa: E402
+    EMBEDDING_DIMENSION,
+    SemanticResponseCache,
+)
+
+
+def _vec(*hot):
+    v = [0.0] * EMBEDDING_DIMENSION
+    for i, w in hot:
+        v[i] = w
+    return v
+
+
+# Near-duplicate phrasings share a direction; an unrelated question points elsewhere
+_EMBEDDINGS = {
+    "what are the fees": _vec((0, 1.0), (1, 0.05)),
+    "what are the fees?": _vec((0, 1.0), (1, 0.06)),
+    "tell me the admission charges": _vec((5, 1.0)),
+}
+
+
+class TestSemanticResponseCache(unittest.TestCase):
+    def _cache(self, **kwargs):
+        return SemanticResponseCache(embed_fn=lambda q: _EMBEDDINGS.get(q.lower()), **kwargs)
+
+    def test_near_duplicate_hits_and_counters(self):
+        cache = self._cache()
+        calls = []
+        compute = lambda: calls.append(1) or "answer"
+        self.assertEqual(cache.get_or_compute("fees", "What are the fees", "parent", compute), "answer")
+        self.assertEqual(cache.get_or_compute("fees", "What are the fees?", "parent", compute), "answer")
+        self.assertEqual(len(calls), 1)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+
+    def test_key_includes_role_and_intent(self):
+        cache = self._cache()
+        cache.put("fees", "what are the fees", "parent", "parent answer")
+        self.assertIsNone(cache.get("fees", "what are the fees", "student"))
+        self.assertIsNone(cache.get("location", "what are the fees", "parent"))
+        self.assertIsNone(cache.get("fees", "tell me the admission charges", "parent"))
+
+    def test_ttl_expiry(self):
+        cache = self._cache(ttl_seconds=0.01)
+        cache.put("fees", "what are the fees", None, "answer")
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("fees", "what are the fees", None))
+        self.assertEqual(cache.stats()["expirations"], 1)
+
+    def test_lru_eviction(self):
+        cache = SemanticResponseCache(max_entries=2)  # no embed_fn: exact text buckets
+        cache.put("a", "one", None, 1)
+        cache.put("a", "two", None, 2)
+        self.assertEqual(cache.get("a", "One!", None), 1)  # refresh "one"
+        cache.put("a", "three", None, 3)
+        self.assertIsNone(cache.get("a", "two", None))
+        self.assertEqual(cache.get("a", "one", None), 1)
+        self.assertEqual(cache.stats()["evictions"], 1)
+
+    def test_cached_values_are_copies(self):
+        cache = SemanticResponseCache()
+        cache.put("location", "where", None, ["text", {"type": "map"}])
+        cache.get("location", "where", None)[1]["type"] = "mutated"
+        self.assertEqual(cache.get("location", "where", None)[1]["type"], "map")
+
+
+if __name__ == "__main__":
+    unittest.main()
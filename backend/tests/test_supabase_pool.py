@@ -0,0 +1,86 @@
+"""Tests for the pooled Supabase httpx transport metrics (local HTTP server, no Supabase)."""
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+import supabase_config  # noqa: E402
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"[]"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        time.sleep(1.0)  # a slow match_* RPC
+        self.do_GET()
+
+    def log_message(self, *args):
+        pass
+
+
+class TestMeteredTransport(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _OkHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_keepalive_reuses_one_connection_and_records_waits(self):
+        metrics = supabase_config._PoolMetrics()
+        transport = supabase_config._MeteredTransport(
+            metrics, limits=httpx.Limits(max_connections=4, max_keepalive_connections=4)
+        )
+        with httpx.Client(transport=transport, base_url=self.base_url) as client:
+            for _ in range(5):
+                self.assertEqual(client.get("/rest/v1/x").status_code, 200)
+            counts = supabase_config._connection_counts(transport._pool)
+
+        snap = metrics.snapshot()
+        self.assertEqual(snap["requests_total"], 5)
+        self.assertEqual(snap["in_flight"], 0)
+        self.assertEqual(snap["wait_samples"], 5)
+        self.assertEqual(counts["connections_total"], 1)
+        self.assertEqual(counts["connections_idle"], 1)
+
+    def test_timed_client_gives_up_after_its_read_timeout(self):
+        with mock.patch.object(supabase_config, "SUPABASE_URL", self.base_url), \
+                mock.patch.object(supabase_config, "SUPABASE_SERVICE_KEY", "service-key"), \
+                mock.patch.object(supabase_config, "_timed_service_clients", {}):
+            client = supabase_config.get_supabase_client_with_timeout(0.2)
+            self.assertIs(client, supabase_config.get_supabase_client_with_timeout(0.2))
+            started = time.monotonic()
+            with self.assertRaises(httpx.ReadTimeout):
+                client.rpc("match_web_content", {"match_count": 3}).execute()
+            self.assertLess(time.monotonic() - started, 0.9)
+
+    def test_snapshot_empty(self):
+        snap = supabase_config._PoolMetrics().snapshot()
+        self.assertEqual(snap["wait_ms_p95"], 0.0)
+        self.assertEqual(snap["requests_total"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Tests for the bulk upsert writer used by the DWD sync (fake Supabase client, no database)."""
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from app.services.sync_bulk_writer import BulkUpsertWriter, TABLE_KEYS  # noqa: E402
+from tests.fakes import FakeSupabase  # noqa: E402
+
+OLD = (datetime.now(timezone.utc) - timedelta(days=30)).isoformat()
+
+
+class _FakeSupabase(FakeSupabase):
+    def __init__(self):
+        super().__init__()
+        self.reject_upsert = set()
+
+    @property
+    def upserts(self):
+        return [(q.table, len(q.payload), q.on_conflict) for q in self.queries_for(action='upsert')]
+
+    def on_execute(self, query):
+        if query.action == 'upsert' and query.table in self.reject_upsert:
+            raise RuntimeError('there is no unique or exclusion constraint matching the ON CONFLICT')
+
+    def insert_row(self, table, row):
+        return super().insert_row(table, {**row, 'created_at': datetime.now(timezone.utc).isoformat()})
+
+    def seed(self, table, row):
+        self.tables.setdefault(table, []).append({**row, 'id': self.new_id(table), 'created_at': OLD})
+
+    def row(self, table, key):
+        return next(r for r in self.tables[table] if tuple(r.get(c) for c in TABLE_KEYS[table]) == key)
+
+
+class _Queue:
+    def __init__(self):
+        self.marked = []
+
+    def mark(self, table, row_id):
+        self.marked.append((table, row_id))
+
+
+def _course(course_id, name='Maths'):
+    return {'user_id': 'u1', 'course_id': course_id, 'name': name}
+
+
+class TestBulkUpsertWriter(unittest.TestCase):
+    def setUp(self):
+        self.db = _FakeSupabase()
+        self.stats = {}
+        self.queue = _Queue()
+        self.writer = BulkUpsertWriter(self.db, batch_size=50, embedding_queue=self.queue, stats=self.stats)
+
+    def test_rows_are_written_in_chunks_on_the_natural_key(self):
+        for i in range(120):
+            self.writer.add('google_classroom_courses', _course(f"c{i}"))
+        self.assertEqual(self.writer.pending(), 20)  # two full chunks already flushed
+        self.writer.flush()
+        self.assertEqual([n for _, n, _ in self.db.upserts], [50, 50, 20])
+        self.assertEqual(self.db.upserts[0][2], 'user_id,course_id')
+        self.assertEqual(self.writer.round_trips, 3)
+        self.assertEqual(self.writer.pending(), 0)
+
+    def test_duplicate_keys_are_collapsed_to_the_last_row(self):
+        self.writer.add('google_classroom_courses', _course('c1', 'Old name'))
+        self.writer.add('google_classroom_courses', _course('c1', 'New name'))
+        self.writer.flush()
+        self.assertEqual(self.db.upserts, [('google_classroom_courses', 1, 'user_id,course_id')])
+        self.assertEqual(self.db.row('google_classroom_courses', ('u1', 'c1'))['name'], 'New name')
+
+    def test_created_and_updated_counts_and_embedding_marks(self):
+        self.db.seed('google_classroom_courses', _course('c1'))
+        self.writer.add('google_classroom_courses', _course('c1'))
+        self.writer.add('google_classroom_courses', _course('c2'))
+        self.writer.flush()
+        self.assertEqual(self.stats['courses'], {'created': 1, 'updated': 1})
+        self.assertEqual(len(self.queue.marked), 2)
+        self.assertTrue(all(table == 'google_classroom_courses' for table, _ in self.queue.marked))
+
+    def test_ids_are_mapped_for_child_rows(self):
+        self.writer.add('google_classroom_courses', _course('c1'))
+        self.writer.flush('google_classroom_courses')
+        course_db_id = self.writer.id_for('google_classroom_courses', 'u1', 'c1')
+        self.assertIsNotNone(course_db_id)
+        self.writer.add('google_classroom_coursework', {'course_id': course_db_id, 'coursework_id': 'cw1'})
+        self.writer.flush()
+        self.assertIsNotNone(self.writer.id_for('google_classroom_coursework', course_db_id, 'cw1'))
+        self.assertIsNone(self.writer.id_for('google_classroom_coursework', course_db_id, 'missing'))
+        self.assertEqual(len(self.writer.ids('google_classroom_courses')), 1)
+
+    def test_failed_upsert_falls_back_to_row_writes(self):
+        self.db.reject_upsert.add('google_classroom_students')
+        self.db.seed('google_classroom_students', {'course_id': 7, 'course_user_id': 'c1_s1'})
+        self.writer.add('google_classroom_students', {'course_id': 7, 'course_user_id': 'c1_s1'})
+        self.writer.add('google_classroom_students', {'course_id': 7, 'course_user_id': 'c1_s2'})
+        self.writer.flush()
+        self.assertEqual(self.stats['students'], {'created': 1, 'updated': 1})
+        self.assertEqual(self.writer.fallback_rows, 2)
+        self.assertIsNotNone(self.writer.id_for('google_classroom_students', 7, 'c1_s2'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+"""Tests for VectorSearchService.search_all fan-out (fake RPC client; needs sentence-transformers installed)."""
+import importlib.util
+import os
+import sys
+import threading
+import time
+import unittest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BACKEND not in sys.path:
+    sys.path.insert(0, BACKEND)
+
+from tests.fakes import FakeSupabase  # noqa: E402
+
+HAS_SENTENCE_TRANSFORMERS = importlib.util.find_spec("sentence_transformers") is not None
+
+
+class _FakeSupabase(FakeSupabase):
+    def __init__(self, delays=None):
+        super().__init__()
+        self.delays = delays or {}
+        self.threads = set()
+
+    def handle_rpc(self, name, params):
+        with self._lock:
+            self.threads.add(threading.current_thread().name)
+        time.sleep(self.delays.get(name, 0.0))
+        return [{"rpc": name}]
+
+
+class _FakeEncoder:
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text):
+        self.calls += 1
+        return [0.0] * 384
+
+
+@unittest.skipUnless(HAS_SENTENCE_TRANSFORMERS, "sentence-transformers not installed")
+class TestSearchAllFanout(unittest.TestCase):
+    def _service(self, supabase):
+        from app.services.vector_search_service import VectorSearchService
+
+        service = VectorSearchService.__new__(VectorSearchService)
+        service.supabase = supabase
+        service.rpc_client = supabase
+        service.encoder = _FakeEncoder()
+        service.embedding_dimension = 384
+        return service
+
+    def test_embeds_once_and_runs_rpcs_concurrently(self):
+        supabase = _FakeSupabase({name: 0.2 for name in (
+            "match_web_content", "match_team_members", "match_coursework", "match_announcements")})
+        service = self._service(supabase)
+        started = time.monotonic()
+        results = service.search_all("admissions", timeout_per_table=2.0)
+        self.assertLess(time.monotonic() - started, 0.6)
+        self.assertEqual(service.encoder.calls, 1)
+        self.assertEqual(results["coursework"], [{"rpc": "match_coursework"}])
+        self.assertGreater(len(supabase.threads), 1)
+
+    def test_slow_table_degrades_to_empty(self):
+        service = self._service(_FakeSupabase({"match_web_content": 1.0}))
+        started = time.monotonic()
+        results = service.search_all("admissions", timeout_per_table=2.0, table_timeouts={"web_content": 0.1})
+        self.assertLess(time.monotonic() - started, 0.8)
+        self.assertEqual(results["web_content"], [])
+        self.assertEqual(results["team_members"], [{"rpc": "match_team_members"}])
+
+
+if __name__ == "__main__":
+    unittest.main()